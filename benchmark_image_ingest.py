@@ -0,0 +1,126 @@
+"""
+benchmark_image_ingest.py
+Developed by Charlie Becquet.
+Measure what image working copies (see image_ingest.py) would save on an existing database.
+
+Reads every image stored in the images table and inside the stored .vap3
+files, produces its working copy in memory with the given settings and
+reports stored size, transcode time and decode time before and after. The
+database is opened read-only and nothing is written.
+
+Usage:
+    python benchmark_image_ingest.py
+    python benchmark_image_ingest.py --db "path/to/dataviewer.db" --max-dimension 1600 --quality 80
+"""
+
+import argparse
+import io
+import os
+import time
+import zipfile
+
+from PIL import Image
+
+from database_manager import get_database_path, open_database_connection
+from image_ingest import INGEST_FORMAT, INGEST_MAX_DIMENSION, INGEST_MIN_BYTES, INGEST_QUALITY, transcode_image
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+
+
+def iter_stored_images(conn, limit=None):
+    """Yield (source label, image bytes) for images in the images table and in stored .vap3 files."""
+    count = 0
+    for image_id, image_data in conn.execute("SELECT id, image_data FROM images"):
+        if image_data:
+            yield 'images table', bytes(image_data)
+            count += 1
+            if limit and count >= limit:
+                return
+
+    for file_id, file_content in conn.execute("SELECT id, file_content FROM files"):
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(file_content))
+        except (zipfile.BadZipFile, TypeError):
+            continue
+        with archive:
+            for name in archive.namelist():
+                if name.startswith(('images/', 'sample_images/')) and name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield 'vap3 files', archive.read(name)
+                    count += 1
+                    if limit and count >= limit:
+                        return
+
+
+def decode_seconds(data):
+    """Time a full decode of encoded image bytes."""
+    started = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+    return time.perf_counter() - started
+
+
+def measure(images, max_dimension, image_format, quality, min_bytes):
+    """Return per-source totals for the working copies of the images."""
+    totals = {}
+    for source, data in images:
+        row = totals.setdefault(source, {'count': 0, 'changed': 0, 'before': 0, 'after': 0,
+                                         'transcode_s': 0.0, 'decode_before_s': 0.0, 'decode_after_s': 0.0})
+        row['count'] += 1
+        row['before'] += len(data)
+        try:
+            before_s = decode_seconds(data)
+            started = time.perf_counter()
+            working, _ = transcode_image(data, max_dimension, image_format, quality, min_bytes)
+            row['transcode_s'] += time.perf_counter() - started
+        except Exception as e:
+            print(f"Skipping unreadable image from {source}: {e}")
+            row['after'] += len(data)
+            continue
+
+        row['decode_before_s'] += before_s
+        if working is None:
+            row['after'] += len(data)
+            row['decode_after_s'] += before_s
+        else:
+            row['changed'] += 1
+            row['after'] += len(working)
+            row['decode_after_s'] += decode_seconds(working)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure image working copy savings on a database")
+    parser.add_argument('--db', help="Database file; the configured database if omitted")
+    parser.add_argument('--max-dimension', type=int, default=INGEST_MAX_DIMENSION)
+    parser.add_argument('--format', default=INGEST_FORMAT, choices=['JPEG', 'WEBP'])
+    parser.add_argument('--quality', type=int, default=INGEST_QUALITY)
+    parser.add_argument('--min-bytes', type=int, default=INGEST_MIN_BYTES)
+    parser.add_argument('--limit', type=int, help="Stop after this many images")
+    args = parser.parse_args()
+
+    db_path = args.db or get_database_path()
+    if not db_path or not os.path.exists(db_path):
+        parser.error(f"Database not found: {db_path}")
+
+    conn = open_database_connection(db_path, read_only=True)
+    try:
+        totals = measure(iter_stored_images(conn, args.limit), args.max_dimension,
+                         args.format, args.quality, args.min_bytes)
+    finally:
+        conn.close()
+
+    print(f"\n{db_path}")
+    print(f"settings: max {args.max_dimension}px, {args.format} q{args.quality}, keep below {args.min_bytes} bytes")
+    print(f"{'source':<14} {'images':>6} {'changed':>7} {'before MB':>10} {'after MB':>9} {'saved':>6} "
+          f"{'transcode s':>11} {'decode s':>9} {'-> s':>7}")
+    for source, row in totals.items():
+        saved = 1 - row['after'] / row['before'] if row['before'] else 0.0
+        print(f"{source:<14} {row['count']:>6} {row['changed']:>7} {row['before'] / 1e6:>10.2f} "
+              f"{row['after'] / 1e6:>9.2f} {saved:>6.0%} {row['transcode_s']:>11.2f} "
+              f"{row['decode_before_s']:>9.2f} {row['decode_after_s']:>7.2f}")
+    if not totals:
+        print("No images found")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+benchmark_vap3.py
+Developed by Charlie Becquet.
+Compare VAP3 compression policies by save time, load time and archive size.
+
+Builds a synthetic archive resembling a typical test file (numeric sheets
+plus photos and plot images) or re-saves existing .vap3 files, then saves
+and loads it once per policy, serially and with parallel member encoding.
+
+Usage:
+    python benchmark_vap3.py
+    python benchmark_vap3.py --archive "path/to/file.vap3" --repeat 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from vap_file_manager import (VapFileManager, COMPRESSION_POLICIES, VAP3_COMPRESSION_WORKERS)
+
+
+def build_synthetic_input(work_dir, sheets=8, rows=4000, photos=12, plots=6):
+    """Create sheets and image files resembling a test workbook with sample photos."""
+    rng = np.random.default_rng(0)
+    filtered_sheets = {}
+    for index in range(sheets):
+        puffs = np.arange(1, rows + 1)
+        frame = pd.DataFrame({
+            'Puffs': puffs,
+            'Before weight/g': np.round(rng.normal(30.0, 0.5, rows), 4),
+            'After weight/g': np.round(rng.normal(29.9, 0.5, rows), 4),
+            'Draw pressure (kPa)': np.round(rng.normal(2.1, 0.2, rows), 3),
+            'Resistance (Ohm)': np.round(rng.normal(1.2, 0.05, rows), 3),
+            'Voltage, Power': np.round(rng.normal(3.7, 0.1, rows), 2),
+            'TPM (mg/puff)': np.round(rng.normal(4.5, 0.8, rows), 3),
+            'Notes': rng.choice(['', 'ok', 'clog', 'leak', 'retest'], rows),
+        })
+        filtered_sheets[f'Test {index + 1}'] = {'data': frame, 'is_empty': False}
+
+    image_paths = []
+    for index in range(photos):
+        # Smooth gradient plus noise compresses like a real photo
+        base = np.linspace(0, 255, 1600, dtype=np.float32)
+        pixels = (base[None, :, None] * 0.6 + rng.normal(80, 25, (1200, 1600, 3))).clip(0, 255)
+        path = os.path.join(work_dir, f'photo_{index}.jpg')
+        Image.fromarray(pixels.astype(np.uint8)).save(path, quality=90)
+        image_paths.append(path)
+    for index in range(plots):
+        pixels = np.full((600, 800, 3), 255, dtype=np.uint8)
+        pixels[::40, :, :] = 200
+        pixels[300 + (np.sin(np.arange(800) / 40) * 200).astype(int), np.arange(800)] = (30, 80, 200)
+        path = os.path.join(work_dir, f'plot_{index}.png')
+        Image.fromarray(pixels).save(path)
+        image_paths.append(path)
+
+    sheet_names = list(filtered_sheets)
+    sheet_images = {'benchmark.xlsx': {sheet_names[i % len(sheet_names)]: [] for i in range(len(image_paths))}}
+    for i, path in enumerate(image_paths):
+        sheet_images['benchmark.xlsx'][sheet_names[i % len(sheet_names)]].append(path)
+    return {'filtered_sheets': filtered_sheets, 'sheet_images': sheet_images,
+            'plot_options': ['TPM'], 'image_crop_states': {}}
+
+
+def load_existing_input(manager, archive_path):
+    """Load a .vap3 file so it can be re-saved under each policy."""
+    data = manager.load_from_vap3(archive_path)
+    return {'filtered_sheets': data['filtered_sheets'], 'sheet_images': data['sheet_images'],
+            'plot_options': data['plot_options'], 'image_crop_states': data['image_crop_states'],
+            'plot_settings': data['plot_settings'], 'sample_images': data['sample_images'],
+            'sample_image_crop_states': data['sample_image_crop_states']}
+
+
+def run_case(manager, inputs, policy, workers, out_path, repeat):
+    """Save and load once per repeat; return median save/load seconds and size."""
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ok = manager.save_to_vap3(out_path, inputs['filtered_sheets'], inputs['sheet_images'],
+                                  inputs['plot_options'], inputs.get('image_crop_states'),
+                                  inputs.get('plot_settings'), inputs.get('sample_images'),
+                                  inputs.get('sample_image_crop_states'),
+                                  compression_policy=policy, compression_workers=workers)
+        save_times.append(time.perf_counter() - started)
+        if not ok:
+            raise RuntimeError(f"Save failed for policy {policy}")
+
+        loader = VapFileManager()
+        started = time.perf_counter()
+        loader.load_from_vap3(out_path)
+        load_times.append(time.perf_counter() - started)
+        loader.cleanup_temp_files()
+    return statistics.median(save_times), statistics.median(load_times), os.path.getsize(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VAP3 compression policies")
+    parser.add_argument('--archive', action='append', default=[],
+                        help="Existing .vap3 file to re-save (repeatable); synthetic data if omitted")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (median is reported)")
+    parser.add_argument('--workers', type=int, default=VAP3_COMPRESSION_WORKERS,
+                        help="Threads for the parallel runs")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='vap3_bench_')
+    manager = VapFileManager()
+    try:
+        if args.archive:
+            datasets = [(os.path.basename(path), load_existing_input(manager, path)) for path in args.archive]
+        else:
+            datasets = [('synthetic', build_synthetic_input(work_dir))]
+
+        for label, inputs in datasets:
+            print(f"\n{label}")
+            print(f"{'policy':<10} {'workers':>7} {'save s':>8} {'load s':>8} {'size MB':>9}")
+            for policy in COMPRESSION_POLICIES:
+                for workers in sorted({1, args.workers}):
+                    out_path = os.path.join(work_dir, f'{policy}_{workers}.vap3')
+                    save_s, load_s, size = run_case(manager, inputs, policy, workers, out_path, args.repeat)
+                    print(f"{policy:<10} {workers:>7} {save_s:>8.3f} {load_s:>8.3f} {size / 1e6:>9.2f}")
+    finally:
+        manager.cleanup_temp_files()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
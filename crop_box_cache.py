@@ -0,0 +1,116 @@
+"""
+crop_box_cache.py
+Developed by Charlie Becquet.
+Persistent cache of auto-crop boxes for the DataViewer application.
+
+Finding the crop box of a sample image takes an OpenCV edge/contour pass or a
+round trip to the Claude API, and used to be repeated for every image in
+every session. Boxes are stored in ~/.DataViewer/crop_boxes.json keyed by the
+SHA-256 of the image file, the crop method and that method's algorithm
+version, so cropping an image seen before is a dictionary lookup. Bump the
+method's version in CROP_ALGORITHM_VERSIONS when its results change; cropped
+thumbnails are keyed by crop_method_key, so they are rebuilt as well.
+"""
+
+import os
+import json
+import threading
+from utils import debug_print, file_content_hash
+
+CROP_CACHE_VERSION = 1
+CROP_CACHE_LIMIT = 2000  # entries kept in the persisted cache
+CROP_ALGORITHM_VERSIONS = {
+    "claude": 1,
+    "fallback": 1,
+}
+
+_crop_cache = None  # key -> [left, top, right, bottom]
+_crop_cache_lock = threading.Lock()
+
+
+def get_crop_cache_path():
+    """Return the path of the persisted crop box cache."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "crop_boxes.json")
+
+
+def crop_method_key(method):
+    """Return the name of a crop method at its current algorithm version (e.g. "claude_v1")."""
+    return f"{method}_v{CROP_ALGORITHM_VERSIONS.get(method, 1)}"
+
+
+def _cache_key(content_hash, method):
+    return f"{content_hash}|{method}|v{CROP_ALGORITHM_VERSIONS.get(method, 1)}"
+
+
+def _load_crop_cache():
+    global _crop_cache
+    if _crop_cache is None:
+        _crop_cache = {}
+        try:
+            with open(get_crop_cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CROP_CACHE_VERSION:
+                _crop_cache = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+    return _crop_cache
+
+
+def _save_crop_cache():
+    entries = _crop_cache
+    if len(entries) > CROP_CACHE_LIMIT:
+        for key in list(entries)[:len(entries) - CROP_CACHE_LIMIT]:
+            del entries[key]
+    path = get_crop_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CROP_CACHE_VERSION, 'entries': entries}, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        debug_print(f"DEBUG: Could not save crop box cache: {e}")
+
+
+def get_cached_crop_box(img_path, method):
+    """
+    Return the cached crop box of an image for a crop method, or None.
+
+    Args:
+        img_path (str): Image file
+        method (str): Crop method ("claude", "fallback" or a stand-in's name)
+
+    Returns:
+        tuple or None: (left, top, right, bottom) in original image pixels
+    """
+    try:
+        key = _cache_key(file_content_hash(img_path), method)
+    except OSError:
+        return None
+    with _crop_cache_lock:
+        box = _load_crop_cache().get(key)
+    if box is None:
+        return None
+    debug_print(f"DEBUG: Crop box cache hit for {os.path.basename(img_path)} ({method}): {box}")
+    return tuple(box)
+
+
+def store_crop_box(img_path, method, box):
+    """
+    Cache the crop box computed for an image's current contents.
+
+    Args:
+        img_path (str): Image file
+        method (str): Crop method that produced the box
+        box (tuple): (left, top, right, bottom) in original image pixels
+    """
+    try:
+        key = _cache_key(file_content_hash(img_path), method)
+    except OSError as e:
+        debug_print(f"DEBUG: Not caching crop box for {img_path}: {e}")
+        return
+    with _crop_cache_lock:
+        entries = _load_crop_cache()
+        entries.pop(key, None)  # re-insert so the entry counts as most recent
+        entries[key] = [int(value) for value in box]
+        _save_crop_cache()
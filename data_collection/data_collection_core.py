@@ -123,6 +123,7 @@ class DataCollectionWindow(DataCollectionUI, DataCollectionHandlers, DataCollect
         self.setup_styles()
 
         # Initialize data structures
+        self._sample_stores = {}  # sample_id -> (source lists, SampleColumnStore), see get_sample_store
         self.initialize_data()
 
         # Create the menu bar first
@@ -141,6 +142,9 @@ class DataCollectionWindow(DataCollectionUI, DataCollectionHandlers, DataCollect
         # Set up event handlers
         self.setup_event_handlers()
 
+        # Open the edit journal (recovering edits from an unsaved session)
+        self.init_edit_journal()
+
         # Start auto-save timer
         self.start_auto_save_timer()
 
@@ -12,6 +12,11 @@ import copy
 import time
 import statistics
 from utils import debug_print
+from .data_collection_store import SampleColumnStore, TPM_INPUT_COLUMNS
+
+# Delay before the stats panel and TPM plot refresh after an edit; further
+# edits within this window restart it
+STATS_REFRESH_DELAY_MS = 150
 
 class DataCollectionData:
 
@@ -301,7 +306,7 @@ class DataCollectionData:
             self.update_tpm_in_sheet(sheet, sample_id)
 
             # Update stats panel
-            self.window.after(100, self.update_stats_panel)
+            self.schedule_stats_refresh()
 
             # Mark as changed
             self.mark_unsaved_changes()
@@ -312,6 +317,192 @@ class DataCollectionData:
         except Exception as e:
             debug_print(f"DEBUG: Error processing sheet changes: {e}")
 
+    def get_sample_store(self, sample_id):
+        """
+        Return the typed column store of a sample.
+
+        The store is rebuilt whenever the sample's lists were replaced (sheet
+        resync, file load) or changed length, so code that rebuilds the data
+        lists wholesale does not need to know about it.
+        """
+        sample = self.data[sample_id]
+        sources = tuple(sample.get(column) for column in TPM_INPUT_COLUMNS + ("tpm",))
+        cached = self._sample_stores.get(sample_id)
+        if (cached is None or len(cached[1]) != len(sample["puffs"])
+                or any(old is not new for old, new in zip(cached[0], sources))):
+            cached = self._sample_stores[sample_id] = (sources, SampleColumnStore(sample))
+        return cached[1]
+
+    def invalidate_sample_store(self, sample_id):
+        """Drop a sample's column store after its data lists were changed wholesale."""
+        self._sample_stores.pop(sample_id, None)
+
+    def get_tpm_column_index(self, sheet):
+        """Return the sheet column holding TPM (always the last column)."""
+        if hasattr(sheet, 'columns'):
+            return len(sheet.columns) - 1
+        return 7 if self.test_name in ["User Test Simulation", "User Simulation Test"] else 8
+
+    def get_edited_cells(self, event):
+        """
+        Return the (row, column) cells a <<SheetModified>> event changed.
+
+        Returns None when the event is not a plain cell edit (rows added,
+        deleted or moved, or no cell information), in which case the caller
+        falls back to process_sheet_changes.
+        """
+        try:
+            if event.eventname != "edit_table":
+                return None
+            if event.added.rows or event.deleted.rows or event.moved.rows:
+                return None
+            cells = sorted(event.cells.table)
+        except (AttributeError, KeyError, TypeError):
+            return None
+        return cells or None
+
+    def _set_sheet_value(self, sheet, sample_id, column, row_idx, value, col_idx=None):
+        """Write one value to the data lists, the column store and (if col_idx is given) the sheet."""
+        self.data[sample_id][column][row_idx] = value
+        if col_idx is not None:
+            sheet.set_cell_data(row_idx, col_idx, str(value))
+            # Keep the snapshot used by sync_tksheet_to_data in step with the sheet
+            self._update_old_sheet_data(row_idx, col_idx, str(value))
+        return self.get_sample_store(sample_id).set_value(column, row_idx, value)
+
+    def _update_old_sheet_data(self, row_idx, col_idx, value):
+        old_sheet_data = getattr(self, 'old_sheet_data', None)
+        if old_sheet_data is not None and row_idx < len(old_sheet_data) and col_idx < len(old_sheet_data[row_idx]):
+            old_sheet_data[row_idx][col_idx] = value
+
+    def refresh_tpm_rows(self, sheet, sample_id, rows):
+        """Recompute TPM for the given rows only and update their sheet cells and the average."""
+        store = self.get_sample_store(sample_id)
+        changed = store.update_tpm(rows)
+        if changed:
+            tpm_col_idx = self.get_tpm_column_index(sheet)
+            for row_idx, tpm_value in changed:
+                self.data[sample_id]["tpm"][row_idx] = tpm_value
+                sheet.set_cell_data(row_idx, tpm_col_idx, f"{tpm_value:.6f}" if tpm_value is not None else "")
+        self.data[sample_id]["avg_tpm"] = store.mean
+        return changed
+
+    def apply_cell_edits(self, sheet, sample_id, cells):
+        """
+        Apply edited cells to a sample without re-reading the whole sheet.
+
+        Only the edited cells are parsed, the puff and weight auto-progression
+        rules of sync_tksheet_to_data are applied to the edited rows, and TPM is
+        recomputed for the affected rows alone.
+
+        Args:
+            sheet: The sample's tksheet
+            sample_id (str): e.g. "Sample 1"
+            cells (list): (row, column) sheet cells that changed
+
+        Returns:
+            bool: False if the edit could not be applied incrementally
+        """
+        sample = self.data[sample_id]
+        row_count = len(sample["puffs"])
+        tpm_col_idx = self.get_tpm_column_index(sheet)
+        is_user_simulation = self.test_name in ["User Test Simulation", "User Simulation Test"]
+        puff_col_idx = 1 if is_user_simulation else 0
+        before_weight_col_idx = 2 if is_user_simulation else 1
+
+        edits = []
+        for row_idx, col_idx in cells:
+            if col_idx == tpm_col_idx:
+                continue
+            if row_idx >= row_count or col_idx > tpm_col_idx:
+                return False
+            column = self.get_column_name(col_idx)
+            if column not in sample:
+                return False
+            value = sheet.get_cell_data(row_idx, col_idx)
+            edits.append((row_idx, col_idx, column, "" if value is None else str(value).strip()))
+        if not edits:
+            return True
+
+        store = self.get_sample_store(sample_id)
+        affected_rows = set()
+        became_filled = {}  # row -> set of weight columns that went from empty to filled
+        for row_idx, col_idx, column, value in edits:
+            old_value = sample[column][row_idx]
+            old_value = "" if old_value is None else str(old_value).strip()
+            if column in ("before_weight", "after_weight") and old_value == "" and value != "":
+                became_filled.setdefault(row_idx, set()).add(column)
+            self._update_old_sheet_data(row_idx, col_idx, value)
+            affected_rows |= self._set_sheet_value(sheet, sample_id, column, row_idx, value)
+
+        for row_idx in sorted(became_filled):
+            filled = became_filled[row_idx]
+
+            # Fill in puffs up to a newly weighed row that has none yet
+            if sample["puffs"][row_idx] in ("", None):
+                last_puff_row = self._last_filled_row(sample["puffs"], nonzero=True)
+                if last_puff_row is None or row_idx > last_puff_row:
+                    base_row = -1 if last_puff_row is None else last_puff_row
+                    base_puffs = 0 if last_puff_row is None else int(float(sample["puffs"][last_puff_row]))
+                    for fill_row in range(base_row + 1, row_idx + 1):
+                        puff_value = base_puffs + (fill_row - base_row) * self.puff_interval
+                        affected_rows |= self._set_sheet_value(sheet, sample_id, "puffs", fill_row, str(puff_value), puff_col_idx)
+                    debug_print(f"DEBUG: Auto-filled puffs for {sample_id} rows {base_row + 1}-{row_idx}")
+
+            # A new after weight on the last weighed row carries over to the next row
+            if filled == {"after_weight"}:
+                last_after_row = self._last_filled_row(sample["after_weight"])
+                next_row_idx = row_idx + 1
+                after_weight = store.after_weight[row_idx]
+                if (last_after_row is None or row_idx >= last_after_row) and next_row_idx < row_count:
+                    if after_weight is not None:
+                        affected_rows |= self._set_sheet_value(sheet, sample_id, "before_weight", next_row_idx,
+                                                               after_weight, before_weight_col_idx)
+                    if sample["puffs"][next_row_idx] in ("", None):
+                        next_puffs = (store.puffs[row_idx] or 0) + self.puff_interval
+                        affected_rows |= self._set_sheet_value(sheet, sample_id, "puffs", next_row_idx,
+                                                               next_puffs, puff_col_idx)
+                    debug_print(f"DEBUG: Auto-progressed after weight of {sample_id} row {row_idx} to row {next_row_idx}")
+
+        changed_tpm = self.refresh_tpm_rows(sheet, sample_id, affected_rows)
+        self.mark_unsaved_changes()
+        if changed_tpm or any(column in TPM_INPUT_COLUMNS for _, _, column, _ in edits):
+            self.schedule_stats_refresh()
+        debug_print(f"DEBUG: Applied {len(edits)} cell edits to {sample_id}, {len(changed_tpm)} TPM rows changed")
+        return True
+
+    @staticmethod
+    def _last_filled_row(values, nonzero=False):
+        """Return the last row with a non-empty value (a non-zero number if nonzero), as sync_tksheet_to_data finds it."""
+        for row_idx in range(len(values) - 1, -1, -1):
+            value = values[row_idx]
+            text = "" if value is None else str(value).strip()
+            if not text:
+                continue
+            if not nonzero:
+                return row_idx
+            try:
+                if float(text) != 0:
+                    return row_idx
+            except ValueError:
+                continue
+        return None
+
+    def schedule_stats_refresh(self):
+        """Refresh the stats panel once edits pause instead of after every keystroke."""
+        pending = getattr(self, '_stats_refresh_id', None)
+        if pending is not None:
+            try:
+                self.window.after_cancel(pending)
+            except Exception:
+                pass
+
+        def refresh():
+            self._stats_refresh_id = None
+            self.update_stats_panel()
+
+        self._stats_refresh_id = self.window.after(STATS_REFRESH_DELAY_MS, refresh)
+
     def calculate_tpm(self, sample_id):
         """Calculate TPM values for all rows for a specific sample"""
 
@@ -377,6 +568,9 @@ class DataCollectionData:
         # Update average TPM
         self.data[sample_id]["avg_tpm"] = sum(valid_tpm_values) / len(valid_tpm_values) if valid_tpm_values else 0.0
 
+        # Data may have been replaced wholesale; rebuild the column store on next use
+        self.invalidate_sample_store(sample_id)
+
         return len(valid_tpm_values) > 0
 
     def calculate_dynamic_plot_size(self, parent_frame):
@@ -482,12 +676,11 @@ class DataCollectionData:
         self.auto_save_timer = self.window.after(self.auto_save_interval, self.auto_save)
 
     def auto_save(self):
-        """Perform automatic save without user confirmation."""
+        """Journal unsaved edits without rewriting the file (see save_data)."""
         if self.has_unsaved_changes:
             try:
                 self.save_data(show_confirmation=False, auto_save=True)
-                self.update_save_status(False)  # Mark as saved
-                debug_print("DEBUG: Auto-save completed successfully")
+                debug_print("DEBUG: Auto-save journaled pending edits")
             except Exception as e:
                 debug_print(f"DEBUG: Auto-save failed: {e}")
                 # Continue even if auto-save fails
@@ -497,6 +690,7 @@ class DataCollectionData:
 
     def mark_unsaved_changes(self):
         """Mark that there are unsaved changes."""
+        self.schedule_journal_flush()
         if not self.has_unsaved_changes:
             self.has_unsaved_changes = True
             self.update_save_status(True)
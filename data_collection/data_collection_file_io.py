@@ -12,11 +12,16 @@ import os
 import copy
 import time
 import datetime
+import queue
+import threading
 import pandas as pd
 import openpyxl
 from openpyxl.styles import PatternFill
 from tkinter import messagebox
 from utils import debug_print, load_excel_file_with_formulas, show_success_message
+from .data_collection_journal import EditJournal, JOURNAL_FLUSH_DELAY_MS, apply_records
+
+BACKGROUND_POLL_MS = 50  # how often a background save is checked for completion
 
 class DataCollectionFileIO:
 
@@ -161,31 +166,49 @@ class DataCollectionFileIO:
                 from tkinter import messagebox
                 messagebox.showerror("Error", f"Could not update header data in file: {e}")
 
-    def _save_to_excel(self):
-        """Save data to the appropriate file format."""
+    def _save_to_excel(self, on_done=None, on_error=None):
+        """
+        Save data to the appropriate file format.
+
+        Excel workbooks are written on a worker thread; on_done() is called on
+        the Tk thread once the main GUI has been updated, on_error(exception)
+        if the write failed.
+        """
         debug_print(f"DEBUG: _save_to_excel() starting - file: {self.file_path}")
+        on_done = on_done or (lambda: None)
 
         # Check if this is a .vap3 file or temporary file
         if self.file_path.endswith('.vap3') or not os.path.exists(self.file_path):
             debug_print("DEBUG: Detected .vap3 file or non-existent file, saving to loaded sheets")
+            # The data is updated in memory (and in the main GUI) by _save_to_loaded_sheets
             self._save_to_loaded_sheets()
-        else:
-            debug_print("DEBUG: Detected Excel file, saving using openpyxl")
-            self._save_to_excel_file()
-
-        debug_print("DEBUG: Excel save completed, updating main GUI...")
+            on_done()
+            return
 
-        # For .vap3 files, the data is already updated in memory via _save_to_loaded_sheets
-        if self.file_path.endswith('.vap3') or not os.path.exists(self.file_path):
-            debug_print("DEBUG: .vap3 file detected, skipping file-based update")
-            # The _save_to_loaded_sheets method should have already updated the main GUI data
-        else:
-            debug_print("DEBUG: Excel file detected, updating from file")
+        def on_written(result):
+            debug_print("DEBUG: Excel save completed, updating main GUI from file")
             self._update_excel_data_in_main_gui()
+            on_done()
 
-    def _save_to_excel_file(self):
-        """Save data to the Excel file."""
+        debug_print("DEBUG: Detected Excel file, saving using openpyxl")
+        # Write a copy so edits made while the workbook is saved do not race the writer
+        data_snapshot = copy.deepcopy(self.data)
+        self.run_in_background(lambda: self._save_to_excel_file(data_snapshot), "Saving workbook...",
+                               on_done=on_written, on_error=on_error)
+
+    def _save_to_excel_file(self, data=None):
+        """
+        Save data to the Excel file.
+
+        Runs on a worker thread during explicit saves, so it only touches the
+        workbook and the given data, never Tk widgets.
+
+        Args:
+            data (dict): Sample data to write (defaults to self.data)
+        """
         debug_print(f"DEBUG: _save_to_excel() starting - file: {self.file_path}")
+        if data is None:
+            data = self.data
 
         # Load the workbook
         wb = openpyxl.load_workbook(self.file_path)
@@ -224,22 +247,22 @@ class DataCollectionFileIO:
             sample_data_written = 0
 
             # Write the data starting at row 5
-            for i, puff in enumerate(self.data[sample_id]["puffs"]):
+            for i, puff in enumerate(data[sample_id]["puffs"]):
                 row = i + 5  # Row 5 is the first data row
 
                 # Only write if we have actual data (not just empty rows)
                 has_data = (
-                    self.data[sample_id]["before_weight"][i] or
-                    self.data[sample_id]["after_weight"][i] or
-                    self.data[sample_id]["draw_pressure"][i] or
-                    self.data[sample_id]["smell"][i] or
-                    self.data[sample_id]["notes"][i] or
-                    self.data[sample_id]["tpm"][i] is not None
+                    data[sample_id]["before_weight"][i] or
+                    data[sample_id]["after_weight"][i] or
+                    data[sample_id]["draw_pressure"][i] or
+                    data[sample_id]["smell"][i] or
+                    data[sample_id]["notes"][i] or
+                    data[sample_id]["tpm"][i] is not None
                 )
 
                 # For User Test Simulation, also check chronography
                 if self.test_name in ["User Test Simulation", "User Simulation Test"]:
-                    has_data = has_data or (i < len(self.data[sample_id]["chronography"]) and self.data[sample_id]["chronography"][i])
+                    has_data = has_data or (i < len(data[sample_id]["chronography"]) and data[sample_id]["chronography"][i])
 
                 if not has_data:
                     continue  # Skip empty rows
@@ -247,45 +270,45 @@ class DataCollectionFileIO:
                 if self.test_name in ["User Test Simulation", "User Simulation Test"]:
                     # User Test Simulation column layout (8 columns)
                     # Chronography column (A + offset)
-                    if i < len(self.data[sample_id]["chronography"]) and self.data[sample_id]["chronography"][i]:
-                        ws.cell(row=row, column=1 + col_offset, value=str(self.data[sample_id]["chronography"][i]))
+                    if i < len(data[sample_id]["chronography"]) and data[sample_id]["chronography"][i]:
+                        ws.cell(row=row, column=1 + col_offset, value=str(data[sample_id]["chronography"][i]))
 
                     # Puffs column (B + offset)
                     ws.cell(row=row, column=2 + col_offset, value=puff)
 
                     # Before weight column (C + offset)
-                    if self.data[sample_id]["before_weight"][i]:
+                    if data[sample_id]["before_weight"][i]:
                         try:
-                            ws.cell(row=row, column=3 + col_offset, value=float(self.data[sample_id]["before_weight"][i]))
+                            ws.cell(row=row, column=3 + col_offset, value=float(data[sample_id]["before_weight"][i]))
                         except:
-                            ws.cell(row=row, column=3 + col_offset, value=self.data[sample_id]["before_weight"][i])
+                            ws.cell(row=row, column=3 + col_offset, value=data[sample_id]["before_weight"][i])
 
                     # After weight column (D + offset)
-                    if self.data[sample_id]["after_weight"][i]:
+                    if data[sample_id]["after_weight"][i]:
                         try:
-                            ws.cell(row=row, column=4 + col_offset, value=float(self.data[sample_id]["after_weight"][i]))
+                            ws.cell(row=row, column=4 + col_offset, value=float(data[sample_id]["after_weight"][i]))
                         except:
-                            ws.cell(row=row, column=4 + col_offset, value=self.data[sample_id]["after_weight"][i])
+                            ws.cell(row=row, column=4 + col_offset, value=data[sample_id]["after_weight"][i])
 
                     # Draw pressure column (E + offset)
-                    if self.data[sample_id]["draw_pressure"][i]:
+                    if data[sample_id]["draw_pressure"][i]:
                         try:
-                            ws.cell(row=row, column=5 + col_offset, value=float(self.data[sample_id]["draw_pressure"][i]))
+                            ws.cell(row=row, column=5 + col_offset, value=float(data[sample_id]["draw_pressure"][i]))
                         except:
-                            ws.cell(row=row, column=5 + col_offset, value=self.data[sample_id]["draw_pressure"][i])
+                            ws.cell(row=row, column=5 + col_offset, value=data[sample_id]["draw_pressure"][i])
 
                     # Skip resistance column (F + offset) - not used in User Test Simulation
 
                     # Failure column (G + offset)
-                    if self.data[sample_id]["smell"][i]:
+                    if data[sample_id]["smell"][i]:
                         try:
-                            ws.cell(row=row, column=6 + col_offset, value=float(self.data[sample_id]["smell"][i]))
+                            ws.cell(row=row, column=6 + col_offset, value=float(data[sample_id]["smell"][i]))
                         except:
-                            ws.cell(row=row, column=6 + col_offset, value=self.data[sample_id]["smell"][i])
+                            ws.cell(row=row, column=6 + col_offset, value=data[sample_id]["smell"][i])
 
                     # Notes column (H + offset)
-                    if self.data[sample_id]["notes"][i]:
-                        ws.cell(row=row, column=7 + col_offset, value=str(self.data[sample_id]["notes"][i]))
+                    if data[sample_id]["notes"][i]:
+                        ws.cell(row=row, column=7 + col_offset, value=str(data[sample_id]["notes"][i]))
 
                     debug_print(f"DEBUG: Saved User Test Simulation row {i} for {sample_id}")
 
@@ -295,52 +318,52 @@ class DataCollectionFileIO:
                     ws.cell(row=row, column=1 + col_offset, value=puff)
 
                     # Before weight column (B + offset)
-                    if self.data[sample_id]["before_weight"][i]:
+                    if data[sample_id]["before_weight"][i]:
                         try:
-                            ws.cell(row=row, column=2 + col_offset, value=float(self.data[sample_id]["before_weight"][i]))
+                            ws.cell(row=row, column=2 + col_offset, value=float(data[sample_id]["before_weight"][i]))
                         except:
-                            ws.cell(row=row, column=2 + col_offset, value=self.data[sample_id]["before_weight"][i])
+                            ws.cell(row=row, column=2 + col_offset, value=data[sample_id]["before_weight"][i])
 
                     # After weight column (C + offset)
-                    if self.data[sample_id]["after_weight"][i]:
+                    if data[sample_id]["after_weight"][i]:
                         try:
-                            ws.cell(row=row, column=3 + col_offset, value=float(self.data[sample_id]["after_weight"][i]))
+                            ws.cell(row=row, column=3 + col_offset, value=float(data[sample_id]["after_weight"][i]))
                         except:
-                            ws.cell(row=row, column=3 + col_offset, value=self.data[sample_id]["after_weight"][i])
+                            ws.cell(row=row, column=3 + col_offset, value=data[sample_id]["after_weight"][i])
 
                     # Draw pressure column (D + offset)
-                    if self.data[sample_id]["draw_pressure"][i]:
+                    if data[sample_id]["draw_pressure"][i]:
                         try:
-                            ws.cell(row=row, column=4 + col_offset, value=float(self.data[sample_id]["draw_pressure"][i]))
+                            ws.cell(row=row, column=4 + col_offset, value=float(data[sample_id]["draw_pressure"][i]))
                         except:
-                            ws.cell(row=row, column=4 + col_offset, value=self.data[sample_id]["draw_pressure"][i])
+                            ws.cell(row=row, column=4 + col_offset, value=data[sample_id]["draw_pressure"][i])
 
-                    if self.data[sample_id]["resistance"][i]:
+                    if data[sample_id]["resistance"][i]:
                         try:
-                            ws.cell(row=row, column=5 + col_offset, value=float(self.data[sample_id]["resistance"][i]))
+                            ws.cell(row=row, column=5 + col_offset, value=float(data[sample_id]["resistance"][i]))
                         except:
-                            ws.cell(row=row, column=5 + col_offset, value=self.data[sample_id]["resistance"][i])
+                            ws.cell(row=row, column=5 + col_offset, value=data[sample_id]["resistance"][i])
 
                     # Smell column (F + offset)
-                    if self.data[sample_id]["smell"][i]:
+                    if data[sample_id]["smell"][i]:
                         try:
-                            ws.cell(row=row, column=6 + col_offset, value=float(self.data[sample_id]["smell"][i]))
+                            ws.cell(row=row, column=6 + col_offset, value=float(data[sample_id]["smell"][i]))
                         except:
-                            ws.cell(row=row, column=6 + col_offset, value=self.data[sample_id]["smell"][i])
+                            ws.cell(row=row, column=6 + col_offset, value=data[sample_id]["smell"][i])
 
-                    if self.data[sample_id]["clog"][i]:
+                    if data[sample_id]["clog"][i]:
                         try:
-                            ws.cell(row=row, column=7 + col_offset, value=float(self.data[sample_id]["clog"][i]))
+                            ws.cell(row=row, column=7 + col_offset, value=float(data[sample_id]["clog"][i]))
                         except:
-                            ws.cell(row=row, column=7 + col_offset, value=self.data[sample_id]["clog"][i])
+                            ws.cell(row=row, column=7 + col_offset, value=data[sample_id]["clog"][i])
 
                     # Notes column (H + offset)
-                    if self.data[sample_id]["notes"][i]:
-                        ws.cell(row=row, column=8 + col_offset, value=str(self.data[sample_id]["notes"][i]))
+                    if data[sample_id]["notes"][i]:
+                        ws.cell(row=row, column=8 + col_offset, value=str(data[sample_id]["notes"][i]))
 
                     # TPM column (I + offset) - if calculated
-                    if i < len(self.data[sample_id]["tpm"]) and self.data[sample_id]["tpm"][i] is not None:
-                        tpm_cell = ws.cell(row=row, column=9 + col_offset, value=float(self.data[sample_id]["tpm"][i]))
+                    if i < len(data[sample_id]["tpm"]) and data[sample_id]["tpm"][i] is not None:
+                        tpm_cell = ws.cell(row=row, column=9 + col_offset, value=float(data[sample_id]["tpm"][i]))
                         tpm_cell.fill = green_fill
 
                 sample_data_written += 1
@@ -357,7 +380,7 @@ class DataCollectionFileIO:
             col_offset = sample_idx * columns_per_sample
 
             debug_print(f"DEBUG: Sample {sample_idx+1} data preview:")
-            for i in range(min(3, len(self.data[sample_id]["puffs"]))):  # First 3 rows
+            for i in range(min(3, len(data[sample_id]["puffs"]))):  # First 3 rows
                 row = i + 5
                 if self.test_name in ["User Test Simulation", "User Simulation Test"]:
                     chrono_val = ws.cell(row=row, column=1 + col_offset).value
@@ -372,7 +395,14 @@ class DataCollectionFileIO:
                     tpm_val = ws.cell(row=row, column=9 + col_offset).value
                     debug_print(f"DEBUG:   Row {i}: Puff={puff_val}, Before={before_val}, After={after_val}, TPM={tpm_val}")
 
-        wb.save(self.file_path)
+        # Write next to the file and swap it in, so an interrupted save cannot truncate the workbook
+        temp_path = self.file_path + ".saving"
+        try:
+            wb.save(temp_path)
+            os.replace(temp_path, self.file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         debug_print(f"DEBUG: Excel file saved successfully to {self.file_path}")
         self._refresh_main_gui_notes_display
 
@@ -1231,7 +1261,7 @@ class DataCollectionFileIO:
                 debug_print("DEBUG: Updating VAP3 file and application state")
                 try:
                     # Import here to avoid circular imports
-                    from vap_file_manager import VapFileManager
+                    from vap_file_manager import NUMERIC_MEMBER_MIN_CELLS, VapFileManager
 
                     vap_manager = VapFileManager()
 
@@ -1248,7 +1278,8 @@ class DataCollectionFileIO:
                         getattr(self.parent, 'sheet_images', {}),
                         getattr(self.parent, 'plot_options', []),
                         image_crop_states,
-                        plot_settings
+                        plot_settings,
+                        numeric_member_min_cells=NUMERIC_MEMBER_MIN_CELLS
                     )
 
                     if success:
@@ -1322,81 +1353,256 @@ class DataCollectionFileIO:
             messagebox.showerror("Export Error", f"Failed to export CSV files: {e}")
 
     def save_data(self, exit_after=False, show_confirmation=True, auto_save=False):
-        """Unified method for saving data."""
+        """
+        Unified method for saving data.
+
+        Autosave only appends the edits made since the last flush to the edit
+        journal. Explicit saves (and saving on exit) rewrite the file on a
+        worker thread and then drop the journal entries the file now contains.
+
+        Returns:
+            bool: True if the save was started (autosave: journaled); it
+            completes, and with exit_after closes the window, from the
+            worker's callback
+        """
         # End any active editing
         self.end_editing()
 
-        # For auto-save, we'll set a flag to avoid certain behaviors
         if auto_save:
-            self._auto_save_in_progress = True
+            return self.flush_journal() is not None
 
-        # Confirm save if requested and not auto-saving
-        if show_confirmation and not auto_save:
+        # Confirm save if requested
+        if show_confirmation:
             if not messagebox.askyesno("Confirm Save", "Save the collected data to the file?"):
                 return False
 
+        if getattr(self, '_background_save_thread', None) is not None:
+            debug_print("DEBUG: Save already in progress, ignoring save request")
+            return False
+
+        def on_file_written():
+            try:
+                # Update application state if needed
+                if hasattr(self.parent, 'filtered_sheets'):
+                    self._update_application_state()
+
+                # Refresh the main GUI
+                self.refresh_main_gui_after_save()
+
+                # Edits made while the file was being written stay journaled and unsaved
+                if self._compact_journal(journal_offset):
+                    debug_print("DEBUG: Edits were made during the save, keeping them journaled")
+                    self.update_save_status(True)
+                    self.last_save_time = datetime.datetime.now()
+                else:
+                    self.has_unsaved_changes = False
+                    self.update_save_status(False)
+
+                # Show confirmation if requested
+                if show_confirmation and not exit_after:
+                    show_success_message("Save Complete", "Data saved successfully.", self.window)
+
+                # Exit if requested
+                if exit_after:
+                    debug_print("DEBUG: Save and exit requested - calling on_window_close()")
+                    self.result = "load_file"
+                    # Call on_window_close() to properly restore main window before destroying
+                    self.on_window_close()
+            except Exception as e:
+                self._on_save_failed(e)
+
         try:
             # Calculate TPM values for all samples
             for i in range(self.num_samples):
                 sample_id = f"Sample {i+1}"
                 self.calculate_tpm(sample_id)
 
-            # Save to Excel file
-            self._save_to_excel()
-
-            self._save_sample_images()
-
-            # Update application state if needed
-            if hasattr(self.parent, 'filtered_sheets'):
-                self._update_application_state()
+            # Everything journaled up to this point is about to be written to the file
+            self.flush_journal()
+            journal_offset = self.edit_journal.size() if hasattr(self, 'edit_journal') else 0
 
-            # Refresh the main GUI if not auto-saving
-            if not auto_save:
-                self.refresh_main_gui_after_save()
-
-            # Mark as saved
-            self.has_unsaved_changes = False
-            self.update_save_status(False)
+            # Save to Excel file, then the sample images; the workbook and .vap3 are
+            # written on worker threads and the steps continue from their callbacks
+            self._save_to_excel(on_done=lambda: self._save_sample_images(on_done=on_file_written),
+                                on_error=self._on_save_failed)
+            return True
 
-            # Show confirmation if requested (not for auto-save)
-            if show_confirmation and not auto_save and not exit_after:
-                show_success_message("Save Complete", "Data saved successfully.", self.window)
+        except Exception as e:
+            self._on_save_failed(e)
+            return False
 
-            # Clean up auto-save flag
-            if auto_save:
-                self._auto_save_in_progress = False
+    def _on_save_failed(self, error):
+        """Report a save that could not be completed."""
+        error_msg = f"Failed to save data: {error}"
+        self.log(error_msg, "error")
+        messagebox.showerror("Save Error", error_msg)
+
+    def init_edit_journal(self):
+        """Open the edit journal for this file and test, offering to replay one left by a crash."""
+        self.edit_journal = EditJournal(self.file_path, self.test_name)
+        self._journal_flush_id = None
+
+        if self.edit_journal.exists():
+            # New edits are appended to this journal, so drop a torn last record first
+            self.edit_journal.repair()
+            header, records = self.edit_journal.read()
+            if records:
+                created = datetime.datetime.fromtimestamp(header.get("created", time.time())).strftime("%Y-%m-%d %H:%M")
+                if messagebox.askyesno("Recover Unsaved Data",
+                                       f"A data collection session for '{self.test_name}' started on {created} "
+                                       f"was not saved.\n\nRestore its {len(records)} unsaved edits?",
+                                       parent=self.window):
+                    self._replay_journal(records)
+                    # The replayed edits stay in the journal until they are saved
+                    self.edit_journal.reset_baseline(self.data)
+                    return
+            self.edit_journal.discard()
+
+        self.edit_journal.reset_baseline(self.data)
+
+    def _replay_journal(self, records):
+        """Apply journaled edits to the loaded data and refresh the sheets."""
+        debug_print(f"DEBUG: Replaying {len(records)} journaled edits for {self.test_name}")
+        apply_records(self.data, records)
+
+        for i in range(self.num_samples):
+            sample_id = f"Sample {i + 1}"
+            if sample_id not in self.data:
+                continue
+            self.data[sample_id]["tpm"] = [None] * len(self.data[sample_id]["puffs"])
+            self.calculate_tpm(sample_id)
+            if hasattr(self, 'sample_sheets') and i < len(self.sample_sheets):
+                self.update_tksheet(self.sample_sheets[i], sample_id)
+
+        self.update_stats_panel()
+        self.mark_unsaved_changes()
+
+    def schedule_journal_flush(self):
+        """Journal the latest edits once typing pauses."""
+        if not hasattr(self, 'edit_journal'):
+            return
+        if self._journal_flush_id is not None:
+            self.window.after_cancel(self._journal_flush_id)
+        self._journal_flush_id = self.window.after(JOURNAL_FLUSH_DELAY_MS, self.flush_journal)
+
+    def flush_journal(self):
+        """
+        Append the edits made since the last flush to the edit journal.
+
+        Returns:
+            int or None: Number of records written, None if the journal could not be written
+        """
+        if not hasattr(self, 'edit_journal'):
+            return 0
+        if self._journal_flush_id is not None:
+            self.window.after_cancel(self._journal_flush_id)
+            self._journal_flush_id = None
 
-            # Exit if requested
-            if exit_after:
-                debug_print("DEBUG: Save and exit requested - calling on_window_close()")
-                self.result = "load_file"
-                # Call on_window_close() to properly restore main window before destroying
-                self.on_window_close()
-                return True
+        try:
+            count = self.edit_journal.flush(self.data)
+        except Exception as e:
+            debug_print(f"ERROR: Failed to write edit journal: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            return True
+        if count and self.has_unsaved_changes and hasattr(self, 'save_status_text'):
+            self.save_status_text.config(text="Unsaved changes (backed up)")
+        return count
 
-        except Exception as e:
-            # Clean up auto-save flag
-            if auto_save:
-                self._auto_save_in_progress = False
+    def _compact_journal(self, journal_offset):
+        """Drop the journal entries written before journal_offset; return how many remain."""
+        if not hasattr(self, 'edit_journal'):
+            return 0
+        self.flush_journal()
+        try:
+            return self.edit_journal.compact_through(journal_offset)
+        except OSError as e:
+            # Replaying entries that are already saved is harmless
+            debug_print(f"ERROR: Failed to compact edit journal: {e}")
+            return 0
+
+    def discard_edit_journal(self):
+        """Delete the edit journal when the user chooses not to save."""
+        if hasattr(self, 'edit_journal'):
+            if self._journal_flush_id is not None:
+                self.window.after_cancel(self._journal_flush_id)
+                self._journal_flush_id = None
+            self.edit_journal.discard()
+
+    def run_in_background(self, func, status_text=None, on_done=None, on_error=None):
+        """
+        Run func on a worker thread and deliver its outcome on the Tk thread.
+
+        The window keeps running its normal event loop; completion is picked up
+        by polling with after().
+
+        Args:
+            func (callable): Work that does not touch Tk widgets
+            status_text (str): Shown in the save status bar while func runs
+            on_done (callable): on_done(result), called on the Tk thread
+            on_error (callable): on_error(exception), called on the Tk thread
+        """
+        results = queue.Queue()
+
+        def worker():
+            try:
+                results.put((True, func()))
+            except Exception as e:
+                results.put((False, e))
+
+        thread = threading.Thread(target=worker, name="DataCollectionSave")
+        self._background_save_thread = thread
+        previous_status = None
+        if status_text and hasattr(self, 'save_status_text'):
+            previous_status = self.save_status_text.cget('text')
+            self.save_status_text.config(text=status_text)
+
+        def finish(succeeded, value):
+            self._background_save_thread = None
+            if previous_status is not None:
+                try:
+                    self.save_status_text.config(text=previous_status)
+                except Exception:
+                    pass
+            if succeeded:
+                if on_done:
+                    on_done(value)
+            elif on_error:
+                on_error(value)
+            else:
+                debug_print(f"ERROR: Background save failed: {value}")
 
-            error_msg = f"Failed to save data: {e}"
-            self.log(error_msg, "error")
+        def poll():
+            try:
+                outcome = results.get_nowait()
+            except queue.Empty:
+                try:
+                    self.window.after(BACKGROUND_POLL_MS, poll)
+                except Exception:
+                    # Window is gone; the (non-daemon) thread still finishes the write
+                    self._background_save_thread = None
+                return
+            finish(*outcome)
 
-            if not auto_save:  # Don't show errors for auto-save
-                messagebox.showerror("Save Error", error_msg)
+        thread.start()
+        self.window.after(BACKGROUND_POLL_MS, poll)
 
-            return False
+    def _save_sample_images(self, on_done=None):
+        """
+        Save sample images to the appropriate file format.
 
-    def _save_sample_images(self):
-        """Save sample images to the appropriate file format."""
+        on_done() is called on the Tk thread when done, also if saving the
+        images failed (that does not fail the whole save).
+        """
+        on_done = on_done or (lambda: None)
         try:
             debug_print("DEBUG: _save_sample_images() starting")
 
             # Check if we have sample images to save
             if not hasattr(self, 'sample_images') or not self.sample_images:
                 debug_print("DEBUG: No sample images to save")
+                on_done()
                 return
 
             debug_print(f"DEBUG: Saving sample images for {len(self.sample_images)} samples")
@@ -1414,7 +1620,8 @@ class DataCollectionFileIO:
 
                 # If this is already a VAP3 file, save it now
                 if self.file_path.endswith('.vap3'):
-                    self._save_vap3_with_sample_images()
+                    self._save_vap3_with_sample_images(on_done)
+                    return
 
             debug_print("DEBUG: Sample images saved successfully")
 
@@ -1423,14 +1630,29 @@ class DataCollectionFileIO:
             import traceback
             traceback.print_exc()
             # Don't fail the entire save process for image save issues
+        on_done()
+
+    def _save_vap3_with_sample_images(self, on_done=None):
+        """Save the VAP3 file with sample images included, calling on_done() on the Tk thread afterwards."""
+        on_done = on_done or (lambda: None)
+
+        def on_saved(success):
+            if success:
+                debug_print("DEBUG: VAP3 file with sample images saved successfully")
+            else:
+                debug_print("ERROR: Failed to save VAP3 file with sample images")
+            on_done()
+
+        def on_failed(error):
+            debug_print(f"ERROR: Failed to save VAP3 with sample images: {error}")
+            # Don't fail the entire save for this
+            on_done()
 
-    def _save_vap3_with_sample_images(self):
-        """Save the VAP3 file with sample images included."""
         try:
             debug_print("DEBUG: Saving VAP3 file with sample images")
 
             # Import the enhanced VAP file manager
-            from vap_file_manager import VapFileManager
+            from vap_file_manager import NUMERIC_MEMBER_MIN_CELLS, VapFileManager
             vap_manager = VapFileManager()
 
             # Get current application state from parent
@@ -1449,8 +1671,8 @@ class DataCollectionFileIO:
             sample_image_crop_states = getattr(self.parent, 'pending_sample_image_crop_states', {})
             sample_header_data = getattr(self.parent, 'pending_sample_header_data', {})
 
-            # Save to VAP3 file with sample images
-            success = vap_manager.save_to_vap3(
+            # Save to VAP3 file with sample images on a worker thread
+            self.run_in_background(lambda: vap_manager.save_to_vap3(
                 self.file_path,
                 filtered_sheets,
                 sheet_images,
@@ -1459,19 +1681,15 @@ class DataCollectionFileIO:
                 plot_settings,
                 sample_images,
                 sample_image_crop_states,
-                sample_header_data
-            )
-
-            if success:
-                debug_print("DEBUG: VAP3 file with sample images saved successfully")
-            else:
-                debug_print("ERROR: Failed to save VAP3 file with sample images")
+                sample_header_data,
+                # Local long-run archive: large sheets are memory-mapped when reopened
+                numeric_member_min_cells=NUMERIC_MEMBER_MIN_CELLS
+            ), "Saving file...", on_done=on_saved, on_error=on_failed)
 
         except Exception as e:
-            debug_print(f"ERROR: Failed to save VAP3 with sample images: {e}")
             import traceback
             traceback.print_exc()
-            # Don't fail the entire save for this
+            on_failed(e)
 
     def save_sample_images_to_vap3(self):
         """Save sample-specific images to the VAP3 file."""
@@ -15,6 +15,9 @@ import time
 import datetime
 from utils import show_success_message, debug_print
 
+# Delay before the TPM plot follows a burst of edits or tab switches
+TPM_PLOT_REFRESH_DELAY_MS = 50
+
 class DataCollectionHandlers:
     def setup_event_handlers(self):
         """Set up event handlers for the window."""
@@ -125,19 +128,17 @@ class DataCollectionHandlers:
                 if current_after_weight and str(current_after_weight).strip() != "" and (not next_before_weight or str(next_before_weight).strip() == ""):
                     debug_print(f"DEBUG: Edit completion - auto-progressing weight from row {row_idx} ({current_after_weight}) to row {row_idx + 1}")
 
-                    # Update the next row's before weight in data structure
-                    self.data[sample_id]["before_weight"][row_idx + 1] = current_after_weight
-
-                    # Update the sheet display
+                    # Update the next row's before weight in the data structure and sheet display
                     before_weight_col_idx = 2 if self.test_name in ["User Test Simulation", "User Simulation Test"] else 1
-                    sheet.set_cell_data(row_idx + 1, before_weight_col_idx, str(current_after_weight))
+                    affected_rows = self._set_sheet_value(sheet, sample_id, "before_weight", row_idx + 1,
+                                                          current_after_weight, before_weight_col_idx)
 
                     debug_print(f"DEBUG: Edit completion - auto-set next row before_weight to {current_after_weight}")
 
-                    # Mark as changed and recalculate TPM
+                    # Mark as changed and recalculate TPM for the affected row
                     self.mark_unsaved_changes()
-                    self.calculate_tpm(sample_id)
-                    self.update_tpm_in_sheet(sheet, sample_id)
+                    if self.refresh_tpm_rows(sheet, sample_id, affected_rows):
+                        self.schedule_stats_refresh()
 
         except Exception as e:
             debug_print(f"DEBUG: Error in on_edit_complete: {e}")
@@ -150,6 +151,10 @@ class DataCollectionHandlers:
             """Handle any cell modification."""
             try:
                 debug_print(f"DEBUG: Cell modified in {sample_id}")
+                # Plain cell edits are applied cell by cell; anything else resyncs the sheet
+                cells = self.get_edited_cells(event)
+                if cells is not None and self.apply_cell_edits(sheet, sample_id, cells):
+                    return
                 # Small delay to ensure edit is complete
                 self.window.after(50, lambda: self.process_sheet_changes(sheet, sample_id))
 
@@ -212,8 +217,73 @@ class DataCollectionHandlers:
         except Exception as e:
             debug_print(f"DEBUG: Error updating sample notes: {e}")
 
+    def schedule_tpm_plot_update(self):
+        """Update the TPM plot once a burst of edits or tab switches settles."""
+        pending = getattr(self, '_tpm_plot_refresh_id', None)
+        if pending is not None:
+            try:
+                self.window.after_cancel(pending)
+            except Exception:
+                pass
+
+        def refresh():
+            self._tpm_plot_refresh_id = None
+            self.update_tpm_plot_for_current_sample()
+
+        self._tpm_plot_refresh_id = self.window.after(TPM_PLOT_REFRESH_DELAY_MS, refresh)
+
+    def _get_tpm_plot_artists(self):
+        """Return the persistent artists of the TPM plot, creating them for a new axes."""
+        state = getattr(self, '_tpm_plot_state', None)
+        if state is None or state['ax'] is not self.stats_ax:
+            ax = self.stats_ax
+            ax.clear()
+            ax.set_xlabel('Puffs', fontsize=10)
+            ax.set_ylabel('TPM (mg/puff)', fontsize=10)
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='both', which='major', labelsize=9)
+            title = ax.set_title('', fontsize=11)
+            empty_text = ax.text(0.5, 0.5, 'No TPM data available',
+                                 transform=ax.transAxes, ha='center', va='center', fontsize=10)
+            state = self._tpm_plot_state = {
+                'ax': ax,
+                'title': title,
+                'empty_text': empty_text,
+                'lines': {},  # sample_id -> Line2D
+                'versions': {},  # sample_id -> store state the line was drawn from
+                'current': None,
+            }
+            # Labels are fixed from here on; layout only changes again on resize
+            self.stats_fig.tight_layout(pad=1.0)
+        return state
+
+    @staticmethod
+    def _tpm_plot_y_max(largest_tpm):
+        """
+        Return the upper y bound for the TPM plot.
+
+        Leaves 2 mg/puff of headroom above the largest value, ignoring a
+        single outlier above 20, and caps the axis at 20 otherwise.
+
+        Args:
+            largest_tpm (list): The two largest TPM values, largest first
+        """
+        if not largest_tpm:
+            return 9
+        if largest_tpm[0] <= 20:
+            return largest_tpm[0] + 2
+        if len(largest_tpm) >= 2 and largest_tpm[1] <= 20:
+            return largest_tpm[1] + 2
+        return 20
+
     def update_tpm_plot_for_current_sample(self):
-        """Update the TPM plot for the currently selected sample with smart y-axis bounds."""
+        """
+        Update the TPM plot for the currently selected sample with smart y-axis bounds.
+
+        Each sample keeps its own line, updated with set_data only when the
+        sample's TPM or puffs changed, and the canvas is redrawn with
+        draw_idle so bursts of updates cost a single render.
+        """
         try:
             # Get currently selected sample
             current_tab_index = self.notebook.index(self.notebook.select())
@@ -222,77 +292,38 @@ class DataCollectionHandlers:
             current_sample_id = "Sample 1"
             current_tab_index = 0
 
-        debug_print(f"DEBUG: Updating TPM plot for {current_sample_id}")
-
-        # Clear the plot
-        self.stats_ax.clear()
-
-        # Get data for the sample
-        tpm_values = [v for v in self.data[current_sample_id]["tpm"] if v is not None]
-        puff_values = []
-
-        # Get corresponding puff values for non-None TPM values
-        for i, tpm in enumerate(self.data[current_sample_id]["tpm"]):
-            if tpm is not None and i < len(self.data[current_sample_id]["puffs"]):
-                puff_values.append(self.data[current_sample_id]["puffs"][i])
-
-        if tpm_values and puff_values and len(tpm_values) == len(puff_values):
-            # Plot TPM over puffs
-            self.stats_ax.plot(puff_values, tpm_values, marker='o', linewidth=2, markersize=4, color='blue')
-            self.stats_ax.set_xlabel('Puffs', fontsize=10)
-            self.stats_ax.set_ylabel('TPM (mg/puff)', fontsize=10)
-            self.stats_ax.set_title(f'TPM Over Time - {current_sample_id}', fontsize=11)
-            self.stats_ax.grid(True, alpha=0.3)
-
-            # Smart y-axis bounds logic
-            if len(tpm_values) >= 2:
-                sorted_tpm = sorted(tpm_values, reverse=True)  # Sort descending
-                max_tpm = sorted_tpm[0]
-                second_max_tpm = sorted_tpm[1]
-
-                if max_tpm <= 20:
-                    # Use max + 2 when max <= 20
-                    y_max = max_tpm + 2
-                    debug_print(f"DEBUG: Setting y-axis bounds 0 to {y_max} (max {max_tpm} + 2)")
-                elif second_max_tpm <= 20:
-                    # Use second largest value when max > 20 but second max <= 20
-                    y_max = second_max_tpm + 2
-                    debug_print(f"DEBUG: Setting y-axis bounds 0 to {y_max} (second max {second_max_tpm} + 2, ignoring outlier {max_tpm})")
-                else:
-                    # Both values > 20, default to 20
-                    y_max = 20
-                    debug_print(f"DEBUG: Setting y-axis bounds 0 to 20 (both max {max_tpm} and second max {second_max_tpm} > 20)")
-            elif len(tpm_values) == 1:
-                # Single value
-                max_tpm = tpm_values[0]
-                if max_tpm <= 20:
-                    y_max = max_tpm + 2
-                else:
-                    y_max = 20  # Single outlier, cap at 20
-                debug_print(f"DEBUG: Setting y-axis bounds 0 to {y_max} (single value {max_tpm})")
-            else:
-                # No values, use default
-                y_max = 9
-                debug_print(f"DEBUG: Setting default y-axis bounds 0 to 9")
-
-            self.stats_ax.set_ylim(0, y_max)
-
-            # Adjust tick label sizes for better fit
-            self.stats_ax.tick_params(axis='both', which='major', labelsize=9)
+        state = self._get_tpm_plot_artists()
+        store = self.get_sample_store(current_sample_id)
+        version = (id(store), store.version)
+        if state['current'] == current_sample_id and state['versions'].get(current_sample_id) == version:
+            return
 
-        else:
-            # Show empty plot with labels
-            self.stats_ax.set_xlabel('Puffs', fontsize=10)
-            self.stats_ax.set_ylabel('TPM (mg/puff)', fontsize=10)
-            self.stats_ax.set_title(f'TPM Over Time - {current_sample_id}', fontsize=11)
-            self.stats_ax.grid(True, alpha=0.3)
-            self.stats_ax.text(0.5, 0.5, 'No TPM data available',
-                              transform=self.stats_ax.transAxes, ha='center', va='center', fontsize=10)
-            self.stats_ax.set_ylim(0, 9)  # Default bounds for empty plot
-
-        # Apply layout and draw
-        self.stats_fig.tight_layout(pad=1.0)
-        self.stats_canvas.draw()
+        debug_print(f"DEBUG: Updating TPM plot for {current_sample_id}")
+        ax = state['ax']
+        line = state['lines'].get(current_sample_id)
+        if line is None:
+            line, = ax.plot([], [], marker='o', linewidth=2, markersize=4, color='blue')
+            state['lines'][current_sample_id] = line
+
+        if state['versions'].get(current_sample_id) != version:
+            puff_values, tpm_values = store.tpm_points()
+            line.set_data(puff_values, tpm_values)
+            state['versions'][current_sample_id] = version
+
+        if state['current'] != current_sample_id:
+            for sample_id, sample_line in state['lines'].items():
+                sample_line.set_visible(sample_id == current_sample_id)
+            state['title'].set_text(f'TPM Over Time - {current_sample_id}')
+            state['current'] = current_sample_id
+
+        has_points = len(line.get_xdata()) > 0
+        state['empty_text'].set_visible(not has_points)
+        if has_points:
+            ax.relim(visible_only=True)
+            ax.autoscale_view(scalex=True, scaley=False)
+        ax.set_ylim(0, self._tpm_plot_y_max(store.largest_tpm(2)) if has_points else 9)
+
+        self.stats_canvas.draw_idle()
 
         debug_print(f"DEBUG: TPM plot updated for {current_sample_id} with smart y-axis bounds")
 
@@ -335,17 +366,18 @@ class DataCollectionHandlers:
             self.current_sample_label.config(text=f"Sample {current_tab + 1}: {actual_sample_name}")
             debug_print(f"DEBUG: Updated main sample label to: Sample {current_tab + 1}: {actual_sample_name}")
 
-        # Calculate TPM statistics
+        # Calculate TPM statistics from the running sums of the sample's column store
         sample_data = self.data[current_sample_id]
-        tpm_values = [float(tpm) for tpm in sample_data.get("tpm", []) if tpm and str(tpm).strip() and tpm != ""]
+        store = self.get_sample_store(current_sample_id)
+        recent_tpm = store.recent_tpm(5)
 
-        if tpm_values:
-            avg_tpm = statistics.mean(tpm_values)
-            latest_tpm = tpm_values[-1] if tpm_values else 0
+        if store.count:
+            avg_tpm = store.mean
+            latest_tpm = recent_tpm[-1]
             current_puffs = len([p for p in sample_data.get("puffs", []) if p and str(p).strip()])
 
             # Update statistics text - FIXED: Remove redundant headers
-            sample_info_text = f"Average TPM: {avg_tpm:.5f}\nLatest TPM: {latest_tpm:.5f}\nStd Dev (last 5 sessions): {statistics.stdev(tpm_values[-5:]) if len(tpm_values) >= 2 else 0:.6f}\nCurrent Puffs: {current_puffs}"
+            sample_info_text = f"Average TPM: {avg_tpm:.5f}\nLatest TPM: {latest_tpm:.5f}\nStd Dev (last 5 sessions): {statistics.stdev(recent_tpm) if len(recent_tpm) >= 2 else 0:.6f}\nCurrent Puffs: {current_puffs}"
 
             # Update sample information - FIXED: Remove redundant headers
             sample_info = self.header_data['samples'][current_tab] if current_tab < len(self.header_data.get('samples', [])) else {}
@@ -401,7 +433,7 @@ class DataCollectionHandlers:
                 debug_print(f"DEBUG: Clearing updating_notes flag and re-binding events for {current_sample_id}")
 
         # Update TPM plot for current sample
-        self.update_tpm_plot_for_current_sample()
+        self.schedule_tpm_plot_update()
 
         debug_print(f"DEBUG: Enhanced stats updated for {current_sample_id} with correct sample name: {actual_sample_name}")
 
@@ -535,8 +567,9 @@ class DataCollectionHandlers:
             if width_diff > threshold or height_diff > threshold:
                 debug_print(f"DEBUG: Significant size change detected - updating plot from {current_width:.2f}x{current_height:.2f} to {new_width:.2f}x{new_height:.2f}")
 
-                # Apply the new size
+                # Apply the new size and recompute the layout for it
                 self.stats_fig.set_size_inches(new_width, new_height)
+                self.stats_fig.tight_layout(pad=1.0)
 
                 # Redraw the canvas
                 self.stats_canvas.draw_idle()
@@ -745,6 +778,11 @@ class DataCollectionHandlers:
         """Handle window close event with auto-save and sample image transfer."""
         self.log("Window close event triggered", "debug")
 
+        # Let a save that is still writing the file finish first
+        if getattr(self, '_background_save_thread', None) is not None:
+            debug_print("DEBUG: Save in progress, ignoring window close")
+            return
+
         # Cancel auto-save timer
         if self.auto_save_timer:
             self.window.after_cancel(self.auto_save_timer)
@@ -755,13 +793,12 @@ class DataCollectionHandlers:
             if self.has_unsaved_changes:
                 if messagebox.askyesno("Save Changes",
                                      "You have unsaved changes. Save before closing?"):
-                    try:
-                        self.save_data(show_confirmation=False)
-                        self.result = "load_file"
-                    except Exception as e:
-                        messagebox.showerror("Save Error", f"Failed to save: {e}")
-                        return  # Don't close if save failed
+                    # The window closes (calling this again) once the save completes;
+                    # it stays open if the save fails
+                    self.save_data(exit_after=True, show_confirmation=False)
+                    return
                 else:
+                    self.discard_edit_journal()
                     self.result = "cancel"
             else:
                 self.result = "load_file" if self.last_save_time else "cancel"
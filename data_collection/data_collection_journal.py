@@ -0,0 +1,282 @@
+"""
+data_collection_journal.py
+Developed by Charlie Becquet
+Append-only edit journal for the data collection window.
+
+Rewriting the whole workbook on every autosave freezes the window for
+seconds on large files. Instead, the edits made since the last flush are
+appended to a small journal file (one JSON record per changed cell) and
+fsynced, which is near-instant and survives a crash. The workbook or
+.vap3 is only rewritten at an explicit save or on exit, after which the
+journal entries it now contains are dropped. A journal left behind by a
+crash is offered for replay the next time the same file and test are
+opened.
+"""
+
+import os
+import json
+import time
+import hashlib
+from utils import debug_print
+
+JOURNAL_VERSION = 1
+JOURNAL_FLUSH_DELAY_MS = 2000  # flush this long after the last edit
+
+# Per-sample fields that are derived from other columns or UI state
+UNJOURNALED_FIELDS = ("tpm", "avg_tpm", "current_row_index")
+
+
+def get_journal_dir():
+    """Return the directory holding data collection journals."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "journals")
+
+
+def get_journal_path(file_path, test_name):
+    """Return the journal path for a test in a file."""
+    key = f"{os.path.abspath(file_path)}|{test_name}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_journal_dir(), f"{digest}.journal")
+
+
+def snapshot_data(data):
+    """Copy the journaled fields of every sample."""
+    snapshot = {}
+    for sample_id, sample in data.items():
+        snapshot[sample_id] = {
+            field: list(value) if isinstance(value, list) else value
+            for field, value in sample.items()
+            if field not in UNJOURNALED_FIELDS and isinstance(value, (list, str))
+        }
+    return snapshot
+
+
+def diff_data(baseline, data):
+    """
+    Return journal records for every change between baseline and data, and bring baseline up to date.
+
+    Unchanged columns are skipped with a single list comparison, so the cost
+    is dominated by the number of changed cells.
+
+    Args:
+        baseline (dict): Snapshot from snapshot_data, updated in place
+        data (dict): Current sample data of the window
+
+    Returns:
+        list: Records of the form {"s": sample, "f": field, "r": row, "v": value};
+        {"s", "f", "n"} records resize a column and {"s", "f", "v"} set a text field
+    """
+    records = []
+    for sample_id, sample in data.items():
+        base_sample = baseline.setdefault(sample_id, {})
+        for field, value in sample.items():
+            if field in UNJOURNALED_FIELDS:
+                continue
+            old_value = base_sample.get(field)
+            if isinstance(value, list):
+                if value == old_value:
+                    continue
+                if not isinstance(old_value, list):
+                    old_value = []
+                if len(value) != len(old_value):
+                    records.append({"s": sample_id, "f": field, "n": len(value)})
+                for row, item in enumerate(value):
+                    if row < len(old_value):
+                        if item != old_value[row]:
+                            records.append({"s": sample_id, "f": field, "r": row, "v": item})
+                    elif item not in ("", None):
+                        # New rows are padded with "" on replay
+                        records.append({"s": sample_id, "f": field, "r": row, "v": item})
+                base_sample[field] = list(value)
+            elif isinstance(value, str) and value != old_value:
+                records.append({"s": sample_id, "f": field, "v": value})
+                base_sample[field] = value
+    return records
+
+
+def apply_records(data, records):
+    """Replay journal records onto the window's sample data."""
+    for record in records:
+        sample = data.get(record.get("s"))
+        field = record.get("f")
+        if sample is None or not field:
+            continue
+        if "n" in record:
+            values = sample.setdefault(field, [])
+            del values[record["n"]:]
+            values.extend([""] * (record["n"] - len(values)))
+        elif "r" in record:
+            values = sample.setdefault(field, [])
+            if record["r"] >= len(values):
+                values.extend([""] * (record["r"] + 1 - len(values)))
+            values[record["r"]] = record["v"]
+        else:
+            sample[field] = record["v"]
+
+
+class EditJournal:
+    """Write-ahead log of the cell edits made in one data collection session."""
+
+    def __init__(self, file_path, test_name):
+        """
+        Args:
+            file_path (str): Excel or .vap3 file being edited
+            test_name (str): Test (sheet) being collected
+        """
+        self.file_path = file_path
+        self.test_name = test_name
+        self.path = get_journal_path(file_path, test_name)
+        self.baseline = {}
+
+    def reset_baseline(self, data):
+        """Treat data as already journaled (or saved)."""
+        self.baseline = snapshot_data(data)
+
+    def exists(self):
+        """Return True if a journal with entries is on disk."""
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def size(self):
+        """Return the current journal size in bytes (0 if there is none)."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def flush(self, data):
+        """
+        Append the changes made since the last flush and fsync them.
+
+        Args:
+            data (dict): Current sample data of the window
+
+        Returns:
+            int: Number of records written
+        """
+        records = diff_data(self.baseline, data)
+        if records:
+            self._append(records)
+            debug_print(f"DEBUG: Journaled {len(records)} edits to {self.path}")
+        return len(records)
+
+    def _header(self):
+        return {"journal": JOURNAL_VERSION, "file": os.path.abspath(self.file_path),
+                "test": self.test_name, "created": time.time()}
+
+    def _append(self, records):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lines = [json.dumps(record, default=str) for record in records]
+        if not self.exists():
+            lines.insert(0, json.dumps(self._header()))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self):
+        """
+        Read the journal.
+
+        A record cut short by a crash ends the journal; everything before it
+        is returned.
+
+        Returns:
+            tuple: (header dict or None, list of records)
+        """
+        header, records = None, []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        debug_print(f"DEBUG: Journal {self.path} ends with an incomplete record at line {line_number + 1}")
+                        break
+                    if line_number == 0:
+                        if entry.get("journal") != JOURNAL_VERSION or entry.get("test") != self.test_name:
+                            debug_print(f"DEBUG: Ignoring journal {self.path} with unexpected header {entry}")
+                            return None, []
+                        header = entry
+                    else:
+                        records.append(entry)
+        except OSError:
+            pass
+        return header, records
+
+    def repair(self):
+        """
+        Cut a record left incomplete by a crash off the end of the journal.
+
+        read() stops at such a record, so edits appended after it would be
+        lost at the next recovery.
+
+        Returns:
+            bool: True if the journal was truncated
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return False
+
+        valid_end = 0
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            valid_end += len(line)
+        if valid_end == len(content):
+            return False
+
+        debug_print(f"DEBUG: Truncating incomplete record at byte {valid_end} of journal {self.path}")
+        with open(self.path, 'r+b') as f:
+            f.truncate(valid_end)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def compact_through(self, offset):
+        """
+        Drop the entries written before offset once the file contains them.
+
+        Entries appended after offset (edits made while the file was being
+        written) are kept under a new header.
+
+        Args:
+            offset (int): Journal size when the data written to the file was taken
+
+        Returns:
+            int: Number of records still in the journal
+        """
+        if not os.path.exists(self.path):
+            return 0
+        if offset <= 0:
+            return len(self.read()[1])
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        remaining = [line for line in tail.splitlines() if line.strip()]
+        if not remaining:
+            self.discard()
+            return 0
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(self._header()).encode('utf-8') + b"\n")
+            f.write(b"\n".join(remaining) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        return len(remaining)
+
+    def discard(self):
+        """Delete the journal."""
+        try:
+            os.remove(self.path)
+            debug_print(f"DEBUG: Discarded journal {self.path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            debug_print(f"DEBUG: Could not remove journal {self.path}: {e}")
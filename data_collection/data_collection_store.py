@@ -0,0 +1,194 @@
+"""
+data_collection_store.py
+Developed by Charlie Becquet
+Typed per-sample column store for the data collection window.
+
+The window keeps each sample's columns as lists of the strings shown in the
+sheet. SampleColumnStore holds parsed copies of the columns TPM depends on
+(puffs, before and after weight) together with the TPM values and running
+sums, so a cell edit only re-parses that cell, recomputes the TPM rows it
+affects and updates the average and standard deviation without rescanning
+the sample.
+"""
+
+import bisect
+import math
+
+# Columns whose values feed the TPM calculation
+TPM_INPUT_COLUMNS = ("puffs", "before_weight", "after_weight")
+
+
+def parse_float(value):
+    """Return value as a float, or None for empty or non-numeric cells."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_puffs(value):
+    """Return a puff count as an int, or None for empty, non-numeric or fractional cells."""
+    number = parse_float(value)
+    if number is None or not math.isfinite(number) or not number.is_integer():
+        return None
+    return int(number)
+
+
+class SampleColumnStore:
+    """Parsed puffs/weights and incrementally maintained TPM statistics for one sample."""
+
+    def __init__(self, sample_data):
+        """
+        Build the store from a sample's data lists.
+
+        TPM values are taken from sample_data["tpm"] as they are, so the store
+        starts out agreeing with whatever the last full calculation produced.
+
+        Args:
+            sample_data (dict): One entry of DataCollectionWindow.data
+        """
+        self.puffs = [parse_puffs(value) for value in sample_data.get("puffs", [])]
+        row_count = len(self.puffs)
+        self.before_weight = self._column(sample_data, "before_weight", row_count)
+        self.after_weight = self._column(sample_data, "after_weight", row_count)
+        self.tpm = [None] * row_count
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.sorted_tpm = []  # all TPM values, ascending
+        self.version = 0  # bumped whenever puffs or TPM change, so views can skip redraws
+
+        existing_tpm = sample_data.get("tpm", [])
+        for row in range(min(row_count, len(existing_tpm))):
+            self._set_tpm(row, parse_float(existing_tpm[row]))
+
+    @staticmethod
+    def _column(sample_data, column, row_count):
+        values = [parse_float(value) for value in sample_data.get(column, [])[:row_count]]
+        return values + [None] * (row_count - len(values))
+
+    def __len__(self):
+        return len(self.puffs)
+
+    def set_value(self, column, row, value):
+        """
+        Store the new value of a cell.
+
+        Args:
+            column (str): Internal column name (e.g. "after_weight")
+            row (int): Row index
+            value: Cell value as entered
+
+        Returns:
+            set: Rows whose TPM may have changed
+        """
+        if column == "puffs":
+            self.puffs[row] = parse_puffs(value)
+            self.version += 1
+            # The next row's puff interval starts at this row
+            return {row, row + 1} if row + 1 < len(self.puffs) else {row}
+        if column == "before_weight":
+            self.before_weight[row] = parse_float(value)
+            return {row}
+        if column == "after_weight":
+            self.after_weight[row] = parse_float(value)
+            return {row}
+        return set()
+
+    def compute_tpm(self, row):
+        """Return the TPM (mg/puff) of a row, or None when it cannot be calculated."""
+        before_weight = self.before_weight[row]
+        after_weight = self.after_weight[row]
+        if before_weight is None or after_weight is None or before_weight <= after_weight:
+            return None
+
+        current_puff = self.puffs[row]
+        if current_puff is None:
+            return None
+        if row == 0:
+            puffs_in_interval = current_puff
+        else:
+            previous_puff = self.puffs[row - 1]
+            if previous_puff is None:
+                return None
+            puffs_in_interval = current_puff - previous_puff
+        if puffs_in_interval <= 0:
+            return None
+
+        # Same rounding as DataCollectionData.calculate_tpm
+        return round((before_weight - after_weight) * 1000 / puffs_in_interval, 3)
+
+    def update_tpm(self, rows):
+        """
+        Recompute TPM for the given rows.
+
+        Returns:
+            list: (row, tpm) for rows whose TPM changed, in row order
+        """
+        changed = []
+        for row in sorted(rows):
+            if 0 <= row < len(self.tpm):
+                value = self.compute_tpm(row)
+                if value != self.tpm[row]:
+                    self._set_tpm(row, value)
+                    changed.append((row, value))
+        return changed
+
+    def _set_tpm(self, row, value):
+        old_value = self.tpm[row]
+        if old_value is not None:
+            self.count -= 1
+            self.total -= old_value
+            self.total_sq -= old_value * old_value
+            del self.sorted_tpm[bisect.bisect_left(self.sorted_tpm, old_value)]
+        if value is not None:
+            self.count += 1
+            self.total += value
+            self.total_sq += value * value
+            bisect.insort(self.sorted_tpm, value)
+        if self.count == 0:
+            # Drop accumulated rounding error
+            self.total = self.total_sq = 0.0
+        self.tpm[row] = value
+        self.version += 1
+
+    @property
+    def mean(self):
+        """Average TPM over all rows with a value."""
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """Sample standard deviation of all TPM values."""
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def recent_tpm(self, limit):
+        """Return up to limit of the last TPM values, oldest first."""
+        values = []
+        for value in reversed(self.tpm):
+            if value is not None:
+                values.append(value)
+                if len(values) == limit:
+                    break
+        return values[::-1]
+
+    def largest_tpm(self, limit):
+        """Return up to limit of the largest TPM values, largest first."""
+        return self.sorted_tpm[:-limit - 1:-1] if limit > 0 else []
+
+    def tpm_points(self):
+        """Return (puffs, tpm) lists of the rows that have both, for plotting."""
+        puffs, tpm = [], []
+        for puff, value in zip(self.puffs, self.tpm):
+            if value is not None and puff is not None:
+                puffs.append(puff)
+                tpm.append(value)
+        return puffs, tpm
@@ -1401,5 +1401,6 @@ Developed by Charlie Becquet
                 return
 
         debug_print("DEBUG: Exiting without saving")
+        self.discard_edit_journal()
         self.result = "cancel"
         self.window.destroy()
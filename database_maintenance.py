@@ -0,0 +1,355 @@
+"""
+database_maintenance.py
+Developed by Charlie Becquet.
+Maintenance for the DataViewer database: WAL checkpoints, space reclamation,
+statistics and integrity checks.
+
+The database runs in WAL mode, so without checkpoints the -wal file keeps
+growing, and deleted VAP3 blobs leave free pages that are never returned to
+the filesystem. DatabaseService runs a light pass on its writer thread every
+CHECKPOINT_INTERVAL seconds:
+
+- a PASSIVE checkpoint, or TRUNCATE once the -wal file is larger than
+  WAL_TRUNCATE_BYTES;
+- an incremental vacuum of up to INCREMENTAL_VACUUM_PAGES free pages when the
+  free list holds more than FREELIST_VACUUM_RATIO of the file.
+
+Once every FULL_MAINTENANCE_INTERVAL (tracked in the database, so several
+clients of the shared database don't repeat it) the pass also runs ANALYZE and
+a quick integrity check, and migrates databases created without
+auto_vacuum=INCREMENTAL when they are small enough to rewrite quickly (never
+the network database, where the rewrite would hold the lock for every client;
+use "Run Full Maintenance" there).
+"""
+
+import os
+import sqlite3
+import time
+import traceback
+
+from database_manager import retry_on_lock
+from tracing import traced, current_span
+from utils import debug_print
+
+CHECKPOINT_INTERVAL = 300.0  # seconds between scheduled passes
+FULL_MAINTENANCE_INTERVAL = 24 * 3600.0  # seconds between ANALYZE / integrity check runs
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024  # truncate the -wal file once it is larger than this
+INCREMENTAL_VACUUM_PAGES = 2048  # free pages returned per pass
+FREELIST_VACUUM_RATIO = 0.05  # vacuum when free pages exceed this share of the file
+AUTO_VACUUM_MIGRATE_MAX_BYTES = 512 * 1024 * 1024  # rewrite (VACUUM) automatically only below this size
+
+AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def _create_state_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS maintenance_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    ''')
+
+
+def _get_state(conn, key, default=None):
+    row = conn.execute("SELECT value FROM maintenance_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_state(conn, key, value):
+    retry_on_lock(conn.execute, "INSERT OR REPLACE INTO maintenance_state (key, value) VALUES (?, ?)", (key, str(value)))
+    retry_on_lock(conn.commit)
+
+
+def get_wal_size(db_path):
+    """Return the size in bytes of db_path's -wal file (0 if there is none)."""
+    try:
+        return os.path.getsize(db_path + "-wal")
+    except OSError:
+        return 0
+
+
+@traced("database_maintenance.checkpoint", category="db")
+def checkpoint(conn, mode="PASSIVE"):
+    """
+    Copy WAL content back into the database file.
+
+    Args:
+        conn (sqlite3.Connection): Write connection (no open transaction)
+        mode (str): PASSIVE (never waits), FULL, RESTART or TRUNCATE (also shrinks the -wal file)
+
+    Returns:
+        dict: busy (bool), wal_pages and checkpointed_pages
+    """
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    busy, wal_pages, checkpointed_pages = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    result = {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed_pages": checkpointed_pages}
+    current_span().set("mode", mode)
+    current_span().set("checkpointed_pages", checkpointed_pages)
+    debug_print(f"DEBUG: {mode} checkpoint: {checkpointed_pages}/{wal_pages} WAL pages copied"
+                f"{' (readers busy)' if busy else ''}")
+    return result
+
+
+def get_auto_vacuum_mode(conn):
+    """Return the database's auto_vacuum mode: NONE, FULL or INCREMENTAL."""
+    return AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "NONE")
+
+
+@traced("database_maintenance.migrate_to_incremental_vacuum", category="db")
+def migrate_to_incremental_vacuum(conn):
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL.
+
+    This requires a VACUUM, which rewrites the whole file and holds the write
+    lock while it runs, so call it when no one else is writing.
+
+    Returns:
+        bool: True if the database was migrated, False if it already was incremental
+    """
+    if get_auto_vacuum_mode(conn) == "INCREMENTAL":
+        return False
+    started = time.perf_counter()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    retry_on_lock(conn.execute, "VACUUM")
+    debug_print(f"DEBUG: Migrated database to auto_vacuum=INCREMENTAL in {time.perf_counter() - started:.1f}s")
+    return True
+
+
+@traced("database_maintenance.incremental_vacuum", category="db")
+def incremental_vacuum(conn, max_pages=INCREMENTAL_VACUUM_PAGES):
+    """
+    Return up to max_pages free pages to the filesystem (auto_vacuum=INCREMENTAL only).
+
+    Returns:
+        int: Number of pages freed
+    """
+    if get_auto_vacuum_mode(conn) != "INCREMENTAL":
+        return 0
+    before = _pragma(conn, "freelist_count")
+    # incremental_vacuum yields one row per freed page; they must be stepped through
+    retry_on_lock(lambda: conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall())
+    retry_on_lock(conn.commit)
+    freed = before - _pragma(conn, "freelist_count")
+    current_span().set("freed_pages", freed)
+    if freed:
+        debug_print(f"DEBUG: Incremental vacuum freed {freed} pages")
+    return freed
+
+
+@traced("database_maintenance.analyze", category="db")
+def analyze(conn):
+    """Refresh the query planner statistics."""
+    retry_on_lock(conn.execute, "ANALYZE")
+    retry_on_lock(conn.commit)
+
+
+@traced("database_maintenance.check_integrity", category="db")
+def check_integrity(conn, quick=True):
+    """
+    Check the database structure and foreign keys.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        quick (bool): PRAGMA quick_check (O(N)) instead of the full integrity_check
+
+    Returns:
+        list: Problems found (empty if the database is healthy)
+    """
+    pragma = "quick_check" if quick else "integrity_check"
+    problems = [row[0] for row in conn.execute(f"PRAGMA {pragma}").fetchall() if row[0] != "ok"]
+    for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check").fetchall():
+        problems.append(f"{table} row {rowid} references a missing {parent} row")
+    if problems:
+        debug_print(f"ERROR: Database {pragma} found {len(problems)} problem(s): {problems[:5]}")
+    return problems
+
+
+@traced("database_maintenance.get_storage_stats", category="db")
+def get_storage_stats(conn, db_path=None):
+    """
+    Describe how the database file's space is used.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        db_path (str, optional): Database path, for the file and -wal sizes
+
+    Returns:
+        dict: path, page_size, page_count, freelist_count, file_bytes, free_bytes,
+              wal_bytes, auto_vacuum, tables ({name: bytes}, including indexes
+              when the dbstat table is available) and blob totals
+    """
+    page_size = _pragma(conn, "page_size")
+    page_count = _pragma(conn, "page_count")
+    freelist_count = _pragma(conn, "freelist_count")
+
+    tables = {}
+    try:
+        for name, size in conn.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC"
+        ):
+            tables[name] = size
+    except sqlite3.OperationalError:
+        # SQLite built without dbstat: only the blob totals below are reported
+        pass
+
+    blob_bytes = {}
+    for table, column in (("files", "file_content"), ("images", "image_data")):
+        try:
+            count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(LENGTH({column})), 0) FROM {table}").fetchone()
+            blob_bytes[table] = {"rows": count, "bytes": total}
+        except sqlite3.OperationalError:
+            pass
+
+    return {
+        "path": db_path,
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist_count,
+        "wal_bytes": get_wal_size(db_path) if db_path else 0,
+        "auto_vacuum": get_auto_vacuum_mode(conn),
+        "tables": tables,
+        "blobs": blob_bytes,
+    }
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_storage_report(stats):
+    """Render get_storage_stats() output as readable text."""
+    lines = [
+        f"Database: {stats.get('path') or 'unknown'}",
+        f"Database file: {_format_bytes(stats['file_bytes'])} "
+        f"({stats['page_count']} pages of {stats['page_size']} bytes)",
+        f"Free pages: {stats['freelist_count']} ({_format_bytes(stats['free_bytes'])})",
+        f"WAL file: {_format_bytes(stats['wal_bytes'])}",
+        f"Auto-vacuum: {stats['auto_vacuum']}",
+    ]
+    for table, info in stats["blobs"].items():
+        lines.append(f"{table}: {info['rows']} rows, {_format_bytes(info['bytes'])} of blob data")
+    if stats["tables"]:
+        lines.append("")
+        lines.append("Space by table/index:")
+        for name, size in stats["tables"].items():
+            lines.append(f"  {name}: {_format_bytes(size)}")
+    return "\n".join(lines)
+
+
+@traced("database_maintenance.run_maintenance", category="db")
+def run_maintenance(conn, db_path, full=False):
+    """
+    Run one maintenance pass (see the module docstring).
+
+    Args:
+        conn (sqlite3.Connection): Write connection (no open transaction)
+        db_path (str): Database path
+        full (bool): Also run ANALYZE and the integrity check even if not due
+
+    Returns:
+        dict: What was done (checkpoint, freed_pages, migrated, analyzed, problems)
+    """
+    report = {"checkpoint": None, "freed_pages": 0, "migrated": False, "analyzed": False, "problems": None}
+    try:
+        _create_state_table(conn)
+        conn.commit()
+
+        mode = "TRUNCATE" if get_wal_size(db_path) > WAL_TRUNCATE_BYTES else "PASSIVE"
+        report["checkpoint"] = checkpoint(conn, mode)
+
+        page_count = _pragma(conn, "page_count")
+        freelist_count = _pragma(conn, "freelist_count")
+        if page_count and freelist_count / page_count > FREELIST_VACUUM_RATIO:
+            report["freed_pages"] = incremental_vacuum(conn)
+
+        last_full = float(_get_state(conn, "last_full_maintenance", 0))
+        if full or time.time() - last_full >= FULL_MAINTENANCE_INTERVAL:
+            file_bytes = page_count * _pragma(conn, "page_size")
+            if get_auto_vacuum_mode(conn) != "INCREMENTAL":
+                from database_mirror import is_shared_database_path
+                if full or (file_bytes <= AUTO_VACUUM_MIGRATE_MAX_BYTES and not is_shared_database_path(db_path)):
+                    report["migrated"] = migrate_to_incremental_vacuum(conn)
+                    report["freed_pages"] += freelist_count
+                else:
+                    debug_print(f"DEBUG: Database {db_path} ({_format_bytes(file_bytes)}) has no incremental auto-vacuum; "
+                                f"run full maintenance to migrate it")
+
+            analyze(conn)
+            report["analyzed"] = True
+            report["problems"] = check_integrity(conn, quick=not full)
+            _set_state(conn, "last_full_maintenance", time.time())
+
+        debug_print(f"DEBUG: Database maintenance pass done: {report}")
+    except Exception as e:
+        debug_print(f"ERROR: Database maintenance failed: {e}")
+        traceback.print_exc()
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+    return report
+
+
+def show_maintenance_dialog(parent, service):
+    """
+    Show storage statistics for the database behind service, with a button for a full maintenance pass.
+
+    Args:
+        parent (tk.Widget): Parent window
+        service (DatabaseService): Service whose database is inspected
+    """
+    import tkinter as tk
+    from tkinter import messagebox
+    from utils import FONT
+
+    dialog = tk.Toplevel(parent)
+    dialog.title("Database Storage")
+    dialog.transient(parent)
+
+    text = tk.Text(dialog, width=70, height=24, font=("Courier New", 10))
+    text.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def show_text(content):
+        if not dialog.winfo_exists():
+            return
+        text.config(state="normal")
+        text.delete("1.0", tk.END)
+        text.insert(tk.END, content)
+        text.config(state="disabled")
+
+    def load_stats():
+        show_text("Reading database statistics...")
+        service.read("get_storage_stats",
+                     callback=lambda stats: show_text(format_storage_report(stats)),
+                     error_callback=lambda error: show_text(f"Failed to read statistics: {error}"))
+
+    def on_maintenance_done(report):
+        if report.get("problems"):
+            messagebox.showwarning("Database Maintenance",
+                                   "Integrity check found problems:\n\n" + "\n".join(report["problems"][:10]),
+                                   parent=dialog if dialog.winfo_exists() else parent)
+        load_stats()
+
+    def run_full_maintenance():
+        show_text("Running maintenance (checkpoint, vacuum, ANALYZE, integrity check)...")
+        service.write("run_maintenance", True, transaction=False,
+                      callback=on_maintenance_done,
+                      error_callback=lambda error: show_text(f"Maintenance failed: {error}"))
+
+    button_frame = tk.Frame(dialog)
+    button_frame.pack(fill="x", padx=10, pady=(0, 10))
+    tk.Button(button_frame, text="Run Full Maintenance", command=run_full_maintenance, font=FONT).pack(side="left")
+    tk.Button(button_frame, text="Close", command=dialog.destroy, font=FONT).pack(side="right")
+
+    load_stats()
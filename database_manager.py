@@ -2,11 +2,168 @@
 import sqlite3
 import json
 import datetime
+import random
 import sys
 import time
 
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 from utils import debug_print
+from tracing import traced, current_span
+from image_ingest import read_image_for_storage
+from database_search import (
+    SEARCH_TABLE,
+    build_match_query,
+    create_search_index,
+    has_search_index,
+    index_file,
+)
+
+# Retry policy for "database is locked" errors (shared Synology database, several writers)
+LOCK_RETRY_ATTEMPTS = 6
+LOCK_RETRY_BASE_DELAY = 0.1  # seconds, doubled after every attempt
+LOCK_RETRY_MAX_DELAY = 3.0  # seconds
+
+# Seconds SQLite itself waits on a lock before raising; kept short so a
+# whole transaction is retried (with backoff) instead of blocking for long
+BUSY_TIMEOUT = 2.0
+
+# Rows per "WHERE id IN (...)" lookup (SQLite's default variable limit is 999)
+ID_CHUNK_SIZE = 500
+
+BLOB_CHUNK_SIZE = 1024 * 1024  # bytes copied per incremental BLOB write
+
+
+def is_lock_error(error):
+    """Return True if a sqlite3 error means another connection holds the lock."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message or "database table is locked" in message
+
+
+def retry_on_lock(operation, *args, attempts=LOCK_RETRY_ATTEMPTS, base_delay=LOCK_RETRY_BASE_DELAY, **kwargs):
+    """
+    Call operation(*args, **kwargs), retrying with jittered exponential backoff while the database is locked.
+
+    Only wrap operations that are safe to repeat on their own: a whole
+    transaction, a statement that starts one, a commit or BEGIN. Retrying a
+    single statement in the middle of a transaction would re-run just that
+    statement; use DatabaseManager.run_transaction for units of work.
+
+    Args:
+        operation (callable): Function to call, e.g. cursor.execute or conn.commit
+        attempts (int): Maximum number of attempts
+        base_delay (float): Delay before the first retry in seconds
+
+    Returns:
+        The return value of operation
+    """
+    delay = base_delay
+    for attempt in range(attempts):
+        try:
+            return operation(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e) or attempt == attempts - 1:
+                raise
+            sleep_time = min(delay, LOCK_RETRY_MAX_DELAY) * (0.5 + random.random())
+            debug_print(f"DEBUG: Database locked, retry {attempt + 1}/{attempts - 1} in {sleep_time:.2f}s")
+            time.sleep(sleep_time)
+            delay *= 2
+
+
+def open_database_connection(db_path, read_only=False, timeout=BUSY_TIMEOUT):
+    """
+    Open a connection configured for the (possibly network-hosted) DataViewer database.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        read_only (bool): Reject writes on this connection (PRAGMA query_only)
+        timeout (float): Seconds SQLite waits on a lock before raising
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    conn = sqlite3.connect(
+        db_path,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=timeout,
+        check_same_thread=False  # Allow multi-threading
+    )
+    conn.execute("PRAGMA foreign_keys = ON")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        # New databases can hand space from deleted files back to the filesystem
+        # (see database_maintenance); must precede the first write, no effect on existing ones
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")  # Better for network/concurrent access
+    conn.execute("PRAGMA synchronous = NORMAL")  # Balance safety vs performance
+    conn.execute("PRAGMA cache_size = 10000")  # Larger cache for network latency
+    conn.execute("PRAGMA temp_store = MEMORY")  # Use memory for temp storage
+    return conn
+
+def open_blob_source(source):
+    """
+    Open file content (a path or a seekable binary file object) for streaming into a BLOB.
+
+    Args:
+        source (str or file object): File path, or e.g. a buffer from vap_file_manager.create_vap3_buffer
+
+    Returns:
+        tuple: (stream, size, owned); the caller closes stream when owned is True
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"File not found: {source}")
+        stream = open(source, 'rb')
+        owned = True
+    else:
+        stream = source
+        owned = False
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return stream, size, owned
+
+
+def write_blob(conn, table, column, rowid, stream, chunk_size=BLOB_CHUNK_SIZE):
+    """
+    Copy stream into a BLOB cell that was inserted as zeroblob(size), one chunk at a time.
+
+    Uses incremental BLOB I/O (Connection.blobopen, Python 3.11+), so the
+    content is never held in memory whole; older Pythons fall back to one UPDATE.
+    Must run inside the transaction that inserted the row.
+    """
+    stream.seek(0)
+    if hasattr(conn, "blobopen"):
+        with conn.blobopen(table, column, rowid) as blob:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                blob.write(chunk)
+    else:
+        conn.execute(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", (stream.read(), rowid))
+
+
+def log_write_throughput(label, rows, started):
+    """
+    Log rows/sec for a batched write and record it on the current trace span.
+
+    Args:
+        label (str): What was written
+        rows (int): Rows inserted or deleted
+        started (float): time.perf_counter() when the write started
+
+    Returns:
+        float: Rows per second
+    """
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else float(rows)
+    span = current_span()
+    span.set("rows", rows)
+    span.set("rows_per_sec", round(rate, 1))
+    debug_print(f"DEBUG: {label}: {rows} rows in {elapsed:.3f}s ({rate:.0f} rows/sec)")
+    return rate
+
 
 def get_database_path():
     """
@@ -199,19 +356,7 @@ class DatabaseManager:
                     debug_print(f"DEBUG: Database connection attempt {attempt + 1}/{max_retries}")
 
                     # Use WAL mode for better network performance and concurrent access
-                    self.conn = sqlite3.connect(
-                        db_path,
-                        detect_types=sqlite3.PARSE_DECLTYPES,
-                        timeout=30.0,  # 30 second timeout for network operations
-                        check_same_thread=False  # Allow multi-threading
-                    )
-
-                    # Configure for network use
-                    self.conn.execute("PRAGMA foreign_keys = ON")
-                    self.conn.execute("PRAGMA journal_mode = WAL")  # Better for network/concurrent access
-                    self.conn.execute("PRAGMA synchronous = NORMAL")  # Balance safety vs performance
-                    self.conn.execute("PRAGMA cache_size = 10000")  # Larger cache for network latency
-                    self.conn.execute("PRAGMA temp_store = MEMORY")  # Use memory for temp storage
+                    self.conn = open_database_connection(db_path)
 
                     # Test the connection
                     self.conn.execute("SELECT 1").fetchone()
@@ -290,19 +435,141 @@ class DatabaseManager:
         )
         ''')
 
+        # Source files each stored file was ingested from, keyed by content hash,
+        # so byte-identical inputs are recognised instead of stored again
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            source_path TEXT,
+            display_filename TEXT,
+            linked_at TIMESTAMP NOT NULL,
+            FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
+        )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_sources_hash ON file_sources (content_hash)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_sources_file ON file_sources (file_id)")
+
+        # Full-text search over filenames, sheets, sample IDs, header fields and notes
+        create_search_index(self.conn)
+
         self.conn.commit()
 
+    @classmethod
+    def from_connection(cls, conn, db_path):
+        """
+        Create a DatabaseManager around an existing connection without path detection.
+
+        Used by DatabaseService so its worker threads can run the normal
+        DatabaseManager methods on their own connections.
+
+        Args:
+            conn (sqlite3.Connection): Open, configured connection
+            db_path (str): Path the connection was opened on
+
+        Returns:
+            DatabaseManager: Manager bound to conn
+        """
+        manager = cls.__new__(cls)
+        manager.conn = conn
+        manager.db_path = db_path
+        return manager
+
     def _check_connection(self):
         """Ensure the database connection is open."""
         if self.conn is None:
             raise ConnectionError("Database connection is not initialized")
 
+    def _execute(self, cursor, sql, params=()):
+        """
+        Execute a statement, retrying while the database is locked if it starts its own transaction.
+
+        Inside an open transaction a lock error propagates, so the caller (see
+        run_transaction) retries the whole unit of work rather than one statement.
+        """
+        if self.conn.in_transaction:
+            return cursor.execute(sql, params)
+        return retry_on_lock(cursor.execute, sql, params)
+
+    def _executemany(self, cursor, sql, rows):
+        """Execute a statement for every row (a list, so it can be retried); retried like _execute."""
+        if self.conn.in_transaction:
+            return cursor.executemany(sql, rows)
+        return retry_on_lock(cursor.executemany, sql, rows)
+
+    # Open unit_of_work blocks; while > 0, _commit leaves committing to the outermost block
+    _transaction_depth = 0
+
+    def _commit(self):
+        """Commit, retrying while the database is locked (deferred inside unit_of_work)."""
+        if self._transaction_depth:
+            return
+        retry_on_lock(self.conn.commit)
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Group writes into one transaction, i.e. one commit and fsync on the shared database.
+
+        Store and delete methods called inside the block don't commit on their
+        own; everything is committed when the outermost block exits and rolled
+        back if it raises. The write lock is taken up front (BEGIN IMMEDIATE).
+
+        Yields:
+            sqlite3.Cursor: Cursor inside the transaction
+        """
+        self._check_connection()
+        outermost = self._transaction_depth == 0
+        if outermost:
+            retry_on_lock(self.conn.execute, "BEGIN IMMEDIATE")
+        self._transaction_depth += 1
+        try:
+            yield self.conn.cursor()
+        except BaseException:
+            self._transaction_depth -= 1
+            if outermost and self.conn.in_transaction:
+                try:
+                    self.conn.rollback()
+                except sqlite3.Error:
+                    pass  # Ignore rollback errors
+            raise
+        self._transaction_depth -= 1
+        if outermost:
+            retry_on_lock(self.conn.commit)
+
+    def run_transaction(self, work, *args):
+        """
+        Run work(*args) as one transaction, retrying all of it while the database is locked.
+
+        Commits inside work are deferred to the end (see unit_of_work); a lock
+        error anywhere rolls the transaction back and work is run again with
+        backoff. Inside an already open unit_of_work, work just joins it.
+
+        Args:
+            work (callable): Function doing the reads and writes of the unit of work
+            *args: Arguments for work
+
+        Returns:
+            The return value of work
+        """
+        if self._transaction_depth:
+            return work(*args)
+
+        def attempt():
+            with self.unit_of_work():
+                return work(*args)
+
+        return retry_on_lock(attempt)
+
+    @traced("DatabaseManager.store_vap3_file", category="db")
     def store_vap3_file(self, file_path, meta_data):
         """
         Store a VAP3 file in the database.
 
         Args:
-            file_path (str): Path to the temporary VAP3 file
+            file_path (str or file object): Path to the VAP3 file, or a seekable binary
+                file object holding it (streamed in without an intermediate copy)
             meta_data (dict): Dictionary containing file metadata, including display_filename
 
         Returns:
@@ -311,49 +578,147 @@ class DatabaseManager:
         try:
             self._check_connection()
 
-            # Verify file exists
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
+            cursor = self.conn.cursor()
+            file_id, filename = self._insert_file(cursor, file_path, meta_data)
+            self._commit()
 
-            # Read the file content
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
+            debug_print(f"File stored in database with ID {file_id} and filename '{filename}'")
+            return file_id
+
+        except Exception as e:
+            if hasattr(self, 'conn') and self.conn is not None:
+                try:
+                    self.conn.rollback()
+                except sqlite3.Error:
+                    pass  # Ignore rollback errors
+            print(f"Error storing file in database: {e}")
+            raise
+
+    def _insert_file(self, cursor, source, meta_data):
+        """
+        Insert a VAP3 file row with its search index and source entries (without committing).
+
+        The content is streamed into a zeroblob placeholder in chunks, so only
+        one chunk of it is in memory at a time.
+
+        Args:
+            cursor (sqlite3.Cursor): Cursor inside the write transaction
+            source (str or file object): VAP3 file path or seekable binary file object
+            meta_data (dict): File metadata
+
+        Returns:
+            tuple: (file_id, filename)
+        """
+        stream, size, owned = open_blob_source(source)
+        try:
+            current_span().add_bytes(size)
 
             # Use the display filename from meta_data instead of the temp filename
             filename = meta_data.get('display_filename')
             if not filename:
                 # Fallback only if display_filename isn't provided
-                filename = os.path.basename(file_path)
+                filename = os.path.basename(source) if owned else "untitled.vap3"
 
             # Print debug info before database operation
-            debug_print(f"Storing file: {filename} (from {file_path})")
+            debug_print(f"Storing file: {filename} ({size} bytes from {source if owned else 'buffer'})")
             debug_print(f"Meta data keys: {list(meta_data.keys())}")
 
             # Convert meta_data to JSON for storage
             meta_data_json = json.dumps(meta_data)
 
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "INSERT INTO files (filename, file_content, meta_data, created_at) VALUES (?, ?, ?, ?)",
-                (filename, file_content, meta_data_json, datetime.datetime.now())
+            self._execute(cursor,
+                "INSERT INTO files (filename, file_content, meta_data, created_at) VALUES (?, zeroblob(?), ?, ?)",
+                (filename, size, meta_data_json, datetime.datetime.now())
             )
-            self.conn.commit()
 
             # Get the ID of the newly inserted record
             file_id = cursor.lastrowid
+            write_blob(self.conn, "files", "file_content", file_id, stream)
+
+            # Index in the same transaction so search never sees a half-stored file
+            self._index_for_search(cursor, file_id, filename, meta_data, stream)
+            self._record_source(cursor, file_id, filename, meta_data)
+            return file_id, filename
+        finally:
+            if owned:
+                stream.close()
+
+    @traced("DatabaseManager.store_files", category="db")
+    def store_files(self, entries):
+        """
+        Store files together with their sheet and image rows in a single transaction.
 
-            debug_print(f"File stored in database with ID {file_id} and filename '{filename}'")
-            return file_id
+        Args:
+            entries (list): One dict per file with
+                source (str or file object): VAP3 file path or seekable binary file object
+                meta_data (dict): File metadata, including display_filename
+                sheets (list, optional): (sheet_name, is_plotting, is_empty) tuples
+                images (list, optional): (sheet_name, image_path, crop_enabled) tuples
 
+        Returns:
+            list: IDs of the new file records, in entry order
+        """
+        started = time.perf_counter()
+        file_ids = []
+        rows = 0
+        try:
+            with self.unit_of_work() as cursor:
+                for entry in entries:
+                    file_id, filename = self._insert_file(cursor, entry['source'], entry['meta_data'])
+                    file_ids.append(file_id)
+
+                    sheet_rows = [
+                        (file_id, sheet_name, 1 if is_plotting else 0, 1 if is_empty else 0)
+                        for sheet_name, is_plotting, is_empty in entry.get('sheets') or ()
+                    ]
+                    if sheet_rows:
+                        self._executemany(cursor,
+                            "INSERT INTO sheets (file_id, sheet_name, is_plotting, is_empty) VALUES (?, ?, ?, ?)",
+                            sheet_rows
+                        )
+
+                    image_rows = []
+                    for sheet_name, image_path, crop_enabled in entry.get('images') or ():
+                        if not os.path.exists(image_path):
+                            raise FileNotFoundError(f"Image not found: {image_path}")
+                        image_data, image_name = read_image_for_storage(image_path)
+                        current_span().add_bytes(len(image_data))
+                        image_rows.append((file_id, sheet_name, image_name, image_data,
+                                           1 if crop_enabled else 0))
+                    if image_rows:
+                        self._executemany(cursor,
+                            "INSERT INTO images (file_id, sheet_name, image_path, image_data, crop_enabled) VALUES (?, ?, ?, ?, ?)",
+                            image_rows
+                        )
+
+                    rows += 1 + len(sheet_rows) + len(image_rows)
+                    debug_print(f"DEBUG: Queued file '{filename}' (ID {file_id}) with {len(sheet_rows)} sheets, {len(image_rows)} images")
         except Exception as e:
-            if hasattr(self, 'conn') and self.conn is not None:
-                try:
-                    self.conn.rollback()
-                except sqlite3.Error:
-                    pass  # Ignore rollback errors
-            print(f"Error storing file in database: {e}")
+            print(f"Error storing files in database: {e}")
             raise
 
+        log_write_throughput(f"Stored {len(file_ids)} file(s)", rows, started)
+        return file_ids
+
+    def _index_for_search(self, cursor, file_id, filename, meta_data, file_content=None, sheet_names=None):
+        """Add a file to the search index; a missing index never blocks storing the file."""
+        try:
+            index_file(cursor, file_id, filename, meta_data, file_content, sheet_names)
+        except sqlite3.OperationalError as e:
+            if is_lock_error(e):
+                raise
+            debug_print(f"DEBUG: File {file_id} not added to search index: {e}")
+
+    def _record_source(self, cursor, file_id, filename, meta_data):
+        """Add the source file's content hash (meta_data['source_hash']) to the file_sources index."""
+        content_hash = meta_data.get('source_hash')
+        if content_hash:
+            self._execute(cursor,
+                "INSERT INTO file_sources (file_id, content_hash, source_path, display_filename, linked_at) VALUES (?, ?, ?, ?, ?)",
+                (file_id, content_hash, meta_data.get('original_path'), filename, datetime.datetime.now())
+            )
+
+    @traced("DatabaseManager.store_sheet_info", category="db")
     def store_sheet_info(self, file_id, sheet_name, is_plotting, is_empty):
         """
         Store sheet information in the database.
@@ -368,11 +733,11 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            cursor.execute(
+            self._execute(cursor,
                 "INSERT INTO sheets (file_id, sheet_name, is_plotting, is_empty) VALUES (?, ?, ?, ?)",
                 (file_id, sheet_name, 1 if is_plotting else 0, 1 if is_empty else 0)
             )
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except Exception as e:
             if self.conn is not None:
@@ -380,6 +745,7 @@ class DatabaseManager:
             print(f"Error storing sheet info: {e}")
             raise
 
+    @traced("DatabaseManager.store_image", category="db")
     def store_image(self, file_id, image_path, sheet_name, crop_enabled):
         """
         Store an image in the database.
@@ -397,16 +763,16 @@ class DatabaseManager:
             if not os.path.exists(image_path):
                 raise FileNotFoundError(f"Image not found: {image_path}")
 
-            # Read the image data
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
+            # Read the image's working copy (capped resolution, recompressed)
+            image_data, image_name = read_image_for_storage(image_path)
+            current_span().add_bytes(len(image_data))
 
             cursor = self.conn.cursor()
-            cursor.execute(
+            self._execute(cursor,
                 "INSERT INTO images (file_id, sheet_name, image_path, image_data, crop_enabled) VALUES (?, ?, ?, ?, ?)",
-                (file_id, sheet_name, os.path.basename(image_path), image_data, 1 if crop_enabled else 0)
+                (file_id, sheet_name, image_name, image_data, 1 if crop_enabled else 0)
             )
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except Exception as e:
             if self.conn is not None:
@@ -414,6 +780,7 @@ class DatabaseManager:
             print(f"Error storing image: {e}")
             raise
 
+    @traced("DatabaseManager.list_files", category="db")
     def list_files(self):
         """
         List all files stored in the database.
@@ -425,8 +792,9 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            cursor.execute("SELECT id, filename, created_at FROM files ORDER BY created_at DESC")
+            self._execute(cursor, "SELECT id, filename, created_at FROM files ORDER BY created_at DESC")
             rows = cursor.fetchall()
+            current_span().set('rows', len(rows))
 
             result = []
             for row in rows:
@@ -451,6 +819,7 @@ class DatabaseManager:
             print(f"Error listing files: {e}")
             return []
 
+    @traced("DatabaseManager.get_file_by_id", category="db")
     def get_file_by_id(self, file_id):
         """
         Get a file by its ID.
@@ -465,10 +834,11 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            cursor.execute("SELECT id, filename, file_content, meta_data, created_at FROM files WHERE id = ?", (file_id,))
+            self._execute(cursor, "SELECT id, filename, file_content, meta_data, created_at FROM files WHERE id = ?", (file_id,))
             row = cursor.fetchone()
 
             if row:
+                current_span().add_bytes(len(row[2]) if row[2] else 0)
                 try:
                     meta_data = json.loads(row[3]) if row[3] else {}
                 except json.JSONDecodeError:
@@ -495,6 +865,7 @@ class DatabaseManager:
             print(f"Error getting file: {e}")
             return None
 
+    @traced("DatabaseManager.delete_file", category="db")
     def delete_file(self, file_id):
         """
         Delete a file from the database.
@@ -509,8 +880,8 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
-            self.conn.commit()
+            self._execute(cursor, "DELETE FROM files WHERE id = ?", (file_id,))
+            self._commit()
             return cursor.rowcount > 0
         except Exception as e:
             if self.conn is not None:
@@ -518,6 +889,7 @@ class DatabaseManager:
             print(f"Error deleting file: {e}")
             return False
 
+    @traced("DatabaseManager.get_files_with_sheet_info", category="db")
     def get_files_with_sheet_info(self):
         """
         Get all files with their associated sheet information for filtering.
@@ -538,7 +910,7 @@ class DatabaseManager:
             ORDER BY f.created_at DESC
             """
 
-            cursor.execute(query)
+            self._execute(cursor, query)
             rows = cursor.fetchall()
 
             files = []
@@ -573,6 +945,7 @@ class DatabaseManager:
             print(f"Error getting files with sheet info: {e}")
             return []
 
+    @traced("DatabaseManager.delete_file_and_versions", category="db")
     def delete_file_and_versions(self, file_id):
         """
         Delete a file and all its versions from the database.
@@ -589,7 +962,7 @@ class DatabaseManager:
             cursor = self.conn.cursor()
 
             # Get filename for logging
-            cursor.execute("SELECT filename FROM files WHERE id = ?", (file_id,))
+            self._execute(cursor, "SELECT filename FROM files WHERE id = ?", (file_id,))
             result = cursor.fetchone()
             if not result:
                 debug_print(f"File ID {file_id} not found")
@@ -599,14 +972,16 @@ class DatabaseManager:
             debug_print(f"Deleting file and versions: {filename} (ID: {file_id})")
 
             # Delete from files table (cascade will handle sheets and images)
-            cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            self._execute(cursor, "DELETE FROM files WHERE id = ?", (file_id,))
             deleted_count = cursor.rowcount
 
-            self.conn.commit()
+            self._commit()
             debug_print(f"Successfully deleted {deleted_count} record(s)")
             return deleted_count > 0
 
         except Exception as e:
+            if self._transaction_depth:
+                raise  # the enclosing unit_of_work rolls back (and retries on lock errors)
             if self.conn is not None:
                 self.conn.rollback()
             print(f"Error deleting file and versions: {e}")
@@ -622,17 +997,48 @@ class DatabaseManager:
         Returns:
             tuple: (success_count, error_count)
         """
-        success_count = 0
-        error_count = 0
+        file_ids = list(dict.fromkeys(file_ids))
+        success_count = len(self.delete_files(file_ids))
+        return success_count, len(file_ids) - success_count
 
-        for file_id in file_ids:
-            if self.delete_file_and_versions(file_id):
-                success_count += 1
-            else:
-                error_count += 1
+    @traced("DatabaseManager.delete_files", category="db")
+    def delete_files(self, file_ids):
+        """
+        Delete multiple files from the database.
 
-        debug_print(f"Batch deletion complete: {success_count} successful, {error_count} errors")
-        return success_count, error_count
+        Args:
+            file_ids (list): List of file IDs to delete
+
+        Returns:
+            list: The IDs that were actually deleted, in request order
+        """
+        started = time.perf_counter()
+        file_ids = list(dict.fromkeys(file_ids))
+
+        try:
+            # One transaction for the whole batch; sheets, images and index rows go by cascade
+            with self.unit_of_work() as cursor:
+                existing_ids = set()
+                for start in range(0, len(file_ids), ID_CHUNK_SIZE):
+                    chunk = file_ids[start:start + ID_CHUNK_SIZE]
+                    self._execute(cursor,
+                        f"SELECT id FROM files WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                    existing_ids.update(row[0] for row in cursor.fetchall())
+
+                self._executemany(cursor, "DELETE FROM files WHERE id = ?",
+                                  [(file_id,) for file_id in file_ids if file_id in existing_ids])
+        except Exception as e:
+            if self._transaction_depth:
+                raise  # the enclosing unit_of_work rolls back (and retries on lock errors)
+            print(f"Error deleting files: {e}")
+            return []
+
+        deleted_ids = [file_id for file_id in file_ids if file_id in existing_ids]
+        success_count = len(deleted_ids)
+        log_write_throughput(f"Deleted {success_count} file(s)", success_count, started)
+
+        debug_print(f"Batch deletion complete: {success_count} successful, {len(file_ids) - success_count} errors")
+        return deleted_ids
 
     def get_file_size_info(self, file_id):
         """
@@ -648,7 +1054,7 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            cursor.execute("SELECT LENGTH(file_content) FROM files WHERE id = ?", (file_id,))
+            self._execute(cursor, "SELECT LENGTH(file_content) FROM files WHERE id = ?", (file_id,))
             result = cursor.fetchone()
 
             return result[0] if result else 0
@@ -657,6 +1063,246 @@ class DatabaseManager:
             debug_print(f"Error getting file size: {e}")
             return 0
 
+    def get_file_storage_info(self, file_id):
+        """
+        Get a breakdown of the space a file uses.
+
+        Args:
+            file_id (int): ID of the file
+
+        Returns:
+            dict: content_bytes, image_count, image_bytes, sheet_count and total_bytes
+        """
+        try:
+            self._check_connection()
+
+            cursor = self.conn.cursor()
+            self._execute(cursor, """
+                SELECT
+                    (SELECT COALESCE(LENGTH(file_content), 0) FROM files WHERE id = ?),
+                    (SELECT COUNT(*) FROM images WHERE file_id = ?),
+                    (SELECT COALESCE(SUM(LENGTH(image_data)), 0) FROM images WHERE file_id = ?),
+                    (SELECT COUNT(*) FROM sheets WHERE file_id = ?)
+            """, (file_id, file_id, file_id, file_id))
+            content_bytes, image_count, image_bytes, sheet_count = cursor.fetchone()
+            content_bytes = content_bytes or 0
+
+            return {
+                "content_bytes": content_bytes,
+                "image_count": image_count,
+                "image_bytes": image_bytes,
+                "sheet_count": sheet_count,
+                "total_bytes": content_bytes + image_bytes
+            }
+
+        except Exception as e:
+            debug_print(f"Error getting file storage info: {e}")
+            return {"content_bytes": 0, "image_count": 0, "image_bytes": 0, "sheet_count": 0, "total_bytes": 0}
+
+    def get_storage_stats(self):
+        """Return database-wide storage statistics (see database_maintenance.get_storage_stats)."""
+        from database_maintenance import get_storage_stats
+        self._check_connection()
+        return get_storage_stats(self.conn, self.db_path)
+
+    def run_maintenance(self, full=False):
+        """
+        Checkpoint the WAL, reclaim free pages and, when due or full=True, run ANALYZE and an integrity check.
+
+        Args:
+            full (bool): Force the ANALYZE / integrity check / auto-vacuum migration steps
+
+        Returns:
+            dict: Maintenance report (see database_maintenance.run_maintenance)
+        """
+        from database_maintenance import run_maintenance
+        self._check_connection()
+        return run_maintenance(self.conn, self.db_path, full=full)
+
+    @traced("DatabaseManager.find_file_by_content_hash", category="db")
+    def find_file_by_content_hash(self, content_hash):
+        """
+        Find the stored file that was ingested from a source with this content hash.
+
+        Args:
+            content_hash (str): SHA-256 hex digest of the source file
+
+        Returns:
+            dict: id, filename and created_at of the newest matching file, or None
+        """
+        try:
+            self._check_connection()
+
+            cursor = self.conn.cursor()
+            self._execute(cursor, """
+                SELECT f.id, f.filename, f.created_at
+                FROM file_sources s
+                JOIN files f ON f.id = s.file_id
+                WHERE s.content_hash = ?
+                ORDER BY f.created_at DESC
+                LIMIT 1
+            """, (content_hash,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            try:
+                if isinstance(row[2], datetime.datetime):
+                    created_at = row[2]
+                else:
+                    created_at = datetime.datetime.fromisoformat(row[2])
+            except (ValueError, TypeError):
+                created_at = datetime.datetime.now()
+
+            return {
+                "id": row[0],
+                "filename": row[1],
+                "created_at": created_at
+            }
+        except Exception as e:
+            print(f"Error looking up file by content hash: {e}")
+            return None
+
+    @traced("DatabaseManager.link_source_path", category="db")
+    def link_source_path(self, file_id, content_hash, source_path, display_filename):
+        """
+        Record that a source file (another path or display name) has the content of a stored file.
+
+        Args:
+            file_id (int): ID of the stored file
+            content_hash (str): SHA-256 hex digest of the source file
+            source_path (str): Path the source was loaded from
+            display_filename (str): Display name it was loaded under
+
+        Returns:
+            bool: True if a new link was added, False if it already existed
+        """
+        try:
+            self._check_connection()
+
+            cursor = self.conn.cursor()
+            self._execute(cursor,
+                "SELECT 1 FROM file_sources WHERE file_id = ? AND content_hash = ? AND source_path IS ? AND display_filename IS ?",
+                (file_id, content_hash, source_path, display_filename)
+            )
+            if cursor.fetchone():
+                return False
+
+            self._execute(cursor,
+                "INSERT INTO file_sources (file_id, content_hash, source_path, display_filename, linked_at) VALUES (?, ?, ?, ?, ?)",
+                (file_id, content_hash, source_path, display_filename, datetime.datetime.now())
+            )
+            self._commit()
+            return True
+        except Exception as e:
+            if self.conn is not None:
+                try:
+                    self.conn.rollback()
+                except sqlite3.Error:
+                    pass
+            print(f"Error linking source path: {e}")
+            raise
+
+    @traced("DatabaseManager.search_files", category="db")
+    def search_files(self, query, limit=500):
+        """
+        Full-text search over filenames, sheet names, sample IDs, header fields and notes.
+
+        Args:
+            query (str): Search text (see database_search.build_match_query), prefix-matched
+            limit (int): Maximum number of results
+
+        Returns:
+            list: File records with id, filename, created_at and rank, best match first
+        """
+        try:
+            self._check_connection()
+
+            match = build_match_query(query)
+            if not match:
+                return []
+
+            cursor = self.conn.cursor()
+            self._execute(cursor, f"""
+                SELECT f.id, f.filename, f.created_at, s.rank
+                FROM {SEARCH_TABLE} s
+                JOIN files f ON f.id = s.rowid
+                WHERE {SEARCH_TABLE} MATCH ?
+                ORDER BY s.rank
+                LIMIT ?
+            """, (match, limit))
+            rows = cursor.fetchall()
+            current_span().set('rows', len(rows))
+
+            result = []
+            for row in rows:
+                try:
+                    if isinstance(row[2], datetime.datetime):
+                        created_at = row[2]
+                    else:
+                        created_at = datetime.datetime.fromisoformat(row[2])
+                except (ValueError, TypeError):
+                    created_at = datetime.datetime.now()
+
+                result.append({
+                    "id": row[0],
+                    "filename": row[1],
+                    "created_at": created_at,
+                    "rank": row[3]
+                })
+
+            return result
+        except Exception as e:
+            print(f"Error searching files: {e}")
+            return []
+
+    @traced("DatabaseManager.index_missing_files", category="db")
+    def index_missing_files(self, batch_size=50, max_batches=None):
+        """
+        Add files stored before the search index existed to the index.
+
+        Args:
+            batch_size (int): Files read and indexed per transaction
+            max_batches (int, optional): Stop after this many batches (None = until done)
+
+        Returns:
+            int: Number of files indexed
+        """
+        self._check_connection()
+        if not has_search_index(self.conn):
+            return 0
+
+        cursor = self.conn.cursor()
+        indexed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            batches += 1
+            self._execute(cursor, f"""
+                SELECT id, filename, file_content, meta_data FROM files
+                WHERE id NOT IN (SELECT rowid FROM {SEARCH_TABLE})
+                ORDER BY id LIMIT ?
+            """, (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            for file_id, filename, file_content, meta_data_json in rows:
+                try:
+                    meta_data = json.loads(meta_data_json) if meta_data_json else {}
+                except json.JSONDecodeError:
+                    meta_data = {}
+                self._execute(cursor, "SELECT sheet_name FROM sheets WHERE file_id = ?", (file_id,))
+                sheet_names = [row[0] for row in cursor.fetchall()]
+                self._index_for_search(cursor, file_id, filename, meta_data, file_content, sheet_names)
+                current_span().add_bytes(len(file_content) if file_content else 0)
+            self._commit()
+            indexed += len(rows)
+
+        if indexed:
+            debug_print(f"DEBUG: Added {indexed} existing files to the search index")
+        return indexed
+
+    @traced("DatabaseManager.get_most_recent_version_by_base_name", category="db")
     def get_most_recent_version_by_base_name(self, base_filename):
         """
         Get the most recent version of a file by its base filename.
@@ -671,8 +1317,9 @@ class DatabaseManager:
             self._check_connection()
 
             cursor = self.conn.cursor()
-            # Search for files with similar base names and get the most recent
-            cursor.execute("""
+            # Search for files with similar base names and get the most recent. The
+            # token-based search index is not used: it misses names embedded in longer tokens.
+            self._execute(cursor, """
                 SELECT id, filename, file_content, meta_data, created_at
                 FROM files
                 WHERE filename LIKE ?
@@ -682,6 +1329,7 @@ class DatabaseManager:
 
             row = cursor.fetchone()
             if row:
+                current_span().add_bytes(len(row[2]) if row[2] else 0)
                 try:
                     meta_data = json.loads(row[3]) if row[3] else {}
                 except json.JSONDecodeError:
@@ -0,0 +1,938 @@
+"""
+database_mirror.py
+Developed by Charlie Becquet.
+Local read-through mirror of the shared DataViewer database.
+
+get_database_path() points every client at one dataviewer.db on the Synology
+share, and SQLite over SMB is slow and fragile. In mirror mode each client
+keeps a local replica with the same schema:
+
+- file, sheet and image metadata are copied incrementally from the shared
+  database using the highest synced files.id as a high-water mark, and files
+  deleted on the share are removed locally on the same pass;
+- file contents (VAP3 blobs) are fetched on first use and kept in a bounded
+  least-recently-used cache;
+- writes are applied to the replica immediately and queued in a persistent
+  table, then forwarded to the shared database by a background thread. Files
+  stored while the share is unreachable get a provisional negative id that is
+  replaced by the shared id once forwarded. Each forwarded write leaves a
+  (client id, queue id) token in the shared database, so a batch whose local
+  cleanup failed is not applied twice on the next pass.
+
+Browsing and loading therefore run at local-disk speed, and queued writes
+catch up when the share recovers.
+
+Mirror mode is chosen by DATAVIEWER_DB_MIRROR: "1" forces it on, "0" off, and
+when unset it is used for network/Synology database paths.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import datetime
+import traceback
+import uuid
+
+from database_manager import (
+    DatabaseManager,
+    log_write_throughput,
+    open_blob_source,
+    open_database_connection,
+    retry_on_lock,
+    write_blob,
+)
+from database_search import SEARCH_TABLE, SEARCH_COLUMNS, has_search_index, index_file
+from image_ingest import read_image_for_storage
+from tracing import traced, current_span
+from utils import debug_print
+
+MIRROR_ENV = "DATAVIEWER_DB_MIRROR"
+MIRROR_CACHE_ENV = "DATAVIEWER_MIRROR_CACHE_MB"
+DEFAULT_CACHE_LIMIT_MB = 1024
+DEFAULT_SYNC_INTERVAL = 30.0  # seconds between sync passes
+MAX_SYNC_BACKOFF = 300.0  # seconds between attempts while the share is down
+SHARED_CONNECT_TIMEOUT = 5.0  # seconds to wait on the shared database's lock
+FORWARD_BATCH_SIZE = 50  # queued writes forwarded per shared transaction
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def is_shared_database_path(db_path):
+    """Return True if db_path looks like the network/Synology database rather than a local file."""
+    normalized = db_path.replace("/", "\\").lower()
+    return normalized.startswith("\\\\") or "synology" in normalized
+
+
+def is_mirror_enabled(db_path):
+    """Decide whether db_path should be accessed through a local mirror."""
+    setting = os.environ.get(MIRROR_ENV, "").strip().lower()
+    if setting in ("1", "true", "yes", "on"):
+        return True
+    if setting in ("0", "false", "no", "off"):
+        return False
+    return is_shared_database_path(db_path)
+
+
+def get_mirror_path(shared_path):
+    """Return the local replica path for a shared database path."""
+    mirror_dir = os.path.join(os.path.expanduser("~/.DataViewer"), "mirror")
+    os.makedirs(mirror_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(shared_path))[0] or "dataviewer"
+    digest = hashlib.sha1(os.path.abspath(shared_path).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(mirror_dir, f"{stem}_{digest}.db")
+
+
+class DatabaseMirror:
+    """Local replica of a shared database plus the queue of writes waiting to reach it."""
+
+    def __init__(self, shared_path, mirror_path=None, cache_limit_bytes=None):
+        """
+        Open (or create) the local replica.
+
+        Args:
+            shared_path (str): Path to the shared database
+            mirror_path (str, optional): Local replica path (default under ~/.DataViewer/mirror)
+            cache_limit_bytes (int, optional): Maximum bytes of cached file contents
+        """
+        self.shared_path = shared_path
+        self.mirror_path = mirror_path or get_mirror_path(shared_path)
+        if cache_limit_bytes is None:
+            cache_limit_bytes = int(float(os.environ.get(MIRROR_CACHE_ENV, DEFAULT_CACHE_LIMIT_MB)) * 1024 * 1024)
+        self.cache_limit_bytes = cache_limit_bytes
+
+        # The mirror's own connection, used for sync, blob caching and relabeling
+        self._lock = threading.RLock()
+        self.conn = open_database_connection(self.mirror_path)
+        DatabaseManager.from_connection(self.conn, self.mirror_path)._create_tables()
+        self._create_mirror_tables()
+
+        self.last_sync_time = None
+        self.last_error = None
+        self.shared_available = None
+        self._shared_schema_checked = False
+
+        self._sync_thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+        debug_print(f"DEBUG: Database mirror for {shared_path} at {self.mirror_path}")
+
+    def _create_mirror_tables(self):
+        """Create the bookkeeping tables that only exist in the replica."""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_files (
+                file_id INTEGER PRIMARY KEY,
+                size INTEGER NOT NULL DEFAULT 0,
+                cached BOOLEAN NOT NULL DEFAULT 0,
+                last_accessed REAL
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation TEXT NOT NULL,
+                file_id INTEGER,
+                payload TEXT NOT NULL,
+                content BLOB,
+                queued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_id_map (
+                local_id INTEGER PRIMARY KEY,
+                remote_id INTEGER NOT NULL
+            )
+            ''')
+            self.client_id = self._get_state("client_id")
+            if self.client_id is None:
+                self.client_id = uuid.uuid4().hex
+                self._set_state(cursor, "client_id", self.client_id)
+            self.conn.commit()
+
+    @staticmethod
+    def _create_shared_tables(cursor):
+        """Create the forwarding tokens table in the shared database."""
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mirror_forwarded (
+            client_id TEXT NOT NULL,
+            pending_id INTEGER NOT NULL,
+            remote_id INTEGER,
+            PRIMARY KEY (client_id, pending_id)
+        )
+        ''')
+
+    # ------------------------------------------------------------------
+    # State helpers
+    # ------------------------------------------------------------------
+
+    def _get_state(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM mirror_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, cursor, key, value):
+        cursor.execute("INSERT OR REPLACE INTO mirror_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _open_shared(self, read_only=True):
+        """Open a short-lived connection to the shared database."""
+        if not os.path.exists(self.shared_path):
+            raise FileNotFoundError(f"Shared database not reachable: {self.shared_path}")
+        return open_database_connection(self.shared_path, read_only=read_only, timeout=SHARED_CONNECT_TIMEOUT)
+
+    @staticmethod
+    def resolve_file_id(cursor, file_id):
+        """Map a provisional (negative) file id to its shared id once it has been forwarded."""
+        if file_id is None or file_id >= 0:
+            return file_id
+        row = cursor.execute("SELECT remote_id FROM mirror_id_map WHERE local_id = ?", (file_id,)).fetchone()
+        return row[0] if row else file_id
+
+    @staticmethod
+    def queue_operation(cursor, operation, file_id, payload, content=None):
+        """
+        Append a write to the forward queue (inside the caller's transaction).
+
+        Returns:
+            int: Queue entry id
+        """
+        cursor.execute(
+            "INSERT INTO mirror_pending (operation, file_id, payload, content, queued_at) VALUES (?, ?, ?, ?, ?)",
+            (operation, file_id, json.dumps(payload), content, time.time())
+        )
+        return cursor.lastrowid
+
+    # ------------------------------------------------------------------
+    # Pulling from the shared database
+    # ------------------------------------------------------------------
+
+    @traced("DatabaseMirror.sync", category="db")
+    def sync(self):
+        """
+        Copy rows added to the shared database since the last sync and drop rows deleted there.
+
+        Returns:
+            int: Number of new files copied
+        """
+        with self._lock:
+            high_water_id = int(self._get_state("high_water_id", 0))
+            sources_high_water_id = int(self._get_state("sources_high_water_id", 0))
+
+        shared = self._open_shared(read_only=True)
+        try:
+            cursor = shared.cursor()
+            retry_on_lock(cursor.execute,
+                "SELECT id, filename, meta_data, created_at, LENGTH(file_content) FROM files WHERE id > ? ORDER BY id",
+                (high_water_id,))
+            new_files = cursor.fetchall()
+            retry_on_lock(cursor.execute,
+                "SELECT file_id, sheet_name, is_plotting, is_empty FROM sheets WHERE file_id > ? ORDER BY id",
+                (high_water_id,))
+            new_sheets = cursor.fetchall()
+            retry_on_lock(cursor.execute,
+                "SELECT file_id, sheet_name, image_path, crop_enabled FROM images WHERE file_id > ? ORDER BY id",
+                (high_water_id,))
+            new_images = cursor.fetchall()
+            retry_on_lock(cursor.execute, "SELECT id FROM files")
+            remote_ids = {row[0] for row in cursor.fetchall()}
+            new_sources = []
+            if shared.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_sources'").fetchone():
+                retry_on_lock(cursor.execute,
+                    "SELECT id, file_id, content_hash, source_path, display_filename, linked_at FROM file_sources WHERE id > ? ORDER BY id",
+                    (sources_high_water_id,))
+                new_sources = cursor.fetchall()
+
+            # Reuse the shared search index rows (built from the full VAP3 contents) when present
+            search_rows = {}
+            if has_search_index(shared):
+                retry_on_lock(cursor.execute,
+                    f"SELECT rowid, {', '.join(SEARCH_COLUMNS)} FROM {SEARCH_TABLE} WHERE rowid > ?",
+                    (high_water_id,))
+                search_rows = {row[0]: row[1:] for row in cursor.fetchall()}
+        finally:
+            shared.close()
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            retry_on_lock(cursor.execute, "BEGIN IMMEDIATE")
+            try:
+                # Files this client forwarded itself are already present under their shared id
+                existing_ids = {row[0] for row in cursor.execute("SELECT id FROM files WHERE id > ?", (high_water_id,))}
+                added_ids = set()
+                last_created_at = None
+                for file_id, filename, meta_data, created_at, size in new_files:
+                    high_water_id = max(high_water_id, file_id)
+                    last_created_at = created_at
+                    if file_id in existing_ids:
+                        continue
+                    cursor.execute(
+                        "INSERT INTO files (id, filename, file_content, meta_data, created_at) VALUES (?, ?, X'', ?, ?)",
+                        (file_id, filename, meta_data, created_at)
+                    )
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO mirror_files (file_id, size, cached, last_accessed) VALUES (?, ?, 0, NULL)",
+                        (file_id, size or 0)
+                    )
+                    added_ids.add(file_id)
+
+                for file_id, sheet_name, is_plotting, is_empty in new_sheets:
+                    if file_id in added_ids:
+                        cursor.execute(
+                            "INSERT INTO sheets (file_id, sheet_name, is_plotting, is_empty) VALUES (?, ?, ?, ?)",
+                            (file_id, sheet_name, is_plotting, is_empty)
+                        )
+
+                # Image rows carry metadata only; image bytes live inside the VAP3 blob
+                for file_id, sheet_name, image_path, crop_enabled in new_images:
+                    if file_id in added_ids:
+                        cursor.execute(
+                            "INSERT INTO images (file_id, sheet_name, image_path, image_data, crop_enabled) VALUES (?, ?, ?, X'', ?)",
+                            (file_id, sheet_name, image_path, crop_enabled)
+                        )
+
+                # Search index: copy the shared rows, or index what the metadata holds
+                search_enabled = has_search_index(self.conn)
+                for file_id, filename, meta_data, created_at, size in new_files:
+                    if not search_enabled or file_id not in added_ids:
+                        continue
+                    if file_id in search_rows:
+                        cursor.execute(
+                            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                            (file_id, *search_rows[file_id])
+                        )
+                    else:
+                        try:
+                            meta = json.loads(meta_data) if meta_data else {}
+                        except json.JSONDecodeError:
+                            meta = {}
+                        sheet_names = [sheet[1] for sheet in new_sheets if sheet[0] == file_id]
+                        index_file(cursor, file_id, filename, meta, sheet_names=sheet_names)
+
+                # Source links (content hash -> file) added on the share, including this
+                # client's own forwarded links, which are already present locally
+                for source_id, file_id, content_hash, source_path, display_filename, linked_at in new_sources:
+                    sources_high_water_id = max(sources_high_water_id, source_id)
+                    cursor.execute("""
+                        INSERT INTO file_sources (file_id, content_hash, source_path, display_filename, linked_at)
+                        SELECT ?, ?, ?, ?, ?
+                        WHERE EXISTS (SELECT 1 FROM files WHERE id = ?)
+                          AND NOT EXISTS (
+                            SELECT 1 FROM file_sources
+                            WHERE file_id = ? AND content_hash = ? AND source_path IS ? AND display_filename IS ?
+                          )
+                    """, (file_id, content_hash, source_path, display_filename, linked_at,
+                          file_id, file_id, content_hash, source_path, display_filename))
+
+                # Files deleted on the share (positive ids are ones that exist there)
+                local_ids = {row[0] for row in cursor.execute("SELECT id FROM files WHERE id > 0")}
+                deleted_ids = local_ids - remote_ids
+                for file_id in deleted_ids:
+                    cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    cursor.execute("DELETE FROM mirror_files WHERE file_id = ?", (file_id,))
+
+                self._set_state(cursor, "high_water_id", high_water_id)
+                self._set_state(cursor, "sources_high_water_id", sources_high_water_id)
+                if last_created_at is not None:
+                    self._set_state(cursor, "high_water_created_at", last_created_at)
+                self._set_state(cursor, "last_sync_time", time.time())
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+        self.last_sync_time = time.time()
+        span = current_span()
+        span.set("new_files", len(added_ids))
+        span.set("deleted_files", len(deleted_ids))
+        if added_ids or deleted_ids:
+            debug_print(f"DEBUG: Mirror sync added {len(added_ids)} files, removed {len(deleted_ids)} (high-water id {high_water_id})")
+        return len(added_ids)
+
+    @traced("DatabaseMirror.get_blob", category="db")
+    def get_blob(self, file_id):
+        """
+        Return a file's VAP3 content, fetching it from the shared database on a cache miss.
+
+        Args:
+            file_id (int): File id in the replica
+
+        Returns:
+            bytes: File content, or None if it is not cached and the share is unreachable
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT cached FROM mirror_files WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None or row[0]:
+                content_row = self.conn.execute("SELECT file_content FROM files WHERE id = ?", (file_id,)).fetchone()
+                if content_row and content_row[0]:
+                    self.conn.execute("UPDATE mirror_files SET last_accessed = ? WHERE file_id = ?", (time.time(), file_id))
+                    self.conn.commit()
+                    span = current_span()
+                    span.set("cache", "hit")
+                    span.add_bytes(len(content_row[0]))
+                    return content_row[0]
+
+        if file_id < 0:
+            return None
+
+        try:
+            shared = self._open_shared(read_only=True)
+            try:
+                cursor = shared.cursor()
+                retry_on_lock(cursor.execute, "SELECT file_content FROM files WHERE id = ?", (file_id,))
+                remote_row = cursor.fetchone()
+            finally:
+                shared.close()
+        except Exception as e:
+            debug_print(f"ERROR: File {file_id} is not cached locally and the shared database is unavailable: {e}")
+            self.shared_available = False
+            self.last_error = str(e)
+            return None
+
+        if not remote_row:
+            return None
+        content = remote_row[0]
+        span = current_span()
+        span.set("cache", "miss")
+        span.add_bytes(len(content))
+
+        with self._lock:
+            self.conn.execute("UPDATE files SET file_content = ? WHERE id = ?", (content, file_id))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO mirror_files (file_id, size, cached, last_accessed) VALUES (?, ?, 1, ?)",
+                (file_id, len(content), time.time())
+            )
+            self.conn.commit()
+            self._evict_blobs()
+        return content
+
+    def _evict_blobs(self):
+        """Drop least recently used file contents until the cache is within its limit."""
+        cursor = self.conn.cursor()
+        total = cursor.execute("SELECT COALESCE(SUM(size), 0) FROM mirror_files WHERE cached = 1").fetchone()[0]
+        if total <= self.cache_limit_bytes:
+            return
+
+        # Provisional files (negative ids) have not reached the share yet and must stay
+        candidates = cursor.execute(
+            "SELECT file_id, size FROM mirror_files WHERE cached = 1 AND file_id > 0 ORDER BY last_accessed"
+        ).fetchall()
+        evicted = 0
+        for file_id, size in candidates:
+            if total <= self.cache_limit_bytes:
+                break
+            cursor.execute("UPDATE files SET file_content = X'' WHERE id = ?", (file_id,))
+            cursor.execute("UPDATE mirror_files SET cached = 0 WHERE file_id = ?", (file_id,))
+            total -= size
+            evicted += 1
+        self.conn.commit()
+        debug_print(f"DEBUG: Mirror evicted {evicted} cached files, {total / (1024 * 1024):.1f} MB remain")
+
+    # ------------------------------------------------------------------
+    # Forwarding queued writes to the shared database
+    # ------------------------------------------------------------------
+
+    def pending_count(self):
+        """Return the number of writes waiting to be forwarded."""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM mirror_pending").fetchone()[0]
+
+    @traced("DatabaseMirror.flush_pending", category="db")
+    def flush_pending(self):
+        """
+        Forward one batch of queued writes to the shared database in a single transaction.
+
+        Returns:
+            int: Number of queued writes forwarded
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, operation, file_id, payload, content FROM mirror_pending ORDER BY id LIMIT ?",
+                (FORWARD_BATCH_SIZE,)
+            ).fetchall()
+            id_map = dict(self.conn.execute("SELECT local_id, remote_id FROM mirror_id_map").fetchall())
+        if not rows:
+            return 0
+
+        new_ids = {}
+        shared = self._open_shared(read_only=False)
+        shared_db = DatabaseManager.from_connection(shared, self.shared_path)
+        try:
+            if not self._shared_schema_checked:
+                # The share may predate tables this client writes to (e.g. file_sources)
+                shared_db._create_tables()
+                self._create_shared_tables(shared.cursor())
+                shared.commit()
+                self._shared_schema_checked = True
+            cursor = shared.cursor()
+            # Entries below this batch were cleaned up locally, so their tokens are no longer needed
+            shared_db._execute(cursor, "DELETE FROM mirror_forwarded WHERE client_id = ? AND pending_id < ?",
+                               (self.client_id, rows[0][0]))
+            forwarded = dict(cursor.execute(
+                "SELECT pending_id, remote_id FROM mirror_forwarded WHERE client_id = ? AND pending_id BETWEEN ? AND ?",
+                (self.client_id, rows[0][0], rows[-1][0])
+            ).fetchall())
+            for pending_id, operation, file_id, payload_json, content in rows:
+                if pending_id in forwarded:
+                    # Applied by an earlier pass whose local cleanup did not complete
+                    if operation == "store_file":
+                        new_ids[file_id] = forwarded[pending_id]
+                    continue
+                payload = json.loads(payload_json)
+                remote_file_id = new_ids.get(file_id, id_map.get(file_id, file_id))
+                forwarded_id = None
+
+                if operation == "store_file":
+                    shared_db._execute(cursor,
+                        "INSERT INTO files (filename, file_content, meta_data, created_at) VALUES (?, ?, ?, ?)",
+                        (payload["filename"], content, payload["meta_data"], payload["created_at"]))
+                    new_ids[file_id] = forwarded_id = cursor.lastrowid
+                    meta_data = json.loads(payload["meta_data"] or "{}")
+                    shared_db._index_for_search(cursor, new_ids[file_id], payload["filename"], meta_data, content)
+                    shared_db._record_source(cursor, new_ids[file_id], payload["filename"], meta_data)
+                    current_span().add_bytes(len(content))
+                elif remote_file_id is None or remote_file_id < 0:
+                    debug_print(f"DEBUG: Dropping queued {operation} for file {file_id} that never reached the share")
+                elif operation == "store_sheet":
+                    shared_db._execute(cursor,
+                        "INSERT INTO sheets (file_id, sheet_name, is_plotting, is_empty) VALUES (?, ?, ?, ?)",
+                        (remote_file_id, payload["sheet_name"], payload["is_plotting"], payload["is_empty"]))
+                elif operation == "store_image":
+                    shared_db._execute(cursor,
+                        "INSERT INTO images (file_id, sheet_name, image_path, image_data, crop_enabled) VALUES (?, ?, ?, ?, ?)",
+                        (remote_file_id, payload["sheet_name"], payload["image_path"], content, payload["crop_enabled"]))
+                elif operation == "delete_file":
+                    shared_db._execute(cursor, "DELETE FROM files WHERE id = ?", (remote_file_id,))
+                elif operation == "link_source":
+                    shared_db._execute(cursor,
+                        "INSERT INTO file_sources (file_id, content_hash, source_path, display_filename, linked_at) VALUES (?, ?, ?, ?, ?)",
+                        (remote_file_id, payload["content_hash"], payload["source_path"],
+                         payload["display_filename"], payload["linked_at"]))
+                else:
+                    debug_print(f"DEBUG: Unknown queued operation {operation!r}, skipping")
+                shared_db._execute(cursor,
+                    "INSERT INTO mirror_forwarded (client_id, pending_id, remote_id) VALUES (?, ?, ?)",
+                    (self.client_id, pending_id, forwarded_id))
+            shared_db._commit()
+        except Exception as e:
+            try:
+                shared.rollback()
+            except Exception:
+                pass
+            with self._lock:
+                self.conn.execute(
+                    "UPDATE mirror_pending SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    (str(e), rows[0][0])
+                )
+                self.conn.commit()
+            raise
+        finally:
+            shared.close()
+
+        self._finish_forwarding(rows[-1][0], new_ids)
+        debug_print(f"DEBUG: Forwarded {len(rows)} queued writes to the shared database")
+        return len(rows)
+
+    def _finish_forwarding(self, last_pending_id, new_ids):
+        """Replace provisional ids with the shared ones and drop the forwarded queue entries."""
+        with self._lock:
+            cursor = self.conn.cursor()
+            retry_on_lock(cursor.execute, "BEGIN IMMEDIATE")
+            try:
+                cursor.execute("PRAGMA defer_foreign_keys = ON")
+                for local_id, remote_id in new_ids.items():
+                    cursor.execute("UPDATE files SET id = ? WHERE id = ?", (remote_id, local_id))
+                    cursor.execute("UPDATE sheets SET file_id = ? WHERE file_id = ?", (remote_id, local_id))
+                    cursor.execute("UPDATE images SET file_id = ? WHERE file_id = ?", (remote_id, local_id))
+                    cursor.execute("UPDATE file_sources SET file_id = ? WHERE file_id = ?", (remote_id, local_id))
+                    cursor.execute("UPDATE mirror_files SET file_id = ? WHERE file_id = ?", (remote_id, local_id))
+                    if has_search_index(self.conn):
+                        cursor.execute(f"UPDATE {SEARCH_TABLE} SET rowid = ? WHERE rowid = ?", (remote_id, local_id))
+                    cursor.execute("UPDATE mirror_pending SET file_id = ? WHERE file_id = ?", (remote_id, local_id))
+                    cursor.execute("INSERT OR REPLACE INTO mirror_id_map (local_id, remote_id) VALUES (?, ?)",
+                                   (local_id, remote_id))
+                cursor.execute("DELETE FROM mirror_pending WHERE id <= ?", (last_pending_id,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    # ------------------------------------------------------------------
+    # Background sync
+    # ------------------------------------------------------------------
+
+    def sync_once(self):
+        """Forward all queued writes, then pull new rows. Returns True if the share was reachable."""
+        try:
+            while self.flush_pending() == FORWARD_BATCH_SIZE:
+                pass
+            self.sync()
+            self.shared_available = True
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.shared_available = False
+            self.last_error = str(e)
+            debug_print(f"DEBUG: Mirror sync failed, working from local replica: {e}")
+            return False
+
+    def start_background_sync(self, interval=DEFAULT_SYNC_INTERVAL):
+        """Start the daemon thread that keeps the replica and the shared database in step."""
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            delay = interval
+            while not self._stop_event.is_set():
+                if self.sync_once():
+                    delay = interval
+                else:
+                    delay = min(delay * 2, MAX_SYNC_BACKOFF)
+                self._wake_event.wait(delay)
+                self._wake_event.clear()
+
+        self._sync_thread = threading.Thread(target=run, name="DBMirrorSync", daemon=True)
+        self._sync_thread.start()
+
+    def request_sync(self):
+        """Run a sync pass as soon as possible (e.g. after a local write)."""
+        self._wake_event.set()
+
+    def status(self):
+        """Return a summary of the mirror's state for display."""
+        with self._lock:
+            cached = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM mirror_files WHERE cached = 1"
+            ).fetchone()
+        return {
+            "shared_path": self.shared_path,
+            "mirror_path": self.mirror_path,
+            "shared_available": self.shared_available,
+            "last_sync_time": self.last_sync_time,
+            "last_error": self.last_error,
+            "pending_writes": self.pending_count(),
+            "cached_files": cached[0],
+            "cached_bytes": cached[1],
+        }
+
+    def close(self):
+        """Stop background sync and close the replica connection. Queued writes stay on disk."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout=SHARED_CONNECT_TIMEOUT * 2)
+        with self._lock:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+
+class MirroredDatabaseManager(DatabaseManager):
+    """
+    DatabaseManager over the local replica.
+
+    Reads are served from the replica (file contents are fetched through the
+    mirror's cache); writes are applied locally and queued for the share.
+    """
+
+    mirror = None
+
+    @classmethod
+    def for_mirror(cls, conn, mirror):
+        """Create a manager on a replica connection (see DatabaseManager.from_connection)."""
+        manager = cls.from_connection(conn, mirror.mirror_path)
+        manager.mirror = mirror
+        return manager
+
+    def _fill_content(self, record):
+        """Fetch the file content of a record whose blob is not cached yet."""
+        if record and not record.get("file_content"):
+            content = self.mirror.get_blob(record["id"])
+            if content is None:
+                return None
+            record["file_content"] = content
+        return record
+
+    def _resolve_id(self, file_id):
+        """Map an id handed out before its file was forwarded (provisional, negative) to its current id."""
+        return self.mirror.resolve_file_id(self.conn, file_id)
+
+    def get_file_by_id(self, file_id):
+        return self._fill_content(super().get_file_by_id(self._resolve_id(file_id)))
+
+    def get_most_recent_version_by_base_name(self, base_filename):
+        return self._fill_content(super().get_most_recent_version_by_base_name(base_filename))
+
+    def get_file_size_info(self, file_id):
+        try:
+            row = self.conn.execute("SELECT size FROM mirror_files WHERE file_id = ?",
+                                    (self._resolve_id(file_id),)).fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            debug_print(f"Error getting file size: {e}")
+            return 0
+
+    def get_file_storage_info(self, file_id):
+        # File contents may not be cached locally; their size is tracked in mirror_files
+        file_id = self._resolve_id(file_id)
+        info = super().get_file_storage_info(file_id)
+        content_bytes = self.get_file_size_info(file_id)
+        info["total_bytes"] += content_bytes - info["content_bytes"]
+        info["content_bytes"] = content_bytes
+        return info
+
+    def get_storage_stats(self):
+        """Return storage statistics of the shared database (the replica is only a local cache of it)."""
+        from database_maintenance import get_storage_stats
+        conn = self.mirror._open_shared(read_only=True)
+        try:
+            return get_storage_stats(conn, self.mirror.shared_path)
+        finally:
+            conn.close()
+
+    def run_maintenance(self, full=False):
+        """
+        Maintain the replica; a full pass (requested from the storage dialog) also maintains the shared database.
+
+        Scheduled passes stay local so clients don't checkpoint or vacuum over the network.
+
+        Returns:
+            dict: The shared database's report for a full pass, otherwise the replica's
+        """
+        from database_maintenance import run_maintenance
+        report = super().run_maintenance(full=full)
+        if not full:
+            return report
+        conn = self.mirror._open_shared(read_only=False)
+        try:
+            return run_maintenance(conn, self.mirror.shared_path, full=True)
+        finally:
+            conn.close()
+
+    def _begin(self):
+        """Start a write transaction, taking the replica's write lock up front (joins an open unit_of_work)."""
+        self._check_connection()
+        if not self._transaction_depth:
+            retry_on_lock(self.conn.execute, "BEGIN IMMEDIATE")
+        return self.conn.cursor()
+
+    @traced("MirroredDatabaseManager.store_vap3_file", category="db")
+    def store_vap3_file(self, file_path, meta_data):
+        """Store a VAP3 file (path or binary file object) locally under a provisional id and queue it for the shared database."""
+        stream, size, owned = open_blob_source(file_path)
+        try:
+            current_span().add_bytes(size)
+
+            filename = meta_data.get('display_filename') or (os.path.basename(file_path) if owned else "untitled.vap3")
+            meta_data_json = json.dumps(meta_data)
+            created_at = datetime.datetime.now()
+
+            cursor = self._begin()
+            try:
+                pending_id = self.mirror.queue_operation(cursor, "store_file", None, {})
+                local_id = -pending_id
+                payload = {"filename": filename, "meta_data": meta_data_json, "created_at": created_at.isoformat(" ")}
+                cursor.execute("UPDATE mirror_pending SET file_id = ?, payload = ?, content = zeroblob(?) WHERE id = ?",
+                               (local_id, json.dumps(payload), size, pending_id))
+                write_blob(self.conn, "mirror_pending", "content", pending_id, stream)
+                cursor.execute(
+                    "INSERT INTO files (id, filename, file_content, meta_data, created_at) VALUES (?, ?, zeroblob(?), ?, ?)",
+                    (local_id, filename, size, meta_data_json, created_at)
+                )
+                write_blob(self.conn, "files", "file_content", local_id, stream)
+                cursor.execute(
+                    "INSERT OR REPLACE INTO mirror_files (file_id, size, cached, last_accessed) VALUES (?, ?, 1, ?)",
+                    (local_id, size, time.time())
+                )
+                self._index_for_search(cursor, local_id, filename, meta_data, stream)
+                self._record_source(cursor, local_id, filename, meta_data)
+                self._commit()
+            except Exception as e:
+                self.conn.rollback()
+                print(f"Error storing file in database: {e}")
+                raise
+        finally:
+            if owned:
+                stream.close()
+
+        debug_print(f"File stored in local mirror with provisional ID {local_id} and filename '{filename}'")
+        self.mirror.request_sync()
+        return local_id
+
+    @traced("MirroredDatabaseManager.store_sheet_info", category="db")
+    def store_sheet_info(self, file_id, sheet_name, is_plotting, is_empty):
+        """Store sheet information locally and queue it for the shared database."""
+        cursor = self._begin()
+        try:
+            file_id = self.mirror.resolve_file_id(cursor, file_id)
+            cursor.execute(
+                "INSERT INTO sheets (file_id, sheet_name, is_plotting, is_empty) VALUES (?, ?, ?, ?)",
+                (file_id, sheet_name, 1 if is_plotting else 0, 1 if is_empty else 0)
+            )
+            sheet_id = cursor.lastrowid
+            self.mirror.queue_operation(cursor, "store_sheet", file_id, {
+                "sheet_name": sheet_name,
+                "is_plotting": 1 if is_plotting else 0,
+                "is_empty": 1 if is_empty else 0
+            })
+            self._commit()
+            return sheet_id
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error storing sheet info: {e}")
+            raise
+
+    @traced("MirroredDatabaseManager.store_image", category="db")
+    def store_image(self, file_id, image_path, sheet_name, crop_enabled):
+        """Store an image locally and queue it for the shared database."""
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image not found: {image_path}")
+        image_data, image_name = read_image_for_storage(image_path)
+        current_span().add_bytes(len(image_data))
+
+        cursor = self._begin()
+        try:
+            file_id = self.mirror.resolve_file_id(cursor, file_id)
+            cursor.execute(
+                "INSERT INTO images (file_id, sheet_name, image_path, image_data, crop_enabled) VALUES (?, ?, ?, ?, ?)",
+                (file_id, sheet_name, image_name, image_data, 1 if crop_enabled else 0)
+            )
+            image_id = cursor.lastrowid
+            self.mirror.queue_operation(cursor, "store_image", file_id, {
+                "sheet_name": sheet_name,
+                "image_path": image_name,
+                "crop_enabled": 1 if crop_enabled else 0
+            }, image_data)
+            self._commit()
+            return image_id
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error storing image: {e}")
+            raise
+
+    @traced("MirroredDatabaseManager.link_source_path", category="db")
+    def link_source_path(self, file_id, content_hash, source_path, display_filename):
+        """Record a source link locally and queue it for the shared database."""
+        file_id = self.mirror.resolve_file_id(self.conn, file_id)
+        if self.conn.execute(
+            "SELECT 1 FROM file_sources WHERE file_id = ? AND content_hash = ? AND source_path IS ? AND display_filename IS ?",
+            (file_id, content_hash, source_path, display_filename)
+        ).fetchone():
+            return False
+
+        cursor = self._begin()
+        try:
+            linked_at = datetime.datetime.now()
+            cursor.execute(
+                "INSERT INTO file_sources (file_id, content_hash, source_path, display_filename, linked_at) VALUES (?, ?, ?, ?, ?)",
+                (file_id, content_hash, source_path, display_filename, linked_at)
+            )
+            self.mirror.queue_operation(cursor, "link_source", file_id, {
+                "content_hash": content_hash,
+                "source_path": source_path,
+                "display_filename": display_filename,
+                "linked_at": linked_at.isoformat(" ")
+            })
+            self._commit()
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error linking source path: {e}")
+            raise
+
+        self.mirror.request_sync()
+        return True
+
+    @traced("MirroredDatabaseManager.store_files", category="db")
+    def store_files(self, entries):
+        """Store files with their sheet and image rows in one replica transaction; each row is queued for the share."""
+        started = time.perf_counter()
+        file_ids = []
+        rows = 0
+        with self.unit_of_work():
+            for entry in entries:
+                file_id = self.store_vap3_file(entry['source'], entry['meta_data'])
+                file_ids.append(file_id)
+                for sheet_name, is_plotting, is_empty in entry.get('sheets') or ():
+                    self.store_sheet_info(file_id, sheet_name, is_plotting, is_empty)
+                for sheet_name, image_path, crop_enabled in entry.get('images') or ():
+                    self.store_image(file_id, image_path, sheet_name, crop_enabled)
+                rows += 1 + len(entry.get('sheets') or ()) + len(entry.get('images') or ())
+
+        log_write_throughput(f"Stored {len(file_ids)} file(s) in local mirror", rows, started)
+        self.mirror.request_sync()
+        return file_ids
+
+    def delete_files(self, file_ids):
+        """Delete files one by one so each deletion is queued (the forward pass batches them)."""
+        file_ids = list(dict.fromkeys(file_ids))
+        deleted_ids = [file_id for file_id in file_ids if self.delete_file_and_versions(file_id)]
+        debug_print(f"Batch deletion complete: {len(deleted_ids)} successful, "
+                    f"{len(file_ids) - len(deleted_ids)} errors")
+        return deleted_ids
+
+    @traced("MirroredDatabaseManager.delete_file_and_versions", category="db")
+    def delete_file_and_versions(self, file_id):
+        """Delete a file locally and queue the deletion (or cancel its queued upload)."""
+        try:
+            cursor = self._begin()
+            try:
+                file_id = self.mirror.resolve_file_id(cursor, file_id)
+                cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                deleted = cursor.rowcount > 0
+                cursor.execute("DELETE FROM mirror_files WHERE file_id = ?", (file_id,))
+                if file_id < 0:
+                    # Never reached the share: drop its queued writes instead
+                    cursor.execute("DELETE FROM mirror_pending WHERE file_id = ?", (file_id,))
+                elif deleted:
+                    self.mirror.queue_operation(cursor, "delete_file", file_id, {})
+                self._commit()
+            except Exception:
+                if not self._transaction_depth:
+                    self.conn.rollback()
+                raise
+            if deleted:
+                self.mirror.request_sync()
+            return deleted
+        except Exception as e:
+            if self._transaction_depth:
+                raise  # the enclosing unit_of_work rolls back (and retries on lock errors)
+            print(f"Error deleting file and versions: {e}")
+            return False
+
+    def delete_file(self, file_id):
+        return self.delete_file_and_versions(file_id)
+
+
+def get_database_mirror(shared_path):
+    """Return the shared DatabaseMirror for shared_path, creating it on first use."""
+    with _mirrors_lock:
+        mirror = _mirrors.get(shared_path)
+        if mirror is None:
+            mirror = DatabaseMirror(shared_path)
+            _mirrors[shared_path] = mirror
+        return mirror
+
+
+def close_database_mirrors():
+    """Stop all mirrors (queued writes are kept and forwarded on the next start)."""
+    with _mirrors_lock:
+        mirrors = list(_mirrors.values())
+        _mirrors.clear()
+    for mirror in mirrors:
+        try:
+            mirror.close()
+        except Exception as e:
+            debug_print(f"DEBUG: Error closing database mirror: {e}")
+            traceback.print_exc()
@@ -0,0 +1,228 @@
+"""
+database_search.py
+Developed by Charlie Becquet.
+Full-text search index for the DataViewer database.
+
+An SQLite FTS5 table (file_search) holds one row per stored file, keyed by
+files.id, with these columns:
+
+    filename       display filename
+    sheet_names    names of the sheets in the VAP3 file
+    sample_ids     sample IDs from every sheet's header data
+    header_fields  "key value" pairs from the header data (tester, media, ...)
+    notes          sample notes
+
+Rows are written in the same transaction as the file itself
+(DatabaseManager.store_vap3_file), and a trigger on files removes them when
+a file is deleted. Queries are parsed by build_match_query:
+
+    abc-12                 any column, prefix match ("abc 12"*)
+    sample:abc-12          sample_ids only
+    media:"fresh base"     header field phrase ("media fresh base"*)
+    tester:jo sheet:intense
+
+Terms are ANDed together.
+"""
+
+import io
+import json
+import re
+import sqlite3
+import zipfile
+
+from utils import debug_print
+
+SEARCH_TABLE = "file_search"
+SEARCH_COLUMNS = ("filename", "sheet_names", "sample_ids", "header_fields", "notes")
+
+# field:value prefixes that map onto a column rather than a header field
+COLUMN_ALIASES = {
+    "file": "filename",
+    "filename": "filename",
+    "name": "filename",
+    "sheet": "sheet_names",
+    "test": "sheet_names",
+    "sample": "sample_ids",
+    "id": "sample_ids",
+    "note": "notes",
+    "notes": "notes",
+}
+
+# Sample header keys that are identifiers or free text rather than searchable fields
+_SAMPLE_SKIP_KEYS = {"id", "sample_notes", "calculated_power"}
+
+_TERM_PATTERN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(conn):
+    """
+    Create the FTS5 table and its delete trigger if they don't exist.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        bool: True if full-text search is available on this SQLite build
+    """
+    try:
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            {", ".join(SEARCH_COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        ''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_after_delete AFTER DELETE ON files
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END
+        ''')
+        return True
+    except sqlite3.OperationalError as e:
+        debug_print(f"DEBUG: Full-text search unavailable (SQLite built without FTS5?): {e}")
+        return False
+
+
+def has_search_index(conn):
+    """Return True if the file_search table exists on this connection's database."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+    ).fetchone()
+    return row is not None
+
+
+def _flatten_text(values):
+    return " ".join(str(value).strip() for value in values if value not in (None, "") and str(value).strip())
+
+
+def extract_search_document(filename, meta_data=None, file_content=None, sheet_names=None):
+    """
+    Build the searchable text for one file.
+
+    Args:
+        filename (str): Display filename
+        meta_data (dict, optional): Database meta_data (sample_notes, original_filename, ...)
+        file_content (bytes or file object, optional): VAP3 archive; header data is read from it when given
+        sheet_names (list, optional): Sheet names when the archive is not available
+
+    Returns:
+        dict: Column name -> text
+    """
+    meta_data = meta_data or {}
+    sheets = list(sheet_names or [])
+    sample_ids = []
+    header_fields = []
+    notes = []
+
+    for sheet_notes in (meta_data.get('sample_notes') or {}).values():
+        if isinstance(sheet_notes, dict):
+            notes.extend(sheet_notes.values())
+
+    if file_content:
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            file_content = io.BytesIO(file_content)
+        try:
+            file_content.seek(0)
+            with zipfile.ZipFile(file_content) as archive:
+                members = set(archive.namelist())
+                if 'meta_data.json' in members:
+                    archive_meta = json.loads(archive.read('meta_data.json').decode('utf-8'))
+                    sheets = archive_meta.get('sheet_names', sheets) or sheets
+
+                for sheet_name in sheets:
+                    header_path = f'sheets/{sheet_name}/header_data.json'
+                    if header_path not in members:
+                        continue
+                    header_data = json.loads(archive.read(header_path).decode('utf-8')) or {}
+
+                    if header_data.get('test'):
+                        header_fields.append(f"test {header_data['test']}")
+                    for key, value in (header_data.get('common') or {}).items():
+                        if value not in (None, ""):
+                            header_fields.append(f"{key} {value}")
+
+                    for sample in header_data.get('samples') or []:
+                        if not isinstance(sample, dict):
+                            continue
+                        sample_ids.append(sample.get('id', ''))
+                        notes.append(sample.get('sample_notes', ''))
+                        for key, value in sample.items():
+                            if key not in _SAMPLE_SKIP_KEYS and value not in (None, ""):
+                                header_fields.append(f"{key} {value}")
+        except (zipfile.BadZipFile, KeyError, ValueError, UnicodeDecodeError) as e:
+            debug_print(f"DEBUG: Could not read header data for search index of '{filename}': {e}")
+
+    original_filename = meta_data.get('original_filename')
+    return {
+        "filename": _flatten_text([filename, original_filename if original_filename != filename else None]),
+        "sheet_names": _flatten_text(sheets),
+        "sample_ids": _flatten_text(dict.fromkeys(sample_ids)),
+        # Each field on its own line so phrases don't run across fields
+        "header_fields": "\n".join(dict.fromkeys(header_fields)),
+        "notes": "\n".join(note.strip() for note in notes if isinstance(note, str) and note.strip()),
+    }
+
+
+def index_file(cursor, file_id, filename, meta_data=None, file_content=None, sheet_names=None):
+    """
+    Insert or replace a file's row in the search index (inside the caller's transaction).
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor on the database holding the file
+        file_id (int): files.id
+        filename (str): Display filename
+        meta_data (dict, optional): Database meta_data
+        file_content (bytes or file object, optional): VAP3 archive
+        sheet_names (list, optional): Sheet names when the archive is not available
+    """
+    document = extract_search_document(filename, meta_data, file_content, sheet_names)
+    cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = ?", (file_id,))
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+        (file_id, *(document[column] for column in SEARCH_COLUMNS))
+    )
+
+
+def _phrase(text, prefix=True):
+    """Quote text as an FTS5 phrase built from its word tokens."""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        return None
+    phrase = '"' + " ".join(tokens) + '"'
+    return phrase + " *" if prefix else phrase
+
+
+def build_match_query(text):
+    """
+    Translate user search text into an FTS5 MATCH expression.
+
+    Args:
+        text (str): Search text, e.g. 'sample:abc-12 media:"fresh base"'
+
+    Returns:
+        str: MATCH expression, or None if the text has no searchable terms
+    """
+    clauses = []
+    for field, quoted, bare in _TERM_PATTERN.findall(text or ""):
+        value = quoted if quoted else bare
+        if not field:
+            phrase = _phrase(value)
+            if phrase:
+                clauses.append(phrase)
+            continue
+
+        field = field.lower()
+        column = COLUMN_ALIASES.get(field)
+        if column:
+            phrase = _phrase(value)
+            if phrase:
+                clauses.append(f"{column}:{phrase}")
+        else:
+            # Any other key is a header field: match "key value" as one phrase
+            phrase = _phrase(f"{field} {value}")
+            if phrase:
+                clauses.append(f"header_fields:{phrase}")
+
+    return " AND ".join(clauses) if clauses else None
@@ -0,0 +1,394 @@
+"""
+database_service.py
+Developed by Charlie Becquet.
+Asynchronous access to the DataViewer database.
+
+All writes go through one writer thread that owns the write connection, so
+they are serialized in the order they were submitted. Reads run on a small
+thread pool where each thread holds its own read-only connection; with WAL
+they never wait on the writer. Every call returns a concurrent.futures.Future,
+and optional callbacks are delivered on the Tk main thread so they can touch
+widgets directly.
+
+Jobs are either the name of a DatabaseManager method or a callable taking the
+DatabaseManager as its first argument:
+
+    service = get_database_service(db_path, tk_root=root)
+    service.read("list_files", callback=populate)
+    service.write(lambda db: db.delete_multiple_files(ids), callback=refresh)
+"""
+
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from database_manager import DatabaseManager, open_database_connection
+from tracing import trace_span
+from utils import debug_print
+
+DEFAULT_READ_POOL_SIZE = 3
+CALLBACK_POLL_INTERVAL_MS = 20
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+class DatabaseService:
+    """Writer thread plus read-only connection pool around one database file."""
+
+    def __init__(self, db_path, read_pool_size=DEFAULT_READ_POOL_SIZE, tk_root=None, mirror=None):
+        """
+        Start the writer thread and the read pool.
+
+        Args:
+            db_path (str): Path to the SQLite database
+            read_pool_size (int): Number of reader threads (one connection each)
+            tk_root (tk.Tk, optional): Root window used to deliver callbacks
+            mirror (DatabaseMirror, optional): Serve db_path (the local replica) through this mirror
+        """
+        self.db_path = db_path
+        self.tk_root = tk_root
+        self.mirror = mirror
+        self._closed = False
+
+        # Writer: a single thread consuming jobs in submission order
+        self._write_queue = queue.Queue()
+        self._writer_ready = threading.Event()
+        self._writer_error = None
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="DBWriter", daemon=True)
+        self._writer_thread.start()
+        self._writer_ready.wait()
+        if self._writer_error is not None:
+            raise self._writer_error
+
+        # Readers: each pool thread lazily opens its own read-only connection
+        self._reader_local = threading.local()
+        self._reader_connections = []
+        self._reader_lock = threading.Lock()
+        self._read_pool = ThreadPoolExecutor(max_workers=max(1, read_pool_size), thread_name_prefix="DBRead")
+
+        # Callbacks are queued here and drained on the Tk thread
+        self._callback_queue = queue.Queue()
+        self._pending_callbacks = 0
+        self._pending_lock = threading.Lock()
+        self._poll_job = None
+
+        # Scheduled checkpoint / vacuum passes (see start_maintenance)
+        self._maintenance_thread = None
+        self._maintenance_stop = threading.Event()
+
+        debug_print(f"DEBUG: DatabaseService started for {db_path} with {read_pool_size} readers")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def read(self, job, *args, callback=None, error_callback=None):
+        """
+        Run a read-only job on the read pool.
+
+        Args:
+            job (str or callable): DatabaseManager method name, or func(db, *args)
+            callback (callable, optional): Called on the Tk thread with the result
+            error_callback (callable, optional): Called on the Tk thread with the exception
+
+        Returns:
+            Future: Resolves to the job's return value
+        """
+        self._check_open()
+        future = self._read_pool.submit(self._run_read, job, args)
+        self._attach_callbacks(future, callback, error_callback, job)
+        return future
+
+    def write(self, job, *args, callback=None, error_callback=None, transaction=True):
+        """
+        Queue a job for the writer thread.
+
+        Writes run one at a time in submission order on the write connection.
+        A job runs as one transaction (DatabaseManager.run_transaction), so
+        its own commits are deferred to the end and the whole job is retried
+        if another client holds the database lock.
+
+        Args:
+            job (str or callable): DatabaseManager method name, or func(db, *args)
+            callback (callable, optional): Called on the Tk thread with the result
+            error_callback (callable, optional): Called on the Tk thread with the exception
+            transaction (bool): False for jobs that cannot run inside a transaction (VACUUM, checkpoints)
+
+        Returns:
+            Future: Resolves to the job's return value
+        """
+        self._check_open()
+        future = Future()
+        self._write_queue.put((job, args, future, transaction))
+        self._attach_callbacks(future, callback, error_callback, job)
+        return future
+
+    def index_missing_files_in_background(self, batch_size=25):
+        """
+        Add unindexed files to the search index, one small batch per writer job.
+
+        Each batch is queued behind whatever writes are pending, so user
+        writes never wait for the whole backfill.
+        """
+        def on_batch_done(future):
+            try:
+                if future.result() >= batch_size and not self._closed:
+                    self.index_missing_files_in_background(batch_size)
+            except Exception as e:
+                debug_print(f"DEBUG: Search index backfill stopped: {e}")
+
+        def index_batch(db):
+            return db.index_missing_files(batch_size=batch_size, max_batches=1)
+
+        self.write(index_batch).add_done_callback(on_batch_done)
+
+    def start_maintenance(self, interval=None):
+        """
+        Queue a database_maintenance pass on the writer thread every interval seconds.
+
+        Args:
+            interval (float, optional): Seconds between passes (default CHECKPOINT_INTERVAL)
+        """
+        if self._maintenance_thread is not None:
+            return
+        from database_maintenance import CHECKPOINT_INTERVAL
+        interval = interval or CHECKPOINT_INTERVAL
+
+        def run():
+            while not self._maintenance_stop.wait(interval):
+                try:
+                    self.write("run_maintenance", transaction=False).result()
+                except RuntimeError:
+                    break  # Service closed
+                except Exception as e:
+                    debug_print(f"DEBUG: Scheduled database maintenance failed: {e}")
+
+        self._maintenance_thread = threading.Thread(target=run, name="DBMaintenance", daemon=True)
+        self._maintenance_thread.start()
+
+    def request_sync(self):
+        """Ask the mirror (if any) to pull new rows from the shared database now."""
+        if self.mirror is not None:
+            self.mirror.request_sync()
+
+    def close(self, wait=True):
+        """Stop accepting work, finish queued jobs and close all connections."""
+        if self._closed:
+            return
+
+        self._maintenance_stop.set()
+        if wait:
+            # Leave a small -wal file behind for the next session
+            def final_checkpoint(db):
+                from database_maintenance import checkpoint
+                return checkpoint(db.conn, "TRUNCATE")
+            self.write(final_checkpoint, transaction=False)
+
+        self._closed = True
+        self._write_queue.put(None)
+        if wait:
+            self._writer_thread.join()
+
+        self._read_pool.shutdown(wait=wait)
+        with self._reader_lock:
+            for conn in self._reader_connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._reader_connections.clear()
+
+        if self._poll_job is not None and self.tk_root is not None:
+            try:
+                self.tk_root.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+
+        debug_print(f"DEBUG: DatabaseService closed for {self.db_path}")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("DatabaseService is closed")
+
+    def _resolve(self, db, job, args):
+        """Run job against db, where job is a method name or a callable."""
+        if isinstance(job, str):
+            return getattr(db, job)(*args)
+        return job(db, *args)
+
+    def _make_manager(self, conn):
+        """Wrap a worker connection in the DatabaseManager flavour this service uses."""
+        if self.mirror is not None:
+            from database_mirror import MirroredDatabaseManager
+            return MirroredDatabaseManager.for_mirror(conn, self.mirror)
+        return DatabaseManager.from_connection(conn, self.db_path)
+
+    def _job_name(self, job):
+        return job if isinstance(job, str) else getattr(job, "__name__", "job")
+
+    def _writer_loop(self):
+        """Own the write connection and run queued write jobs in order."""
+        try:
+            # DatabaseManager creates the schema and applies the WAL settings
+            conn = open_database_connection(self.db_path)
+            writer_db = self._make_manager(conn)
+            writer_db._create_tables()
+        except Exception as e:
+            debug_print(f"ERROR: DatabaseService writer failed to connect: {e}")
+            self._writer_error = e
+            self._writer_ready.set()
+            return
+        self._writer_ready.set()
+
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            job, args, future, transaction = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with trace_span(f"DatabaseService.write:{self._job_name(job)}", category="db"):
+                    if transaction:
+                        result = writer_db.run_transaction(self._resolve, writer_db, job, args)
+                    else:
+                        result = self._resolve(writer_db, job, args)
+                future.set_result(result)
+            except BaseException as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                debug_print(f"ERROR: Database write job {self._job_name(job)} failed: {e}")
+                future.set_exception(e)
+
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reader_db(self):
+        """Return this pool thread's read-only DatabaseManager, opening it on first use."""
+        db = getattr(self._reader_local, "db", None)
+        if db is None:
+            conn = open_database_connection(self.db_path, read_only=True)
+            with self._reader_lock:
+                self._reader_connections.append(conn)
+            db = self._make_manager(conn)
+            self._reader_local.db = db
+        return db
+
+    def _run_read(self, job, args):
+        with trace_span(f"DatabaseService.read:{self._job_name(job)}", category="db"):
+            return self._resolve(self._reader_db(), job, args)
+
+    # ------------------------------------------------------------------
+    # Callback delivery on the Tk thread
+    # ------------------------------------------------------------------
+
+    def _attach_callbacks(self, future, callback, error_callback, job):
+        if callback is None and error_callback is None:
+            return
+        if self.tk_root is None:
+            raise ValueError("Callbacks require a tk_root; wait on the returned Future instead")
+
+        with self._pending_lock:
+            self._pending_callbacks += 1
+
+        def on_done(done_future):
+            self._callback_queue.put((done_future, callback, error_callback, self._job_name(job)))
+
+        future.add_done_callback(on_done)
+        # read()/write() are called from the Tk thread, so scheduling here is safe
+        self._ensure_polling()
+
+    def _ensure_polling(self):
+        if self._poll_job is None:
+            self._poll_job = self.tk_root.after(CALLBACK_POLL_INTERVAL_MS, self._drain_callbacks)
+
+    def _drain_callbacks(self):
+        """Deliver finished callbacks; keep polling while any are outstanding."""
+        self._poll_job = None
+        while True:
+            try:
+                future, callback, error_callback, name = self._callback_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._pending_lock:
+                self._pending_callbacks -= 1
+
+            try:
+                error = future.exception()
+                if error is None:
+                    if callback is not None:
+                        callback(future.result())
+                elif error_callback is not None:
+                    error_callback(error)
+                else:
+                    debug_print(f"ERROR: Database job {name} failed with no error handler: {error}")
+            except Exception as e:
+                debug_print(f"ERROR: Database callback for {name} raised: {e}")
+                traceback.print_exc()
+
+        with self._pending_lock:
+            outstanding = self._pending_callbacks > 0
+        if outstanding and not self._closed:
+            try:
+                self._ensure_polling()
+            except Exception as e:
+                debug_print(f"DEBUG: Stopped polling database callbacks: {e}")
+
+
+def get_database_service(db_path, tk_root=None):
+    """
+    Return the shared DatabaseService for db_path, starting it on first use.
+
+    When db_path is the shared network database and mirror mode is enabled
+    (see database_mirror.is_mirror_enabled), the service runs against a local
+    replica kept in step by a background DatabaseMirror.
+
+    Args:
+        db_path (str): Path to the SQLite database
+        tk_root (tk.Tk, optional): Root window for callback delivery
+
+    Returns:
+        DatabaseService: Shared service instance
+    """
+    with _services_lock:
+        service = _services.get(db_path)
+        if service is None or service._closed:
+            from database_mirror import is_mirror_enabled, get_database_mirror
+            if is_mirror_enabled(db_path):
+                mirror = get_database_mirror(db_path)
+                mirror.start_background_sync()
+                service = DatabaseService(mirror.mirror_path, tk_root=tk_root, mirror=mirror)
+            else:
+                service = DatabaseService(db_path, tk_root=tk_root)
+            _services[db_path] = service
+            service.index_missing_files_in_background()
+            service.start_maintenance()
+        elif service.tk_root is None and tk_root is not None:
+            service.tk_root = tk_root
+        return service
+
+
+def close_database_services(wait=True):
+    """Close every shared DatabaseService, letting queued writes finish (call on application exit)."""
+    with _services_lock:
+        services = list(_services.values())
+        _services.clear()
+    for service in services:
+        service.close(wait=wait)
+
+    if 'database_mirror' in sys.modules:
+        sys.modules['database_mirror'].close_database_mirrors()
+
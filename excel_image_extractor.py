@@ -3,16 +3,115 @@ Excel Image Extractor Module for DataViewer Application
 
 This module handles extraction of embedded images from Excel files and integrates
 them into the loaded images display.
+
+Images are read straight from the .xlsx zip: the workbook, worksheet and
+drawing relationship parts map each picture in xl/media/ to its sheet and
+anchor column, and the pictures are written out on a thread pool. A workbook
+without an xl/media/ folder is recognized from the zip directory alone, so
+the common image-free file costs a few milliseconds instead of a full
+openpyxl load.
 """
 
 import os
 import io
+import zipfile
+import posixpath
 import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as OpenpyxlImage
 from utils import debug_print
 
+EXTRACTION_WORKERS = min(4, os.cpu_count() or 1)
+
+# OOXML namespaces used by the workbook, relationship and drawing parts
+_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'xdr': 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+}
+_R_ID = f"{{{_NS['r']}}}id"
+_R_EMBED = f"{{{_NS['r']}}}embed"
+
+
+def _rels_path(part_path):
+    """Return the relationship part of a package part (xl/a/b.xml -> xl/a/_rels/b.xml.rels)."""
+    directory, name = posixpath.split(part_path)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _read_relationships(archive, part_path):
+    """
+    Return {relationship id: (type, target part path)} for a part of the package.
+
+    Targets are resolved relative to the part, as the OOXML spec requires.
+    """
+    rels_path = _rels_path(part_path)
+    try:
+        root = ET.fromstring(archive.read(rels_path))
+    except KeyError:
+        return {}
+    base_dir = posixpath.dirname(part_path)
+    relationships = {}
+    for rel in root.findall('rel:Relationship', _NS):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(base_dir, target))
+        relationships[rel.get('Id')] = (rel.get('Type', ''), target)
+    return relationships
+
+
+def find_sheet_images(archive, target_sheet_name=None):
+    """
+    Map the pictures of an .xlsx package to their sheets.
+
+    Args:
+        archive (zipfile.ZipFile): Open .xlsx file
+        target_sheet_name (str): Optional specific sheet to look at
+
+    Returns:
+        dict: sheet name -> list of (media part path, anchor column), in drawing order
+    """
+    workbook_part = 'xl/workbook.xml'
+    workbook_rels = _read_relationships(archive, workbook_part)
+    workbook_root = ET.fromstring(archive.read(workbook_part))
+
+    sheet_images = {}
+    for sheet in workbook_root.iterfind('main:sheets/main:sheet', _NS):
+        sheet_name = sheet.get('name')
+        if target_sheet_name and sheet_name != target_sheet_name:
+            continue
+        sheet_rel = workbook_rels.get(sheet.get(_R_ID))
+        if not sheet_rel:
+            continue
+
+        images = []
+        for rel_type, drawing_part in _read_relationships(archive, sheet_rel[1]).values():
+            if not rel_type.endswith('/drawing'):
+                continue
+            drawing_rels = _read_relationships(archive, drawing_part)
+            drawing_root = ET.fromstring(archive.read(drawing_part))
+            for anchor in drawing_root:
+                blip = anchor.find('xdr:pic/xdr:blipFill/a:blip', _NS)
+                if blip is None:
+                    continue
+                media_rel = drawing_rels.get(blip.get(_R_EMBED))
+                if not media_rel:
+                    continue
+                column = anchor.findtext('xdr:from/xdr:col', default='0', namespaces=_NS)
+                images.append((media_rel[1], int(column)))
+        if images:
+            sheet_images[sheet_name] = images
+    return sheet_images
+
 
 class ExcelImageExtractor:
     """Extracts embedded images from Excel files and integrates them into the GUI."""
@@ -31,6 +130,96 @@ class ExcelImageExtractor:
     def extract_images_from_excel(self, excel_path, target_sheet_name=None):
         """Extract all embedded images from an Excel file with sample detection.
         
+        Args:
+            excel_path: Path to the Excel file
+            target_sheet_name: Optional specific sheet to extract from
+            
+        Returns:
+            Dictionary mapping sheet names to lists of extracted image paths
+        """
+        debug_print(f"DEBUG: Extracting images from Excel file: {excel_path}")
+
+        try:
+            if not zipfile.is_zipfile(excel_path):
+                debug_print("DEBUG: Not an .xlsx package, no embedded images to extract")
+                return {}
+
+            with zipfile.ZipFile(excel_path) as archive:
+                if not any(name.startswith('xl/media/') for name in archive.namelist()):
+                    debug_print("DEBUG: Workbook has no xl/media folder, skipping image extraction")
+                    return {}
+
+                sheet_images = find_sheet_images(archive, target_sheet_name)
+                tasks = [
+                    (sheet_name, idx, media_path, column_index)
+                    for sheet_name, images in sheet_images.items()
+                    for idx, (media_path, column_index) in enumerate(images)
+                ]
+                debug_print(f"DEBUG: Found {len(tasks)} images in {len(sheet_images)} sheets")
+
+                with ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS) as executor:
+                    results = list(executor.map(
+                        lambda task: self._extract_media_member(archive, task[2], task[0], task[1]), tasks))
+
+        except (zipfile.BadZipFile, KeyError, ET.ParseError, ValueError) as e:
+            debug_print(f"DEBUG: Could not read images from the package directly ({e}), using openpyxl")
+            return self._extract_images_with_openpyxl(excel_path, target_sheet_name)
+        except Exception as e:
+            debug_print(f"ERROR: Failed to extract images from Excel: {e}")
+            import traceback
+            traceback.print_exc()
+            return {}
+
+        extracted_images = {}
+        for (sheet_name, idx, _, column_index), extracted_path in zip(tasks, results):
+            if not extracted_path:
+                continue
+            # Calculate sample number (each sample is 12 columns)
+            sample_number = (column_index // 12) + 1
+            extracted_images.setdefault(sheet_name, []).append(extracted_path)
+            self.image_sample_mapping[extracted_path] = sample_number
+            debug_print(f"DEBUG: Extracted image {idx+1} from {sheet_name} - Column {column_index} (Sample {sample_number})")
+
+        debug_print(f"DEBUG: Total extraction complete: {sum(len(imgs) for imgs in extracted_images.values())} images from {len(extracted_images)} sheets")
+        return extracted_images
+
+    def _extract_media_member(self, archive, media_path, sheet_name, index):
+        """Write one picture of the package to the temporary directory without re-encoding it.
+        
+        Args:
+            archive: Open .xlsx zip file
+            media_path: Path of the picture inside the package (e.g. xl/media/image1.png)
+            sheet_name: Name of the sheet containing the image
+            index: Index of the image in the sheet
+            
+        Returns:
+            Path to the extracted image file, or None if it is not an image PIL can read
+        """
+        try:
+            image_data = archive.read(media_path)
+            with Image.open(io.BytesIO(image_data)) as pil_image:
+                image_format = pil_image.format or 'PNG'
+                image_size = pil_image.size
+
+            extension = image_format.lower()
+            safe_sheet_name = "".join(c if c.isalnum() else "_" for c in sheet_name)
+            filename = f"{safe_sheet_name}_image_{index+1}.{extension}"
+            filepath = os.path.join(self.temp_dir, filename)
+
+            with open(filepath, 'wb') as f:
+                f.write(image_data)
+
+            debug_print(f"DEBUG: Saved extracted image to: {filepath}")
+            debug_print(f"DEBUG: Image dimensions: {image_size}, format: {image_format}")
+            return filepath
+
+        except Exception as e:
+            debug_print(f"ERROR: Failed to extract {media_path}: {e}")
+            return None
+
+    def _extract_images_with_openpyxl(self, excel_path, target_sheet_name=None):
+        """Extract all embedded images through openpyxl's image objects (fallback for unusual packages).
+        
         Args:
             excel_path: Path to the Excel file
             target_sheet_name: Optional specific sheet to extract from
@@ -100,9 +100,9 @@ class FileManager:
         """Delegate to database operations."""
         return self.db_ops.load_from_database(*args, **kwargs)
     
-    def load_multiple_from_database(self, file_ids):
+    def load_multiple_from_database(self, file_ids, on_complete=None):
         """Delegate to database operations."""
-        return self.db_ops.load_multiple_from_database(file_ids)
+        return self.db_ops.load_multiple_from_database(file_ids, on_complete=on_complete)
     
     def load_from_database_by_id(self, file_id):
         """Delegate to database operations."""
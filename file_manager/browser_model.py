@@ -0,0 +1,268 @@
+"""
+Database Browser Model for DataViewer Application
+
+This module holds the data behind the database browser list: file records
+grouped by base filename, one precomputed order per sort mode, and the
+current filter. The browser widget only asks it for the row count and the
+text/record of the rows that are on screen.
+"""
+
+# Standard library imports
+import os
+import re
+import json
+import threading
+
+# Local imports
+from utils import debug_print
+
+# Sort labels shown in the browser, mapped to model sort modes
+SORT_MODES = {
+    "Newest First": "newest_first",
+    "Oldest First": "oldest_first",
+    "A to Z": "alphabetical_asc",
+    "Z to A": "alphabetical_desc",
+}
+DEFAULT_SORT_MODE = "newest_first"
+
+BASE_NAME_CACHE_VERSION = 1
+BASE_NAME_CACHE_LIMIT = 200000  # filenames kept in the persisted cache
+
+_DATE_SUFFIX = re.compile(r'\s+\d{4}-\d{2}-\d{2}.*')
+_COPY_SUFFIX = re.compile(r'\s+copy.*', re.IGNORECASE)
+_EXTENSION = re.compile(r'\.[^.]*$')
+
+_base_name_cache = None
+_base_name_cache_dirty = False
+_base_name_cache_lock = threading.Lock()
+
+
+def get_base_name_cache_path():
+    """Return the path of the persisted filename -> base name cache."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "browser_base_names.json")
+
+
+def _load_base_name_cache():
+    global _base_name_cache
+    if _base_name_cache is None:
+        _base_name_cache = {}
+        try:
+            with open(get_base_name_cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == BASE_NAME_CACHE_VERSION:
+                _base_name_cache = data.get('base_names', {})
+        except (OSError, ValueError):
+            pass
+    return _base_name_cache
+
+
+def save_base_name_cache():
+    """Write the base name cache to disk if new names were added."""
+    global _base_name_cache_dirty
+    with _base_name_cache_lock:
+        if not _base_name_cache_dirty or _base_name_cache is None:
+            return
+        names = _base_name_cache
+        if len(names) > BASE_NAME_CACHE_LIMIT:
+            names = dict(list(names.items())[-BASE_NAME_CACHE_LIMIT:])
+        path = get_base_name_cache_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': BASE_NAME_CACHE_VERSION, 'base_names': names}, f)
+            os.replace(temp_path, path)
+            _base_name_cache_dirty = False
+        except OSError as e:
+            debug_print(f"DEBUG: Could not save browser base name cache: {e}")
+
+
+def extract_base_filename(filename):
+    """Extract base filename without timestamp and extension."""
+    global _base_name_cache_dirty
+    with _base_name_cache_lock:
+        cache = _load_base_name_cache()
+        base = cache.get(filename)
+        if base is not None:
+            return base
+
+    # Remove common timestamp patterns and extensions
+    base = _DATE_SUFFIX.sub('', filename)  # Remove date patterns
+    base = _COPY_SUFFIX.sub('', base)  # Remove "copy" variants
+    base = _EXTENSION.sub('', base)  # Remove extension
+    base = base.strip()
+
+    with _base_name_cache_lock:
+        cache[filename] = base
+        _base_name_cache_dirty = True
+    return base
+
+
+class DatabaseBrowserModel:
+    """Grouped, sorted and filtered view of database file records."""
+
+    def __init__(self):
+        self.groups = {}  # base name -> versions, newest first
+        self._lower_names = {}  # base name -> lowercase base name
+        self._sorted = {}  # sort mode -> all base names in that order
+        self.sort_mode = DEFAULT_SORT_MODE
+        self.filter_text = ""
+        self.matching_ids = None
+        self._matched = None  # set of base names passing the filter, None = all
+        self.view = []  # base names currently shown, in display order
+        self.overrides = {}  # base name -> older version picked from the version history
+        self._text_cache = {}
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+
+    def set_files(self, files):
+        """
+        Group file records by base name and precompute every sort order.
+
+        Args:
+            files (list): Records from DatabaseManager.list_files()
+        """
+        groups = {}
+        for file_record in files:
+            groups.setdefault(extract_base_filename(file_record['filename']), []).append(file_record)
+        for versions in groups.values():
+            versions.sort(key=lambda record: record['created_at'], reverse=True)
+
+        self.groups = groups
+        self.overrides = {name: record for name, record in self.overrides.items() if name in groups}
+        self._rebuild_indexes()
+        save_base_name_cache()
+        debug_print(f"DEBUG: Browser model grouped {len(files)} files into {len(groups)} base names")
+
+    def remove_files(self, file_ids):
+        """Drop deleted files from their groups without reloading the list."""
+        file_ids = set(file_ids)
+        changed = False
+        for base_name in list(self.groups):
+            versions = self.groups[base_name]
+            remaining = [record for record in versions if record['id'] not in file_ids]
+            if len(remaining) == len(versions):
+                continue
+            changed = True
+            if remaining:
+                self.groups[base_name] = remaining
+            else:
+                del self.groups[base_name]
+            override = self.overrides.get(base_name)
+            if override is not None and override['id'] in file_ids:
+                del self.overrides[base_name]
+        if changed:
+            self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        names = list(self.groups)
+        self._lower_names = {name: name.lower() for name in names}
+        newest = {name: self.groups[name][0]['created_at'] for name in names}
+        by_date = sorted(names, key=newest.__getitem__)
+        alphabetical = sorted(names)
+        self._sorted = {
+            "newest_first": by_date[::-1],
+            "oldest_first": by_date,
+            "alphabetical_asc": alphabetical,
+            "alphabetical_desc": alphabetical[::-1],
+        }
+        self._text_cache.clear()
+        self._apply_filter(self.filter_text, self.matching_ids, incremental=False)
+
+    # ------------------------------------------------------------------
+    # Sorting and filtering
+    # ------------------------------------------------------------------
+
+    def set_sort(self, sort_mode):
+        """Switch to a precomputed sort order, keeping the current filter."""
+        if sort_mode not in self._sorted and self._sorted:
+            sort_mode = DEFAULT_SORT_MODE
+        self.sort_mode = sort_mode
+        self._apply_filter(self.filter_text, self.matching_ids, incremental=False)
+
+    def set_filter(self, text, matching_ids=None):
+        """
+        Filter by base-name substring, or membership in matching_ids (search results).
+
+        Typing more characters narrows the current view instead of rescanning
+        every group.
+        """
+        text = (text or "").strip().lower()
+        incremental = (
+            matching_ids is None and self.matching_ids is None
+            and self.filter_text and text.startswith(self.filter_text)
+        )
+        self._apply_filter(text, matching_ids, incremental=incremental)
+
+    def _apply_filter(self, text, matching_ids, incremental):
+        self.filter_text = (text or "").strip().lower()
+        self.matching_ids = set(matching_ids) if matching_ids else None
+        ordered = self._sorted.get(self.sort_mode, [])
+
+        if not self.filter_text and not self.matching_ids:
+            self._matched = None
+            self.view = list(ordered)
+            return
+
+        candidates = self.view if incremental else ordered
+        lower_names = self._lower_names
+        matched = []
+        for name in candidates:
+            if self.filter_text and self.filter_text in lower_names[name]:
+                matched.append(name)
+            elif self.matching_ids and any(record['id'] in self.matching_ids for record in self.groups[name]):
+                matched.append(name)
+        self.view = matched
+        self._matched = set(matched)
+
+    # ------------------------------------------------------------------
+    # Rows
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.view)
+
+    def base_name(self, index):
+        return self.view[index]
+
+    def index_of(self, base_name):
+        """Return the row of base_name in the current view, or None."""
+        try:
+            return self.view.index(base_name)
+        except ValueError:
+            return None
+
+    def versions(self, index):
+        return self.groups[self.view[index]]
+
+    def record(self, index):
+        """Return the file record a row currently stands for (latest, or a picked older version)."""
+        base_name = self.view[index]
+        return self.overrides.get(base_name, self.groups[base_name][0])
+
+    def row_text(self, index):
+        """Return the display text for a row."""
+        base_name = self.view[index]
+        text = self._text_cache.get(base_name)
+        if text is None:
+            versions = self.groups[base_name]
+            override = self.overrides.get(base_name)
+            if override is not None:
+                version_num = len(versions) - versions.index(override)
+                text = f"{base_name} [v{version_num}: {override['created_at'].strftime('%Y-%m-%d %H:%M')}] ★"
+            elif len(versions) > 1:
+                text = f"{base_name} ({len(versions)} versions, latest: {versions[0]['created_at'].strftime('%Y-%m-%d %H:%M')})"
+            else:
+                text = f"{base_name} ({versions[0]['created_at'].strftime('%Y-%m-%d %H:%M')})"
+            self._text_cache[base_name] = text
+        return text
+
+    def set_override(self, base_name, record=None):
+        """Make a row stand for an older version, or restore the latest when record is None/latest."""
+        if record is None or record is self.groups[base_name][0]:
+            self.overrides.pop(base_name, None)
+        else:
+            self.overrides[base_name] = record
+        self._text_cache.pop(base_name, None)
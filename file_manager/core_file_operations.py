@@ -41,6 +41,7 @@ from utils import (
     plotting_sheet_test
 )
 from excel_image_extractor import extract_and_load_excel_images
+from tracing import traced, trace_span, current_span
 
 class CoreFileOperations:
     """Handles core file operations like loading, reloading, and file state management."""
@@ -51,6 +52,7 @@ class CoreFileOperations:
         self.gui = file_manager.gui
         self.root = file_manager.root
         
+    @traced("CoreFileOperations.load_excel_file", category="file")
     def load_excel_file(self, file_path, legacy_mode: str = None, skip_database_storage: bool = False, force_reload: bool = False) -> None:
         """
         Load the selected Excel file and process its sheets.
@@ -63,6 +65,7 @@ class CoreFileOperations:
             force_reload (bool): If True, bypass cache and reload from file
         """
         debug_print(f"DEBUG: load_excel_file called for {file_path}, skip_db_storage={skip_database_storage}, force_reload={force_reload}")
+        current_span().set('file', os.path.basename(file_path))
 
         # Check cache first (unless force_reload is True)
         cache_key = f"{file_path}_{legacy_mode}"
@@ -92,11 +95,13 @@ class CoreFileOperations:
                 raise ValueError(f"Invalid Excel file selected: {file_path}")
 
             debug_print(f"DEBUG: {'Force reloading' if force_reload else 'Loading'} file from disk: {file_path}")
+            current_span().add_bytes(os.path.getsize(file_path))
 
             # extract embedded images from Excel file
             debug_print("DEBUG: Checking for embedded images in Excel file")
             try:
-                num_images = extract_and_load_excel_images(self.gui, file_path,current_sheet=None)
+                with trace_span("extract_and_load_excel_images", category="file"):
+                    num_images = extract_and_load_excel_images(self.gui, file_path,current_sheet=None)
                 if num_images > 0:
                     debug_print(f"DEBUG: Successfully extracted {num_images} embedded images from Excel")
             except Exception as img_error:
@@ -114,18 +119,13 @@ class CoreFileOperations:
                     os.makedirs(legacy_dir)
                     debug_print(f"DEBUG: Created legacy data directory: {legacy_dir}")
 
-                legacy_wb = load_workbook(file_path)
+                legacy_wb = load_workbook(file_path, read_only=True)
                 legacy_sheetnames = legacy_wb.sheetnames
+                legacy_wb.close()
                 debug_print(f"DEBUG: Legacy file sheets: {legacy_sheetnames}")
 
-                template_path_default = os.path.join(os.path.abspath("."), "resources",
-                                         "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx")
-
-                if not os.path.exists(template_path_default):
-                    raise FileNotFoundError(f"Template file not found: {template_path_default}")
-
-                wb_template = load_workbook(template_path_default)
-                template_sheet_names = wb_template.sheetnames
+                # Only the template's sheet names are needed; the registry caches them by file hash
+                template_sheet_names = processing.get_template_structure().sheet_names
                 debug_print(f"DEBUG: Template sheets: {template_sheet_names}")
 
                 if legacy_mode is None:
@@ -228,6 +228,7 @@ class CoreFileOperations:
             traceback.print_exc()
             messagebox.showerror("Error", error_msg)
 
+    @traced("CoreFileOperations.load_initial_file", category="file")
     def load_initial_file(self) -> None:
         """Handle file loading directly on the main thread."""
         file_paths = filedialog.askopenfilenames(
@@ -336,6 +337,7 @@ class CoreFileOperations:
         else:
             raise ValueError(f"File '{file_name}' not found.")
 
+    @traced("CoreFileOperations.ensure_file_is_loaded_in_ui", category="file")
     def ensure_file_is_loaded_in_ui(self, file_path):
         """Ensure the file is properly loaded in the UI without redundant processing."""
         debug_print(f"DEBUG: Ensuring file {file_path} is loaded in UI")
@@ -21,7 +21,18 @@ from tkinter import filedialog, messagebox, Toplevel, Label, Button, ttk, Frame,
 
 # Local imports
 from database_manager import DatabaseManager
-from utils import debug_print, show_success_message, FONT, APP_BACKGROUND_COLOR, plotting_sheet_test
+from database_service import get_database_service
+from virtual_listbox import VirtualListbox
+from utils import debug_print, show_success_message, FONT, APP_BACKGROUND_COLOR, plotting_sheet_test, file_content_hash
+from tracing import traced
+from .browser_model import DatabaseBrowserModel, SORT_MODES, DEFAULT_SORT_MODE
+
+# Browser filter debounce: base-name filter, then the full-text content search
+FILTER_DEBOUNCE_MS = 150
+SEARCH_DEBOUNCE_MS = 250
+
+# How often a batch load checks whether the next prefetched record has arrived
+BATCH_LOAD_POLL_MS = 20
 
 class DatabaseOperations:
     """Handles database storage, loading, and browsing operations."""
@@ -32,11 +43,43 @@ class DatabaseOperations:
         self.gui = file_manager.gui
         self.root = file_manager.root
         self.db_manager = DatabaseManager()
+        self._db_service = None
+        self._batch_load = None  # state of the running load_multiple_from_database
+
+    # Number of files fetched ahead of the one being loaded in batch loads
+    PREFETCH_COUNT = 3
+
+    @property
+    def db_service(self):
+        """Asynchronous access (writer thread + read pool) to the same database as db_manager."""
+        if self._db_service is None:
+            self._db_service = get_database_service(self.db_manager.db_path, tk_root=self.gui.root)
+        return self._db_service
+
+    @staticmethod
+    def _get_display_filename(file_data):
+        """Return the display filename for a database record: metadata first, then the stored filename."""
+        display_filename = None
+        meta_data = file_data.get('meta_data') or {}
+        if meta_data:
+            display_filename = meta_data.get('display_filename')
+            if not display_filename:
+                original_filename = meta_data.get('original_filename')
+                if original_filename:
+                    display_filename = os.path.splitext(original_filename)[0] + '.vap3'
+        return display_filename or file_data['filename']
         
+    @traced("DatabaseOperations._store_file_in_database", category="db")
     def _store_file_in_database(self, original_file_path, display_filename=None):
         """
         Store the current file in the database.
         Enhanced with duplicate checking, better error handling, and sample image support.
+
+        Sources whose content hash matches an already stored file are linked to
+        that file (path and display name) instead of being stored again. The
+        lookup and the write run on the database service and finish in its
+        callbacks, so this returns right away; what gets stored is a snapshot
+        of the current file's state taken before returning.
         """
         debug_print(f"DEBUG: Checking if file {original_file_path} needs database storage")
 
@@ -44,199 +87,328 @@ class DatabaseOperations:
             debug_print("DEBUG: File already stored in database, skipping")
             return
 
+        if display_filename is None:
+            if original_file_path.endswith('.vap3'):
+                display_filename = os.path.basename(original_file_path)
+            else:
+                base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+                display_filename = f"{base_name}.vap3"
+
+        content_hash = None
         try:
-            debug_print("DEBUG: Storing new file in database...")
-            self.gui.progress_dialog.show_progress_bar("Storing file in database...")
-            self.gui.root.update_idletasks()
+            content_hash = file_content_hash(original_file_path)
+        except OSError as e:
+            debug_print(f"DEBUG: Could not hash {original_file_path}, storing without deduplication: {e}")
 
-            sample_notes_data = {}
-            for sheet_name, sheet_info in self.gui.filtered_sheets.items():
-                header_data = sheet_info.get('header_data')
-                if header_data and 'samples' in header_data:
-                    sheet_notes = {}
-                    for i, sample_data in enumerate(header_data['samples']):
-                        sample_notes = sample_data.get('sample_notes', '')
-                        if sample_notes.strip():
-                            sheet_notes[f"Sample {i+1}"] = sample_notes
+        store_state = self._collect_store_state(original_file_path, display_filename, content_hash)
+        if not content_hash:
+            self._write_new_file(store_state)
+            return
 
-                    if sheet_notes:
-                        sample_notes_data[sheet_name] = sheet_notes
-                        debug_print(f"DEBUG: Collected notes for sheet {sheet_name}: {len(sheet_notes)} samples")
+        def on_lookup(existing):
+            if existing is None:
+                self._write_new_file(store_state)
+            else:
+                self._link_existing_file(existing, original_file_path, content_hash, display_filename)
 
-            with tempfile.NamedTemporaryFile(suffix='.vap3', delete=False) as temp_file:
-                temp_vap3_path = temp_file.name
-                debug_print(f"DEBUG: Created temporary VAP3 file: {temp_vap3_path}")
+        def on_lookup_failed(error):
+            debug_print(f"DEBUG: Content-hash lookup failed, storing file normally: {error}")
+            self._write_new_file(store_state)
 
-            from vap_file_manager import VapFileManager
-            vap_manager = VapFileManager()
+        self.db_service.read("find_file_by_content_hash", content_hash,
+                             callback=on_lookup, error_callback=on_lookup_failed)
 
-            plot_settings = {}
-            if hasattr(self.gui, 'selected_plot_type'):
-                plot_settings['selected_plot_type'] = self.gui.selected_plot_type.get()
-
-            debug_print(f"DEBUG: Plot settings: {plot_settings}")
-
-            image_crop_states = getattr(self.gui, 'image_crop_states', {})
-            if hasattr(self.gui, 'image_loader') and self.gui.image_loader:
-                image_crop_states.update(getattr(self.gui.image_loader, 'image_crop_states', {}))
-
-            debug_print(f"DEBUG: Image crop states: {len(image_crop_states)} items")
-
-            sample_images = {}
-            sample_image_crop_states = {}
-            sample_header_data = {}
-
-            if hasattr(self.gui, 'pending_sample_images'):
-                sample_images = getattr(self.gui, 'pending_sample_images', {})
-                sample_image_crop_states = getattr(self.gui, 'pending_sample_image_crop_states', {})
-                sample_header_data = getattr(self.gui, 'pending_sample_header_data', {})
-                debug_print(f"DEBUG: Found pending sample images: {len(sample_images)} samples")
-
-            if hasattr(self.gui, 'sample_image_metadata'):
-                current_file = getattr(self.gui, 'current_file', None)
-                if current_file and current_file in self.gui.sample_image_metadata:
-                    for sheet_name, metadata in self.gui.sample_image_metadata[current_file].items():
-                        sheet_sample_images = metadata.get('sample_images', {})
-                        if sheet_sample_images:
-                            sample_images.update(sheet_sample_images)
-                            sample_image_crop_states.update(metadata.get('sample_image_crop_states', {}))
-                            if not sample_header_data:
-                                sample_header_data = metadata.get('header_data', {})
-                            debug_print(f"DEBUG: Found sample images in metadata for {sheet_name}: {len(sheet_sample_images)} samples")
-
-            debug_print(f"DEBUG: Total sample images for database storage: {len(sample_images)} samples")
-            if sample_images:
-                debug_print(f"DEBUG: Sample image groups: {list(sample_images.keys())}")
-
-            if display_filename is None:
-                if original_file_path.endswith('.vap3'):
-                    display_filename = os.path.basename(original_file_path)
-                else:
-                    base_name = os.path.splitext(os.path.basename(original_file_path))[0]
-                    display_filename = f"{base_name}.vap3"
-
-            debug_print(f"DEBUG: Using display filename: {display_filename}")
-
-            current_file_sheet_images = {}
-            if hasattr(self.gui, 'sheet_images'):
-                current_file = getattr(self.gui, 'current_file', None) or original_file_path
-                if current_file in self.gui.sheet_images:
-                    current_file_sheet_images[display_filename] = self.gui.sheet_images[current_file]
-                    debug_print(f"DEBUG: Extracted sheet images for file {current_file}: {len(self.gui.sheet_images[current_file])} sheets")
-                    for sheet_name, imgs in self.gui.sheet_images[current_file].items():
-                        debug_print(f"DEBUG: Sheet {sheet_name} has {len(imgs)} images")
-
-            debug_print(f"DEBUG: Sheet images to save with key '{display_filename}': {list(current_file_sheet_images.keys())}")
-
-            # Collect image sample mapping
-            image_sample_mapping = {}
-            if hasattr(self.gui, 'image_sample_mapping'):
-                image_sample_mapping = self.gui.image_sample_mapping.copy()
-                debug_print(f"DEBUG: Collected image sample mapping: {len(image_sample_mapping)} entries")
-        
-            # Add to plot_settings for storage
-            if image_sample_mapping:
-                plot_settings['image_sample_mapping'] = image_sample_mapping
+    def _collect_store_state(self, original_file_path, display_filename, content_hash):
+        """
+        Gather everything storing the current file needs from the GUI.
+
+        Args:
+            original_file_path (str): Path the source was loaded from
+            display_filename (str): Display name to store the file under
+            content_hash (str): SHA-256 hex digest of the source file, or None
+
+        Returns:
+            dict: save_to_vap3 arguments plus the metadata, sheet and image rows
+        """
+        sample_notes_data = {}
+        for sheet_name, sheet_info in self.gui.filtered_sheets.items():
+            header_data = sheet_info.get('header_data')
+            if header_data and 'samples' in header_data:
+                sheet_notes = {}
+                for i, sample_data in enumerate(header_data['samples']):
+                    sample_notes = sample_data.get('sample_notes', '')
+                    if sample_notes.strip():
+                        sheet_notes[f"Sample {i+1}"] = sample_notes
+
+                if sheet_notes:
+                    sample_notes_data[sheet_name] = sheet_notes
+                    debug_print(f"DEBUG: Collected notes for sheet {sheet_name}: {len(sheet_notes)} samples")
+
+        plot_settings = {}
+        if hasattr(self.gui, 'selected_plot_type'):
+            plot_settings['selected_plot_type'] = self.gui.selected_plot_type.get()
+
+        debug_print(f"DEBUG: Plot settings: {plot_settings}")
+
+        image_crop_states = getattr(self.gui, 'image_crop_states', {})
+        if hasattr(self.gui, 'image_loader') and self.gui.image_loader:
+            image_crop_states.update(getattr(self.gui.image_loader, 'image_crop_states', {}))
+
+        debug_print(f"DEBUG: Image crop states: {len(image_crop_states)} items")
+
+        sample_images = {}
+        sample_image_crop_states = {}
+        sample_header_data = {}
+
+        if hasattr(self.gui, 'pending_sample_images'):
+            sample_images = getattr(self.gui, 'pending_sample_images', {})
+            sample_image_crop_states = getattr(self.gui, 'pending_sample_image_crop_states', {})
+            sample_header_data = getattr(self.gui, 'pending_sample_header_data', {})
+            debug_print(f"DEBUG: Found pending sample images: {len(sample_images)} samples")
+
+        if hasattr(self.gui, 'sample_image_metadata'):
+            current_file = getattr(self.gui, 'current_file', None)
+            if current_file and current_file in self.gui.sample_image_metadata:
+                for sheet_name, metadata in self.gui.sample_image_metadata[current_file].items():
+                    sheet_sample_images = metadata.get('sample_images', {})
+                    if sheet_sample_images:
+                        sample_images.update(sheet_sample_images)
+                        sample_image_crop_states.update(metadata.get('sample_image_crop_states', {}))
+                        if not sample_header_data:
+                            sample_header_data = metadata.get('header_data', {})
+                        debug_print(f"DEBUG: Found sample images in metadata for {sheet_name}: {len(sheet_sample_images)} samples")
+
+        debug_print(f"DEBUG: Total sample images for database storage: {len(sample_images)} samples")
+        if sample_images:
+            debug_print(f"DEBUG: Sample image groups: {list(sample_images.keys())}")
+
+        debug_print(f"DEBUG: Using display filename: {display_filename}")
+
+        current_file_sheet_images = {}
+        if hasattr(self.gui, 'sheet_images'):
+            current_file = getattr(self.gui, 'current_file', None) or original_file_path
+            if current_file in self.gui.sheet_images:
+                current_file_sheet_images[display_filename] = self.gui.sheet_images[current_file]
+                debug_print(f"DEBUG: Extracted sheet images for file {current_file}: {len(self.gui.sheet_images[current_file])} sheets")
+                for sheet_name, imgs in self.gui.sheet_images[current_file].items():
+                    debug_print(f"DEBUG: Sheet {sheet_name} has {len(imgs)} images")
+
+        debug_print(f"DEBUG: Sheet images to save with key '{display_filename}': {list(current_file_sheet_images.keys())}")
+
+        # Collect image sample mapping
+        image_sample_mapping = {}
+        if hasattr(self.gui, 'image_sample_mapping'):
+            image_sample_mapping = self.gui.image_sample_mapping.copy()
+            debug_print(f"DEBUG: Collected image sample mapping: {len(image_sample_mapping)} entries")
+
+        # Add to plot_settings for storage
+        if image_sample_mapping:
+            plot_settings['image_sample_mapping'] = image_sample_mapping
+
+        filtered_sheets = self.gui.filtered_sheets
+        plot_options = getattr(self.gui, 'plot_options', [])
+        meta_data = {
+            'display_filename': display_filename,
+            'original_filename': os.path.basename(original_file_path),
+            'original_path': original_file_path,
+            'creation_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'sheet_count': len(filtered_sheets),
+            'plot_options': plot_options,
+            'plot_settings': plot_settings,
+            'has_sample_images': bool(sample_images),
+            'sample_count': len(sample_images),
+            'sample_notes': sample_notes_data,
+            'source_hash': content_hash
+        }
+
+        sheet_rows = [
+            (sheet_name, plotting_sheet_test(sheet_name, sheet_info["data"]), sheet_info.get("is_empty", False))
+            for sheet_name, sheet_info in filtered_sheets.items()
+        ]
+
+        image_rows = []
+        if hasattr(self.gui, 'sheet_images') and hasattr(self.gui, 'current_file') and self.gui.current_file in self.gui.sheet_images:
+            current_file = self.gui.current_file
+            for sheet_name, image_paths in self.gui.sheet_images[current_file].items():
+                for image_path in image_paths:
+                    if os.path.exists(image_path):
+                        image_rows.append((sheet_name, image_path, image_crop_states.get(image_path, False)))
+
+        # Copies, so later edits in the GUI don't change what is stored
+        return {
+            'original_file_path': original_file_path,
+            'filtered_sheets': dict(filtered_sheets),
+            'sheet_images': current_file_sheet_images,
+            'plot_options': list(plot_options),
+            'image_crop_states': dict(image_crop_states),
+            'plot_settings': plot_settings,
+            'sample_images': dict(sample_images),
+            'sample_image_crop_states': dict(sample_image_crop_states),
+            'sample_header_data': sample_header_data,
+            'meta_data': meta_data,
+            'sheet_rows': sheet_rows,
+            'image_rows': image_rows
+        }
+
+    def _write_new_file(self, store_state):
+        """
+        Build the VAP3 archive for a store snapshot and queue it on the writer thread.
+
+        Args:
+            store_state (dict): Result of _collect_store_state
+        """
+        original_file_path = store_state['original_file_path']
+        vap3_buffer = None
+
+        def on_store_failed(error):
+            debug_print(f"ERROR: Failed to store file in database: {error}")
+            if vap3_buffer is not None:
+                vap3_buffer.close()
+            # Not stored after all, so a later load may try again
+            self.file_manager.stored_files_cache.discard(original_file_path)
+            self.gui.progress_dialog.hide_progress_bar()
+            messagebox.showerror("Error", f"Failed to store {os.path.basename(original_file_path)} in the database: {error}")
+
+        try:
+            debug_print("DEBUG: Storing new file in database...")
+            self.gui.progress_dialog.show_progress_bar("Storing file in database...")
+            self.gui.root.update_idletasks()
+
+            # The archive is built in memory and streamed into the database, no temp file
+            from vap_file_manager import VapFileManager, create_vap3_buffer
+            vap_manager = VapFileManager()
+            vap3_buffer = create_vap3_buffer()
 
             success = vap_manager.save_to_vap3(
-                temp_vap3_path,
-                self.gui.filtered_sheets,
-                current_file_sheet_images,
-                getattr(self.gui, 'plot_options', []),
-                image_crop_states,
-                plot_settings,
-                sample_images,
-                sample_image_crop_states,
-                sample_header_data
+                vap3_buffer,
+                store_state['filtered_sheets'],
+                store_state['sheet_images'],
+                store_state['plot_options'],
+                store_state['image_crop_states'],
+                store_state['plot_settings'],
+                store_state['sample_images'],
+                store_state['sample_image_crop_states'],
+                store_state['sample_header_data']
             )
 
             if not success:
-                raise Exception("Failed to create temporary VAP3 file")
+                raise Exception("Failed to create VAP3 archive")
 
             debug_print("DEBUG: VAP3 file created successfully with sample images")
+            debug_print(f"DEBUG: Metadata to store: {store_state['meta_data']}")
 
-            meta_data = {
-                'display_filename': display_filename,
-                'original_filename': os.path.basename(original_file_path),
-                'original_path': original_file_path,
-                'creation_date': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'sheet_count': len(self.gui.filtered_sheets),
-                'plot_options': getattr(self.gui, 'plot_options', []),
-                'plot_settings': plot_settings,
-                'has_sample_images': bool(sample_images),
-                'sample_count': len(sample_images),
-                'sample_notes': sample_notes_data 
-            }
-
-            debug_print(f"DEBUG: Metadata to store: {meta_data}")
-
-            file_id = self.db_manager.store_vap3_file(temp_vap3_path, meta_data)
-            debug_print(f"DEBUG: File stored with ID: {file_id}")
-
-            for sheet_name, sheet_info in self.gui.filtered_sheets.items():
-                is_plotting = plotting_sheet_test(sheet_name, sheet_info["data"])
-                is_empty = sheet_info.get("is_empty", False)
-
-                sheet_id = self.db_manager.store_sheet_info(
-                    file_id,
-                    sheet_name,
-                    is_plotting,
-                    is_empty
-                )
-                debug_print(f"DEBUG: Stored sheet '{sheet_name}' with ID: {sheet_id}")
-
-            if hasattr(self.gui, 'sheet_images') and hasattr(self.gui, 'current_file') and self.gui.current_file in self.gui.sheet_images:
-                current_file = self.gui.current_file
-                for sheet_name, image_paths in self.gui.sheet_images[current_file].items():
-                    for image_path in image_paths:
-                        if os.path.exists(image_path):
-                            crop_enabled = image_crop_states.get(image_path, False)
-                            self.db_manager.store_image(file_id, sheet_name, image_path, crop_enabled)
-                            debug_print(f"DEBUG: Stored image for sheet {sheet_name}: {os.path.basename(image_path)}")
-
-            try:
-                os.unlink(temp_vap3_path)
-            except:
-                pass
+            # File, sheet and image rows go in as one transaction (one commit on the share)
+            entry = {'source': vap3_buffer, 'meta_data': store_state['meta_data'],
+                     'sheets': store_state['sheet_rows'], 'images': store_state['image_rows']}
+        except Exception as e:
+            traceback.print_exc()
+            on_store_failed(e)
+            return
 
+        def on_stored(file_ids):
+            vap3_buffer.close()
+            self.gui.progress_dialog.hide_progress_bar()
             self.file_manager.stored_files_cache.add(original_file_path)
-
+            debug_print(f"DEBUG: File stored with ID: {file_ids[0]} ({len(entry['sheets'])} sheets, {len(entry['images'])} images)")
             debug_print("DEBUG: File stored in database successfully")
 
-        except Exception as e:
-            debug_print(f"ERROR: Failed to store file in database: {e}")
-            import traceback
-            traceback.print_exc()
-            raise e
-        finally:
-            self.gui.progress_dialog.hide_progress_bar()
+        self.db_service.write("store_files", [entry], callback=on_stored, error_callback=on_store_failed)
+
+    def _link_existing_file(self, existing, original_file_path, content_hash, display_filename):
+        """
+        Link a source file to the stored file with the same content hash.
 
-    def load_from_database(self, file_id=None, show_success_msg=True, batch_operation=False):
-        """Load a file from the database."""
+        Args:
+            existing (dict): Stored file record with the same content (id, filename)
+            original_file_path (str): Path the source was loaded from
+            content_hash (str): SHA-256 hex digest of the source file
+            display_filename (str): Display name the source was loaded under
+        """
+        def on_linked(linked):
+            if linked:
+                debug_print(f"DEBUG: {original_file_path} has the same content as stored file {existing['id']} "
+                            f"('{existing['filename']}'), linked instead of storing again")
+            else:
+                debug_print(f"DEBUG: {original_file_path} already linked to stored file {existing['id']}, skipping")
+
+        def on_link_failed(error):
+            debug_print(f"DEBUG: Could not link {original_file_path} to stored file {existing['id']}: {error}")
+
+        self.file_manager.stored_files_cache.add(original_file_path)
+        self.db_service.write("link_source_path", existing['id'], content_hash, original_file_path, display_filename,
+                              callback=on_linked, error_callback=on_link_failed)
+
+    @traced("DatabaseOperations.load_from_database", category="db")
+    def load_from_database(self, file_id=None, show_success_msg=True, batch_operation=False, file_data=None):
+        """
+        Load a file from the database.
+
+        Without file_data the record (and, when file_id is None, the file list
+        for the selection dialog) is read on the database service and the file
+        is loaded from the read's callback, after this has returned.
+
+        Args:
+            file_id: Database ID of the file; prompts for a file when None
+            show_success_msg: Show a message box when done
+            batch_operation: Part of load_multiple_from_database (no own progress dialog)
+            file_data: Record already fetched for file_id (skips the database read)
+
+        Returns:
+            bool: Whether the file was loaded when file_data is given, otherwise None
+        """
         debug_print(f"DEBUG: load_from_database called with file_id={file_id}, show_success_message={show_success_msg}, batch_operation={batch_operation}")
-        try:
-            # Only show progress dialog if not part of a batch operation
+        # Only show progress dialog if not part of a batch operation
+        if not batch_operation:
+            self.gui.progress_dialog.show_progress_bar("Loading from database...")
+            self.gui.root.update_idletasks()
+
+        if file_data is not None:
+            return self._load_file_record(file_id, file_data, show_success_msg, batch_operation)
+
+        def on_read_failed(error):
             if not batch_operation:
-                self.gui.progress_dialog.show_progress_bar("Loading from database...")
-                self.gui.root.update_idletasks()
-
-            if file_id is None:
-                # Show a dialog to select from available files
-                file_list = self.db_manager.list_files()
-                if not file_list:
-                    show_success_message("Info", "No files found in the database.", self.gui.root)
-                    return False
+                self.gui.progress_dialog.hide_progress_bar()
+            if show_success_msg:
+                messagebox.showerror("Error", f"Error loading file from database: {error}")
+            debug_print(f"ERROR: Error loading file from database: {error}")
+
+        def read_record(selected_id):
+            self.db_service.read(
+                "get_file_by_id", selected_id,
+                callback=lambda record: self._load_file_record(selected_id, record, show_success_msg, batch_operation),
+                error_callback=on_read_failed
+            )
 
-                # Create file selection dialog
-                selection_dialog = FileSelectionDialog(self.gui.root, file_list)
-                file_id = selection_dialog.show()
+        def on_file_list(file_list):
+            if not file_list:
+                if not batch_operation:
+                    self.gui.progress_dialog.hide_progress_bar()
+                show_success_message("Info", "No files found in the database.", self.gui.root)
+                return
 
-                if file_id is None:
-                    debug_print("DEBUG: No file selected from dialog")
-                    return False
+            # Create file selection dialog
+            selected_id = FileSelectionDialog(self.gui.root, file_list).show()
+            if selected_id is None:
+                debug_print("DEBUG: No file selected from dialog")
+                if not batch_operation:
+                    self.gui.progress_dialog.hide_progress_bar()
+                return
+            read_record(selected_id)
 
-            # Get file data from database - CORRECTED METHOD NAME
-            file_data = self.db_manager.get_file_by_id(file_id)
+        if file_id is None:
+            # Show a dialog to select from available files
+            self.db_service.read("list_files", callback=on_file_list, error_callback=on_read_failed)
+        else:
+            read_record(file_id)
+
+    def _load_file_record(self, file_id, file_data, show_success_msg=True, batch_operation=False):
+        """
+        Load a file from its database record (see load_from_database).
+
+        Returns:
+            bool: True if the file was loaded
+        """
+        try:
             if not file_data:
                 if show_success_msg:
                     messagebox.showerror("Error", "File not found in database.")
@@ -247,25 +419,8 @@ class DatabaseOperations:
             created_at = file_data.get('created_at')
 
             # Get the proper display filename - prioritize metadata, then fallback to database filename
-            display_filename = None
-
-            # First, try to get display_filename from metadata
-            if 'meta_data' in file_data and file_data['meta_data']:
-                display_filename = file_data['meta_data'].get('display_filename')
-                debug_print(f"DEBUG: display_filename from metadata: '{display_filename}'")
-
-                # If not found, try original_filename from metadata and construct .vap3 name
-                if not display_filename:
-                    original_filename = file_data['meta_data'].get('original_filename')
-                    if original_filename:
-                        # Remove extension and add .vap3
-                        display_filename = os.path.splitext(original_filename)[0] + '.vap3'
-                        debug_print(f"DEBUG: Constructed filename from original_filename: '{display_filename}'")
-
-            # Final fallback to database filename field
-            if not display_filename:
-                display_filename = file_data['filename']
-                debug_print(f"DEBUG: Using database filename as fallback: '{display_filename}'")
+            display_filename = self._get_display_filename(file_data)
+            debug_print(f"DEBUG: Display filename: '{display_filename}'")
 
             # Check if we already have files loaded to determine if we should append
             append_to_existing = len(self.gui.all_filtered_sheets) > 0
@@ -279,7 +434,8 @@ class DatabaseOperations:
                 # CRITICAL: Load and process VAP3 data BEFORE loading the file
                 from vap_file_manager import VapFileManager
                 vap_manager = VapFileManager()
-                vap_data = vap_manager.load_from_vap3(temp_vap3_path)
+                # The temporary copy is deleted below, so read it instead of mapping it
+                vap_data = vap_manager.load_from_vap3(temp_vap3_path, memory_map=False)
                 debug_print(f"DEBUG: VAP3 data keys: {list(vap_data.keys())}")
                 debug_print(f"DEBUG: Sample images in vap_data: {list(vap_data.get('sample_images', {}).keys())}")
                 debug_print(f"DEBUG: Sample image counts: {[(k, len(v)) for k, v in vap_data.get('sample_images', {}).items()]}")
@@ -288,7 +444,8 @@ class DatabaseOperations:
                 debug_print(f"DEBUG: Loaded VAP3 data with keys: {list(vap_data.keys())}")
 
                 # Use the enhanced VAP3 loading that handles sample images
-                success = self.file_manager.load_vap3_file(temp_vap3_path, display_name=display_filename, append_to_existing=append_to_existing)
+                success = self.file_manager.load_vap3_file(temp_vap3_path, display_name=display_filename,
+                                                           append_to_existing=append_to_existing, memory_map=False)
 
                 if success:
                     total_files = len(self.gui.all_filtered_sheets)
@@ -396,24 +553,68 @@ class DatabaseOperations:
             if not batch_operation:
                 self.gui.progress_dialog.hide_progress_bar()
 
-    def load_multiple_from_database(self, file_ids):
-        """Load multiple files from the database with a single progress dialog and success message."""
+    def load_multiple_from_database(self, file_ids, on_complete=None):
+        """
+        Load multiple files from the database with a single progress dialog and success message.
+
+        Records are fetched on the read pool a few files ahead of the one being
+        loaded; the Tk thread picks them up by polling, so this returns before
+        the files are loaded.
+
+        Args:
+            file_ids (list): Database IDs in load order
+            on_complete (callable, optional): Called with the loaded display filenames when done
+        """
         if not file_ids:
+            if on_complete:
+                on_complete([])
+            return
+        if self._batch_load is not None:
+            messagebox.showinfo("Info", "Files are still being loaded from the database.")
             return
 
-        loaded_files = []
-        failed_files = []
-        total_sample_images_loaded = 0
-
+        # Show progress dialog for the entire batch operation
+        self.gui.progress_dialog.show_progress_bar("Loading files from database...")
+        self.gui.root.update_idletasks()
+
+        debug_print(f"DEBUG: Starting batch load of {len(file_ids)} files")
+        self._batch_load = {
+            'file_ids': list(file_ids),
+            'next_index': 0,
+            'fetches': {},
+            'loaded_files': [],
+            'failed_files': [],
+            'sample_images_loaded': 0,
+            'on_complete': on_complete
+        }
+        for index in range(min(self.PREFETCH_COUNT, len(file_ids))):
+            self._prefetch_batch_record(index)
+        self._continue_batch_load()
+
+    def _prefetch_batch_record(self, index):
+        """Start reading the record of the batch file at index, unless already requested."""
+        batch = self._batch_load
+        file_ids = batch['file_ids']
+        if index < len(file_ids) and file_ids[index] not in batch['fetches']:
+            batch['fetches'][file_ids[index]] = self.db_service.read("get_file_by_id", file_ids[index])
+
+    def _continue_batch_load(self):
+        """Load the batch files whose records have arrived, in order; poll again while one is pending."""
+        batch = self._batch_load
+        file_ids = batch['file_ids']
+        total_files = len(file_ids)
         try:
-            # Show progress dialog for the entire batch operation
-            self.gui.progress_dialog.show_progress_bar("Loading files from database...")
-            self.gui.root.update_idletasks()
-
-            total_files = len(file_ids)
-            debug_print(f"DEBUG: Starting batch load of {total_files} files")
+            while batch['next_index'] < total_files:
+                i = batch['next_index']
+                file_id = file_ids[i]
+                self._prefetch_batch_record(i)
+                if not batch['fetches'][file_id].done():
+                    self.gui.root.after(BATCH_LOAD_POLL_MS, self._continue_batch_load)
+                    return
 
-            for i, file_id in enumerate(file_ids):
+                batch['next_index'] += 1
+                fetch = batch['fetches'].pop(file_id)
+                self._prefetch_batch_record(i + self.PREFETCH_COUNT)
                 try:
                     # Update progress
                     progress = int(((i + 1) / total_files) * 100)
@@ -423,41 +624,52 @@ class DatabaseOperations:
                     debug_print(f"DEBUG: Loading file {i + 1}/{total_files} (ID: {file_id})")
 
                     # Load this file (suppress individual success messages and progress dialogs)
-                    success = self.load_from_database(file_id, show_success_msg=False, batch_operation=True)
+                    file_data = fetch.result()
+                    success = bool(file_data) and self._load_file_record(
+                        file_id, file_data, show_success_msg=False, batch_operation=True
+                    )
 
                     if success:
-                        # Get the file info for the success message - CORRECTED METHOD NAME
-                        file_data = self.db_manager.get_file_by_id(file_id)
-                        if file_data:
-                            display_filename = None
-                            if 'meta_data' in file_data and file_data['meta_data']:
-                                display_filename = file_data['meta_data'].get('display_filename')
-                                if not display_filename:
-                                    original_filename = file_data['meta_data'].get('original_filename')
-                                    if original_filename:
-                                        display_filename = os.path.splitext(original_filename)[0] + '.vap3'
-                            if not display_filename:
-                                display_filename = file_data['filename']
-
-                            loaded_files.append(display_filename)
-                            debug_print(f"DEBUG: Successfully loaded: {display_filename}")
-
-                            # Count sample images for this file
-                            if (hasattr(self.gui, 'sample_image_metadata') and
-                                display_filename in self.gui.sample_image_metadata):
-                                for sheet_metadata in self.gui.sample_image_metadata[display_filename].values():
-                                    sample_images = sheet_metadata.get('sample_images', {})
-                                    file_sample_count = sum(len(images) for images in sample_images.values())
-                                    total_sample_images_loaded += file_sample_count
-                                    debug_print(f"DEBUG: Loaded {file_sample_count} sample images for {display_filename}")
+                        # Reuse the fetched record for the success message
+                        display_filename = self._get_display_filename(file_data)
+
+                        batch['loaded_files'].append(display_filename)
+                        debug_print(f"DEBUG: Successfully loaded: {display_filename}")
+
+                        # Count sample images for this file
+                        if (hasattr(self.gui, 'sample_image_metadata') and
+                            display_filename in self.gui.sample_image_metadata):
+                            for sheet_metadata in self.gui.sample_image_metadata[display_filename].values():
+                                sample_images = sheet_metadata.get('sample_images', {})
+                                file_sample_count = sum(len(images) for images in sample_images.values())
+                                batch['sample_images_loaded'] += file_sample_count
+                                debug_print(f"DEBUG: Loaded {file_sample_count} sample images for {display_filename}")
                     else:
-                        failed_files.append(f"File ID {file_id}")
+                        batch['failed_files'].append(f"File ID {file_id}")
                         debug_print(f"DEBUG: Failed to load file ID: {file_id}")
 
                 except Exception as e:
-                    failed_files.append(f"File ID {file_id}")
+                    batch['failed_files'].append(f"File ID {file_id}")
                     debug_print(f"DEBUG: Exception loading file ID {file_id}: {e}")
 
+            self._finish_batch_load()
+
+        except Exception as e:
+            self._batch_load = None
+            self.gui.progress_dialog.hide_progress_bar()
+            messagebox.showerror("Error", f"Error during batch loading: {e}")
+            debug_print(f"ERROR: Batch loading error: {e}")
+            traceback.print_exc()
+
+    def _finish_batch_load(self):
+        """Report the result of the batch load and hand the loaded files to its on_complete callback."""
+        batch = self._batch_load
+        self._batch_load = None
+        loaded_files = batch['loaded_files']
+        failed_files = batch['failed_files']
+        total_sample_images_loaded = batch['sample_images_loaded']
+
+        try:
             # Update final progress
             self.gui.progress_dialog.update_progress_bar(100)
             self.gui.root.update_idletasks()
@@ -468,51 +680,49 @@ class DatabaseOperations:
                 self.gui.root.title(f"DataViewer - {total_loaded} files loaded")
             elif total_loaded == 1:
                 self.gui.root.title("DataViewer - 1 file loaded")
+        finally:
+            # Hide progress dialog
+            self.gui.progress_dialog.hide_progress_bar()
 
-            # Show single summary message
-            if failed_files:
-                if loaded_files:
-                    # Partial success
-                    success_count = len(loaded_files)
-                    failed_count = len(failed_files)
-                    message = f"Batch load completed:\n\n"
-                    message += f"✓ Successfully loaded: {success_count} files\n"
-                    message += f"✗ Failed to load: {failed_count} files\n\n"
-                    if total_sample_images_loaded > 0:
-                        message += f"📷 Sample images loaded: {total_sample_images_loaded}\n\n"
-                    message += f"Total files now loaded: {len(self.gui.all_filtered_sheets)}"
-                    messagebox.showwarning("Partial Success", message)
-                else:
-                    # Complete failure
-                    messagebox.showerror("Error", f"Failed to load all {len(failed_files)} selected files.")
+        # Show single summary message
+        if failed_files:
+            if loaded_files:
+                # Partial success
+                success_count = len(loaded_files)
+                failed_count = len(failed_files)
+                message = f"Batch load completed:\n\n"
+                message += f"✓ Successfully loaded: {success_count} files\n"
+                message += f"✗ Failed to load: {failed_count} files\n\n"
+                if total_sample_images_loaded > 0:
+                    message += f"📷 Sample images loaded: {total_sample_images_loaded}\n\n"
+                message += f"Total files now loaded: {len(self.gui.all_filtered_sheets)}"
+                messagebox.showwarning("Partial Success", message)
+            else:
+                # Complete failure
+                messagebox.showerror("Error", f"Failed to load all {len(failed_files)} selected files.")
+        else:
+            # Complete success
+            if len(loaded_files) == 1:
+                message = f"Successfully loaded 1 file:\n{loaded_files[0]}"
+                if total_sample_images_loaded > 0:
+                    message += f"\n\n📷 Sample images loaded: {total_sample_images_loaded}"
             else:
-                # Complete success
-                if len(loaded_files) == 1:
-                    message = f"Successfully loaded 1 file:\n{loaded_files[0]}"
-                    if total_sample_images_loaded > 0:
-                        message += f"\n\n📷 Sample images loaded: {total_sample_images_loaded}"
+                message = f"Successfully loaded {len(loaded_files)} files:\n\n"
+                # Show first few filenames, then "and X more" if too many
+                if len(loaded_files) <= 5:
+                    message += "\n".join([f"• {name}" for name in loaded_files])
                 else:
-                    message = f"Successfully loaded {len(loaded_files)} files:\n\n"
-                    # Show first few filenames, then "and X more" if too many
-                    if len(loaded_files) <= 5:
-                        message += "\n".join([f"• {name}" for name in loaded_files])
-                    else:
-                        message += "\n".join([f"• {name}" for name in loaded_files[:3]])
-                        message += f"\n• ... and {len(loaded_files) - 3} more files"
+                    message += "\n".join([f"• {name}" for name in loaded_files[:3]])
+                    message += f"\n• ... and {len(loaded_files) - 3} more files"
 
-                    if total_sample_images_loaded > 0:
-                        message += f"\n\n📷 Total sample images loaded: {total_sample_images_loaded}"
-                    message += f"\n\nTotal files now loaded: {len(self.gui.all_filtered_sheets)}"
+                if total_sample_images_loaded > 0:
+                    message += f"\n\n📷 Total sample images loaded: {total_sample_images_loaded}"
+                message += f"\n\nTotal files now loaded: {len(self.gui.all_filtered_sheets)}"
 
-                show_success_message("Success", message, self.gui.root)
+            show_success_message("Success", message, self.gui.root)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error during batch loading: {e}")
-            debug_print(f"ERROR: Batch loading error: {e}")
-            traceback.print_exc()
-        finally:
-            # Hide progress dialog
-            self.gui.progress_dialog.hide_progress_bar()
+        if batch['on_complete']:
+            batch['on_complete'](loaded_files)
 
     def load_from_database_by_id(self, file_id):
         """Load a file from database by its ID."""
@@ -558,137 +768,45 @@ class DatabaseOperations:
         bottom_frame = Frame(dialog)
         bottom_frame.pack(fill="x", padx=10, pady=10)
 
-        # Store grouped files data
-        file_groups = {}  # Key: base filename, Value: list of file records
-        listbox_to_file_mapping = {}  # Key: listbox index, Value: file record
-
-        def extract_base_filename(filename):
-            """Extract base filename without timestamp and extension."""
-
-            # Remove common timestamp patterns and extensions
-            base = re.sub(r'\s+\d{4}-\d{2}-\d{2}.*', '', filename)  # Remove date patterns
-            base = re.sub(r'\s+copy.*', '', base, flags=re.IGNORECASE)  # Remove "copy" variants
-            base = re.sub(r'\.[^.]*$', '', base)  # Remove extension
-            return base.strip()
-
-
-        def sort_file_groups(groups, sort_method):
-            """Sort file groups based on the selected method."""
-            debug_print(f"DEBUG: Sorting files by {sort_method}")
-
-            if sort_method == "newest_first":
-                # Sort by most recent update (within each group, then by group)
-                sorted_groups = {}
-                for base_name, versions in groups.items():
-                    # Each group is already sorted by creation date (newest first)
-                    sorted_groups[base_name] = versions
-                # Sort group keys by the most recent file in each group
-                sorted_keys = sorted(sorted_groups.keys(),
-                                   key=lambda name: sorted_groups[name][0]['created_at'], reverse=True)
-            elif sort_method == "oldest_first":
-                # Sort by oldest update
-                sorted_groups = {}
-                for base_name, versions in groups.items():
-                    sorted_groups[base_name] = versions
-                # Sort group keys by the most recent file in each group (oldest first)
-                sorted_keys = sorted(sorted_groups.keys(),
-                                   key=lambda name: sorted_groups[name][0]['created_at'], reverse=False)
-            elif sort_method == "alphabetical_asc":
-                # Sort alphabetically A to Z
-                sorted_groups = groups
-                sorted_keys = sorted(groups.keys())
-            elif sort_method == "alphabetical_desc":
-                # Sort alphabetically Z to A
-                sorted_groups = groups
-                sorted_keys = sorted(groups.keys(), reverse=True)
-            else:
-                # Default to newest first
-                sorted_groups = groups
-                sorted_keys = sorted(groups.keys(),
-                                   key=lambda name: groups[name][0]['created_at'], reverse=True)
-
-            return sorted_groups, sorted_keys
-
-        def populate_listbox(filter_keyword = None):
-            """Populate the listbox with files according to current sort method."""
-            try:
-                debug_print("DEBUG: Populating listbox with sorted files")
-
-                # Clear current listbox
-                file_listbox.delete(0, tk.END)
-                listbox_to_file_mapping.clear()
-
-                # Get current sort method
-                current_sort = sort_var.get()
-                if current_sort == "Newest First":
-                    sort_method = "newest_first"
-                elif current_sort == "Oldest First":
-                    sort_method = "oldest_first"
-                elif current_sort == "A to Z":
-                    sort_method = "alphabetical_asc"
-                elif current_sort == "Z to A":
-                    sort_method = "alphabetical_desc"
-                else:
-                    sort_method = "newest_first"
-
-                # Apply filter if provided
-                filtered_groups = file_groups.copy()
-                if filter_keyword and filter_keyword.strip():
-                    keyword_lower = filter_keyword.strip().lower()
-                    filtered_groups = {
-                        base_name: versions
-                        for base_name, versions in file_groups.items()
-                        if keyword_lower in base_name.lower()
-                    }
-                    debug_print(f"DEBUG: Applied filter '{filter_keyword}' - {len(filtered_groups)} groups remaining")
-
-
-                # Sort the file groups
-                sorted_groups, sorted_keys = sort_file_groups(filtered_groups, sort_method)
-
-                # Populate listbox with sorted groups
-                listbox_index = 0
-                for base_name in sorted_keys:
-                    latest_file = sorted_groups[base_name][0]  # First item is newest
-                    count = len(sorted_groups[base_name])
-
-                    if count > 1:
-                        display_text = f"{base_name} ({count} versions, latest: {latest_file['created_at'].strftime('%Y-%m-%d %H:%M')})"
-                    else:
-                        display_text = f"{base_name} ({latest_file['created_at'].strftime('%Y-%m-%d %H:%M')})"
-
-                    file_listbox.insert(tk.END, display_text)
-                    listbox_to_file_mapping[listbox_index] = latest_file
-                    debug_print(f"DEBUG: Mapped listbox index {listbox_index} to file ID {latest_file['id']} for base name '{base_name}'")
-                    listbox_index += 1
-
-                update_selection_info()
-                debug_print(f"DEBUG: Listbox populated with {listbox_index} items")
+        # Grouping, sort orders and filtering live in the model; the list renders visible rows only
+        model = DatabaseBrowserModel()
+
+        def populate_listbox(selected_names=None):
+            """
+            Point the list at the model's current view.
+
+            Args:
+                selected_names (list): Base names to select again; rows move when the
+                    model regroups or re-sorts, so the selection follows the names
+            """
+            file_listbox.set_source(len(model), model.row_text)
+            rows = [model.index_of(name) for name in selected_names or ()]
+            rows = [row for row in rows if row is not None]
+            for row in rows:
+                file_listbox.selection_set(row)
+            if rows:
+                file_listbox.see(rows[0])
+            update_selection_info()
 
-            except Exception as e:
-                debug_print(f"DEBUG: Error populating listbox: {e}")
-                messagebox.showerror("Error", f"Error displaying files: {e}")
+        def load_file_list():
+            """Fetch the file list on the database read pool; the dialog stays responsive meanwhile."""
+            file_listbox.show_message("Loading files from database...")
+            self.db_service.read("list_files", callback=on_files_loaded, error_callback=on_files_failed)
 
-        try:
-            # Get files from database
-            files = self.db_manager.list_files()
+        def on_files_loaded(files):
+            if not dialog.winfo_exists():
+                return
             debug_print(f"DEBUG: Found {len(files)} files in database")
+            model.set_files(files)
+            populate_listbox()
+            if filter_var.get().strip():
+                run_content_search(filter_var.get())
 
-            # Group files by base filename
-            for file_record in files:
-                base_name = extract_base_filename(file_record['filename'])
-                if base_name not in file_groups:
-                    file_groups[base_name] = []
-                file_groups[base_name].append(file_record)
-
-            # Sort each group by creation date (newest first)
-            for group in file_groups.values():
-                group.sort(key=lambda x: x['created_at'], reverse=True)
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load files from database: {e}")
+        def on_files_failed(error):
+            if not dialog.winfo_exists():
+                return
+            messagebox.showerror("Error", f"Failed to load files from database: {error}")
             dialog.destroy()
-            return
 
         # Create header
         if comparison_mode:
@@ -707,19 +825,9 @@ class DatabaseOperations:
         # Sort options variable
         sort_var = tk.StringVar(value="newest_first")
 
-        sort_options = [
-            ("Newest First", "newest_first"),
-            ("Oldest First", "oldest_first"),
-            ("A to Z", "alphabetical_asc"),
-            ("Z to A", "alphabetical_desc")
-        ]
-
-        sort_dropdown = ttk.Combobox(sort_frame, textvariable=sort_var, values=[option[1] for option in sort_options],
+        sort_dropdown = ttk.Combobox(sort_frame, textvariable=sort_var, values=list(SORT_MODES),
                                    state="readonly", width=15)
         sort_dropdown.pack(side="left", padx=5)
-
-        # Set display values
-        sort_dropdown['values'] = [option[0] for option in sort_options]
         sort_dropdown.set("Newest First")
 
         # Right side - Filter controls
@@ -728,30 +836,16 @@ class DatabaseOperations:
         filter_entry = tk.Entry(sort_frame, textvariable=filter_var, width=20, font=("Arial", 10))
         filter_entry.pack(side="right", padx=(0, 5))
 
-        # Create listbox with scrollbar
-        listbox_frame = Frame(list_frame)
-
-        # Create listbox with scrollbar
-        listbox_frame = Frame(list_frame)
-        listbox_frame.pack(fill="both", expand=True)
-
-        scrollbar = tk.Scrollbar(listbox_frame)
-        scrollbar.pack(side="right", fill="y")
-
-        # Use extended selection mode for multi-select
-        file_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set,
-                                 selectmode=tk.EXTENDED, font=FONT)
-        file_listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.config(command=file_listbox.yview)
+        # Virtual list: only the rows on screen are inserted into the Listbox
+        file_listbox = VirtualListbox(list_frame, font=FONT)
+        file_listbox.pack(fill="both", expand=True)
 
         # Selection info label (create before functions that use it)
         selection_info = Label(list_frame, text="", font=("Arial", 10))
         selection_info.pack(pady=5)
 
-        # DEFINE update_selection_info FIRST since populate_listbox needs it
         def update_selection_info():
             """Update the selection information label."""
-            debug_print("DEBUG: Updating selection info")
             try:
                 selected_count = len(file_listbox.curselection())
                 if comparison_mode:
@@ -762,34 +856,66 @@ class DatabaseOperations:
                         selection_info.config(text=f"Selected: {selected_count} files (ready for comparison)",
                                             fg="green")
                 else:
-                    selection_info.config(text=f"Selected: {selected_count} files", fg="black")
-                debug_print(f"DEBUG: Selection info updated - {selected_count} files selected")
+                    selection_info.config(text=f"Selected: {selected_count} of {len(model)} files", fg="black")
             except Exception as e:
                 debug_print(f"DEBUG: Error updating selection info: {e}")
 
-        # Initial population with default sort
-        populate_listbox()
+        # Initial population with default sort once the file list arrives
+        load_file_list()
+        # With a local mirror, pull rows added on the share since the last pass (shown on refresh)
+        self.db_service.request_sync()
 
         # Bind sort dropdown change event
         def on_sort_change(event=None):
             """Handle sort method change."""
             debug_print(f"DEBUG: Sort method changed to {sort_var.get()}")
-            current_filter = filter_var.get()
-            populate_listbox(current_filter if current_filter else None)
+            model.set_sort(SORT_MODES.get(sort_var.get(), DEFAULT_SORT_MODE))
+            populate_listbox()
 
         sort_dropdown.bind('<<ComboboxSelected>>', on_sort_change)
 
-        # Bind filter entry change event
+        # Filtering is debounced: names are matched once typing pauses, the content search a bit later
+        search_state = {'filter_job': None, 'search_job': None, 'text': ""}
+
         def on_filter_change(event=None):
             """Handle filter keyword change."""
+            if search_state['filter_job'] is not None:
+                dialog.after_cancel(search_state['filter_job'])
+            search_state['filter_job'] = dialog.after(FILTER_DEBOUNCE_MS, apply_filter)
+
+        def apply_filter():
+            search_state['filter_job'] = None
             filter_keyword = filter_var.get()
-            debug_print(f"DEBUG: Filter keyword changed to '{filter_keyword}'")
-            populate_listbox(filter_keyword if filter_keyword else None)
+            if filter_keyword == search_state['text']:
+                return
+            search_state['text'] = filter_keyword
+            model.set_filter(filter_keyword)
+            populate_listbox()
+
+            if search_state['search_job'] is not None:
+                dialog.after_cancel(search_state['search_job'])
+                search_state['search_job'] = None
+            if filter_keyword.strip():
+                search_state['search_job'] = dialog.after(SEARCH_DEBOUNCE_MS, lambda: run_content_search(filter_keyword))
+
+        def run_content_search(filter_keyword):
+            """Search sample IDs, header fields and notes; results arrive on the Tk thread."""
+            search_state['search_job'] = None
+
+            def on_results(results):
+                # Ignore results for text the user has already changed
+                if not dialog.winfo_exists() or filter_var.get() != filter_keyword:
+                    return
+                debug_print(f"DEBUG: Full-text search '{filter_keyword}' matched {len(results)} files")
+                model.set_filter(filter_keyword, matching_ids={record['id'] for record in results})
+                populate_listbox()
+
+            self.db_service.read("search_files", filter_keyword, callback=on_results)
 
         filter_entry.bind('<KeyRelease>', on_filter_change)
         filter_entry.bind('<FocusOut>', on_filter_change)
 
-        def show_version_history_dialog(base_name, versions, main_listbox_index):
+        def show_version_history_dialog(base_name, versions):
             """Show dialog with version history and allow version selection."""
             history_dialog = Toplevel(dialog)
             history_dialog.title(f"Version History - {base_name}")
@@ -828,12 +954,12 @@ class DatabaseOperations:
             hist_scrollbar.config(command=version_listbox.yview)
 
             # Populate with versions (newest first)
+            version_texts = []
             for i, version in enumerate(versions):
                 created_str = version['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                is_current = i == 0
-                status = " [CURRENT]" if is_current else f" [v{len(versions)-i}]"
-                display_text = f"{version['filename']}{status} - {created_str}"
-                version_listbox.insert(tk.END, display_text)
+                status = " [CURRENT]" if i == 0 else f" [v{len(versions)-i}]"
+                version_texts.append(f"{version['filename']}{status} - {created_str}")
+            version_listbox.insert(tk.END, *version_texts)
 
             def on_version_double_click(event):
                 """Handle double-click on version to replace in main browser."""
@@ -842,43 +968,18 @@ class DatabaseOperations:
                     return
 
                 selected_version_idx = selection[0]
-                selected_version = versions[selected_version_idx]
-
-                # Update the main listbox display
-                created_str = selected_version['created_at'].strftime('%Y-%m-%d %H:%M')
-                if selected_version_idx == 0:
-                    # Current version selected - restore normal display
-                    count = len(versions)
-                    if count > 1:
-                        display_text = f"{base_name} ({count} versions, latest: {created_str})"
-                    else:
-                        display_text = f"{base_name} ({created_str})"
-                    # Remove from restoration tracking if it exists
-                    if hasattr(dialog, 'original_mappings') and main_listbox_index in dialog.original_mappings:
-                        del dialog.original_mappings[main_listbox_index]
-                else:
-                    # Older version selected - show with indicator
-                    version_num = len(versions) - selected_version_idx
-                    display_text = f"{base_name} [v{version_num}: {created_str}] ★"
 
-                    # Store original mapping for restoration if not already stored
-                    if not hasattr(dialog, 'original_mappings'):
-                        dialog.original_mappings = {}
-                    if main_listbox_index not in dialog.original_mappings:
-                        dialog.original_mappings[main_listbox_index] = versions[0]  # Store original (newest)
-
-                # Update main listbox
-                file_listbox.delete(main_listbox_index)
-                file_listbox.insert(main_listbox_index, display_text)
-
-                # Update mapping to point to selected version
-                listbox_to_file_mapping[main_listbox_index] = selected_version
-
-                # Keep the item selected in main listbox
-                file_listbox.selection_clear(0, tk.END)
-                file_listbox.selection_set(main_listbox_index)
+                # Keep the item selected in main listbox (before overriding, so the
+                # selection handler doesn't restore it as deselected)
+                row = model.index_of(base_name)
+                if row is not None and row not in file_listbox.curselection():
+                    file_listbox.selection_set(row)
 
+                model.set_override(base_name, versions[selected_version_idx])
                 debug_print(f"DEBUG: Temporarily replaced {base_name} with version {selected_version_idx + 1}")
+                if row is not None:
+                    file_listbox.refresh()
+                    file_listbox.see(row)
 
                 history_dialog.destroy()
 
@@ -917,9 +1018,9 @@ class DatabaseOperations:
                 if not messagebox.askyesno("Confirm Deletion", confirm_msg):
                     return
 
-                try:
-                    debug_print(f"DEBUG: Starting deletion of {len(version_ids)} versions")
-                    success_count, error_count = self.db_manager.delete_multiple_files(version_ids)
+                def on_versions_deleted(deleted_ids):
+                    success_count = len(deleted_ids)
+                    error_count = len(version_ids) - success_count
 
                     if success_count > 0:
                         if error_count == 0:
@@ -927,49 +1028,27 @@ class DatabaseOperations:
                         else:
                             messagebox.showwarning("Partial Success", f"Deleted {success_count} version(s), but {error_count} failed.")
 
-                        # Check if we deleted the most recent version
-                        most_recent_deleted = 0 in selected_items
-
-                        if most_recent_deleted:
-                            # Find the new most recent version and update main listbox
-                            remaining_versions = [v for i, v in enumerate(versions) if i not in selected_items]
-                            if remaining_versions:
-                                # Sort remaining versions by date (newest first)
-                                remaining_versions.sort(key=lambda x: x['created_at'], reverse=True)
-                                new_most_recent = remaining_versions[0]
-
-                                # Update the main listbox display
-                                base_name = extract_base_filename(new_most_recent['filename'])
-                                count = len(remaining_versions)
-                                created_str = new_most_recent['created_at'].strftime('%Y-%m-%d %H:%M')
-
-                                if count > 1:
-                                    display_text = f"{base_name} ({count} versions, latest: {created_str})"
-                                else:
-                                    display_text = f"{base_name} ({created_str})"
-
-                                # Update the item in main listbox
-                                file_listbox.delete(main_listbox_index)
-                                file_listbox.insert(main_listbox_index, display_text)
-                                listbox_to_file_mapping[main_listbox_index] = new_most_recent
-
-                                debug_print(f"DEBUG: Updated main listbox after deleting most recent version")
-                            else:
-                                # All versions deleted, remove from main listbox
-                                file_listbox.delete(main_listbox_index)
-                                if main_listbox_index in listbox_to_file_mapping:
-                                    del listbox_to_file_mapping[main_listbox_index]
-                                debug_print(f"DEBUG: Removed entry from main listbox - all versions deleted")
+                        # The model regroups: the next newest version becomes the row's latest,
+                        # and the row disappears if every version was deleted
+                        if dialog.winfo_exists():
+                            selected_names = [model.base_name(idx) for idx in file_listbox.curselection()]
+                            model.remove_files(deleted_ids)
+                            populate_listbox(selected_names)
+                            debug_print(f"DEBUG: Updated main listbox after deleting {success_count} versions")
 
                         # Close the version history dialog and refresh
-                        history_dialog.destroy()
-                        update_selection_info()
+                        if history_dialog.winfo_exists():
+                            history_dialog.destroy()
                     else:
                         messagebox.showerror("Error", "Failed to delete any versions.")
 
-                except Exception as e:
-                    debug_print(f"DEBUG: Error during version deletion: {e}")
-                    messagebox.showerror("Error", f"Error during deletion: {e}")
+                def on_versions_delete_failed(error):
+                    debug_print(f"DEBUG: Error during version deletion: {error}")
+                    messagebox.showerror("Error", f"Error during deletion: {error}")
+
+                debug_print(f"DEBUG: Starting deletion of {len(version_ids)} versions")
+                self.db_service.write("delete_files", version_ids,
+                                      callback=on_versions_deleted, error_callback=on_versions_delete_failed)
 
             # Add delete button on the left, close on the right
             Button(bottom_frame_hist, text="Delete Selected", command=on_delete_versions,
@@ -991,10 +1070,9 @@ class DatabaseOperations:
             file_ids = []
             filenames = []
             for idx in selected_items:
-                if idx in listbox_to_file_mapping:
-                    file_record = listbox_to_file_mapping[idx]
-                    file_ids.append(file_record['id'])
-                    filenames.append(file_record['filename'])
+                file_record = model.record(idx)
+                file_ids.append(file_record['id'])
+                filenames.append(file_record['filename'])
 
             if not file_ids:
                 messagebox.showwarning("Warning", "No valid files selected for deletion.")
@@ -1009,9 +1087,9 @@ class DatabaseOperations:
             if not messagebox.askyesno("Confirm Deletion", confirm_msg):
                 return
 
-            try:
-                debug_print(f"DEBUG: Starting deletion of {len(file_ids)} files")
-                success_count, error_count = self.db_manager.delete_multiple_files(file_ids)
+            def on_files_deleted(deleted_ids):
+                success_count = len(deleted_ids)
+                error_count = len(file_ids) - success_count
 
                 if success_count > 0:
                     if error_count == 0:
@@ -1020,48 +1098,23 @@ class DatabaseOperations:
                         messagebox.showwarning("Partial Success", f"Deleted {success_count} file(s), but {error_count} failed.")
 
                     # Refresh the file list after deletion
-                    refresh_file_list()
+                    if dialog.winfo_exists():
+                        refresh_file_list()
                 else:
                     messagebox.showerror("Error", "Failed to delete any files.")
 
-            except Exception as e:
-                debug_print(f"DEBUG: Error during file deletion: {e}")
-                messagebox.showerror("Error", f"Error during deletion: {e}")
+            def on_files_delete_failed(error):
+                debug_print(f"DEBUG: Error during file deletion: {error}")
+                messagebox.showerror("Error", f"Error during deletion: {error}")
+
+            debug_print(f"DEBUG: Starting deletion of {len(file_ids)} files")
+            self.db_service.write("delete_files", file_ids,
+                                  callback=on_files_deleted, error_callback=on_files_delete_failed)
 
         def refresh_file_list():
             """Refresh the file list display after deletion."""
-            try:
-                debug_print("DEBUG: Refreshing file list after deletion")
-
-                # Clear current listbox
-                file_listbox.delete(0, tk.END)
-                listbox_to_file_mapping.clear()
-                file_groups.clear()
-
-                # Reload files from database
-                files = self.db_manager.list_files()
-                debug_print(f"DEBUG: Reloaded {len(files)} files from database")
-
-                # Regroup files
-                for file_record in files:
-                    base_name = extract_base_filename(file_record['filename'])
-                    if base_name not in file_groups:
-                        file_groups[base_name] = []
-                    file_groups[base_name].append(file_record)
-
-                # Sort each group by creation date (newest first)
-                for base_name in file_groups:
-                    file_groups[base_name].sort(key=lambda x: x['created_at'], reverse=True)
-
-                # Repopulate listbox
-                populate_listbox()
-
-                update_selection_info()
-                debug_print("DEBUG: File list refresh completed")
-
-            except Exception as e:
-                debug_print(f"DEBUG: Error refreshing file list: {e}")
-                messagebox.showerror("Error", f"Error refreshing file list: {e}")
+            debug_print("DEBUG: Refreshing file list after deletion")
+            load_file_list()
 
         def on_double_click(event):
             """Handle double-click to show version history for selected files."""
@@ -1069,104 +1122,67 @@ class DatabaseOperations:
             if not selected_items:
                 return
 
+            # Base names are stable while dialogs are open, row indices may not be
+            base_names = [model.base_name(idx) for idx in selected_items]
+
             # Process each selected file one by one
-            def process_next_file(file_indices):
-                if not file_indices:
+            def process_next_file(names):
+                if not names:
                     return  # All done
 
-                idx = file_indices[0]
-                remaining = file_indices[1:]
-
-                if idx not in listbox_to_file_mapping:
-                    # Skip this one and process next
-                    if remaining:
-                        dialog.after(100, lambda: process_next_file(remaining))
-                    return
-
-                selected_file = listbox_to_file_mapping[idx]
-                base_name = extract_base_filename(selected_file['filename'])
+                base_name = names[0]
+                remaining = names[1:]
 
                 # Check if this file has multiple versions
-                if base_name not in file_groups or len(file_groups[base_name]) <= 1:
+                versions = model.groups.get(base_name, [])
+                if len(versions) <= 1:
                     # Single version - skip to next file
                     if remaining:
                         dialog.after(100, lambda: process_next_file(remaining))
                     return
 
-                # Show version history dialog
-                # We need to ensure the dialog is modal and wait for it to close before proceeding
-                def show_dialog_and_continue():
-                    show_version_history_dialog(base_name, file_groups[base_name], idx)
-                    # After dialog closes, process next file
-                    if remaining:
-                        dialog.after(100, lambda: process_next_file(remaining))
-
-                show_dialog_and_continue()
+                # Show version history dialog, then continue with the next file
+                show_version_history_dialog(base_name, versions)
+                if remaining:
+                    dialog.after(100, lambda: process_next_file(remaining))
 
             # Start processing the first file
-            process_next_file(selected_items)
+            process_next_file(base_names)
 
         def on_selection_change(event):
             """Restore original versions for deselected items."""
-            if hasattr(dialog, 'original_mappings'):
-                current_selection = set(file_listbox.curselection())
-
-                # Check each item that has been temporarily replaced
-                items_to_restore = []
-                for idx, original_version in dialog.original_mappings.items():
-                    if idx not in current_selection:
-                        items_to_restore.append((idx, original_version))
-
-                # Restore items that were deselected
-                for idx, original_version in items_to_restore:
-                    base_name = extract_base_filename(original_version['filename'])
-                    count = len(file_groups[base_name])
-                    created_str = original_version['created_at'].strftime('%Y-%m-%d %H:%M')
-
-                    if count > 1:
-                        display_text = f"{base_name} ({count} versions, latest: {created_str})"
-                    else:
-                        display_text = f"{base_name} ({created_str})"
-
-                    # Restore display and mapping
-                    file_listbox.delete(idx)
-                    file_listbox.insert(idx, display_text)
-                    listbox_to_file_mapping[idx] = original_version
-
+            if model.overrides:
+                selected_names = {model.base_name(idx) for idx in file_listbox.curselection()}
+                restored = [name for name in model.overrides if name not in selected_names]
+                for base_name in restored:
+                    model.set_override(base_name, None)
                     debug_print(f"DEBUG: Restored {base_name} to latest version (deselected)")
-
-                # Remove restored items from tracking
-                for idx, _ in items_to_restore:
-                    del dialog.original_mappings[idx]
+                if restored:
+                    file_listbox.refresh()
 
             update_selection_info()
 
         def select_all():
-            file_listbox.select_set(0, tk.END)
-            update_selection_info()
+            file_listbox.select_all()
 
         def select_none():
             file_listbox.selection_clear(0, tk.END)
-            update_selection_info()
+
+        def selected_file_ids():
+            return [model.record(idx)['id'] for idx in file_listbox.curselection()]
 
         # Define load functions based on mode
         if comparison_mode:
             def on_load():
-                selected_items = file_listbox.curselection()
-                if len(selected_items) < 2:
+                file_ids = selected_file_ids()
+                if len(file_ids) < 2:
                     messagebox.showwarning("Warning", "Please select at least 2 files for comparison.")
                     return
 
-                file_ids = []
-                for idx in selected_items:
-                    if idx in listbox_to_file_mapping:
-                        file_record = listbox_to_file_mapping[idx]
-                        file_ids.append(file_record['id'])
-
                 dialog.destroy()
-                if len(file_ids) >= 2:
-                    original_all_filtered_sheets = self.gui.all_filtered_sheets.copy()
-                    self.load_multiple_from_database(file_ids)
+                original_all_filtered_sheets = self.gui.all_filtered_sheets.copy()
+
+                def on_comparison_files_loaded(loaded_files):
                     if len(self.gui.all_filtered_sheets) >= 2:
                         from sample_comparison import SampleComparisonWindow
                         comparison_window = SampleComparisonWindow(self.gui, self.gui.all_filtered_sheets)
@@ -1174,27 +1190,23 @@ class DatabaseOperations:
                     else:
                         messagebox.showwarning("Warning", "Failed to load enough files for comparison.")
                         self.gui.all_filtered_sheets = original_all_filtered_sheets
+
+                self.load_multiple_from_database(file_ids, on_complete=on_comparison_files_loaded)
         else:
             def on_load():
-                selected_items = file_listbox.curselection()
-                if not selected_items:
+                file_ids = selected_file_ids()
+                if not file_ids:
                     messagebox.showwarning("Warning", "Please select at least one file to load.")
                     return
 
-                file_ids = []
-                for idx in selected_items:
-                    if idx in listbox_to_file_mapping:
-                        file_record = listbox_to_file_mapping[idx]
-                        file_ids.append(file_record['id'])
-
                 dialog.destroy()
                 if len(file_ids) == 1:
                     self.load_from_database(file_ids[0])
-                elif len(file_ids) > 1:
+                else:
                     self.load_multiple_from_database(file_ids)
 
         # Bind events
-        file_listbox.bind("<Double-Button-1>", on_double_click)
+        file_listbox.bind_rows("<Double-Button-1>", on_double_click)
         file_listbox.bind("<<ListboxSelect>>", on_selection_change)
 
         # Create buttons
@@ -3,24 +3,179 @@ Excel Integration Module for DataViewer Application
 
 This module handles opening Excel files for external editing and processing
 changes made in Excel back into the application.
+
+The sheet is exported with a write-only (streaming) workbook into a private
+temporary directory. That directory is watched with operating system change
+notifications where available (Windows), so Excel saving or closing the file
+is noticed immediately without polling the file lock every second. When Excel
+closes, the edited sheet is compared cell by cell with the exported snapshot
+and only the changed cells are applied; an unchanged sheet is not reprocessed.
 """
 
 # Standard library imports
 import os
+import sys
 import time
 import uuid
+import shutil
 import tempfile
 import threading
 import subprocess
 import traceback
 
 # Third party imports
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
 from tkinter import messagebox, ttk
 
 # Local imports
-from utils import debug_print
+from utils import debug_print, show_success_message
+
+EXCEL_TEMP_PREFIX = "dataviewer_excel_"
+EXCEL_OPEN_TIMEOUT_S = 30.0  # how long to wait for Excel to open the exported file
+EXCEL_WATCH_TIMEOUT_S = 5.0  # safety-net lock check interval when notifications are available
+EXCEL_POLL_INTERVAL_S = 1.0  # lock check interval without notifications
+
+
+def export_rows(frame):
+    """Yield the rows of a DataFrame as lists, with missing values as None (empty cells)."""
+    values = frame.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    for row in values:
+        yield row.tolist()
+
+
+def write_sheet_for_excel(frame, file_path, sheet_title):
+    """
+    Write a DataFrame to a new workbook using a write-only (streaming) worksheet.
+
+    Args:
+        frame (pd.DataFrame): Sheet data
+        file_path (str): Workbook path to create
+        sheet_title (str): Worksheet title
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31] or "Sheet1")
+    ws.append([str(column) for column in frame.columns])
+    for row in export_rows(frame):
+        ws.append(row)
+    wb.save(file_path)
+
+
+def diff_frames(snapshot, modified):
+    """
+    Compare an exported sheet with the version read back from Excel.
+
+    Args:
+        snapshot (pd.DataFrame): Data as exported
+        modified (pd.DataFrame): Data read back from the edited workbook
+
+    Returns:
+        np.ndarray or None: Boolean mask of changed cells, or None if rows or
+        columns were added, removed or renamed
+    """
+    if snapshot.shape != modified.shape:
+        return None
+    if [str(column) for column in snapshot.columns] != [str(column) for column in modified.columns]:
+        return None
+    old_values = snapshot.to_numpy(dtype=object)
+    new_values = modified.to_numpy(dtype=object)
+    both_missing = pd.isna(old_values) & pd.isna(new_values)
+    return ~((old_values == new_values) | both_missing)
+
+
+def apply_cell_changes(frame, modified, changed):
+    """
+    Return a copy of frame with the changed cells taken from modified.
+
+    Only columns containing changes are rebuilt; their dtype is re-inferred so
+    a numeric column stays numeric when numbers are edited.
+    """
+    result = frame.copy()
+    for col_idx in np.flatnonzero(changed.any(axis=0)):
+        rows = np.flatnonzero(changed[:, col_idx])
+        values = result.iloc[:, col_idx].to_numpy(dtype=object, copy=True)
+        values[rows] = modified.iloc[rows, col_idx].to_numpy(dtype=object)
+        result.isetitem(col_idx, pd.Series(values, index=result.index).infer_objects())
+    return result
+
+
+def is_file_locked(file_path):
+    """Return True if another process (Excel) holds the file open."""
+    try:
+        with open(file_path, 'r+b'):
+            pass
+    except PermissionError:
+        return True
+    except Exception:
+        return False
+    return False
+
+
+class DirectoryWatcher:
+    """
+    Blocks until a directory changes, using Windows change notifications.
+
+    On other platforms (or if notifications cannot be set up) wait() simply
+    sleeps, so callers fall back to checking the directory periodically.
+    """
+
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x01
+    FILE_NOTIFY_CHANGE_SIZE = 0x08
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x10
+    WAIT_OBJECT_0 = 0
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._handle = None
+        self._kernel32 = None
+        if sys.platform != 'win32':
+            return
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+            kernel32.FindFirstChangeNotificationW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32]
+            kernel32.FindNextChangeNotification.argtypes = [ctypes.c_void_p]
+            kernel32.FindCloseChangeNotification.argtypes = [ctypes.c_void_p]
+            kernel32.WaitForSingleObject.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+            kernel32.WaitForSingleObject.restype = ctypes.c_uint32
+            handle = kernel32.FindFirstChangeNotificationW(
+                directory, False,
+                self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE)
+            if handle and handle != ctypes.c_void_p(-1).value:
+                self._handle = handle
+                self._kernel32 = kernel32
+        except Exception as e:
+            debug_print(f"DEBUG: Directory change notifications unavailable, polling instead: {e}")
+
+    @property
+    def notifications(self):
+        """True if wait() returns as soon as the directory changes."""
+        return self._handle is not None
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for a change.
+
+        Returns:
+            bool: True if a change was signalled
+        """
+        if self._handle is None:
+            time.sleep(timeout)
+            return False
+        result = self._kernel32.WaitForSingleObject(self._handle, int(timeout * 1000))
+        if result == self.WAIT_OBJECT_0:
+            self._kernel32.FindNextChangeNotification(self._handle)
+            return True
+        return False
+
+    def close(self):
+        """Release the notification handle."""
+        if self._handle is not None:
+            self._kernel32.FindCloseChangeNotification(self._handle)
+            self._handle = None
 
 
 class ExcelIntegration:
@@ -48,13 +203,9 @@ class ExcelIntegration:
                 messagebox.showerror("Error", "Please select a valid sheet first.")
                 return
 
-            # Get the sheet data
+            # Get the sheet data; the snapshot is what Excel edits are diffed against
             sheet_data = self.gui.filtered_sheets[sheet_name]['data']
-
-            # Create a temporary Excel file
-            import tempfile
-            import uuid
-            from openpyxl import Workbook
+            snapshot = sheet_data.copy()
 
             # Generate a unique identifier
             unique_id = str(uuid.uuid4()).split('-')[0]
@@ -63,49 +214,26 @@ class ExcelIntegration:
             safe_sheet_name = "".join(c for c in sheet_name if c.isalnum() or c == ' ')
             safe_sheet_name = safe_sheet_name.replace(' ', '_')[:15]
 
-            # Create a temporary file
-            temp_dir = os.path.abspath(tempfile.gettempdir())
+            # Create the temporary file in its own directory so only Excel's activity on it is watched
+            temp_dir = tempfile.mkdtemp(prefix=EXCEL_TEMP_PREFIX)
             temp_file = os.path.join(temp_dir, f"dataviewer_{safe_sheet_name}_{unique_id}.xlsx")
 
-            # Create a new workbook with just this sheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = safe_sheet_name[:31]
-
-            # Write the headers
-            for col_idx, column_name in enumerate(sheet_data.columns, 1):
-                ws.cell(row=1, column=col_idx, value=str(column_name))
-
-            # Write the data
-            for row_idx, row in enumerate(sheet_data.itertuples(index=False), 2):
-                for col_idx, value in enumerate(row, 1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
-
-            # Save the workbook
-            wb.save(temp_file)
+            # Stream the sheet into a write-only workbook
+            write_sheet_for_excel(sheet_data, temp_file, safe_sheet_name)
 
             if not os.path.exists(temp_file):
                 raise FileNotFoundError(f"Failed to create temporary file at {temp_file}")
 
-            # Record the file modification time before opening
-            original_mod_time = os.path.getmtime(temp_file)
-
             # Create status notification
             status_text = f"Opening {sheet_name} in Excel. Changes will be imported when Excel closes."
             status_label = ttk.Label(self.gui.root, text=status_text, relief="sunken", anchor="w")
             status_label.pack(side="bottom", fill="x")
             self.gui.root.update_idletasks()
 
-            # File monitor state
-            class FileMonitorState:
-                def __init__(self, initial_mod_time):
-                    self.last_mod_time = initial_mod_time
-                    self.has_changed = False
-
-            monitor_state = FileMonitorState(original_mod_time)
+            # Start watching before Excel is launched so no change is missed
+            watcher = DirectoryWatcher(temp_dir)
 
             # Force a new Excel instance
-            import subprocess
             cmd = f'start /wait "" "excel.exe" /x "{os.path.abspath(temp_file)}"'
 
             try:
@@ -114,43 +242,17 @@ class ExcelIntegration:
                 debug_print(f"Error launching Excel with command: {e}")
                 os.startfile(os.path.abspath(temp_file))
 
-            time.sleep(2.0)
-
             # Monitor file in background thread
-            def monitor_file_lock():
-                file_open = True
-                while file_open:
-                    file_locked = False
-                    try:
-                        with open(temp_file, 'r+b') as test_lock:
-                            pass
-                    except PermissionError:
-                        file_locked = True
-                    except FileNotFoundError:
-                        file_locked = False
-                        file_open = False
-                    except Exception:
-                        file_locked = False
-
-                    file_open = file_locked
-
-                    if os.path.exists(temp_file):
-                        try:
-                            current_mod_time = os.path.getmtime(temp_file)
-                            if current_mod_time > monitor_state.last_mod_time:
-                                monitor_state.has_changed = True
-                                monitor_state.last_mod_time = current_mod_time
-                        except Exception:
-                            pass
-
-                    if not file_open:
-                        self.gui.root.after(500, lambda: self._process_excel_changes(temp_file, sheet_name, monitor_state.has_changed, status_label))
-                        break
-
-                    time.sleep(1.0)
+            def monitor_excel_file():
+                try:
+                    has_changed = self._wait_for_excel(temp_file, watcher)
+                finally:
+                    watcher.close()
+                self.gui.root.after(0, lambda: self._process_excel_changes(
+                    temp_file, sheet_name, has_changed, status_label, snapshot=snapshot))
 
             # Start monitoring thread
-            monitor_thread = threading.Thread(target=monitor_file_lock, daemon=True)
+            monitor_thread = threading.Thread(target=monitor_excel_file, daemon=True)
             self.gui.threads.append(monitor_thread)
             monitor_thread.start()
 
@@ -158,8 +260,52 @@ class ExcelIntegration:
             messagebox.showerror("Error", f"Failed to open Excel: {e}")
             traceback.print_exc()
 
-    def _process_excel_changes(self, temp_file, sheet_name, file_changed, status_label=None):
-        """Process changes made in Excel after it closes."""
+    def _wait_for_excel(self, temp_file, watcher):
+        """
+        Block until Excel has opened and closed the file.
+
+        Runs on a worker thread; woken by directory change notifications when
+        available, with a slower lock check as a safety net.
+
+        Returns:
+            bool: True if the file was modified
+        """
+        def signature():
+            try:
+                stat = os.stat(temp_file)
+                return stat.st_mtime_ns, stat.st_size
+            except OSError:
+                return None
+
+        original_signature = signature()
+        interval = EXCEL_WATCH_TIMEOUT_S if watcher.notifications else EXCEL_POLL_INTERVAL_S
+        debug_print(f"DEBUG: Watching {temp_file} ({'notifications' if watcher.notifications else 'polling'})")
+
+        # Wait for Excel to open (lock) the file
+        deadline = time.monotonic() + EXCEL_OPEN_TIMEOUT_S
+        while not is_file_locked(temp_file) and os.path.exists(temp_file):
+            if time.monotonic() > deadline:
+                debug_print("DEBUG: Excel did not open the file in time")
+                break
+            watcher.wait(min(interval, 1.0))
+
+        # Wait for Excel to release it
+        while os.path.exists(temp_file) and is_file_locked(temp_file):
+            watcher.wait(interval)
+
+        return signature() != original_signature
+
+    def _process_excel_changes(self, temp_file, sheet_name, file_changed, status_label=None, snapshot=None):
+        """
+        Process changes made in Excel after it closes.
+
+        Args:
+            temp_file (str): The exported workbook
+            sheet_name (str): Sheet it was exported from
+            file_changed (bool): Whether Excel modified the file
+            status_label: Status notification to remove
+            snapshot (pd.DataFrame): Sheet data as exported, used to find the changed cells
+        """
         try:
             if status_label and status_label.winfo_exists():
                 status_label.destroy()
@@ -182,8 +328,25 @@ class ExcelIntegration:
                     if not read_success:
                         raise Exception(f"Failed to read Excel file after {max_retries} attempts")
 
-                    # Update the filtered sheets with new data
-                    self.gui.filtered_sheets[sheet_name]['data'] = modified_data
+                    current_data = self.gui.filtered_sheets[sheet_name]['data']
+                    changed = diff_frames(snapshot, modified_data) if snapshot is not None else None
+
+                    if changed is not None and not changed.any():
+                        debug_print(f"DEBUG: Excel saved {sheet_name} without changing any cells")
+                        self._show_status_message("Excel file was closed without changes.")
+                        return
+
+                    if changed is not None and current_data.shape == snapshot.shape:
+                        # Apply only the edited cells, keeping anything else as it is in the application
+                        changed_count = int(changed.sum())
+                        debug_print(f"DEBUG: Applying {changed_count} changed cells from Excel to {sheet_name}")
+                        self.gui.filtered_sheets[sheet_name]['data'] = apply_cell_changes(current_data, modified_data, changed)
+                        message = f"Imported {changed_count} changed cell{'s' if changed_count != 1 else ''} from Excel."
+                    else:
+                        # Rows or columns were added or removed; take the whole sheet
+                        debug_print(f"DEBUG: Sheet structure changed in Excel, replacing {sheet_name}")
+                        self.gui.filtered_sheets[sheet_name]['data'] = modified_data
+                        message = "Changes from Excel have been imported successfully."
 
                     # If using VAP3 file, update it
                     if hasattr(self.gui, 'file_path') and self.gui.file_path.endswith('.vap3'):
@@ -201,14 +364,7 @@ class ExcelIntegration:
                     self.gui.update_displayed_sheet(sheet_name)
 
                     # Show success message
-                    success_label = ttk.Label(
-                        self.gui.root,
-                        text="Changes from Excel have been imported successfully.",
-                        relief="sunken",
-                        anchor="w"
-                    )
-                    success_label.pack(side="bottom", fill="x")
-                    self.gui.root.after(3000, lambda: success_label.destroy() if success_label.winfo_exists() else None)
+                    self._show_status_message(message)
 
                 except Exception as e:
                     traceback.print_exc()
@@ -216,21 +372,23 @@ class ExcelIntegration:
             elif file_changed and not os.path.exists(temp_file):
                 show_success_message("Information", "Excel file was modified but appears to have been moved or renamed. Changes could not be imported.", self.gui.root)
             else:
-                info_label = ttk.Label(
-                    self.gui.root,
-                    text="Excel file was closed without changes.",
-                    relief="sunken",
-                    anchor="w"
-                )
-                info_label.pack(side="bottom", fill="x")
-                self.gui.root.after(3000, lambda: info_label.destroy() if info_label.winfo_exists() else None)
+                self._show_status_message("Excel file was closed without changes.")
 
         except Exception as e:
             traceback.print_exc()
             messagebox.showerror("Error", f"Failed to process Excel changes: {e}")
         finally:
-            if os.path.exists(temp_file):
+            temp_dir = os.path.dirname(temp_file)
+            if os.path.basename(temp_dir).startswith(EXCEL_TEMP_PREFIX):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            elif os.path.exists(temp_file):
                 try:
                     os.remove(temp_file)
                 except Exception:
-                    pass
\ No newline at end of file
+                    pass
+
+    def _show_status_message(self, text):
+        """Show a short-lived status bar message at the bottom of the main window."""
+        label = ttk.Label(self.gui.root, text=text, relief="sunken", anchor="w")
+        label.pack(side="bottom", fill="x")
+        self.gui.root.after(3000, lambda: label.destroy() if label.winfo_exists() else None)
@@ -0,0 +1,111 @@
+"""
+Header Data Cache for DataViewer Application
+
+Extracting header data opens the workbook with openpyxl and rescans the sheet
+every time a header dialog or data collection session starts. This module
+caches the extracted header data keyed by the SHA-256 of the file and the
+sheet name, so an unchanged workbook is parsed once. Writing to the file
+changes its hash, so stale entries are never returned. File hashes are
+memoized by size and modification time, so repeated lookups do not reread
+the file either.
+"""
+
+# Standard library imports
+import os
+import json
+import threading
+
+# Local imports
+from utils import debug_print, file_content_hash
+
+HEADER_CACHE_VERSION = 1
+HEADER_CACHE_LIMIT = 500  # entries kept in the persisted cache
+
+_header_cache = None  # key -> header data as a JSON string
+_header_cache_lock = threading.Lock()
+
+
+def get_header_cache_path():
+    """Return the path of the persisted header data cache."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "header_data_cache.json")
+
+
+def _cache_key(content_hash, sheet_name, variant):
+    return f"{content_hash}|{variant}|{sheet_name}"
+
+
+def _load_header_cache():
+    global _header_cache
+    if _header_cache is None:
+        _header_cache = {}
+        try:
+            with open(get_header_cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == HEADER_CACHE_VERSION:
+                _header_cache = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+    return _header_cache
+
+
+def _save_header_cache():
+    entries = _header_cache
+    if len(entries) > HEADER_CACHE_LIMIT:
+        for key in list(entries)[:len(entries) - HEADER_CACHE_LIMIT]:
+            del entries[key]
+    path = get_header_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': HEADER_CACHE_VERSION, 'entries': entries}, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        debug_print(f"DEBUG: Could not save header data cache: {e}")
+
+
+def get_cached_header_data(file_path, sheet_name, variant="auto"):
+    """
+    Return cached header data for a sheet of the file as it is now, or None.
+
+    Args:
+        file_path (str): Excel file path
+        sheet_name (str): Sheet (test) name
+        variant (str): Which extractor produced the data ("auto" or "old")
+
+    Returns:
+        dict or None: A fresh copy the caller may modify
+    """
+    try:
+        key = _cache_key(file_content_hash(file_path), sheet_name, variant)
+    except OSError:
+        return None
+    with _header_cache_lock:
+        cached = _load_header_cache().get(key)
+    if cached is None:
+        return None
+    debug_print(f"DEBUG: Header data cache hit for '{sheet_name}' in {os.path.basename(file_path)}")
+    return json.loads(cached)
+
+
+def store_header_data(file_path, sheet_name, header_data, variant="auto"):
+    """
+    Cache header data extracted from the file's current contents.
+
+    Args:
+        file_path (str): Excel file path
+        sheet_name (str): Sheet (test) name
+        header_data (dict): Extracted header data
+        variant (str): Which extractor produced the data ("auto" or "old")
+    """
+    try:
+        key = _cache_key(file_content_hash(file_path), sheet_name, variant)
+        serialized = json.dumps(header_data, default=str)
+    except (OSError, TypeError, ValueError) as e:
+        debug_print(f"DEBUG: Not caching header data for '{sheet_name}': {e}")
+        return
+    with _header_cache_lock:
+        entries = _load_header_cache()
+        entries.pop(key, None)  # re-insert so the entry counts as most recent
+        entries[key] = serialized
+        _save_header_cache()
@@ -17,6 +17,7 @@ from openpyxl import load_workbook
 
 # Local imports
 from utils import debug_print
+from .header_data_cache import get_cached_header_data, store_header_data
 
 
 class HeaderDataProcessor:
@@ -224,28 +225,36 @@ class HeaderDataProcessor:
         """Extract header data from Excel file with enhanced old format support."""
         try:
             debug_print(f"DEBUG: Extracting header data from Excel file for test: {selected_test}")
+            cached = get_cached_header_data(file_path, selected_test)
+            if cached is not None:
+                return cached
+
             wb = load_workbook(file_path, read_only=True)
 
             if selected_test not in wb.sheetnames:
                 debug_print(f"DEBUG: Sheet '{selected_test}' not found in workbook")
                 return None
 
-            ws = wb[selected_test]
-
-            # First, detect if this sheet uses old or new format
-            format_type = self.detect_sheet_format(ws)
-            debug_print(f"DEBUG: Detected sheet format: {format_type}")
-
-            if format_type == "old":
-                return self.extract_old_format_header_data(ws, selected_test)
-            else:
-                return self.extract_new_format_header_data(ws, selected_test)
+            header_data = self._extract_header_data_from_sheet(wb[selected_test], selected_test)
+            wb.close()
+            store_header_data(file_path, selected_test, header_data)
+            return header_data
 
         except Exception as e:
             debug_print(f"ERROR: Exception extracting header data from Excel file: {e}")
             traceback.print_exc()
             return None
 
+    def _extract_header_data_from_sheet(self, ws, selected_test):
+        """Detect the sheet's format and extract its header data."""
+        # First, detect if this sheet uses old or new format
+        format_type = self.detect_sheet_format(ws)
+        debug_print(f"DEBUG: Detected sheet format: {format_type}")
+
+        if format_type == "old":
+            return self.extract_old_format_header_data(ws, selected_test)
+        return self.extract_new_format_header_data(ws, selected_test)
+
     def detect_sheet_format(self, ws):
         """Detect if a sheet uses old or new template format."""
         try:
@@ -546,7 +555,11 @@ class HeaderDataProcessor:
         debug_print(f"DEBUG: Extracting header data from Excel file: {file_path} for test {selected_test}")
 
         try:
-            wb = openpyxl.load_workbook(file_path)
+            cached = get_cached_header_data(file_path, selected_test, variant="old")
+            if cached is not None:
+                return cached
+
+            wb = openpyxl.load_workbook(file_path, read_only=True)
 
             if selected_test not in wb.sheetnames:
                 debug_print(f"DEBUG: Sheet {selected_test} not found in file. Available sheets: {wb.sheetnames}")
@@ -626,6 +639,7 @@ class HeaderDataProcessor:
             debug_print(f"DEBUG: Common: {common_data}")
 
             wb.close()
+            store_header_data(file_path, selected_test, header_data, variant="old")
             return header_data
 
         except Exception as e:
@@ -670,138 +684,121 @@ class HeaderDataProcessor:
         debug_print("DEBUG: Header data validation passed")
         return True
 
+    def header_cell_updates(self, header_data):
+        """
+        Return the header cells a sheet needs for header_data.
+
+        Each sample block is 12 columns wide. Numeric fields are written as
+        numbers when they parse as floats, and empty fields are left untouched.
+
+        Returns:
+            list: (row, column, value) tuples
+        """
+        def number_or_text(value):
+            try:
+                return float(value)
+            except ValueError:
+                return value
+
+        # Test name at row 1, column 1 (once per sheet)
+        updates = [(1, 1, header_data["test"])]
+        common_data = header_data["common"]
+        samples_data = header_data.get("samples", [])
+        tester_name = common_data.get("tester", "")
+
+        for i in range(header_data["num_samples"]):
+            col_offset = i * 12
+            sample_data = samples_data[i] if i < len(samples_data) else {}
+
+            # Row 1, Column F (6) + offset: Sample ID
+            updates.append((1, 6 + col_offset, sample_data.get('id', f'Sample {i+1}')))
+
+            # Row 2, Column D (4) + offset: Resistance
+            resistance = sample_data.get("resistance", "")
+            if resistance:
+                updates.append((2, 4 + col_offset, number_or_text(resistance)))
+
+            # Row 3, Column D (4) + offset: Tester name (from common data)
+            if tester_name:
+                updates.append((3, 4 + col_offset, tester_name))
+
+            # Row 2, Column B (2) + offset: Media
+            media = sample_data.get("media", "")
+            if media:
+                updates.append((2, 2 + col_offset, media))
+
+            # Row 3, Column B (2) + offset: Viscosity
+            viscosity = sample_data.get("viscosity", "")
+            if viscosity:
+                updates.append((3, 2 + col_offset, number_or_text(viscosity)))
+
+            # Row 3, Column F (6) + offset: Voltage
+            voltage = sample_data.get("voltage", "")
+            if voltage:
+                updates.append((3, 6 + col_offset, number_or_text(voltage)))
+
+            # Row 2, Column F (6) + offset: Calculated Power
+            calculated_power = sample_data.get("calculated_power", "")
+            if calculated_power:
+                updates.append((2, 6 + col_offset, number_or_text(calculated_power)))
+
+            # Row 3, Column H (8) + offset: Oil Mass
+            oil_mass = sample_data.get("oil_mass", "")
+            if oil_mass:
+                updates.append((3, 8 + col_offset, number_or_text(oil_mass)))
+
+            # Row 2, Column H (8) + offset: Puffing Regime
+            puffing_regime = sample_data.get("puffing_regime", "60mL/3s/30s")
+            if puffing_regime:
+                updates.append((2, 8 + col_offset, puffing_regime))
+
+        return updates
+
     def apply_header_data_to_file(self, file_path, header_data):
         """
         Apply the header data to the Excel file.
-        Enhanced to correctly apply headers to all sample blocks with proper column mapping.
+
+        Opens the workbook once, writes only the header cells whose value
+        differs and saves only if something changed. The header data is then
+        re-extracted from the sheet already in memory and cached under the
+        file's new hash, so the next header dialog or data collection session
+        does not parse the workbook again.
         """
         try:
             debug_print(f"DEBUG: Applying header data to {file_path} for {header_data['num_samples']} samples")
+            updates = self.header_cell_updates(header_data)
 
             # Load the workbook
             wb = openpyxl.load_workbook(file_path)
 
             # Get the sheet for the selected test
-            if header_data["test"] in wb.sheetnames:
-                ws = wb[header_data["test"]]
-
-                debug_print(f"DEBUG: Successfully opened sheet '{header_data['test']}'")
-
-                # Set the test name at row 1, column 1 (this should be done once)
-                ws.cell(row=1, column=1, value=header_data["test"])
-                debug_print(f"DEBUG: Set test name '{header_data['test']}' at row 1, column 1")
+            if header_data["test"] not in wb.sheetnames:
+                error_msg = f"Sheet '{header_data['test']}' not found in the file."
+                debug_print(f"ERROR: {error_msg}")
+                raise Exception(error_msg)
 
-                # Get common data once
-                common_data = header_data["common"]
-                samples_data = header_data.get("samples", [])
+            ws = wb[header_data["test"]]
+            debug_print(f"DEBUG: Successfully opened sheet '{header_data['test']}'")
 
-                # Apply sample-specific data for each sample block
-                num_samples = header_data["num_samples"]
-                for i in range(num_samples):
-                    # Calculate column offset (12 columns per sample)
-                    # Sample blocks start at column 1, so offsets are 0, 12, 24, 36, etc.
-                    col_offset = i * 12
-                    sample_data = samples_data[i] if i < len(samples_data) else {}
+            changed = 0
+            for row, column, value in updates:
+                cell = ws.cell(row=row, column=column)
+                if cell.value != value:
+                    cell.value = value
+                    changed += 1
+                    debug_print(f"DEBUG: Set '{value}' at row {row}, column {column}")
 
-                    debug_print(f"DEBUG: Processing sample {i+1} with column offset {col_offset}")
-                    debug_print(f"DEBUG: Sample {i+1}: ID='{sample_data.get('id', '')}', Resistance='{sample_data.get('resistance', '')}'")
-
-                    # Row 1, Column F (6) + offset: Sample ID
-                    sample_id = sample_data.get('id', f'Sample {i+1}')
-                    ws.cell(row=1, column=6 + col_offset, value=sample_id)
-                    debug_print(f"DEBUG: Set sample ID '{sample_id}' at row 1, column {6 + col_offset}")
-
-                    # Row 2, Column D (4) + offset: Resistance
-                    resistance = sample_data.get("resistance", "")
-                    if resistance:
-                        try:
-                            resistance_value = float(resistance)
-                            ws.cell(row=2, column=4 + col_offset, value=resistance_value)
-                        except ValueError:
-                            ws.cell(row=2, column=4 + col_offset, value=resistance)
-                        debug_print(f"DEBUG: Set resistance '{resistance}' at row 2, column {4 + col_offset}")
-
-                    # Row 3, Column D (4) + offset: Tester name (from common data)
-                    tester_name = common_data.get("tester", "")
-                    if tester_name:
-                        tester_col = 4 + col_offset
-                        ws.cell(row=3, column=tester_col, value=tester_name)
-                        debug_print(f"DEBUG: Set tester '{tester_name}' at row 3, column {tester_col} for sample {i+1}")
-
-                    # Sample-specific data from the sample record
-                    # Row 2, Column B (2) + offset: Media
-                    media = sample_data.get("media", "")
-                    if media:
-                        media_col = 2 + col_offset
-                        ws.cell(row=2, column=media_col, value=media)
-                        debug_print(f"DEBUG: Set media '{media}' at row 2, column {media_col} for sample {i+1}")
-
-                    # Row 3, Column B (2) + offset: Viscosity
-                    viscosity = sample_data.get("viscosity", "")
-                    if viscosity:
-                        viscosity_col = 2 + col_offset
-                        try:
-                            viscosity_value = float(viscosity)
-                            ws.cell(row=3, column=viscosity_col, value=viscosity_value)
-                        except ValueError:
-                            ws.cell(row=3, column=viscosity_col, value=viscosity)
-                        debug_print(f"DEBUG: Set viscosity '{viscosity}' at row 3, column {viscosity_col} for sample {i+1}")
-
-                    # Row 3, Column F (6) + offset: Voltage
-                    voltage = sample_data.get("voltage", "")
-                    if voltage:
-                        try:
-                            voltage_value = float(voltage)
-                            ws.cell(row=3, column=6 + col_offset, value=voltage_value)
-                        except ValueError:
-                            ws.cell(row=3, column=6 + col_offset, value=voltage)
-
-                    # Row 2, Column F (6) + offset: Calculated Power
-                    calculated_power = sample_data.get("calculated_power", "")
-                    if calculated_power:
-                        try:
-                            power_value = float(calculated_power)
-                            ws.cell(row=2, column=6 + col_offset, value=power_value)
-                            debug_print(f"DEBUG: Set calculated power '{power_value}' at row 2, column {6 + col_offset} for sample {i+1}")
-                        except ValueError:
-                            ws.cell(row=2, column=6 + col_offset, value=calculated_power)
-                            debug_print(f"DEBUG: Set calculated power (string) '{calculated_power}' at row 2, column {6 + col_offset} for sample {i+1}")
-                    else:
-                        debug_print(f"DEBUG: No calculated power available for sample {i+1}")
-
-                    # Row 3, Column H (8) + offset: Oil Mass
-                    oil_mass = sample_data.get("oil_mass", "")
-                    if oil_mass:
-                        oil_mass_col = 8 + col_offset
-                        try:
-                            oil_mass_value = float(oil_mass)
-                            ws.cell(row=3, column=oil_mass_col, value=oil_mass_value)
-                        except ValueError:
-                            ws.cell(row=3, column=oil_mass_col, value=oil_mass)
-                        debug_print(f"DEBUG: Set oil mass '{oil_mass}' at row 3, column {oil_mass_col} for sample {i+1}")
-
-                    # Row 2, Column H + offset: Puffing Regime
-                    puffing_regime = sample_data.get("puffing_regime", "60mL/3s/30s")
-                    if puffing_regime:
-                        puffing_regime_col = 8 + col_offset
-                        ws.cell(row=2, column=puffing_regime_col, value=puffing_regime)
-                        debug_print(f"DEBUG: Set puffing regime '{puffing_regime}' at row 2, column {puffing_regime_col} for sample {i+1}")
-
-                # Calculate the last column used
-                last_sample_column = ((num_samples - 1) * 12) + 12
-                max_column = ws.max_column
-                debug_print(f"DEBUG: Last sample column: {last_sample_column}, Max column: {max_column}")
-
-                # Save the workbook
+            if changed:
                 wb.save(file_path)
-                debug_print(f"DEBUG: Successfully saved workbook to {file_path}")
+                debug_print(f"DEBUG: Successfully saved workbook to {file_path} ({changed} of {len(updates)} header cells changed)")
+            else:
+                debug_print("DEBUG: Header cells already up to date, skipping save")
 
-                debug_print(f"SUCCESS: Applied header data for {num_samples} samples to {file_path}")
+            store_header_data(file_path, header_data["test"],
+                              self._extract_header_data_from_sheet(ws, header_data["test"]))
+            wb.close()
 
-            else:
-                error_msg = f"Sheet '{header_data['test']}' not found in the file."
-                debug_print(f"ERROR: {error_msg}")
-                raise Exception(error_msg)
+            debug_print(f"SUCCESS: Applied header data for {header_data['num_samples']} samples to {file_path}")
 
         except Exception as e:
             debug_print(f"ERROR: Error applying header data: {e}")
@@ -10,10 +10,9 @@ import copy
 
 # Third party imports
 import tkinter as tk
-from tkinter import ttk
 
 # Local imports
-from utils import debug_print, FONT, APP_BACKGROUND_COLOR
+from utils import debug_print
 
 
 class UIManager:
@@ -114,20 +113,7 @@ class UIManager:
     def add_or_update_file_dropdown(self) -> None:
         """Add a file selection dropdown or update its values if it already exists."""
         if not hasattr(self.gui, 'file_dropdown') or not self.gui.file_dropdown:
-            dropdown_frame = ttk.Frame(self.gui.top_frame, width=1400, height=40)
-            dropdown_frame.pack(side="left", pady=2, padx=5)
-            file_label = ttk.Label(dropdown_frame, text="Select File:", font=FONT, background=APP_BACKGROUND_COLOR)
-            file_label.pack(side="left", padx=(0, 0))
-            self.gui.file_dropdown_var = tk.StringVar()
-            self.gui.file_dropdown = ttk.Combobox(
-                dropdown_frame,
-                textvariable=self.gui.file_dropdown_var,
-                state="readonly",
-                font=FONT,
-                width=20
-            )
-            self.gui.file_dropdown.pack(side="left", fill="x", expand=True, padx=(5, 5))
-            self.gui.file_dropdown.bind("<<ComboboxSelected>>", self.gui.on_file_selection)
+            self.gui.ui_manager.create_file_dropdown()
         self.update_file_dropdown()
 
     def center_window(self, window, width, height):
@@ -83,8 +83,8 @@ class Vap3FileHandler:
         finally:
             self.gui.progress_dialog.hide_progress_bar()
 
-    def load_vap3_file(self, filepath=None, display_name=None, append_to_existing=False) -> bool:
-        """Load a .vap3 file and update the application state."""
+    def load_vap3_file(self, filepath=None, display_name=None, append_to_existing=False, memory_map=True) -> bool:
+        """Load a .vap3 file and update the application state (memory_map: see VapFileManager.load_from_vap3)."""
         from vap_file_manager import VapFileManager
 
         if not filepath:
@@ -101,7 +101,7 @@ class Vap3FileHandler:
             self.root.update_idletasks()
 
             vap_manager = VapFileManager()
-            result = vap_manager.load_from_vap3(filepath)
+            result = vap_manager.load_from_vap3(filepath, memory_map=memory_map)
 
             # Use display_name if provided, otherwise use the actual filename
             if display_name:
@@ -119,7 +119,7 @@ class Vap3FileHandler:
                     debug_print(f"DEBUG: File already loaded: {current_file_name}")
                     break
 
-            vap_data = vap_manager.load_from_vap3(filepath)
+            vap_data = vap_manager.load_from_vap3(filepath, memory_map=memory_map)
             self.gui.load_sample_images_from_vap3(vap_data)
 
             if existing_file:
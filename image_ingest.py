@@ -0,0 +1,209 @@
+"""
+image_ingest.py
+Developed by Charlie Becquet.
+Working copies of sample and sheet images for VAP3 archives and the database.
+
+Images used to be stored as the original bytes, so multi-megabyte phone
+photos dominated archive size, database growth and load time even though the
+UI shows them 135 px tall and reports place them about 2 inches wide. Before
+an image is stored, prepare_image returns a working copy instead:
+
+- photos (JPEG, BMP, TIFF, ...) are capped at INGEST_MAX_DIMENSION pixels on
+  the long edge and re-encoded as INGEST_FORMAT at INGEST_QUALITY, keeping
+  their EXIF (orientation) and ICC profile;
+- PNGs (plots, screenshots) stay lossless and are only downscaled when larger
+  than the cap; GIFs and PDFs are stored as they are;
+- when the working copy would not be smaller, the original is used.
+
+Working copies are cached under ~/.DataViewer/ingest keyed by the image's
+content hash and the ingest settings, so saving the same images again costs a
+lookup. With INGEST_KEEP_ORIGINALS the original bytes are also copied to
+~/.DataViewer/original_images, named by content hash.
+
+benchmark_image_ingest.py measures the savings over an existing database.
+"""
+
+import io
+import os
+import shutil
+import threading
+from utils import debug_print, file_content_hash
+from thumbnail_cache import prune_cache_dir
+
+INGEST_MAX_DIMENSION = 2048  # long edge in pixels; reports need about 600 px
+INGEST_FORMAT = "JPEG"  # or "WEBP"; python-docx/pptx reports cannot embed WebP
+INGEST_QUALITY = 85
+INGEST_MIN_BYTES = 512 * 1024  # files within the size cap and smaller than this are kept as they are
+INGEST_KEEP_ORIGINALS = False
+INGEST_CACHE_LIMIT_BYTES = 1024 * 1024 * 1024
+
+# Formats stored unchanged: animation or vector content would be lost
+PASSTHROUGH_FORMATS = ("GIF", "PDF")
+LOSSLESS_FORMATS = ("PNG",)
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+_unchanged_memo = {}  # (absolute path, size, mtime_ns) of images whose original is kept
+_ingest_lock = threading.Lock()
+_cache_pruned = False
+
+
+def get_ingest_dir():
+    """Return the directory holding working copies."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "ingest")
+
+
+def get_originals_dir():
+    """Return the directory holding originals kept aside."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "original_images")
+
+
+def transcode_image(source, max_dimension=INGEST_MAX_DIMENSION, image_format=INGEST_FORMAT,
+                    quality=INGEST_QUALITY, min_bytes=INGEST_MIN_BYTES):
+    """
+    Produce the working copy of an image.
+
+    Args:
+        source (str or bytes): Image file path or encoded image bytes
+        max_dimension (int): Cap for the long edge in pixels
+        image_format (str): Target format for photos ("JPEG" or "WEBP")
+        quality (int): Encoder quality for photos
+        min_bytes (int): Images within the cap and smaller than this are left alone
+
+    Returns:
+        tuple: (encoded bytes, extension), or (None, None) when the original should be kept
+    """
+    from PIL import Image
+
+    if isinstance(source, (bytes, bytearray)):
+        original_size = len(source)
+        source = io.BytesIO(source)
+    else:
+        original_size = os.path.getsize(source)
+
+    with Image.open(source) as img:
+        source_format = img.format or ""
+        oversized = max(img.size) > max_dimension
+        if source_format in PASSTHROUGH_FORMATS or getattr(img, "is_animated", False):
+            return None, None
+        if not oversized and original_size < min_bytes:
+            return None, None
+
+        lossless = source_format in LOSSLESS_FORMATS or "A" in img.getbands() or img.mode == "P"
+        if lossless and not oversized:
+            return None, None
+
+        exif = img.info.get("exif")
+        icc_profile = img.info.get("icc_profile")
+        if oversized:
+            # thumbnail() decodes JPEGs in draft mode at a reduced scale
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        else:
+            img.load()
+
+        buffer = io.BytesIO()
+        if lossless:
+            img.save(buffer, format="PNG", optimize=True)
+            extension = FORMAT_EXTENSIONS["PNG"]
+        else:
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            options = {"quality": quality}
+            if exif:
+                options["exif"] = exif
+            if icc_profile:
+                options["icc_profile"] = icc_profile
+            if image_format == "JPEG":
+                options["optimize"] = True
+            img.save(buffer, format=image_format, **options)
+            extension = FORMAT_EXTENSIONS.get(image_format, "." + image_format.lower())
+
+    data = buffer.getvalue()
+    if len(data) >= original_size:
+        return None, None
+    return data, extension
+
+
+def keep_original(img_path, content_hash=None):
+    """Copy an original image to the originals directory (named by content hash) and return the copy's path."""
+    content_hash = content_hash or file_content_hash(img_path)
+    target = os.path.join(get_originals_dir(), content_hash + os.path.splitext(img_path)[1].lower())
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{threading.get_ident()}.tmp"
+        shutil.copyfile(img_path, temp_path)
+        os.replace(temp_path, target)
+    return target
+
+
+def prepare_image(img_path):
+    """
+    Return the path of the file to store for an image: its working copy, or the original.
+
+    Never raises; any problem falls back to the original.
+
+    Args:
+        img_path (str): Image file
+
+    Returns:
+        str: Path of the working copy or of the original
+    """
+    global _cache_pruned
+    try:
+        stat = os.stat(img_path)
+        memo_key = (os.path.abspath(img_path), stat.st_size, stat.st_mtime_ns)
+        with _ingest_lock:
+            if memo_key in _unchanged_memo:
+                return img_path
+
+        content_hash = file_content_hash(img_path)
+        settings = f"{INGEST_MAX_DIMENSION}_{INGEST_FORMAT.lower()}_q{INGEST_QUALITY}"
+        cache_dir = get_ingest_dir()
+        for extension in set(FORMAT_EXTENSIONS.values()):
+            cached_path = os.path.join(cache_dir, f"{content_hash}_{settings}{extension}")
+            if os.path.exists(cached_path):
+                return cached_path
+
+        data, extension = transcode_image(img_path)
+        if INGEST_KEEP_ORIGINALS and data is not None:
+            keep_original(img_path, content_hash)
+        if data is None:
+            with _ingest_lock:
+                _unchanged_memo[memo_key] = True
+            return img_path
+
+        working_path = os.path.join(cache_dir, f"{content_hash}_{settings}{extension}")
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{working_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, working_path)
+        debug_print(f"DEBUG: Working copy of {os.path.basename(img_path)}: {stat.st_size} -> {len(data)} bytes")
+
+        if not _cache_pruned:
+            _cache_pruned = True
+            prune_cache_dir(cache_dir, INGEST_CACHE_LIMIT_BYTES)
+        return working_path
+
+    except Exception as e:
+        debug_print(f"DEBUG: Storing original of {img_path}, working copy failed: {e}")
+        return img_path
+
+
+def read_image_for_storage(img_path):
+    """
+    Read the bytes to store in the database for an image.
+
+    Args:
+        img_path (str): Image file
+
+    Returns:
+        tuple: (image bytes, stored file name); the name keeps the original
+        base name with the working copy's extension
+    """
+    stored_path = prepare_image(img_path)
+    with open(stored_path, 'rb') as f:
+        image_data = f.read()
+    name = os.path.basename(img_path)
+    if stored_path != img_path:
+        name = os.path.splitext(name)[0] + os.path.splitext(stored_path)[1]
+    return image_data, name
@@ -3,6 +3,10 @@ import base64
 import io
 from tkinter import filedialog, Canvas, Scrollbar, Frame, Label, PhotoImage, messagebox
 from utils import debug_print
+import thumbnail_cache
+import crop_box_cache
+
+THUMBNAIL_POLL_MS = 50  # how often finished background thumbnails are picked up
 
 class ImageLoader:
     def __init__(self, parent, is_plotting_sheet, on_images_selected=None, main_gui=None):
@@ -29,11 +33,15 @@ class ImageLoader:
         self.scrollbar = None
         self.scrollable_frame = None
 
-        self.processed_image_cache = {}
         self.processing_status = {}
+        self.pending_thumbnails = []  # thumbnails being built in the background for the current display
+        self.thumbnail_poll_id = None
 
-        # Initialize Claude API client if available
+        # Initialize Claude API client if available. crop_analyzer sends an image to it;
+        # tests can substitute a local stand-in (and a crop_method name to cache its boxes under)
         self.claude_client = None
+        self.crop_analyzer = None
+        self.crop_method = "claude"
         self._init_claude_api()
 
         if not self.parent or not self.parent.winfo_exists():
@@ -50,6 +58,7 @@ class ImageLoader:
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if api_key:
                 self.claude_client = anthropic.Anthropic(api_key=api_key)
+                self.crop_analyzer = self._request_claude_crop_analysis
                 print("DEBUG: Claude API client initialized successfully")
             else:
                 print("DEBUG: ANTHROPIC_API_KEY not found, Claude cropping disabled")
@@ -183,232 +192,369 @@ class ImageLoader:
         self.image_files = image_paths
         self.display_images()
 
+    def crop_images_in_background(self, image_paths):
+        """
+        Auto-crop a batch of images on the thumbnail pool.
+
+        Each image's crop box is computed (or looked up) and its cropped
+        thumbnail cached, so displaying the images later is a cache lookup.
+
+        Args:
+            image_paths (list): Image files to crop; PDFs are skipped
+
+        Returns:
+            list: Futures resolving to the cropped thumbnails
+        """
+        futures = []
+        for img_path in dict.fromkeys(image_paths):
+            if img_path.lower().endswith(".pdf") or not os.path.exists(img_path):
+                continue
+            futures.append(thumbnail_cache.submit_thumbnail(img_path, self.thumbnail_crop(True), self.crop_with_method))
+        debug_print(f"DEBUG: Cropping {len(futures)} images in the background")
+        return futures
+
+    def thumbnail_crop(self, should_crop):
+        """Return the thumbnail_cache crop key for a crop state: the crop method in effect and its version."""
+        if not should_crop:
+            return None
+        method = self.crop_method if self.crop_analyzer is not None else "fallback"
+        return crop_box_cache.crop_method_key(method)
+
     def claude_intelligent_crop(self, img_path):
         """Use Claude API to analyze image and determine optimal crop boundaries."""
-        if not self.claude_client:
+        return self.crop_with_method(img_path)[0]
+
+    def crop_with_method(self, img_path):
+        """
+        Crop an image with the crop method in effect, falling back to the OpenCV crop.
+
+        This is the crop_func given to thumbnail_cache, which only persists the
+        thumbnail when the requested method produced it.
+
+        Returns:
+            tuple: (cropped PIL image or None, crop_method_key of the crop actually applied)
+        """
+        if self.crop_analyzer is None:
             debug_print("DEBUG: Claude API not available, falling back to basic crop")
-            return self.smart_crop_fallback(img_path)
+            return self._fallback_crop(img_path)
 
-        try:
-            debug_print(f"DEBUG: Using Claude API for intelligent cropping: {img_path}")
+        box, method = self._find_crop_box(img_path)
+        if box is None:
+            return self._fallback_crop(img_path)
 
-            # Prepare image for Claude API
+        try:
             Image, _, _, _, _, _ = _lazy_import_pil()
-            if Image is None:
-                return self.smart_crop_fallback(img_path)
-
-            with Image.open(img_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Resize if too large for API
-                max_size = 1568
-                original_size = img.size
-                scale_factor = 1.0
-                if max(img.width, img.height) > max_size:
-                    scale_factor = max_size / max(img.width, img.height)
-                    new_size = (int(img.width * scale_factor), int(img.height * scale_factor))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    debug_print(f"DEBUG: Resized image to {new_size} for API processing (scale: {scale_factor})")
-
-                # Convert to base64
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=90)
-                image_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-                # Create prompt for Claude - VERY specific about bottoms
-                prompt = f"""
-                Analyze this image and find the COMPLETE boundaries of the entire device/object for tight cropping.
-
-                CRITICAL - PAY SPECIAL ATTENTION TO THE BOTTOM:
-                1. Electronic devices often have CURVED, ROUNDED, or EXTENDED bottoms below the main rectangular body
-                2. The bottom boundary is NOT where the label ends - it's where the physical device ends
-                3. Look for curved bases, rounded bottoms, protruding connectors, or any physical extensions
-                4. Many vape devices, cartridges, and electronic components have rounded bottoms that extend well below the label area
-                5. Follow the device contours all the way to the absolute bottom edge
-
-                COMPLETE MEASUREMENT REQUIREMENTS:
-                - TOP: Include mouthpieces, tips, caps, anything above the main body
-                - BOTTOM: Include curved bases, rounded bottoms, connectors - follow the device shape to its absolute lowest point
-                - SIDES: Include any side extensions, buttons, connectors
-                - The device likely has a distinctive shape - capture ALL of it
-
-                IMAGE DETAILS:
-                - Image size: {img.width} x {img.height} pixels
-                - Look beyond rectangular boundaries - follow the actual device shape
-                - Electronic devices typically have rounded/curved bottoms
-
-                MEASUREMENT VALIDATION:
-                - If the detected height seems too short compared to width, extend the bottom boundary
-                - Electronic devices are typically taller than they are wide
-                - Double-check that you've included the complete bottom curve/extension
-
-                Return JSON with exact measurements:
-                {{
-                    "device_analysis": {{
-                        "has_curved_bottom": <true/false>,
-                        "has_extended_bottom": <true/false>,
-                        "bottom_shape_description": "<describe the bottom shape>",
-                        "estimated_device_type": "<what type of device this appears to be>"
-                    }},
-                    "complete_boundaries": {{
-                        "top_pixel": <absolute topmost pixel including any extensions>,
-                        "bottom_pixel": <absolute bottommost pixel following device contour>,
-                        "left_pixel": <absolute leftmost pixel>,
-                        "right_pixel": <absolute rightmost pixel>
-                    }},
-                    "crop_box": {{
-                        "left": <left_pixel - 15>,
-                        "top": <top_pixel - 15>,
-                        "right": <right_pixel + 15>,
-                        "bottom": <bottom_pixel + 15>
-                    }},
-                    "measurements": {{
-                        "total_device_height": <bottom_pixel - top_pixel>,
-                        "total_device_width": <right_pixel - left_pixel>,
-                        "height_to_width_ratio": <height/width>
-                    }},
-                    "confidence": <0-100>,
-                    "description": "<complete device with all parts>"
-                }}
-
-                CRITICAL: Make absolutely sure you've followed the device shape to its absolute bottom edge!
-                """
-
-                # Send request to Claude
-                response = self.claude_client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=2000,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": prompt
-                                },
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/jpeg",
-                                        "data": image_data
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                )
+            with Image.open(img_path) as original_img:
+                cropped_img = original_img.crop(box)
+            debug_print(f"DEBUG: Cropped image created with size: {cropped_img.size}")
+            return cropped_img, crop_box_cache.crop_method_key(method)
+        except Exception as e:
+            print(f"ERROR: Claude intelligent crop failed: {e}")
+            return self._fallback_crop(img_path)
 
-                # Parse response
-                response_text = response.content[0].text
-                debug_print(f"DEBUG: Claude response: {response_text}")
-
-                # Extract JSON from response
-                import json
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-
-                if start_idx == -1 or end_idx == 0:
-                    debug_print("DEBUG: No JSON found in Claude response, using fallback")
-                    return self.smart_crop_fallback(img_path)
-
-                crop_data = json.loads(response_text[start_idx:end_idx])
-                confidence = crop_data.get('confidence', 0)
-
-                if confidence < 60:  # Lowered threshold since we want to try harder
-                    debug_print(f"DEBUG: Claude confidence too low ({confidence}), using fallback")
-                    return self.smart_crop_fallback(img_path)
-
-                # Extract detailed analysis
-                device_analysis = crop_data.get('device_analysis', {})
-                boundaries = crop_data.get('complete_boundaries', {})
-                measurements = crop_data.get('measurements', {})
-                crop_box = crop_data['crop_box']
-
-                debug_print(f"DEBUG: Device analysis: {device_analysis}")
-                debug_print(f"DEBUG: Boundaries detected: {boundaries}")
-                debug_print(f"DEBUG: Measurements: {measurements}")
-
-                # VALIDATION: Check if the height seems reasonable
-                height_width_ratio = measurements.get('height_to_width_ratio', 0)
-                device_height = measurements.get('total_device_height', 0)
-                device_width = measurements.get('total_device_width', 0)
-
-                debug_print(f"DEBUG: Height/Width ratio: {height_width_ratio}")
-
-                # If the device seems too short (likely missing bottom), extend it
-                if height_width_ratio < 1.2:  # Most electronic devices are taller than wide
-                    debug_print("WARNING: Device appears too short - likely missing bottom portion")
-                    debug_print("DEBUG: Attempting to extend bottom boundary")
-
-                    # Extend bottom by 20% of current height or at least 50 pixels
-                    extension = max(int(device_height * 0.2), 50)
-                    original_bottom = boundaries.get('bottom_pixel', crop_box.get('bottom', 0) + 15)
-                    extended_bottom = original_bottom + extension
-
-                    # Update the crop box
-                    crop_box['bottom'] = min(extended_bottom + 15, img.height - 1)
-                    debug_print(f"DEBUG: Extended bottom from {original_bottom} to {extended_bottom}")
-                    debug_print(f"DEBUG: New crop bottom: {crop_box['bottom']}")
-
-                # Convert coordinates, accounting for any scaling done for API
-                with Image.open(img_path) as original_img:
-                    if scale_factor != 1.0:
-                        # Scale coordinates back up to original image size
-                        left = int(crop_box['left'] / scale_factor)
-                        top = int(crop_box['top'] / scale_factor)
-                        right = int(crop_box['right'] / scale_factor)
-                        bottom = int(crop_box['bottom'] / scale_factor)
-                        debug_print(f"DEBUG: Scaled coordinates back by factor {1/scale_factor}")
-                    else:
-                        left = crop_box['left']
-                        top = crop_box['top']
-                        right = crop_box['right']
-                        bottom = crop_box['bottom']
+    def get_crop_box(self, img_path):
+        """
+        Return the crop box of an image from the crop box cache, computing and caching it on a miss.
 
-                    # Ensure coordinates are valid
-                    width, height = original_img.size
-                    left = max(0, min(left, width - 1))
-                    top = max(0, min(top, height - 1))
-                    right = max(left + 1, min(right, width))
-                    bottom = max(top + 1, min(bottom, height))
+        When the analyzer declines (no JSON, low confidence) the fallback box is
+        cached for the analyzer's method too. Failed requests are not cached,
+        so they are retried in the next session.
 
-                    debug_print(f"DEBUG: Final validated crop box: ({left}, {top}, {right}, {bottom})")
-                    debug_print(f"DEBUG: Final crop dimensions: {right - left} x {bottom - top} pixels")
+        Returns:
+            tuple or None: (left, top, right, bottom), or None if no box could be found
+        """
+        return self._find_crop_box(img_path)[0]
 
-                    cropped_img = original_img.crop((left, top, right, bottom))
-                    debug_print(f"DEBUG: Cropped image created with size: {cropped_img.size}")
-                    return cropped_img
+    def _find_crop_box(self, img_path):
+        """Return (box, method) where method is the crop method the box is cached under."""
+        box = crop_box_cache.get_cached_crop_box(img_path, self.crop_method)
+        if box is not None:
+            return box, self.crop_method
 
+        try:
+            debug_print(f"DEBUG: Using Claude API for intelligent cropping: {img_path}")
+            box = self.compute_claude_crop_box(img_path)
         except Exception as e:
             print(f"ERROR: Claude intelligent crop failed: {e}")
-            return self.smart_crop_fallback(img_path)
+            return self.get_fallback_crop_box(img_path), "fallback"
+
+        if box is None:
+            box = self.get_fallback_crop_box(img_path)
+        if box is not None:
+            crop_box_cache.store_crop_box(img_path, self.crop_method, box)
+        return box, self.crop_method
+
+    def compute_claude_crop_box(self, img_path):
+        """
+        Ask the crop analyzer for the device boundaries in an image.
+
+        Returns:
+            tuple or None: (left, top, right, bottom) in original image pixels, or
+            None when the analyzer's answer should not be used
+        """
+        Image, _, _, _, _, _ = _lazy_import_pil()
+        if Image is None:
+            return None
+
+        with Image.open(img_path) as img:
+            # Convert to RGB if necessary
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            # Resize if too large for API
+            max_size = 1568
+            original_size = img.size
+            scale_factor = 1.0
+            if max(img.width, img.height) > max_size:
+                scale_factor = max_size / max(img.width, img.height)
+                new_size = (int(img.width * scale_factor), int(img.height * scale_factor))
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
+                debug_print(f"DEBUG: Resized image to {new_size} for API processing (scale: {scale_factor})")
+
+            # Convert to base64
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=90)
+            image_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+            # Create prompt for Claude - VERY specific about bottoms
+            prompt = f"""
+            Analyze this image and find the COMPLETE boundaries of the entire device/object for tight cropping.
+
+            CRITICAL - PAY SPECIAL ATTENTION TO THE BOTTOM:
+            1. Electronic devices often have CURVED, ROUNDED, or EXTENDED bottoms below the main rectangular body
+            2. The bottom boundary is NOT where the label ends - it's where the physical device ends
+            3. Look for curved bases, rounded bottoms, protruding connectors, or any physical extensions
+            4. Many vape devices, cartridges, and electronic components have rounded bottoms that extend well below the label area
+            5. Follow the device contours all the way to the absolute bottom edge
+
+            COMPLETE MEASUREMENT REQUIREMENTS:
+            - TOP: Include mouthpieces, tips, caps, anything above the main body
+            - BOTTOM: Include curved bases, rounded bottoms, connectors - follow the device shape to its absolute lowest point
+            - SIDES: Include any side extensions, buttons, connectors
+            - The device likely has a distinctive shape - capture ALL of it
+
+            IMAGE DETAILS:
+            - Image size: {img.width} x {img.height} pixels
+            - Look beyond rectangular boundaries - follow the actual device shape
+            - Electronic devices typically have rounded/curved bottoms
+
+            MEASUREMENT VALIDATION:
+            - If the detected height seems too short compared to width, extend the bottom boundary
+            - Electronic devices are typically taller than they are wide
+            - Double-check that you've included the complete bottom curve/extension
+
+            Return JSON with exact measurements:
+            {{
+                "device_analysis": {{
+                    "has_curved_bottom": <true/false>,
+                    "has_extended_bottom": <true/false>,
+                    "bottom_shape_description": "<describe the bottom shape>",
+                    "estimated_device_type": "<what type of device this appears to be>"
+                }},
+                "complete_boundaries": {{
+                    "top_pixel": <absolute topmost pixel including any extensions>,
+                    "bottom_pixel": <absolute bottommost pixel following device contour>,
+                    "left_pixel": <absolute leftmost pixel>,
+                    "right_pixel": <absolute rightmost pixel>
+                }},
+                "crop_box": {{
+                    "left": <left_pixel - 15>,
+                    "top": <top_pixel - 15>,
+                    "right": <right_pixel + 15>,
+                    "bottom": <bottom_pixel + 15>
+                }},
+                "measurements": {{
+                    "total_device_height": <bottom_pixel - top_pixel>,
+                    "total_device_width": <right_pixel - left_pixel>,
+                    "height_to_width_ratio": <height/width>
+                }},
+                "confidence": <0-100>,
+                "description": "<complete device with all parts>"
+            }}
+
+            CRITICAL: Make absolutely sure you've followed the device shape to its absolute bottom edge!
+            """
+
+            # Send request to the crop analyzer (Claude API unless replaced)
+            response_text = self.crop_analyzer(image_data, prompt)
+            debug_print(f"DEBUG: Claude response: {response_text}")
+
+            # Extract JSON from response
+            import json
+            start_idx = response_text.find('{')
+            end_idx = response_text.rfind('}') + 1
+
+            if start_idx == -1 or end_idx == 0:
+                debug_print("DEBUG: No JSON found in Claude response, using fallback")
+                return None
+
+            crop_data = json.loads(response_text[start_idx:end_idx])
+            confidence = crop_data.get('confidence', 0)
+
+            if confidence < 60:  # Lowered threshold since we want to try harder
+                debug_print(f"DEBUG: Claude confidence too low ({confidence}), using fallback")
+                return None
+
+            # Extract detailed analysis
+            device_analysis = crop_data.get('device_analysis', {})
+            boundaries = crop_data.get('complete_boundaries', {})
+            measurements = crop_data.get('measurements', {})
+            crop_box = crop_data['crop_box']
+
+            debug_print(f"DEBUG: Device analysis: {device_analysis}")
+            debug_print(f"DEBUG: Boundaries detected: {boundaries}")
+            debug_print(f"DEBUG: Measurements: {measurements}")
+
+            # VALIDATION: Check if the height seems reasonable
+            height_width_ratio = measurements.get('height_to_width_ratio', 0)
+            device_height = measurements.get('total_device_height', 0)
+            device_width = measurements.get('total_device_width', 0)
+
+            debug_print(f"DEBUG: Height/Width ratio: {height_width_ratio}")
+
+            # If the device seems too short (likely missing bottom), extend it
+            if height_width_ratio < 1.2:  # Most electronic devices are taller than wide
+                debug_print("WARNING: Device appears too short - likely missing bottom portion")
+                debug_print("DEBUG: Attempting to extend bottom boundary")
+
+                # Extend bottom by 20% of current height or at least 50 pixels
+                extension = max(int(device_height * 0.2), 50)
+                original_bottom = boundaries.get('bottom_pixel', crop_box.get('bottom', 0) + 15)
+                extended_bottom = original_bottom + extension
+
+                # Update the crop box
+                crop_box['bottom'] = min(extended_bottom + 15, img.height - 1)
+                debug_print(f"DEBUG: Extended bottom from {original_bottom} to {extended_bottom}")
+                debug_print(f"DEBUG: New crop bottom: {crop_box['bottom']}")
+
+            # Convert coordinates, accounting for any scaling done for API
+            with Image.open(img_path) as original_img:
+                if scale_factor != 1.0:
+                    # Scale coordinates back up to original image size
+                    left = int(crop_box['left'] / scale_factor)
+                    top = int(crop_box['top'] / scale_factor)
+                    right = int(crop_box['right'] / scale_factor)
+                    bottom = int(crop_box['bottom'] / scale_factor)
+                    debug_print(f"DEBUG: Scaled coordinates back by factor {1/scale_factor}")
+                else:
+                    left = crop_box['left']
+                    top = crop_box['top']
+                    right = crop_box['right']
+                    bottom = crop_box['bottom']
+
+                # Ensure coordinates are valid
+                width, height = original_img.size
+                left = max(0, min(left, width - 1))
+                top = max(0, min(top, height - 1))
+                right = max(left + 1, min(right, width))
+                bottom = max(top + 1, min(bottom, height))
+
+                debug_print(f"DEBUG: Final validated crop box: ({left}, {top}, {right}, {bottom})")
+                debug_print(f"DEBUG: Final crop dimensions: {right - left} x {bottom - top} pixels")
+                return left, top, right, bottom
+
+    def _request_claude_crop_analysis(self, image_data, prompt):
+        """
+        Send an image and the crop prompt to the Claude API.
+
+        This is the default crop analyzer; tests can replace self.crop_analyzer
+        with a local stand-in taking the same arguments.
+
+        Args:
+            image_data (str): Base64-encoded JPEG
+            prompt (str): Crop instructions
+
+        Returns:
+            str: Response text expected to contain the crop JSON
+        """
+        response = self.claude_client.messages.create(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=2000,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "image/jpeg",
+                                "data": image_data
+                            }
+                        }
+                    ]
+                }
+            ]
+        )
+        return response.content[0].text
 
     def smart_crop_fallback(self, img_path):
         """Fallback cropping using improved computer vision techniques."""
+        return self._fallback_crop(img_path)[0]
+
+    def _fallback_crop(self, img_path):
+        """Crop with the OpenCV box; returns (image or None, crop_method_key of the crop applied, None if uncropped)."""
         try:
             Image, _, _, _, _, _ = _lazy_import_pil()
-            cv2 = _lazy_import_cv2()
-            np = _lazy_import_numpy()
 
             if Image is None:
                 debug_print("DEBUG: PIL not available for fallback crop")
-                return Image.open(img_path)
+                return None, None
 
+            box = self.get_fallback_crop_box(img_path)
             with Image.open(img_path) as img:
                 debug_print(f"DEBUG: Using fallback crop for {img_path}")
 
-                if cv2 is None or np is None:
+                if box is None:
                     debug_print("DEBUG: OpenCV/numpy not available, returning center crop")
                     # Simple center crop as last resort
                     width, height = img.size
                     crop_size = min(width, height) * 0.8
                     left = (width - crop_size) // 2
                     top = (height - crop_size) // 2
-                    return img.crop((left, top, left + crop_size, top + crop_size))
+                    return img.crop((left, top, left + crop_size, top + crop_size)), "center"
+
+                return img.crop(box), crop_box_cache.crop_method_key("fallback")
+
+        except Exception as e:
+            print(f"ERROR: Fallback crop failed: {e}")
+            try:
+                return Image.open(img_path), None
+            except:
+                return None, None
+
+    def get_fallback_crop_box(self, img_path):
+        """Return the OpenCV crop box of an image from the crop box cache, computing and caching it on a miss."""
+        box = crop_box_cache.get_cached_crop_box(img_path, "fallback")
+        if box is not None:
+            return box
+        try:
+            box = self.compute_fallback_crop_box(img_path)
+        except Exception as e:
+            print(f"ERROR: Fallback crop failed: {e}")
+            return None
+        if box is not None:
+            crop_box_cache.store_crop_box(img_path, "fallback", box)
+        return box
+
+    def compute_fallback_crop_box(self, img_path):
+        """
+        Find the crop box around the largest edge contour of an image.
 
+        Returns:
+            tuple or None: (left, top, right, bottom), or None if OpenCV/numpy are unavailable
+        """
+        Image, _, _, _, _, _ = _lazy_import_pil()
+        cv2 = _lazy_import_cv2()
+        np = _lazy_import_numpy()
+        if Image is None or cv2 is None or np is None:
+            return None
+
+        with Image.open(img_path) as img:
                 # Convert to numpy array for OpenCV processing
                 img_array = np.array(img)
                 gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
@@ -422,10 +568,10 @@ class ImageLoader:
                 contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
                 if not contours:
-                    debug_print("DEBUG: No contours found, returning center crop")
+                    debug_print("DEBUG: No contours found, using center crop")
                     width, height = img.size
-                    margin = min(width, height) * 0.1
-                    return img.crop((margin, margin, width - margin, height - margin))
+                    margin = int(min(width, height) * 0.1)
+                    return margin, margin, width - margin, height - margin
 
                 # Find the most significant contour (largest area)
                 largest_contour = max(contours, key=cv2.contourArea)
@@ -445,14 +591,7 @@ class ImageLoader:
                 )
 
                 debug_print(f"DEBUG: Fallback crop box: {crop_box}")
-                return img.crop(crop_box)
-
-        except Exception as e:
-            print(f"ERROR: Fallback crop failed: {e}")
-            try:
-                return Image.open(img_path)
-            except:
-                return None
+                return crop_box
 
     def smart_crop(self, img, margin_percent=10):
         """Enhanced smart crop using Claude API when available."""
@@ -462,58 +601,21 @@ class ImageLoader:
         return img  # Return unchanged for now, as processing happens in process_image
 
     def process_image(self, img_path):
-        """Load and process image with optional cropping based on toggle. Cache results to avoid re-processing."""
-        try:
-            Image, ImageTk, _, _, _, _ = _lazy_import_pil()
-            if Image is None:
-                print("ERROR: PIL not available")
-                return None
-
-            debug_print(f"DEBUG: Processing image: {img_path}")
+        """
+        Load and process image with optional cropping based on toggle, returning the display thumbnail.
 
+        Thumbnails are cached in memory and on disk by thumbnail_cache, so an
+        image is only decoded (and cropped) once. This runs synchronously;
+        display_images builds thumbnails in the background instead.
+        """
+        try:
             should_crop = self.image_crop_states.get(img_path, False)
+            debug_print(f"DEBUG: Processing image: {img_path} (crop={should_crop})")
 
-            # Create a cache key based on image path and crop state
-            cache_key = f"{img_path}_{should_crop}"
-
-            # Check if we already have this processed image in cache
-            if cache_key in self.processed_image_cache:
-                debug_print(f"DEBUG: Using cached processed image for {os.path.basename(img_path)}")
-                cached_img = self.processed_image_cache[cache_key]
-
-                # Resize for display (this is cheap so we can do it every time)
-                max_height = 135
-                scaling_factor = max_height / cached_img.height
-                new_width = int(cached_img.width * scaling_factor)
-
-                debug_print(f"DEBUG: Resizing cached image to: ({new_width}, {max_height})")
-                return cached_img.resize((new_width, max_height), Image.Resampling.LANCZOS)
-
-            # Image not in cache - process it
-            if should_crop:
-                debug_print(f"DEBUG: Auto-Crop ENABLED - Processing with Claude API (FIRST TIME): {os.path.basename(img_path)}")
-                processed_img = self.claude_intelligent_crop(img_path)
-                if processed_img is None:
-                    debug_print("DEBUG: Intelligent crop failed, loading original")
-                    processed_img = Image.open(img_path)
-            else:
-                debug_print(f"DEBUG: Auto-Crop DISABLED - Loading original image: {os.path.basename(img_path)}")
-                processed_img = Image.open(img_path)
-
-            # Store the processed image in cache (at full resolution before display resizing)
-            self.processed_image_cache[cache_key] = processed_img.copy()
-            self.processing_status[img_path] = should_crop
-            debug_print(f"DEBUG: Cached processed image for {os.path.basename(img_path)} (crop={should_crop})")
-
-            debug_print(f"DEBUG: Final processed image size: {processed_img.size}")
-
-            # Resize for display
-            max_height = 135
-            scaling_factor = max_height / processed_img.height
-            new_width = int(processed_img.width * scaling_factor)
-
-            debug_print(f"DEBUG: Resizing processed image to: ({new_width}, {max_height})")
-            return processed_img.resize((new_width, max_height), Image.Resampling.LANCZOS)
+            img = thumbnail_cache.load_thumbnail(img_path, self.thumbnail_crop(should_crop), self.crop_with_method)
+            if img is not None:
+                self.processing_status[img_path] = should_crop
+            return img
 
         except Exception as e:
             print(f"ERROR: Failed to process image {img_path}: {e}")
@@ -530,11 +632,8 @@ class ImageLoader:
         if path_to_remove in self.image_crop_states:
             del self.image_crop_states[path_to_remove]
 
-        # IMPORTANT: Clean up cache entries for this image
-        cache_keys_to_remove = [key for key in self.processed_image_cache.keys() if key.startswith(path_to_remove)]
-        for cache_key in cache_keys_to_remove:
-            del self.processed_image_cache[cache_key]
-            debug_print(f"DEBUG: Removed cache entry: {cache_key}")
+        # Drop its in-memory thumbnails; the disk tier is keyed by content and kept
+        thumbnail_cache.forget(path_to_remove)
 
         if path_to_remove in self.processing_status:
             del self.processing_status[path_to_remove]
@@ -549,16 +648,18 @@ class ImageLoader:
         debug_print(f"DEBUG: Image removed. Remaining: {len(self.image_files)} images")
 
     def clear_cache(self):
-        """Clear the processed image cache - useful for debugging or memory management"""
-        self.processed_image_cache.clear()
+        """Clear the in-memory thumbnail cache - useful for debugging or memory management"""
+        thumbnail_cache.clear_memory_cache()
         self.processing_status.clear()
         debug_print("DEBUG: Cleared processed image cache")
 
     def get_cache_info(self):
         """Get information about the current cache state - useful for debugging"""
+        memory_info = thumbnail_cache.memory_cache_info()
         cache_info = {
-            'cached_images': len(self.processed_image_cache),
-            'cache_keys': list(self.processed_image_cache.keys()),
+            'cached_images': memory_info['entries'],
+            'cached_bytes': memory_info['bytes'],
+            'pending_thumbnails': len(self.pending_thumbnails),
             'processing_status': self.processing_status
         }
         debug_print(f"DEBUG: Cache info: {cache_info}")
@@ -567,6 +668,10 @@ class ImageLoader:
     def display_images(self):
         """
         Loads and displays the selected images in the GUI with sample labels.
+
+        Thumbnails already in memory are shown immediately. The others get a
+        placeholder sized from the image header while they are decoded (and
+        cropped) on the thumbnail pool, and are swapped in as they finish.
         """
         if not self.canvas or not self.scrollable_frame:
             debug_print("DEBUG: Canvas or scrollable_frame not initialized")
@@ -586,6 +691,8 @@ class ImageLoader:
         self.image_widgets.clear()
         self.close_buttons.clear()
         self.image_references = []
+        # Results for the previous layout are no longer wanted; their futures still fill the cache
+        self.pending_thumbnails = []
 
         if not self.image_files:
             debug_print("DEBUG: No image files to display")
@@ -598,7 +705,7 @@ class ImageLoader:
 
         # Ensure parent has updated size before calculating max width
         self.parent.update_idletasks()
-        max_height = 135
+        max_height = thumbnail_cache.THUMBNAIL_HEIGHT
 
         debug_print(f"DEBUG: Total images to process: {len(self.image_files)}")
 
@@ -608,20 +715,6 @@ class ImageLoader:
             image_sample_mapping = self.main_gui.image_sample_mapping
             debug_print(f"DEBUG: Loaded sample mapping from GUI: {len(image_sample_mapping)} entries")
 
-        # Calculate positions
-        padding = 5
-        current_x = padding
-        current_y = padding
-        max_row_height = 0
-
-        # Get frame width, with fallback
-        try:
-            frame_width = self.scrollable_frame.winfo_width()
-            if frame_width <= 1:
-                frame_width = 800
-        except:
-            frame_width = 800
-
         for img_index, img_path in enumerate(self.image_files):
             debug_print(f"DEBUG: Processing image {img_index + 1}/{len(self.image_files)}: {os.path.basename(img_path)}")
 
@@ -630,6 +723,7 @@ class ImageLoader:
             container.pack_propagate(False)
 
             # Add sample label if mapping exists for this image
+            label_height = 0
             if img_path in image_sample_mapping:
                 sample_num = image_sample_mapping[img_path]
                 sample_label = Label(
@@ -640,6 +734,7 @@ class ImageLoader:
                     fg='blue'
                 )
                 sample_label.pack(pady=(2, 0))
+                label_height = 20
                 debug_print(f"DEBUG: Added sample label: Sample {sample_num}")
 
             if img_path.lower().endswith(".pdf"):
@@ -649,27 +744,42 @@ class ImageLoader:
                 item_height = 50
             else:
                 try:
-                    img = self.process_image(img_path)
-                    if img is None:
-                        debug_print(f"DEBUG: Skipping failed image: {img_path}")
-                        continue
-
-                    img_tk = ImageTk.PhotoImage(img)
-                    label = Label(container, image=img_tk, bg="white")
+                    should_crop = self.image_crop_states.get(img_path, False)
+                    img = thumbnail_cache.get_cached_thumbnail(img_path, self.thumbnail_crop(should_crop))
+                    if img is not None:
+                        self.processing_status[img_path] = should_crop
+                        img_tk = ImageTk.PhotoImage(img)
+                        label = Label(container, image=img_tk, bg="white")
+                    else:
+                        placeholder_size = self._placeholder_size(img_path, max_height, Image)
+                        if placeholder_size is None:
+                            debug_print(f"DEBUG: Skipping failed image: {img_path}")
+                            container.destroy()
+                            continue
+                        img = Image.new("RGB", placeholder_size, (235, 235, 235))
+                        img_tk = ImageTk.PhotoImage(img)
+                        label = Label(container, image=img_tk, text="Loading...", compound="center",
+                                      fg="gray40", bg="white")
+                        self.pending_thumbnails.append({
+                            'path': img_path,
+                            'future': thumbnail_cache.submit_thumbnail(img_path, self.thumbnail_crop(should_crop),
+                                                                       self.crop_with_method),
+                            'crop': should_crop,
+                            'container': container,
+                            'label': label,
+                            'label_height': label_height,
+                        })
                     label.pack(padx=2, pady=2)
 
                     self.image_references.append(img_tk)
                     item_width = img.width + 4
-                    item_height = img.height + 4
-                
-                    # Add extra height for sample label if present
-                    if img_path in image_sample_mapping:
-                        item_height += 20
+                    item_height = img.height + 4 + label_height
 
-                    debug_print(f"DEBUG: Image {img_index + 1} processed successfully: {item_width}x{item_height}")
+                    debug_print(f"DEBUG: Image {img_index + 1} prepared: {item_width}x{item_height}")
 
                 except Exception as e:
                     print(f"ERROR: Failed to process image {img_path}: {str(e)}")
+                    container.destroy()
                     continue
 
             # Create close button
@@ -691,16 +801,58 @@ class ImageLoader:
             # Set container dimensions
             container.config(width=item_width, height=item_height)
 
+        total_height = self._layout_containers()
+
+        try:
+            self.parent.update_idletasks()
+            if prev_pos and len(prev_pos) >= 2:
+                self.canvas.yview_moveto(prev_pos[0])
+        except Exception as e:
+            debug_print(f"DEBUG: Error updating scroll region: {e}")
+
+        if self.pending_thumbnails:
+            debug_print(f"DEBUG: Building {len(self.pending_thumbnails)} thumbnails in the background")
+            self._schedule_thumbnail_poll()
+
+        debug_print(f"DEBUG: Display completed. Total height: {total_height}")
+
+    @staticmethod
+    def _placeholder_size(img_path, max_height, Image):
+        """Return the display size of an image from its header, without decoding it."""
+        try:
+            with Image.open(img_path) as img:
+                width, height = img.size
+            return max(1, int(width * max_height / height)), max_height
+        except Exception as e:
+            print(f"ERROR: Failed to read image {img_path}: {e}")
+            return None
+
+    def _layout_containers(self):
+        """Place the image containers left to right, wrapping rows to the frame width."""
+        padding = 5
+        current_x = padding
+        current_y = padding
+        max_row_height = 0
+
+        # Get frame width, with fallback
+        try:
+            frame_width = self.scrollable_frame.winfo_width()
+            if frame_width <= 1:
+                frame_width = 800
+        except:
+            frame_width = 800
+
+        for container in self.image_widgets:
+            item_width = int(container.cget("width"))
+            item_height = int(container.cget("height"))
+
             # Wrap to new row if needed
             if current_x + item_width > frame_width - padding:
                 current_x = padding
                 current_y += max_row_height + padding
                 max_row_height = 0
-                debug_print(f"DEBUG: Wrapping to new row at y={current_y}")
 
-            # Position container
             container.place(x=current_x, y=current_y)
-            debug_print(f"DEBUG: Placed container at ({current_x}, {current_y})")
 
             # Update tracking variables
             current_x += item_width + padding
@@ -710,77 +862,69 @@ class ImageLoader:
         # Update scrolling area
         total_height = current_y + max_row_height + padding
         self.scrollable_frame.configure(height=total_height)
-
         try:
             self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-            self.parent.update_idletasks()
-            if prev_pos and len(prev_pos) >= 2:
-                self.canvas.yview_moveto(prev_pos[0])
         except Exception as e:
             debug_print(f"DEBUG: Error updating scroll region: {e}")
+        return total_height
 
-        debug_print(f"DEBUG: Display completed. Total height: {total_height}")
+    def _schedule_thumbnail_poll(self):
+        if self.thumbnail_poll_id is None:
+            self.thumbnail_poll_id = self.parent.after(THUMBNAIL_POLL_MS, self._poll_thumbnails)
 
-    def get_image_for_report(self, img_path, target_width=None, target_height=None):
-        """
-        Get the best available version of an image for report generation.
-        Returns the processed (cropped) version if available, otherwise the original.
-
-        Args:
-            img_path: Path to the original image
-            target_width: Optional target width for the returned image
-            target_height: Optional target height for the returned image
-
-        Returns:
-            PIL Image object (processed version if available, otherwise original)
-        """
+    def _poll_thumbnails(self):
+        """Swap finished background thumbnails into their placeholders (runs on the Tk thread)."""
+        self.thumbnail_poll_id = None
         try:
-            Image, _, _, _, _, _ = _lazy_import_pil()
-            if Image is None:
-                return None
-
-            debug_print(f"DEBUG: Getting image for report: {os.path.basename(img_path)}")
-
-            # Check if we have a processed version in cache
-            should_crop = self.image_crop_states.get(img_path, False)
-            cache_key = f"{img_path}_{should_crop}"
-
-            if cache_key in self.processed_image_cache:
-                debug_print(f"DEBUG: Using processed version for report: {os.path.basename(img_path)} (cropped={should_crop})")
-                img = self.processed_image_cache[cache_key].copy()
-            else:
-                debug_print(f"DEBUG: Using original image for report: {os.path.basename(img_path)}")
-                img = Image.open(img_path)
-
-            # Resize if target dimensions are specified
-            if target_width or target_height:
-                original_width, original_height = img.size
-
-                if target_width and target_height:
-                    # Both dimensions specified - use them directly
-                    img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                elif target_width:
-                    # Only width specified - maintain aspect ratio
-                    ratio = target_width / original_width
-                    new_height = int(original_height * ratio)
-                    img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-                elif target_height:
-                    # Only height specified - maintain aspect ratio
-                    ratio = target_height / original_height
-                    new_width = int(original_width * ratio)
-                    img = img.resize((new_width, target_height), Image.Resampling.LANCZOS)
-
-                debug_print(f"DEBUG: Resized image for report to: {img.size}")
+            if not (self.scrollable_frame and self.scrollable_frame.winfo_exists()):
+                self.pending_thumbnails = []
+                return
+        except Exception:
+            # The loader's widgets were destroyed with the window
+            self.pending_thumbnails = []
+            return
 
-            return img
+        _, ImageTk, _, _, _, _ = _lazy_import_pil()
+        still_pending = []
+        relayout = False
+        for entry in self.pending_thumbnails:
+            if not entry['future'].done():
+                still_pending.append(entry)
+                continue
 
-        except Exception as e:
-            print(f"ERROR: Failed to get image for report {img_path}: {e}")
+            container = entry['container']
             try:
-                # Fallback to original image
-                return Image.open(img_path)
-            except:
-                return None
+                img = entry['future'].result()
+            except Exception as e:
+                print(f"ERROR: Failed to process image {entry['path']}: {e}")
+                img = None
+
+            if img is None:
+                debug_print(f"DEBUG: Removing failed image from display: {entry['path']}")
+                index = self.image_widgets.index(container)
+                del self.image_widgets[index]
+                del self.close_buttons[index]
+                container.destroy()
+                relayout = True
+                continue
+
+            self.processing_status[entry['path']] = entry['crop']
+            img_tk = ImageTk.PhotoImage(img)
+            entry['label'].configure(image=img_tk, text="")
+            self.image_references.append(img_tk)
+
+            item_width = img.width + 4
+            item_height = img.height + 4 + entry['label_height']
+            if (item_width, item_height) != (int(container.cget("width")), int(container.cget("height"))):
+                # Auto-cropped images do not keep the original aspect ratio
+                container.config(width=item_width, height=item_height)
+                relayout = True
+
+        self.pending_thumbnails = still_pending
+        if relayout:
+            self._layout_containers()
+        if still_pending:
+            self._schedule_thumbnail_poll()
 
 # Update the ImageLoader methods with better error handling and debugging
 
@@ -837,18 +981,13 @@ class ImageLoader:
 
             debug_print(f"DEBUG: Getting image for report: {os.path.basename(img_path)}")
 
-            # Check if we have a processed version in cache
+            # Only display thumbnails are cached, so the full-resolution crop is redone here
             should_crop = self.image_crop_states.get(img_path, False)
-            cache_key = f"{img_path}_{should_crop}"
-
             debug_print(f"DEBUG: Image crop state for {os.path.basename(img_path)}: {should_crop}")
-            debug_print(f"DEBUG: Looking for cache key: {cache_key}")
-            debug_print(f"DEBUG: Available cache keys: {list(self.processed_image_cache.keys())}")
 
-            if cache_key in self.processed_image_cache:
-                debug_print(f"DEBUG: FOUND processed version in cache for {os.path.basename(img_path)} (cropped={should_crop})")
-                img = self.processed_image_cache[cache_key].copy()
-                debug_print(f"DEBUG: Retrieved processed image size: {img.size}")
+            img = self.claude_intelligent_crop(img_path) if should_crop else None
+            if img is not None:
+                debug_print(f"DEBUG: Using cropped version for {os.path.basename(img_path)}, size: {img.size}")
             else:
                 debug_print(f"DEBUG: NO processed version found, using original for {os.path.basename(img_path)}")
                 img = Image.open(img_path)
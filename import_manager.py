@@ -4,7 +4,12 @@ Lazy loading utilities for optional dependencies.
 Handles deferred imports to improve startup time.
 """
 
+import importlib
+import threading
+import time
+
 from utils import debug_print
+from tracing import trace_span
 
 # Lazy loading helper functions
 def lazy_import_pandas():
@@ -88,4 +93,90 @@ def lazy_import_viscosity_gui():
         return ViscosityGUI
     except ImportError as e:
         debug_print(f"Error importing viscosity GUI: {e}")
-        return None
\ No newline at end of file
+        return None
+
+# Background warm-up of heavy modules
+#
+# main.py shows the startup menu before pandas/numpy/openpyxl/matplotlib are
+# imported. While the user is choosing what to open, these modules are imported
+# on a worker thread so that the first file load does not pay for them.
+# Entries later in the list import the earlier ones anyway, so the scientific
+# stack comes first and the application packages last.
+WARMUP_MODULES = (
+    'numpy',
+    'pandas',
+    'openpyxl',
+    'PIL.Image',
+    'matplotlib',
+    'tksheet',
+    'processing',
+    'file_manager',
+    'plot_manager',
+)
+
+_warmup_thread = None
+_warmup_done = threading.Event()
+_warmup_timings = {}
+
+
+def start_background_warmup(modules=WARMUP_MODULES):
+    """
+    Import heavy modules on a daemon thread. Safe to call more than once.
+
+    Module imports only - no Tk objects are created on the worker thread. If
+    the main thread needs a module that is still being imported, the import
+    system makes it wait for the worker rather than importing it twice.
+
+    Args:
+        modules (iterable): Dotted module names to import, in order
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    global _warmup_thread
+    if _warmup_thread is not None:
+        return _warmup_thread
+
+    def warmup_worker():
+        with trace_span("import warm-up", category="startup"):
+            for module_name in modules:
+                start = time.perf_counter()
+                try:
+                    with trace_span(f"import {module_name}", category="startup"):
+                        if module_name == 'matplotlib':
+                            # Select the Tk backend before anything imports pyplot
+                            lazy_import_matplotlib()
+                        else:
+                            importlib.import_module(module_name)
+                    _warmup_timings[module_name] = time.perf_counter() - start
+                except Exception as e:
+                    debug_print(f"DEBUG: Background import of {module_name} failed: {e}")
+        _warmup_done.set()
+        debug_print(f"DEBUG: Background import warm-up finished in {sum(_warmup_timings.values()):.3f}s")
+
+    _warmup_thread = threading.Thread(target=warmup_worker, name="ImportWarmup", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+def is_warmup_complete():
+    """Return True once the background warm-up has finished."""
+    return _warmup_done.is_set()
+
+
+def wait_for_warmup(timeout=None):
+    """
+    Block until the background warm-up finishes.
+
+    Args:
+        timeout (float, optional): Maximum seconds to wait
+
+    Returns:
+        bool: True if the warm-up finished
+    """
+    return _warmup_done.wait(timeout)
+
+
+def get_warmup_timings():
+    """Return a dict of module name -> seconds spent importing it in the background."""
+    return dict(_warmup_timings)
@@ -5,6 +5,7 @@ and plotting graphs.
 """
 
 import time
+from tracing import trace_instant, trace_span
 startup_timer = {
     'start_time': time.time(),
     'checkpoints': []
@@ -14,6 +15,7 @@ def log_timing_checkpoint(checkpoint_name):
     """Log a timing checkpoint with elapsed time."""
     elapsed = time.time() - startup_timer['start_time']
     startup_timer['checkpoints'].append((checkpoint_name, elapsed))
+    trace_instant(checkpoint_name, category="startup")
     print(f"TIMING: {checkpoint_name}: {elapsed:.3f}s")
 
 # Time each import in main.py individually
@@ -42,7 +44,8 @@ import_time = time.time() - import_start
 print(f"TIMING: from utils import get_resource_path took: {import_time:.3f}s")
 
 import_start = time.time()
-from main_gui import DataViewer
+with trace_span("import main_gui", category="startup"):
+    from main_gui import DataViewer
 import_time = time.time() - import_start
 print(f"TIMING: from main_gui import DataViewer took: {import_time:.3f}s")
 
@@ -99,10 +102,13 @@ def main():
 
         # Initialize and launch the GUI application
         gui_start = time.time()
-        app = DataViewer(root)
+        with trace_span("DataViewer.__init__", category="startup"):
+            app = DataViewer(root)
         gui_time = time.time() - gui_start
         print(f"TIMING: DataViewer initialization took: {gui_time:.3f}s")
         log_timing_checkpoint("DataViewer initialized")
+        deferred_modules = [name for name in ('pandas', 'numpy', 'openpyxl', 'matplotlib') if name not in sys.modules]
+        print(f"TIMING: Startup menu shown before importing: {', '.join(deferred_modules) or 'none'}")
 
         # Calculate and display total startup time
         total_startup_time = time.time() - startup_timer['start_time']
@@ -10,6 +10,7 @@ to separate modules for better modularity and scalability.
 import copy
 import queue
 import os
+import sys
 import threading
 import time
 import tkinter as tk
@@ -26,14 +27,16 @@ from import_manager import (
     lazy_import_requests,
     lazy_import_packaging,
     _lazy_import_processing,
-    lazy_import_viscosity_gui
+    lazy_import_viscosity_gui,
+    start_background_warmup
 )
 
 # Import utilities after lazy imports
 from utils import FONT, clean_columns, get_save_path, is_standard_file, plotting_sheet_test, APP_BACKGROUND_COLOR, BUTTON_COLOR, PLOT_CHECKBOX_TITLE, clean_display_suffixes, show_success_message
 from resource_utils import get_resource_path
 from enhanced_notes_manager import EnhancedNotesManager, bind_table_double_click
-from excel_image_extractor import ExcelImageExtractor, extract_and_load_excel_images
+from virtual_table import VirtualTable, VIRTUAL_TABLE_ROW_THRESHOLD
+from tracing import traced, current_span
 
 class DataViewer:
     """Main GUI class for the Standardized Testing application."""
@@ -74,6 +77,10 @@ class DataViewer:
         self.excel_image_extractor = None # Lazy loaded
         debug_print("DEBUG: Excel Image Extractor ready for lazy loading")
 
+        # Nothing above imports pandas/numpy/openpyxl, so the startup menu is already
+        # up; import the heavy modules in the background while the user picks a file
+        self.root.after_idle(start_background_warmup)
+
         # Setup update checking - disable when no internet!
         #self.update_checker = UpdateChecker(current_version="3.0.0")
         #self.setup_update_checking()
@@ -187,11 +194,6 @@ Would you like to download and install the update?"""
     # Initialization and Configuration
     def initialize_variables(self) -> None:
         """Initialize variables used throughout the GUI."""
-        pd = self.get_pandas()
-        if not pd:
-            debug_print("ERROR: Could not load pandas")
-            return None
-
         # Basic variables
         self.sheets: Dict[str, pd.DataFrame] = {}
         self.filtered_sheets: Dict[str, pd.DataFrame] = {}
@@ -322,8 +324,8 @@ Would you like to download and install the update?"""
         # Create menu immediately - needed for basic functionality
         self.add_menu()
 
-        # Setup file dropdown
-        self.file_manager.add_or_update_file_dropdown()
+        # Setup file dropdown (without loading FileManager, which pulls in pandas/openpyxl)
+        self.ui_manager.create_file_dropdown()
 
         # Add static controls
         self.ui_manager.add_static_controls()
@@ -518,6 +520,10 @@ Would you like to download and install the update?"""
             if hasattr(self, 'excel_image_extractor') and self.excel_image_extractor:
                 self.excel_image_extractor.cleanup_temp_directory()
 
+            # Let queued database writes finish before the process exits
+            if 'database_service' in sys.modules:
+                sys.modules['database_service'].close_database_services()
+
             for thread in self.threads:
                 if thread.is_alive():
                     pass
@@ -560,6 +566,7 @@ Would you like to download and install the update?"""
         # Database menu
         dbmenu = tk.Menu(menubar, tearoff=0)
         dbmenu.add_command(label="Browse Database", command=lambda: self.file_manager.show_database_browser())
+        dbmenu.add_command(label="Storage and Maintenance", command=self.show_database_maintenance)
         menubar.add_cascade(label="Database", menu=dbmenu)
 
         # Calculate menu
@@ -578,6 +585,12 @@ Would you like to download and install the update?"""
         reportmenu.add_command(label="Generate Full Report", command=self.generate_full_report)
         menubar.add_cascade(label="Reports", menu=reportmenu)
 
+        # Debug menu
+        debugmenu = tk.Menu(menubar, tearoff=0)
+        debugmenu.add_command(label="Performance HUD", command=self.show_performance_hud)
+        debugmenu.add_command(label="Export Chrome Trace...", command=self.export_performance_trace)
+        menubar.add_cascade(label="Debug", menu=debugmenu)
+
         # Help menu
         helpmenu = tk.Menu(menubar, tearoff=0)
         helpmenu.add_command(label="Help", command=self.show_help)
@@ -589,6 +602,23 @@ Would you like to download and install the update?"""
 
         self.root.bind_all("<Control-u>", lambda e: self.update_database())
 
+    def show_performance_hud(self):
+        """Show the performance HUD listing recently traced operations."""
+        if not hasattr(self, 'trace_hud') or self.trace_hud is None:
+            from trace_hud import TraceHUD
+            self.trace_hud = TraceHUD(self.root)
+        self.trace_hud.show()
+
+    def export_performance_trace(self):
+        """Export recorded spans as Chrome trace-event JSON."""
+        from trace_hud import export_trace_dialog
+        export_trace_dialog(self.root)
+
+    def show_database_maintenance(self):
+        """Show database storage statistics and run maintenance on request."""
+        from database_maintenance import show_maintenance_dialog
+        show_maintenance_dialog(self.root, self.file_manager.db_ops.db_service)
+
     def show_database_comparison(self):
         """Show database browser for file selection, then run comparison analysis."""
         self.file_manager.show_database_browser(comparison_mode=True)
@@ -772,6 +802,8 @@ Would you like to download and install the update?"""
                     self.image_crop_states = {}
                 self.image_crop_states[img_path] = img_info.get('crop_state', False)
 
+            self._crop_pending_images(formatted_images)
+
             # Update the image display ONLY if the target sheet is currently displayed
             current_displayed_sheet = self.selected_sheet.get()
             if target_sheet == current_displayed_sheet:
@@ -806,6 +838,12 @@ Would you like to download and install the update?"""
             import traceback
             traceback.print_exc()
 
+    def _crop_pending_images(self, formatted_images):
+        """Start auto-cropping the pending sample images that have cropping enabled, in parallel."""
+        crop_paths = [img_info['path'] for img_info in formatted_images if img_info.get('crop_state', False)]
+        if crop_paths and getattr(self, 'image_loader', None):
+            self.image_loader.crop_images_in_background(crop_paths)
+
     def process_formatted_sample_images(self):
         """Process and display formatted sample images in the main GUI."""
         try:
@@ -846,6 +884,8 @@ Would you like to download and install the update?"""
                     self.image_crop_states = {}
                 self.image_crop_states[img_path] = img_info.get('crop_state', False)
 
+            self._crop_pending_images(formatted_images)
+
             # Refresh the image display if we have an image loader
             if hasattr(self, 'image_loader') and self.image_loader:
                 debug_print("DEBUG: Refreshing image display with sample images")
@@ -939,8 +979,10 @@ Would you like to download and install the update?"""
         thread = threading.Thread(target=update_in_background, daemon=True)
         thread.start()
 
+    @traced("DataViewer.sheet_switch", category="ui")
     def _finish_sheet_update(self, sheet_name, data, is_empty, is_plotting_sheet, processing):
         """Finish sheet update in main thread."""
+        current_span().set('sheet', sheet_name)
         try:
             # Clear and rebuild frames
             self.ui_manager.clear_dynamic_frame()
@@ -1118,6 +1160,7 @@ Would you like to download and install the update?"""
         if current_title.endswith(" *"):
             self.root.title(current_title[:-2])
 
+    @traced("DataViewer.update_database", category="db")
     def update_database(self):
         """Update the database with all staged changes."""
         try:
@@ -1143,45 +1186,49 @@ Would you like to download and install the update?"""
             successful_updates = 0
             failed_updates = []
 
+            # Build every file's VAP3 first, then store them all in one database transaction
+            entries = []
+            entry_names = []
             for i, file_data in enumerate(modified_files):
                 try:
                     # Update progress
-                    progress = int(((i + 1) / total_files) * 100)
+                    progress = int(((i + 1) / total_files) * 90)
                     self.progress_dialog.update_progress_bar(progress)
                     self.root.update_idletasks()
 
-                    debug_print(f"DEBUG: Updating database for file: {file_data['file_name']}")
+                    debug_print(f"DEBUG: Preparing database update for file: {file_data['file_name']}")
 
-                    # Save current file state as VAP3 and store in database
-                    self._update_file_in_database(file_data)
-                    successful_updates += 1
+                    # Save current file state as VAP3
+                    entries.append(self._build_database_entry(file_data))
+                    entry_names.append(file_data['file_name'])
 
                 except Exception as e:
                     debug_print(f"ERROR: Failed to update file {file_data['file_name']}: {e}")
                     failed_updates.append(file_data['file_name'])
 
-            # Clean up
-            self.progress_dialog.hide_progress_bar()
-
-            # Show results
-            if failed_updates:
-                if successful_updates > 0:
-                    message = f"Partial success:\n\n"
-                    message += f"✓ Successfully updated: {successful_updates} files\n"
-                    message += f"✗ Failed to update: {len(failed_updates)} files\n\n"
-                    message += "Failed files:\n" + "\n".join([f"• {name}" for name in failed_updates])
-                    messagebox.showwarning("Partial Success", message)
-                else:
-                    message = f"Failed to update all {len(failed_updates)} files:\n\n"
-                    message += "\n".join([f"• {name}" for name in failed_updates])
-                    messagebox.showerror("Update Failed", message)
+            def release_archives():
+                # Release the in-memory archives
+                for entry in entries:
+                    entry['source'].close()
+
+            def on_stored(file_ids):
+                release_archives()
+                for name, file_id in zip(entry_names, file_ids):
+                    debug_print(f"DEBUG: Successfully updated file {name} in database with ID: {file_id}")
+                self.progress_dialog.update_progress_bar(100)
+                self._report_database_update(len(file_ids), failed_updates)
+
+            def on_store_failed(error):
+                release_archives()
+                debug_print(f"ERROR: Failed to store updated files in database: {error}")
+                self._report_database_update(0, failed_updates + entry_names)
+
+            if entries:
+                # The writer thread stores everything; results are reported from its callback
+                self.file_manager.db_ops.db_service.write("store_files", entries,
+                                                          callback=on_stored, error_callback=on_store_failed)
             else:
-                # Complete success
-                message = f"Successfully updated {successful_updates} file(s) in the database."
-                show_success_message("Database Updated", message, self.root)
-
-                # Clear modification flags
-                self.clear_modified_flags()
+                self._report_database_update(successful_updates, failed_updates)
 
         except Exception as e:
             self.progress_dialog.hide_progress_bar()
@@ -1190,8 +1237,34 @@ Would you like to download and install the update?"""
             import traceback
             traceback.print_exc()
 
-    def _update_file_in_database(self, file_data):
-        """Update a single file in the database."""
+    def _report_database_update(self, successful_updates, failed_updates):
+        """Hide the progress bar and show the result of update_database."""
+        # Clean up
+        self.progress_dialog.hide_progress_bar()
+
+        # Show results
+        if failed_updates:
+            if successful_updates > 0:
+                message = f"Partial success:\n\n"
+                message += f"✓ Successfully updated: {successful_updates} files\n"
+                message += f"✗ Failed to update: {len(failed_updates)} files\n\n"
+                message += "Failed files:\n" + "\n".join([f"• {name}" for name in failed_updates])
+                messagebox.showwarning("Partial Success", message)
+            else:
+                message = f"Failed to update all {len(failed_updates)} files:\n\n"
+                message += "\n".join([f"• {name}" for name in failed_updates])
+                messagebox.showerror("Update Failed", message)
+        else:
+            # Complete success
+            message = f"Successfully updated {successful_updates} file(s) in the database."
+            show_success_message("Database Updated", message, self.root)
+
+            # Clear modification flags
+            self.clear_modified_flags()
+
+    @traced("DataViewer._build_database_entry", category="db")
+    def _build_database_entry(self, file_data):
+        """Build a modified file's VAP3 archive in an in-memory buffer and return its DatabaseManager.store_files entry (the buffer is streamed into the database)."""
         try:
             # CREATE: Collect sample notes from current filtered_sheets (ADD THIS SECTION)
             sample_notes_data = {}
@@ -1210,10 +1283,9 @@ Would you like to download and install the update?"""
                         sample_notes_data[sheet_name] = sheet_notes
                         debug_print(f"DEBUG: Collected notes for sheet {sheet_name}: {len(sheet_notes)} samples")
 
-            # Create temporary VAP3 file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.vap3', delete=False) as temp_file:
-                temp_vap3_path = temp_file.name
+            # Build the VAP3 in memory; it is streamed into the database without a temp file
+            from vap_file_manager import create_vap3_buffer
+            vap3_buffer = create_vap3_buffer()
 
             # Get associated images for this file
             sheet_images = {}
@@ -1259,7 +1331,7 @@ Would you like to download and install the update?"""
 
             # MODIFY: Add sample images and header data to vap3 save (MODIFY THIS CALL)
             success = vap_manager.save_to_vap3(
-                temp_vap3_path,
+                vap3_buffer,
                 filtered_sheets,
                 sheet_images,
                 getattr(self, 'plot_options', []),
@@ -1271,7 +1343,7 @@ Would you like to download and install the update?"""
             )
 
             if not success:
-                raise Exception("Failed to create temporary VAP3 file")
+                raise Exception("Failed to create VAP3 archive")
 
             # MODIFY: Prepare enhanced metadata with sample notes (MODIFY THIS SECTION)
             metadata = {
@@ -1287,16 +1359,7 @@ Would you like to download and install the update?"""
                 'sample_notes': sample_notes_data  # ADD THIS LINE
             }
 
-            # Store in database
-            file_id = self.file_manager.db_manager.store_vap3_file(temp_vap3_path, metadata)
-
-            # Clean up temporary file
-            try:
-                os.unlink(temp_vap3_path)
-            except:
-                pass
-
-            debug_print(f"DEBUG: Successfully updated file {file_data['file_name']} in database with ID: {file_id}")
+            return {'source': vap3_buffer, 'meta_data': metadata}
 
         except Exception as e:
             debug_print(f"ERROR: Failed to update file {file_data['file_name']}: {e}")
@@ -1571,6 +1634,7 @@ Would you like to download and install the update?"""
         self.plot_manager.add_plot_dropdown(self.plot_frame)
         self.plot_frame.update_idletasks()
 
+    @traced("DataViewer.display_table", category="ui")
     def display_table(self, frame, data, sheet_name, is_plotting_sheet):
         """Display table data in the given frame using tksheet with robust error handling."""
         pd = self.get_pandas()
@@ -1601,6 +1665,11 @@ Would you like to download and install the update?"""
 
         debug_print("DEBUG: Cleared existing table widgets.")
 
+        # Large non-plotting sheets (raw data, test plans) only format the visible window
+        if not is_plotting_sheet and len(data) > VIRTUAL_TABLE_ROW_THRESHOLD:
+            self.display_virtual_table(frame, data, sheet_name, Sheet)
+            return
+
         # Clean and prepare data with enhanced error handling
         try:
             data = clean_columns(data)
@@ -1895,6 +1964,72 @@ Would you like to download and install the update?"""
             )
             error_label.pack(expand=True, pady=50)
 
+    def display_virtual_table(self, frame, data, sheet_name, Sheet):
+        """Display a large non-plotting sheet with a virtualized tksheet table."""
+        try:
+            data = clean_columns(data, fill_na=False)
+            data.columns = data.columns.map(str)
+
+            table_frame = ttk.Frame(frame, padding=(2, 1))
+            table_frame.pack(fill='both', expand=True)
+            table_frame.grid_rowconfigure(0, weight=1)
+            table_frame.grid_columnconfigure(0, weight=1)
+
+            virtual_table = VirtualTable(table_frame, data, Sheet)
+            sheet = virtual_table.sheet
+
+            # Same read-only bindings as the regular table
+            sheet.disable_bindings(
+                "edit_cell",
+                "edit_header",
+                "edit_index",
+                "copy",
+                "cut",
+                "paste",
+                "delete",
+                "insert_columns",
+                "insert_rows",
+                "delete_columns",
+                "delete_rows"
+            )
+            sheet.enable_bindings(
+                "single_select",
+                "drag_select",
+                "select_all",
+                "column_select",
+                "row_select",
+                "column_width_resize",
+                "double_click_column_resize",
+                "row_height_resize",
+                "arrowkeys",
+                "right_click_popup_menu",
+                "rc_select"
+            )
+
+            virtual_table.grid(row=0, column=0, sticky="nsew")
+
+            if not hasattr(self, 'current_sheet_widget'):
+                self.current_sheet_widget = {}
+            self.current_sheet_widget[sheet_name] = sheet
+            self.current_virtual_table = virtual_table
+
+            bind_table_double_click(self)
+            debug_print(f"DEBUG: Virtual table displayed for '{sheet_name}' ({len(data)} rows)")
+
+        except Exception as table_error:
+            debug_print(f"ERROR: Failed to create virtual table: {table_error}")
+            import traceback
+            traceback.print_exc()
+
+            error_label = tk.Label(
+                frame,
+                text=f"Error creating table for '{sheet_name}'.\nPlease check the console for details.",
+                font=("Arial", 12),
+                fg="red",
+                justify="center"
+            )
+            error_label.pack(expand=True, pady=50)
+
     def store_vap3_data_for_data_collection(self, vap_data):
         """Store VAP3 data for access by data collection windows."""
         try:
@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel, Label, Button
 from utils import wrap_text,APP_BACKGROUND_COLOR,BUTTON_COLOR, PLOT_CHECKBOX_TITLE,FONT, debug_print
 import processing
+from tracing import traced
 
 
 def lazy_import_matplotlib_components():
@@ -235,6 +236,7 @@ class PlotManager:
         else:
             debug_print(f"DEBUG: Index {index} out of range for phase bars")
 
+    @traced("PlotManager.plot_all_samples", category="plot")
     def plot_all_samples(self, frame: ttk.Frame, full_sample_data, num_columns_per_sample: int) -> None:
         """
         Plot the provided sample data in the given frame.
@@ -368,6 +370,7 @@ class PlotManager:
 
         debug_print("DEBUG: Empty plot placeholder displayed successfully")
 
+    @traced("PlotManager.update_plot", category="plot")
     def update_plot(self, full_sample_data, num_columns_per_sample, frame=None):
         """
         Update the plot dynamically. The frame must be provided.
@@ -434,6 +437,7 @@ class PlotManager:
         if self.selected_plot_type.get() not in self.plot_options:
             self.selected_plot_type.set(self.plot_options[0])
 
+    @traced("PlotManager.update_plot_from_dropdown", category="plot")
     def update_plot_from_dropdown(self, event) -> None:
         """
         Callback for when the plot type dropdown changes.
@@ -76,6 +76,15 @@ from .legacy_processing import (
     filter_legacy_samples
 )
 
+# Import the cached template structure registry
+from .template_registry import (
+    get_template_structure,
+    get_template_registry,
+    get_default_template_path,
+    TemplateRegistry,
+    TemplateSheetBuilder
+)
+
 # Import data extraction utilities
 from .data_extraction import (
     aggregate_sheet_metrics,
@@ -154,6 +163,13 @@ __all__ = [
     'extract_samples_from_old_file_v2',
     'is_legacy_sample_empty',
     'filter_legacy_samples',
+
+    # Template registry
+    'get_template_structure',
+    'get_template_registry',
+    'get_default_template_path',
+    'TemplateRegistry',
+    'TemplateSheetBuilder',
     
     # Data extraction
     'aggregate_sheet_metrics',
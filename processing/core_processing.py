@@ -12,6 +12,7 @@ from utils import (
     remove_empty_columns,
     round_values
 )
+from tracing import traced
 
 from .data_extraction import updated_extracted_data_function_with_raw_data
 
@@ -194,6 +195,7 @@ def get_y_data_for_plot_type(sample_data, plot_type):
         # Default to TPM
         return get_y_data_for_plot_type(sample_data, "TPM")
 
+@traced("processing.process_generic_sheet", category="processing")
 def process_generic_sheet(data, headers_row=3, data_start_row=4):
     """
     Process data for any sheet that doesn't match predefined sheet names.
@@ -236,6 +238,7 @@ def process_generic_sheet(data, headers_row=3, data_start_row=4):
         #print(f"Error processing generic sheet: {e}")
         return pd.DataFrame(), {}, pd.DataFrame()
 
+@traced("processing.process_plot_sheet", category="processing")
 def process_plot_sheet(data, headers_row=3, data_start_row=4, num_columns_per_sample=12, custom_extracted_data_fn=None):
     """
     Process plotting sheets with fixed burn/clog/leak extraction from raw data.
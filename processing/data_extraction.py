@@ -9,6 +9,7 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Dict, Any
 from utils import debug_print, round_values
+from tracing import traced
 
 # Module constants for data extraction
 BURN_CLOG_LEAK_MAPPING = {
@@ -576,6 +577,7 @@ def extract_initial_oil_mass(sample_data):
         debug_print(f"DEBUG: Error extracting initial oil mass: {e}")
         return ""
 
+@traced("processing.aggregate_sheet_metrics", category="processing")
 def aggregate_sheet_metrics(full_sample_data: pd.DataFrame, num_columns_per_sample: int = 12) -> pd.DataFrame:
     """
     Given full_sample_data from a single sheet (which contains multiple samples laid out in groups of 12 columns),
@@ -4,6 +4,7 @@ Developed by Charlie Becquet
 Legacy Data Processing module for the DataViewer application.
 """
 
+import os
 import re
 import pandas as pd
 import numpy as np
@@ -14,8 +15,11 @@ from utils import (
     extract_meta_data,
     map_meta_data_to_template,
     load_excel_file,
+    load_workbook,
     plotting_sheet_test
 )
+from tracing import traced
+from .template_registry import get_template_structure, TemplateSheetBuilder
 
 # Module constants for legacy processing
 CART_FORMAT_INDICATORS = ['cart #', 'cart#', 'cartridge #']
@@ -153,7 +157,7 @@ def extract_samples_from_cart_format(file_path: str, sheet_name: Optional[str] =
 
     try:
         if sheet_name is None:
-            wb = load_workbook(file_path)
+            wb = load_workbook(file_path, read_only=True)
             sheet_name = wb.sheetnames[0]
             wb.close()
 
@@ -363,6 +367,7 @@ def extract_samples_from_cart_format(file_path: str, sheet_name: Optional[str] =
         traceback.print_exc()
         return []
 
+@traced("processing.process_legacy_file_auto_detect", category="processing")
 def process_legacy_file_auto_detect(legacy_file_path: str, template_path: str = None) -> pd.DataFrame:
     """
     Automatically detect template format and use appropriate processing function.
@@ -454,6 +459,7 @@ def detect_template_format(file_path: str, sheet_name: Optional[str] = None) ->
         print(f"DEBUG: Error detecting template format: {e}")
         return "unknown"
 
+@traced("processing.convert_legacy_file_using_template", category="processing")
 def convert_legacy_file_using_template(legacy_file_path: str, template_path: str = None) -> pd.DataFrame:
     """
     Converts a legacy Excel file to the standardized template format.
@@ -462,16 +468,9 @@ def convert_legacy_file_using_template(legacy_file_path: str, template_path: str
     - For each sample block, only rows up to the first empty 'After weight/g'
         are written and all cells below that row (within that block) are cleared.
     """
-    # Determine the template path.
-    if template_path is None:
-        template_path = os.path.join(os.path.abspath("."), "resources",
-                                        "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx")
-
+    # Template layout comes from the registry (parsed once, cached by file hash).
     template_sheet = "Intense Test"
-    wb = load_workbook(template_path)
-    if template_sheet not in wb.sheetnames:
-        raise ValueError(f"Sheet '{template_sheet}' not found in template file.")
-    ws = wb[template_sheet]
+    ws = TemplateSheetBuilder(get_template_structure(template_path).get_sheet(template_sheet))
 
     # Load legacy samples using our extraction function.
     legacy_samples = extract_samples_from_old_file(legacy_file_path)
@@ -510,12 +509,12 @@ def convert_legacy_file_using_template(legacy_file_path: str, template_path: str
 
     # Process each legacy sample.
     for sample_idx, sample in enumerate(legacy_samples):
-        col_offset = 1 + (sample_idx * 12)
+        col_offset = ws.block_column(sample_idx)
         #debug_print(f"\nProcessing sample {sample_idx + 1} at columns {col_offset} to {col_offset + 11}")
 
         # --- 1. meta_data Handling ---
         sample_name = sample.get("sample_name", f"Sample {sample_idx + 1}")
-        ws.cell(row=1, column=col_offset, value=os.path.splitext(os.path.basename(legacy_file_path))[0])
+        ws.set_value(1, col_offset, os.path.splitext(os.path.basename(legacy_file_path))[0])
 
         meta_data_values = {
             "Sample ID:": sample.get("sample_name", ""),
@@ -528,9 +527,9 @@ def convert_legacy_file_using_template(legacy_file_path: str, template_path: str
             "Media:": sample.get("media", "")
         }
 
-        for template_key, (patterns, (tpl_row, tpl_col_offset)) in meta_data_MAPPING.items():
+        for template_key, (patterns, default_position) in meta_data_MAPPING.items():
             value = meta_data_values.get(template_key, "")
-            ws.cell(row=tpl_row, column=col_offset + tpl_col_offset, value=value)
+            ws.set_value(*ws.sample_value_position(template_key, sample_idx, default_position), value)
 
         # --- 2. Data Column Handling with Row Slicing ---
         # Determine the cutoff row for this sample block based on "after_weight".
@@ -553,35 +552,27 @@ def convert_legacy_file_using_template(legacy_file_path: str, template_path: str
             else:
                 data = sliced_data.astype(str).replace("nan", "").replace("None", "")
             for row_offset, value in enumerate(data):
-                target_row = 5 + row_offset  # Data starts at row 5.
+                target_row = ws.data_start_row + row_offset
                 target_col = col_offset + rel_col
                 try:
-                    ws.cell(row=target_row, column=target_col,
-                            value=float(value) if is_numeric else str(value))
+                    ws.set_value(target_row, target_col, float(value) if is_numeric else str(value))
                 except Exception as e:
                     #debug_print(f"Error writing {key} at ({target_row},{target_col}): {e}")
-                    ws.cell(row=target_row, column=target_col, value="ERROR")
+                    ws.set_value(target_row, target_col, "ERROR")
 
         # --- 3. Clearing Extra Rows in the Block ---
         # For rows below the cutoff (in the sample block), clear all cells in the block's columns.
-        # We assume the block occupies 12 columns starting at col_offset.
-        start_clear_row = 5 + cutoff  # first row to clear in the block.
+        start_clear_row = ws.data_start_row + cutoff  # first row to clear in the block.
         # Use the maximum row in the worksheet as the ending point.
         for row_clear in range(start_clear_row, ws.max_row + 1):
-            for col_clear in range(col_offset, col_offset + 12):
-                ws.cell(row=row_clear, column=col_clear).value = None
+            for col_clear in range(col_offset, col_offset + ws.block_width):
+                ws.set_value(row_clear, col_clear, None)
 
     # --- 4. Final Cleanup ---
     # Delete any extra columns beyond the last sample block.
-    last_sample_col = len(legacy_samples) * 12
+    last_sample_col = ws.block_column(len(legacy_samples)) - 1
     if ws.max_column > last_sample_col:
-        ws.delete_cols(last_sample_col + 1, ws.max_column - last_sample_col)
-
-    # Delete all sheets except the template sheet.
-    sheets_to_keep = [template_sheet]
-    for sheet_name in list(wb.sheetnames):
-        if sheet_name not in sheets_to_keep:
-            del wb[sheet_name]
+        ws.delete_columns_after(last_sample_col)
 
     # Rename the sheet based on the legacy file name (limited to 31 characters).
     base_name = os.path.splitext(os.path.basename(legacy_file_path))[0]
@@ -589,23 +580,26 @@ def convert_legacy_file_using_template(legacy_file_path: str, template_path: str
     ws.title = new_sheet_name
     folder_path = os.path.join(os.path.abspath("."), "legacy data")
 
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+
     new_file_name = f"{base_name} Legacy.xlsx"
     new_file_path = os.path.join(folder_path, new_file_name)
-    wb.save(new_file_path)
+    ws.save(new_file_path)
     #debug_print(f"\nSaved processed file to: {new_file_path}")
-    return load_excel_file(new_file_path)[new_sheet_name]
+    return ws.to_dataframe()
 
+@traced("processing.convert_legacy_standards_using_template", category="processing")
 def convert_legacy_standards_using_template(legacy_file_path: str, template_path: str = None) -> dict:
     """
     Converts a legacy standards Excel file to the standardized template format.
     """
-    from openpyxl.cell.cell import MergedCell
-
-    if template_path is None:
-        template_path = os.path.join(os.path.abspath("."), "resources",
-                                    "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx")
+    from openpyxl import Workbook
 
-    wb_template = load_workbook(template_path, read_only=False)
+    # Sheet names and template values come from the registry instead of loading the template
+    template_structure = get_template_structure(template_path)
+    wb_output = Workbook()
+    wb_output.remove(wb_output.active)
     legacy_wb = load_workbook(legacy_file_path, read_only=False)
     base_name = os.path.splitext(os.path.basename(legacy_file_path))[0]
     folder_path = os.path.join(os.path.abspath("."), "legacy data")
@@ -625,10 +619,9 @@ def convert_legacy_standards_using_template(legacy_file_path: str, template_path
         "media": r"media"
     }
 
-    for sheet_name in wb_template.sheetnames:
-        # Create a new sheet to avoid merged cell issues
-        new_sheet_name = f"{sheet_name}_new"
-        new_ws = wb_template.create_sheet(title=new_sheet_name)
+    for sheet_name in template_structure.sheet_names:
+        # Fresh sheets avoid merged cell issues
+        new_ws = wb_output.create_sheet(title=sheet_name)
 
         if sheet_name in legacy_wb.sheetnames:
             legacy_ws = legacy_wb[sheet_name]
@@ -654,23 +647,10 @@ def convert_legacy_standards_using_template(legacy_file_path: str, template_path
                     for j, value in enumerate(row):
                         new_ws.cell(row=i + 1, column=j + 1, value=value)
         else:
-            # If sheet not in legacy file, copy from template sheet
-            ws = wb_template[sheet_name]
-            for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
-                for col_idx, value in enumerate(row, 1):
-                    new_ws.cell(row=row_idx, column=col_idx, value=value)
-
-    # Remove original sheets and rename new ones
-    for sheet_name in list(wb_template.sheetnames):
-        if not sheet_name.endswith('_new'):
-            del wb_template[sheet_name]
-
-    for sheet_name in list(wb_template.sheetnames):
-        if sheet_name.endswith('_new'):
-            original_name = sheet_name[:-4]  # Remove _new suffix
-            wb_template[sheet_name].title = original_name
-
-    wb_template.save(new_file_path)
+            # If sheet not in legacy file, copy the template sheet's values and formulas
+            TemplateSheetBuilder(template_structure.get_sheet(sheet_name)).write_to(new_ws)
+
+    wb_output.save(new_file_path)
     return load_excel_file(new_file_path)
 
 def extract_samples_from_old_file_v2(file_path: str, sheet_name: Optional[str] = None) -> list:
@@ -950,6 +930,7 @@ def filter_legacy_samples(legacy_samples):
     print(f"DEBUG: Filtered from {len(legacy_samples)} to {len(filtered_samples)} meaningful samples")
     return filtered_samples
 
+@traced("processing.convert_legacy_file_using_template_v2", category="processing")
 def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path: str = None) -> pd.DataFrame:
     """
     Enhanced version that handles both old and new template formats.
@@ -962,16 +943,9 @@ def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path:
     import math  # Add this import for the filtering functions
     print(f"DEBUG: Starting enhanced template conversion for: {legacy_file_path}")
 
-    # Determine the template path
-    if template_path is None:
-        template_path = os.path.join(os.path.abspath("."), "resources",
-                                        "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx")
-
+    # Template layout comes from the registry (parsed once, cached by file hash)
     template_sheet = "Intense Test"
-    wb = load_workbook(template_path)
-    if template_sheet not in wb.sheetnames:
-        raise ValueError(f"Sheet '{template_sheet}' not found in template file.")
-    ws = wb[template_sheet]
+    ws = TemplateSheetBuilder(get_template_structure(template_path).get_sheet(template_sheet))
 
     # Load legacy samples using our enhanced extraction function
     all_legacy_samples = extract_samples_from_old_file_v2(legacy_file_path)
@@ -1019,12 +993,12 @@ def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path:
 
     # Process each FILTERED legacy sample
     for sample_idx, sample in enumerate(legacy_samples):
-        col_offset = 1 + (sample_idx * 12)
-        print(f"DEBUG: Processing sample {sample_idx + 1} at columns {col_offset} to {col_offset + 11}")
+        col_offset = ws.block_column(sample_idx)
+        print(f"DEBUG: Processing sample {sample_idx + 1} at columns {col_offset} to {col_offset + ws.block_width - 1}")
 
         # Metadata Handling
         sample_name = sample.get("sample_name", f"Sample {sample_idx + 1}")
-        ws.cell(row=1, column=col_offset, value=os.path.splitext(os.path.basename(legacy_file_path))[0])
+        ws.set_value(1, col_offset, os.path.splitext(os.path.basename(legacy_file_path))[0])
 
         meta_data_values = {
             "Sample ID:": sample.get("sample_name", ""),
@@ -1038,11 +1012,12 @@ def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path:
         }
 
         # Write metadata to template
-        for template_key, (patterns, (tpl_row, tpl_col_offset)) in meta_data_MAPPING.items():
+        for template_key, (patterns, default_position) in meta_data_MAPPING.items():
             value = meta_data_values.get(template_key, "")
             if value:
-                print(f"DEBUG: Set {template_key} to '{value}' at row {tpl_row}, col {col_offset + tpl_col_offset}")
-                ws.cell(row=tpl_row, column=col_offset + tpl_col_offset, value=value)
+                tpl_row, tpl_col = ws.sample_value_position(template_key, sample_idx, default_position)
+                print(f"DEBUG: Set {template_key} to '{value}' at row {tpl_row}, col {tpl_col}")
+                ws.set_value(tpl_row, tpl_col, value)
 
         # Data Handling
         for data_key, (data_col_offset, is_numeric) in DATA_COL_MAPPING.items():
@@ -1066,22 +1041,16 @@ def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path:
 
                 print(f"DEBUG: Writing {data_key} data to column {target_col} ({len(clean_values)} values)")
 
-                # Write the data starting from row 4 (data_start_row)
-                for row_idx, value in enumerate(clean_values, start=4):
+                # Write the data below the block headers
+                for row_idx, value in enumerate(clean_values, start=ws.data_start_row):
                     if is_numeric:
                         try:
                             numeric_value = float(value)
-                            ws.cell(row=row_idx, column=target_col, value=numeric_value)
+                            ws.set_value(row_idx, target_col, numeric_value)
                         except (ValueError, TypeError):
-                            ws.cell(row=row_idx, column=target_col, value=value)
+                            ws.set_value(row_idx, target_col, value)
                     else:
-                        ws.cell(row=row_idx, column=target_col, value=str(value))
-
-    # Keep only the Intense Test sheet
-    sheets_to_keep = [template_sheet]
-    for sheet_name in list(wb.sheetnames):
-        if sheet_name not in sheets_to_keep:
-            del wb[sheet_name]
+                        ws.set_value(row_idx, target_col, str(value))
 
     # Rename the sheet based on the legacy file name (limited to 31 characters)
     base_name = os.path.splitext(os.path.basename(legacy_file_path))[0]
@@ -1095,27 +1064,21 @@ def convert_legacy_file_using_template_v2(legacy_file_path: str, template_path:
 
     new_file_name = f"{base_name} Legacy.xlsx"
     new_file_path = os.path.join(folder_path, new_file_name)
-    wb.save(new_file_path)
+    ws.save(new_file_path)
 
     print(f"DEBUG: Saved processed file to: {new_file_path}")
-    return load_excel_file(new_file_path)[new_sheet_name]
+    return ws.to_dataframe()
 
+@traced("processing.convert_cart_format_to_template", category="processing")
 def convert_cart_format_to_template(legacy_file_path: str, template_path: str = None) -> pd.DataFrame:
     """
     Convert cart format legacy files to standardized template.
     """
     print(f"DEBUG: Converting cart format file: {legacy_file_path}")
 
-    # Determine template path
-    if template_path is None:
-        template_path = os.path.join(os.path.abspath("."), "resources",
-                                        "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx")
-
+    # Template layout comes from the registry (parsed once, cached by file hash)
     template_sheet = "Intense Test"
-    wb = load_workbook(template_path)
-    if template_sheet not in wb.sheetnames:
-        raise ValueError(f"Sheet '{template_sheet}' not found in template file.")
-    ws = wb[template_sheet]
+    ws = TemplateSheetBuilder(get_template_structure(template_path).get_sheet(template_sheet))
 
     # Extract samples using cart format function
     all_legacy_samples = extract_samples_from_cart_format(legacy_file_path)
@@ -1163,12 +1126,12 @@ def convert_cart_format_to_template(legacy_file_path: str, template_path: str =
 
     # Process each sample (using same logic as v2)
     for sample_idx, sample in enumerate(legacy_samples):
-        col_offset = 1 + (sample_idx * 12)
-        print(f"DEBUG: Processing sample {sample_idx + 1} at columns {col_offset} to {col_offset + 11}")
+        col_offset = ws.block_column(sample_idx)
+        print(f"DEBUG: Processing sample {sample_idx + 1} at columns {col_offset} to {col_offset + ws.block_width - 1}")
 
         # Write project name to first row
         sample_name = sample.get("sample_name", f"Sample {sample_idx + 1}")
-        ws.cell(row=1, column=col_offset, value=os.path.splitext(os.path.basename(legacy_file_path))[0])
+        ws.set_value(1, col_offset, os.path.splitext(os.path.basename(legacy_file_path))[0])
 
         # Prepare metadata values
         meta_data_values = {
@@ -1183,11 +1146,12 @@ def convert_cart_format_to_template(legacy_file_path: str, template_path: str =
         }
 
         # Write metadata to template
-        for template_key, (patterns, (tpl_row, tpl_col_offset)) in meta_data_MAPPING.items():
+        for template_key, (patterns, default_position) in meta_data_MAPPING.items():
             value = meta_data_values.get(template_key, "")
             if value:
-                print(f"DEBUG: Set {template_key} to '{value}' at row {tpl_row}, col {col_offset + tpl_col_offset}")
-                ws.cell(row=tpl_row, column=col_offset + tpl_col_offset, value=value)
+                tpl_row, tpl_col = ws.sample_value_position(template_key, sample_idx, default_position)
+                print(f"DEBUG: Set {template_key} to '{value}' at row {tpl_row}, col {tpl_col}")
+                ws.set_value(tpl_row, tpl_col, value)
 
         # Write data columns (using same logic as v2)
         for data_key, (data_col_offset, is_numeric) in DATA_COL_MAPPING.items():
@@ -1211,22 +1175,16 @@ def convert_cart_format_to_template(legacy_file_path: str, template_path: str =
 
                 print(f"DEBUG: Writing {data_key} data to column {target_col} ({len(clean_values)} values)")
 
-                # Write the data starting from row 4 (data_start_row)
-                for row_idx, value in enumerate(clean_values, start=4):
+                # Write the data below the block headers
+                for row_idx, value in enumerate(clean_values, start=ws.data_start_row):
                     if is_numeric:
                         try:
                             numeric_value = float(value)
-                            ws.cell(row=row_idx, column=target_col, value=numeric_value)
+                            ws.set_value(row_idx, target_col, numeric_value)
                         except (ValueError, TypeError):
-                            ws.cell(row=row_idx, column=target_col, value=value)
+                            ws.set_value(row_idx, target_col, value)
                     else:
-                        ws.cell(row=row_idx, column=target_col, value=str(value))
-
-    # Keep only the Intense Test sheet
-    sheets_to_keep = [template_sheet]
-    for sheet_name in list(wb.sheetnames):
-        if sheet_name not in sheets_to_keep:
-            del wb[sheet_name]
+                        ws.set_value(row_idx, target_col, str(value))
 
     # Rename the sheet based on the legacy file name (limited to 31 characters)
     base_name = os.path.splitext(os.path.basename(legacy_file_path))[0]
@@ -1240,7 +1198,7 @@ def convert_cart_format_to_template(legacy_file_path: str, template_path: str =
 
     new_file_name = f"{base_name} Legacy Cart.xlsx"
     new_file_path = os.path.join(folder_path, new_file_name)
-    wb.save(new_file_path)
+    ws.save(new_file_path)
 
     print(f"DEBUG: Saved processed cart format file to: {new_file_path}")
-    return load_excel_file(new_file_path)[new_sheet_name]
\ No newline at end of file
+    return ws.to_dataframe()
\ No newline at end of file
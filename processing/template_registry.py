@@ -0,0 +1,624 @@
+"""
+template_registry.py
+Developed by Charlie Becquet
+Cached structure of the standardized test template for the DataViewer application.
+
+Legacy conversions only need the template's sheet names, the labels in each
+sheet's header rows, the sample block geometry and the cell values they start
+from. Loading the template workbook with openpyxl takes over a second, so the
+registry parses each template once, keeps the structure in memory and caches it
+on disk keyed by the SHA-256 of the template file. A changed template gets a new
+hash and is parsed again; stale cache files are simply never read.
+
+Conversions copy a TemplateSheet into a TemplateSheetBuilder, place values
+using the cached geometry (sample block columns, header value cells, first
+data row), and get the output DataFrame from the builder without writing and
+re-reading an Excel file.
+
+The saved copy keeps the template sheet's styles, merged cells and column
+widths. It is written over a one-sheet workbook cut from the template, which
+is also cached on disk next to the structure and loads several times faster
+than the whole template.
+"""
+
+import datetime
+import io
+import json
+import os
+import threading
+import time
+
+from utils import debug_print, hash_file, load_workbook, pd
+
+TEMPLATE_FILE_NAME = "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx"
+
+# Bump when the cached structure format or the parsing rules change
+TEMPLATE_CACHE_VERSION = 1
+
+# Each sample occupies a 12-column block in the plotting sheets
+DEFAULT_BLOCK_WIDTH = 12
+
+# Label that marks the column header row of a sample block
+BLOCK_HEADER_LABEL = "puffs"
+
+# First data row used when a sheet has no sample block header row
+DEFAULT_DATA_START_ROW = 5
+
+
+def get_default_template_path():
+    """Return the path of the bundled standardized test template."""
+    return os.path.join(os.path.abspath("."), "resources", TEMPLATE_FILE_NAME)
+
+
+def get_template_cache_dir():
+    """Return the directory the parsed template structures are cached in."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "template_cache")
+
+
+def _encode_value(value):
+    """Convert a cell value to something json.dump accepts."""
+    if isinstance(value, datetime.datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'date': value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {'time': value.isoformat()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _decode_value(value):
+    """Reverse _encode_value."""
+    if isinstance(value, dict):
+        if 'datetime' in value:
+            return datetime.datetime.fromisoformat(value['datetime'])
+        if 'date' in value:
+            return datetime.date.fromisoformat(value['date'])
+        if 'time' in value:
+            return datetime.time.fromisoformat(value['time'])
+    return value
+
+
+def _excel_cell_value(value):
+    """
+    Convert a cell value the way pandas' openpyxl reader does.
+
+    Integral floats become ints and empty cells become "" so the DataFrames
+    built here match what load_excel_file returned for a saved workbook.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value != value:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            as_int = int(value)
+        except (OverflowError, ValueError):
+            return float(value)
+        return as_int if as_int == value else float(value)
+    return value
+
+
+class TemplateSheet:
+    """Parsed layout and starting values of one template sheet."""
+
+    def __init__(self, name, cells, formulas, max_row, max_column, merged_ranges,
+                 header_positions, header_row, data_start_row, block_width, num_blocks):
+        """
+        Args:
+            name (str): Sheet name
+            cells (dict): (row, column) -> literal cell value, formulas excluded
+            formulas (dict): (row, column) -> (formula text, array range or None)
+            max_row (int): Last used row in the template
+            max_column (int): Last used column in the template
+            merged_ranges (list): Merged ranges as (min_row, min_col, max_row, max_col)
+            header_positions (dict): Header label -> (row, column) of its first occurrence
+            header_row (int): Row holding the per-sample column headers, or None
+            data_start_row (int): First data row below the header row, or None
+            block_width (int): Columns per sample block
+            num_blocks (int): Number of sample blocks laid out in the template
+        """
+        self.name = name
+        self.cells = cells
+        self.formulas = formulas
+        self.max_row = max_row
+        self.max_column = max_column
+        self.merged_ranges = merged_ranges
+        self.header_positions = header_positions
+        self.header_row = header_row
+        self.data_start_row = data_start_row
+        self.block_width = block_width
+        self.num_blocks = num_blocks
+
+    def value_position(self, label):
+        """
+        Return the (row, column) of the value cell next to a header label.
+
+        Args:
+            label (str): Header label such as "Sample ID:"
+
+        Returns:
+            tuple: (row, column) to the right of the label, or None if not found
+        """
+        position = self.header_positions.get(label)
+        if position is None:
+            return None
+        return position[0], position[1] + 1
+
+    def first_block_column(self):
+        """Return the first column of the first sample block (1 when the sheet has no blocks)."""
+        if self.header_row is not None:
+            for label, (row, col) in self.header_positions.items():
+                if row == self.header_row and label.lower() == BLOCK_HEADER_LABEL:
+                    return col
+        return 1
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'cells': [[row, col, _encode_value(value)] for (row, col), value in self.cells.items()],
+            'formulas': [[row, col, text, ref] for (row, col), (text, ref) in self.formulas.items()],
+            'max_row': self.max_row,
+            'max_column': self.max_column,
+            'merged_ranges': [list(bounds) for bounds in self.merged_ranges],
+            'header_positions': {label: list(pos) for label, pos in self.header_positions.items()},
+            'header_row': self.header_row,
+            'data_start_row': self.data_start_row,
+            'block_width': self.block_width,
+            'num_blocks': self.num_blocks
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data['name'],
+            cells={(row, col): _decode_value(value) for row, col, value in data['cells']},
+            formulas={(row, col): (text, ref) for row, col, text, ref in data['formulas']},
+            max_row=data['max_row'],
+            max_column=data['max_column'],
+            merged_ranges=[tuple(bounds) for bounds in data['merged_ranges']],
+            header_positions={label: tuple(pos) for label, pos in data['header_positions'].items()},
+            header_row=data['header_row'],
+            data_start_row=data['data_start_row'],
+            block_width=data['block_width'],
+            num_blocks=data['num_blocks']
+        )
+
+
+class TemplateStructure:
+    """Sheet names and parsed sheets of one template file."""
+
+    def __init__(self, template_path, file_hash, sheet_names, sheets):
+        self.template_path = template_path
+        self.file_hash = file_hash
+        self.sheet_names = sheet_names
+        self.sheets = sheets
+        for sheet in sheets.values():
+            sheet.structure = self
+
+    def get_sheet(self, sheet_name):
+        """
+        Get a parsed template sheet.
+
+        Raises:
+            ValueError: If the template has no sheet with that name
+        """
+        if sheet_name not in self.sheets:
+            raise ValueError(f"Sheet '{sheet_name}' not found in template file.")
+        return self.sheets[sheet_name]
+
+    def load_sheet_workbook(self, sheet_name):
+        """
+        Load a workbook holding only one template sheet, with its formatting.
+
+        Args:
+            sheet_name (str): Template sheet name
+
+        Returns:
+            openpyxl.Workbook: Workbook whose only worksheet is the template sheet
+        """
+        return get_template_registry().load_sheet_workbook(self, sheet_name)
+
+    def to_dict(self):
+        return {
+            'version': TEMPLATE_CACHE_VERSION,
+            'file_hash': self.file_hash,
+            'sheet_names': self.sheet_names,
+            'sheets': [self.sheets[name].to_dict() for name in self.sheet_names]
+        }
+
+    @classmethod
+    def from_dict(cls, data, template_path):
+        sheets = {sheet['name']: TemplateSheet.from_dict(sheet) for sheet in data['sheets']}
+        return cls(template_path, data['file_hash'], data['sheet_names'], sheets)
+
+
+class TemplateSheetBuilder:
+    """
+    Writable copy of a template sheet, used by conversions in place of an openpyxl worksheet.
+
+    Mirrors the parts of the worksheet API the conversions relied on (writing
+    cells, max_row/max_column, deleting trailing columns) and produces the same
+    DataFrame that saving the workbook and reading it back with load_excel_file did.
+    Template formulas are kept for the saved copy but read back as empty cells,
+    as they did from an openpyxl-saved file without cached results.
+    """
+
+    def __init__(self, template_sheet):
+        self.template_sheet = template_sheet
+        self.title = template_sheet.name
+        self.cells = dict(template_sheet.cells)
+        self.formulas = dict(template_sheet.formulas)
+        self.max_row = template_sheet.max_row
+        self.max_column = template_sheet.max_column
+        self._last_column = None  # set by delete_columns_after
+        self._merged_interior = set()
+        for min_row, min_col, max_row, max_col in template_sheet.merged_ranges:
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    if (row, col) != (min_row, min_col):
+                        self._merged_interior.add((row, col))
+
+    @property
+    def block_width(self):
+        """Columns per sample block in the template."""
+        return self.template_sheet.block_width
+
+    @property
+    def data_start_row(self):
+        """First row below the sample block headers."""
+        return self.template_sheet.data_start_row or DEFAULT_DATA_START_ROW
+
+    def block_column(self, sample_idx, offset=0):
+        """
+        Return a column of a sample block.
+
+        Args:
+            sample_idx (int): Zero-based sample index
+            offset (int): Column offset within the block
+
+        Returns:
+            int: 1-based worksheet column
+        """
+        return self.template_sheet.first_block_column() + sample_idx * self.block_width + offset
+
+    def sample_value_position(self, label, sample_idx, default):
+        """
+        Return where the value of a header label goes for a sample.
+
+        Header labels are laid out once per block; the template's first
+        occurrence gives the position within the block.
+
+        Args:
+            label (str): Header label such as "Sample ID:"
+            sample_idx (int): Zero-based sample index
+            default (tuple): (row, offset within the block) if the template lacks the label
+
+        Returns:
+            tuple: (row, column)
+        """
+        position = self.template_sheet.value_position(label)
+        if position is None:
+            row, offset = default
+            return row, self.block_column(sample_idx, offset)
+        row, column = position
+        return row, column + sample_idx * self.block_width
+
+    def set_value(self, row, column, value):
+        """Write a literal value, replacing any template value or formula in the cell."""
+        if (row, column) in self._merged_interior:
+            debug_print(f"DEBUG: Skipping write to merged cell ({row}, {column}) in {self.title}")
+            return
+        self.formulas.pop((row, column), None)
+        if isinstance(value, str) and len(value) > 1 and value.startswith('='):
+            # openpyxl stores such strings as formulas, which read back empty
+            self.cells.pop((row, column), None)
+            self.formulas[(row, column)] = (value, None)
+        elif value is None:
+            self.cells.pop((row, column), None)
+        else:
+            self.cells[(row, column)] = value
+        self.max_row = max(self.max_row, row)
+        self.max_column = max(self.max_column, column)
+
+    def delete_columns_after(self, last_column):
+        """Drop every column to the right of last_column."""
+        self.cells = {pos: value for pos, value in self.cells.items() if pos[1] <= last_column}
+        self.formulas = {pos: formula for pos, formula in self.formulas.items() if pos[1] <= last_column}
+        self.max_column = min(self.max_column, last_column)
+        self._last_column = last_column if self._last_column is None else min(self._last_column, last_column)
+
+    def to_rows(self):
+        """
+        Return the sheet as a list of rows, trimmed like pandas' openpyxl reader.
+
+        Trailing empty cells and rows are dropped and shorter rows are padded
+        with "" to the widest row.
+        """
+        if not self.cells:
+            return []
+        grid_rows = max(row for row, _ in self.cells)
+        grid_columns = max(col for _, col in self.cells)
+        rows = [[""] * grid_columns for _ in range(grid_rows)]
+        for (row, col), value in self.cells.items():
+            rows[row - 1][col - 1] = _excel_cell_value(value)
+        for row in rows:
+            while row and row[-1] == "":
+                row.pop()
+        while rows and not rows[-1]:
+            rows.pop()
+        if rows:
+            width = max(len(row) for row in rows)
+            rows = [row + [""] * (width - len(row)) for row in rows]
+        return rows
+
+    def to_dataframe(self):
+        """Build the DataFrame load_excel_file would return for this sheet (first row as header)."""
+        from pandas.io.parsers import TextParser
+
+        rows = self.to_rows()
+        if not rows:
+            return pd.DataFrame()
+        return TextParser(rows, header=0, skip_blank_lines=False).read()
+
+    def write_to(self, ws):
+        """Write the values and formulas (no styling) into an openpyxl worksheet."""
+        from openpyxl.worksheet.formula import ArrayFormula
+
+        for (row, col), value in self.cells.items():
+            ws.cell(row=row, column=col, value=value)
+        for (row, col), (text, ref) in self.formulas.items():
+            ws.cell(row=row, column=col, value=ArrayFormula(ref, text) if ref else text)
+
+    def save(self, file_path):
+        """
+        Save the sheet as a single-sheet workbook formatted like the template sheet.
+
+        Args:
+            file_path (str): Destination .xlsx path
+        """
+        template_sheet = self.template_sheet
+        wb = template_sheet.structure.load_sheet_workbook(template_sheet.name)
+        ws = wb.worksheets[0]
+        ws.title = self.title
+
+        # Clear template cells the conversion emptied, then write the current contents
+        for row, col in set(template_sheet.cells) | set(template_sheet.formulas):
+            if (row, col) not in self.cells and (row, col) not in self.formulas:
+                ws.cell(row=row, column=col).value = None
+        self.write_to(ws)
+        if self._last_column is not None and ws.max_column > self._last_column:
+            ws.delete_cols(self._last_column + 1, ws.max_column - self._last_column)
+        wb.save(file_path)
+
+
+class TemplateRegistry:
+    """Parses template workbooks once and caches their structure in memory and on disk."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or get_template_cache_dir()
+        self._structures = {}
+        self._path_hashes = {}
+        self._sheet_workbooks = {}  # (file hash, sheet name) -> .xlsx bytes of that sheet alone
+        self._lock = threading.Lock()
+
+    def get_structure(self, template_path=None):
+        """
+        Get the parsed structure of a template file.
+
+        Args:
+            template_path (str, optional): Template path, defaults to the bundled template
+
+        Returns:
+            TemplateStructure: Parsed structure
+
+        Raises:
+            FileNotFoundError: If the template file does not exist
+        """
+        if template_path is None:
+            template_path = get_default_template_path()
+        template_path = os.path.abspath(template_path)
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"Template file not found: {template_path}")
+
+        with self._lock:
+            file_hash = self._get_file_hash(template_path)
+            structure = self._structures.get(file_hash)
+            if structure is None:
+                structure = self._load_from_disk(file_hash, template_path)
+                if structure is None:
+                    structure = self._parse_template(template_path, file_hash)
+                    self._save_to_disk(structure)
+                self._structures[file_hash] = structure
+            return structure
+
+    def _get_file_hash(self, template_path):
+        """Hash the template, reusing the previous hash while its size and mtime are unchanged."""
+        stat = os.stat(template_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._path_hashes.get(template_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        file_hash = hash_file(template_path)
+        self._path_hashes[template_path] = (signature, file_hash)
+        return file_hash
+
+    def _cache_file(self, file_hash):
+        return os.path.join(self.cache_dir, f"{file_hash}.json")
+
+    def load_sheet_workbook(self, structure, sheet_name):
+        """
+        Load a workbook holding only one sheet of a template, with its formatting.
+
+        The one-sheet workbook is cut from the template on first use and kept in
+        memory and in the disk cache.
+
+        Args:
+            structure (TemplateStructure): Parsed template
+            sheet_name (str): Template sheet name
+
+        Returns:
+            openpyxl.Workbook: Workbook whose only worksheet is the template sheet
+        """
+        structure.get_sheet(sheet_name)
+        key = (structure.file_hash, sheet_name)
+        with self._lock:
+            data = self._sheet_workbooks.get(key)
+            if data is None:
+                cache_file = os.path.join(
+                    self.cache_dir, f"{structure.file_hash}.sheet{structure.sheet_names.index(sheet_name)}.xlsx")
+                if os.path.exists(cache_file):
+                    with open(cache_file, 'rb') as f:
+                        data = f.read()
+                else:
+                    data = self._cut_sheet_workbook(structure.template_path, sheet_name)
+                    self._write_cache_file(cache_file, data)
+                self._sheet_workbooks[key] = data
+        return load_workbook(io.BytesIO(data))
+
+    @staticmethod
+    def _cut_sheet_workbook(template_path, sheet_name):
+        """Return the template saved with every other sheet removed, as .xlsx bytes."""
+        wb = load_workbook(template_path)
+        for name in list(wb.sheetnames):
+            if name != sheet_name:
+                del wb[name]
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return buffer.getvalue()
+
+    def _write_cache_file(self, cache_file, data):
+        """Write bytes to a cache file atomically; failures are only logged."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            debug_print(f"DEBUG: Could not write template cache: {e}")
+
+    def _load_from_disk(self, file_hash, template_path):
+        """Load a cached structure, returning None if it is missing or unreadable."""
+        cache_file = self._cache_file(file_hash)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != TEMPLATE_CACHE_VERSION or data.get('file_hash') != file_hash:
+                return None
+            debug_print(f"DEBUG: Loaded cached template structure {file_hash[:12]}")
+            return TemplateStructure.from_dict(data, template_path)
+        except Exception as e:
+            debug_print(f"DEBUG: Ignoring unreadable template cache {cache_file}: {e}")
+            return None
+
+    def _save_to_disk(self, structure):
+        """Write a structure to the disk cache; failures only cost a re-parse next run."""
+        self._write_cache_file(self._cache_file(structure.file_hash),
+                               json.dumps(structure.to_dict()).encode('utf-8'))
+
+    def _parse_template(self, template_path, file_hash):
+        """Load the template workbook and extract every sheet's structure."""
+        from openpyxl.worksheet.formula import ArrayFormula
+
+        start = time.time()
+        wb = load_workbook(template_path)
+        sheets = {}
+        for ws in wb.worksheets:
+            cells = {}
+            formulas = {}
+            for row in ws.iter_rows():
+                for cell in row:
+                    value = cell.value
+                    if value is None:
+                        continue
+                    if isinstance(value, ArrayFormula):
+                        formulas[(cell.row, cell.column)] = (value.text, value.ref)
+                    elif cell.data_type == 'f':
+                        formulas[(cell.row, cell.column)] = (str(value), None)
+                    else:
+                        cells[(cell.row, cell.column)] = value
+
+            merged_ranges = [(r.min_row, r.min_col, r.max_row, r.max_col) for r in ws.merged_cells.ranges]
+            header_row, block_width, num_blocks = self._find_block_geometry(cells)
+            header_positions = {}
+            last_header_row = header_row or min(ws.max_row, 4)
+            for (row, col), value in sorted(cells.items()):
+                if row <= last_header_row and isinstance(value, str):
+                    header_positions.setdefault(value.strip(), (row, col))
+
+            sheets[ws.title] = TemplateSheet(
+                name=ws.title,
+                cells=cells,
+                formulas=formulas,
+                max_row=ws.max_row,
+                max_column=ws.max_column,
+                merged_ranges=merged_ranges,
+                header_positions=header_positions,
+                header_row=header_row,
+                data_start_row=header_row + 1 if header_row else None,
+                block_width=block_width,
+                num_blocks=num_blocks
+            )
+
+        structure = TemplateStructure(template_path, file_hash, list(wb.sheetnames), sheets)
+        wb.close()
+        debug_print(f"DEBUG: Parsed template {os.path.basename(template_path)} "
+                    f"({len(sheets)} sheets) in {time.time() - start:.3f}s")
+        return structure
+
+    @staticmethod
+    def _find_block_geometry(cells):
+        """
+        Locate the sample block header row and the spacing between blocks.
+
+        Returns:
+            tuple: (header_row or None, block_width, num_blocks)
+        """
+        header_columns = {}
+        for (row, col), value in cells.items():
+            if isinstance(value, str) and value.strip().lower() == BLOCK_HEADER_LABEL:
+                header_columns.setdefault(row, []).append(col)
+        if not header_columns:
+            return None, DEFAULT_BLOCK_WIDTH, 0
+
+        header_row = min(header_columns)
+        columns = sorted(header_columns[header_row])
+        block_width = columns[1] - columns[0] if len(columns) > 1 else DEFAULT_BLOCK_WIDTH
+        return header_row, block_width, len(columns)
+
+    def clear(self):
+        """Forget the in-memory structures (the disk cache is kept)."""
+        with self._lock:
+            self._structures.clear()
+            self._path_hashes.clear()
+            self._sheet_workbooks.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry():
+    """Return the process-wide TemplateRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry()
+        return _registry
+
+
+def get_template_structure(template_path=None):
+    """
+    Get the cached structure of a template file.
+
+    Args:
+        template_path (str, optional): Template path, defaults to the bundled template
+
+    Returns:
+        TemplateStructure: Parsed structure
+    """
+    return get_template_registry().get_structure(template_path)
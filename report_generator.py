@@ -16,6 +16,7 @@ from datetime import datetime
 import processing
 from utils import get_save_path, plotting_sheet_test, get_plot_sheet_names, debug_print, show_success_message
 from resource_utils import get_resource_path
+from tracing import traced
 from tkinter import messagebox  # For showing info/errors
 
 class HeaderSelectorDialog:
@@ -130,6 +131,7 @@ class ReportGenerator:
         self.gui = gui
         self.root = gui.root
 
+    @traced("ReportGenerator.generate_full_report", category="report")
     def generate_full_report(self, filtered_sheets: dict, plot_options: list) -> None:
         """
         Generate a full report (Excel and PowerPoint) for all sheets.
@@ -240,6 +242,7 @@ class ReportGenerator:
         finally:
             self.cleanup_images(images_to_delete)
 
+    @traced("ReportGenerator.generate_test_report", category="report")
     def generate_test_report(self, selected_sheet: str, sheets: dict, plot_options: list) -> None:
         """
         Generate an Excel and PowerPoint report for only the specified sheet.
@@ -458,6 +461,7 @@ class ReportGenerator:
                 import traceback
                 traceback.print_exc()
 
+    @traced("ReportGenerator.write_excel_report", category="report")
     def write_excel_report(self, writer, sheet_name: str, processed_data, full_sample_data, valid_plot_options=[], images_to_delete=None) -> None:
         try:
             processed_data.astype(str).replace([pd.NA], '')
@@ -470,6 +474,7 @@ class ReportGenerator:
             print(f"Error writing Excel report for sheet '{sheet_name}': {e}")
             traceback.print_exc()
 
+    @traced("ReportGenerator.write_powerpoint_report_for_test", category="report")
     def write_powerpoint_report_for_test(self, ppt_save_path: str, images_to_delete: list, sheet_name: str, processed_data, full_sample_data, plot_options: list) -> None:
         try:
             prs = Presentation()
@@ -538,6 +543,7 @@ class ReportGenerator:
             raise
             traceback.print_exc()
 
+    @traced("ReportGenerator.write_powerpoint_report", category="report")
     def write_powerpoint_report(self, ppt_save_path: str, images_to_delete: list, plot_options: list, selected_headers: list = None, progress_callback = None) -> None:
         try:
             processed_slides = 0
@@ -12,6 +12,7 @@ import re
 from typing import Dict, List, Any, Tuple
 from utils import debug_print, FONT, show_success_message
 import processing
+from sample_comparison_engine import KeywordMatcher, SheetMatchCache, SampleMetricsCache, read_sample_names
 import os
 import json
 from datetime import datetime
@@ -46,6 +47,8 @@ class SampleComparisonWindow:
         self.load_configuration()
         self.model_keywords = {}
         self.comparison_results = {}
+        self.match_cache = SheetMatchCache()
+        self.metrics_cache = SampleMetricsCache()  # independent of the keyword config
         self.parse_keyword_variations()
         debug_print(f"DEBUG: Sample comparison initialized with config from {self.config_file_path}")
 
@@ -484,6 +487,9 @@ class SampleComparisonWindow:
 
             debug_print(f"DEBUG: Final parsed keywords: {self.model_keywords}")
 
+            # Compile the variations once; cached per-sheet matches belong to the old keywords
+            self.match_cache.set_matcher(KeywordMatcher(self.model_keywords))
+
     def center_window(self, window, width, height):
         """Center a window on the screen."""
         try:
@@ -506,7 +512,13 @@ class SampleComparisonWindow:
             window.geometry(f"{width}x{height}")
 
     def perform_analysis(self):
-        """Perform the sample comparison analysis with time-series data creation."""
+        """
+        Perform the sample comparison analysis with time-series data creation.
+
+        Keyword matches and per-sample metrics are cached, so after a
+        configuration change only matching and grouping are redone, and only
+        files not analyzed before have their samples computed.
+        """
         debug_print("DEBUG: Starting sample comparison analysis")
 
         if not self.selected_files:
@@ -514,6 +526,7 @@ class SampleComparisonWindow:
             return
 
         self.comparison_results = {}
+        analyzed_sheets = set()
 
         # Progress tracking
         total_files = len(self.selected_files)
@@ -549,6 +562,7 @@ class SampleComparisonWindow:
 
             for sheet_name, sheet_info in filtered_sheets.items():
                 data = sheet_info["data"]
+                analyzed_sheets.add((file_name, sheet_name))
 
                 if data.empty:
                     continue
@@ -556,15 +570,16 @@ class SampleComparisonWindow:
                 # Determine test group
                 test_group = self.get_test_group(sheet_name)
 
-                # Find samples matching keywords (now passing filename)
-                matching_samples = self.find_matching_samples(data, sheet_name, file_name)
+                # Find samples matching keywords (now passing filename), cached per file and sheet
+                sheet_matches = self.match_cache.get(data, sheet_name, file_name)
+                matching_samples = sheet_matches['samples']
 
                 for keyword, sample_columns in matching_samples.items():
                     if not sample_columns:
                         continue
 
-                    # Extract metrics for this keyword/test group combination
-                    metrics = self.extract_metrics(data, sample_columns, sheet_name)
+                    # Extract metrics for this keyword/test group combination (cached per sample)
+                    metrics = self.extract_metrics(data, sample_columns, sheet_name, file_name)
 
                     # Store results with proper structure for time-series plotting
                     if keyword not in self.comparison_results:
@@ -609,13 +624,12 @@ class SampleComparisonWindow:
                     self.comparison_results[keyword][test_group]['files'].append(f"{file_name}:{sheet_name}")
 
                     # Determine match source for this file
-                    sample_name_matches = self.find_sample_name_matches_only(data, keyword, sheet_name)
-                    if sample_name_matches:
-                        match_source = "sample_name"
-                    else:
-                        match_source = "filename"
+                    match_source = sheet_matches['sources'][keyword]
                     self.comparison_results[keyword][test_group]['match_sources'].append(f"{file_name}:{match_source}")
 
+        # Forget metrics of files no longer in the comparison
+        self.metrics_cache.retain(analyzed_sheets)
+
         # Calculate file counts (unique files for each combination)
         for keyword in self.comparison_results:
             for test_group in self.comparison_results[keyword]:
@@ -680,113 +694,16 @@ class SampleComparisonWindow:
 
     def find_sample_name_matches_only(self, data: pd.DataFrame, main_keyword: str, sheet_name: str) -> List[int]:
         """Check if a main keyword (or its variations) matches any sample names (used to determine match source)."""
-        matches = []
-
-        is_user_simulation = any(test in sheet_name.lower() for test in ['user test simulation', 'user simulation'])
-        columns_per_sample = 8 if is_user_simulation else 12
-
-        if data.shape[0] > 0:
-            first_row = data.iloc[0]
-            num_samples = len(first_row) // columns_per_sample
-
-            # Get variations for this main keyword
-            variations = self.model_keywords.get(main_keyword, [main_keyword])
-
-            for sample_idx in range(num_samples):
-                start_col = sample_idx * columns_per_sample
-                sample_name_col = 5 + start_col
-
-                if sample_name_col < len(first_row):
-                    sample_name = str(first_row.iloc[sample_name_col]).lower()
-
-                    # Check all variations
-                    for variation in variations:
-                        if variation.lower() in sample_name:
-                            matches.append(sample_idx)
-                            break  # Don't add the same sample multiple times
-
-        return matches
+        matcher = self.match_cache.matcher
+        return [sample_idx for sample_idx, sample_name in read_sample_names(data, sheet_name)
+                if main_keyword in matcher.match(sample_name)]
 
     def find_matching_samples(self, data: pd.DataFrame, sheet_name: str, file_name: str = None) -> Dict[str, List[int]]:
         """Find samples that match the model keywords and their variations, checking sample names first, then filename."""
-        matching_samples = {main_keyword: [] for main_keyword in self.model_keywords.keys()}
-
-        debug_print(f"DEBUG: Searching for keyword matches in {sheet_name}")
-
-        # Determine the data structure based on the sheet type
-        is_user_simulation = any(test in sheet_name.lower() for test in ['user test simulation', 'user simulation'])
-
-        if is_user_simulation:
-            columns_per_sample = 8  # User simulation uses 8 columns per sample
-        else:
-            columns_per_sample = 12  # Standard tests use 12 columns per sample
-
-        debug_print(f"DEBUG: Using {columns_per_sample} columns per sample for {sheet_name}")
-
-        # STEP 1: Look for sample names in the first row (PRIORITY)
-        sample_name_matches = {main_keyword: [] for main_keyword in self.model_keywords.keys()}
-        valid_sample_indices = []
-
-        if data.shape[0] > 0:
-            first_row = data.iloc[0]
-            num_samples = len(first_row) // columns_per_sample
-
-            for sample_idx in range(num_samples):
-                start_col = sample_idx * columns_per_sample
-
-                # Sample name is typically in column F (index 5) + offset
-                sample_name_col = 5 + start_col
+        return self.match_cache.get(data, sheet_name, file_name)['samples']
 
-                if sample_name_col < len(first_row):
-                    sample_name = str(first_row.iloc[sample_name_col]).lower()
-
-                    # Check if this sample has valid data (not empty/NaN)
-                    if sample_name and sample_name.lower() not in ['nan', 'none', '']:
-                        valid_sample_indices.append(sample_idx)
-
-                        # Check for keyword matches in sample name (including variations)
-                        for main_keyword, variations in self.model_keywords.items():
-                            for variation in variations:
-                                if variation.lower() in sample_name:
-                                    sample_name_matches[main_keyword].append(sample_idx)
-                                    debug_print(f"DEBUG: Found {main_keyword} match (variation: '{variation}') in SAMPLE NAME {sample_idx}: {sample_name}")
-                                    break  # Stop checking other variations for this main keyword
-
-        # STEP 2: For keywords with no sample name matches, check filename
-        filename_matches = {main_keyword: [] for main_keyword in self.model_keywords.keys()}
-
-        if file_name:
-            file_name_lower = file_name.lower()
-            debug_print(f"DEBUG: Checking filename for keywords: {file_name}")
-
-            for main_keyword, variations in self.model_keywords.items():
-                # Only check filename if no sample name matches were found for this keyword
-                if not sample_name_matches[main_keyword]:
-                    for variation in variations:
-                        if variation.lower() in file_name_lower:
-                            # Apply this keyword to ALL valid samples since it's in the filename
-                            filename_matches[main_keyword] = valid_sample_indices.copy()
-                            debug_print(f"DEBUG: Found {main_keyword} match (variation: '{variation}') in FILENAME, applying to {len(valid_sample_indices)} samples: {valid_sample_indices}")
-                            break  # Stop checking other variations for this main keyword
-
-        # STEP 3: Combine results with sample name matches taking priority
-        for main_keyword in self.model_keywords.keys():
-            if sample_name_matches[main_keyword]:
-                # Use sample name matches (priority)
-                matching_samples[main_keyword] = sample_name_matches[main_keyword]
-                debug_print(f"DEBUG: Using SAMPLE NAME matches for {main_keyword}: {sample_name_matches[main_keyword]}")
-            elif filename_matches[main_keyword]:
-                # Use filename matches as fallback
-                matching_samples[main_keyword] = filename_matches[main_keyword]
-                debug_print(f"DEBUG: Using FILENAME matches for {main_keyword}: {filename_matches[main_keyword]}")
-            else:
-                # No matches found
-                matching_samples[main_keyword] = []
-                debug_print(f"DEBUG: No matches found for {main_keyword}")
-
-        return matching_samples
-
-    def extract_metrics(self, data: pd.DataFrame, sample_indices: List[int], sheet_name: str) -> Dict[str, List[float]]:
+    def extract_metrics(self, data: pd.DataFrame, sample_indices: List[int], sheet_name: str,
+                        file_name: str = None) -> Dict[str, List[float]]:
         """Extract TPM, standard deviation, and draw pressure metrics for specified samples."""
         metrics = {
             'tpm': [],
@@ -794,53 +711,15 @@ class SampleComparisonWindow:
             'draw_pressure': []
         }
 
-        is_user_simulation = any(test in sheet_name.lower() for test in ['user test simulation', 'user simulation'])
-        columns_per_sample = 8 if is_user_simulation else 12
-
         for sample_idx in sample_indices:
-            start_col = sample_idx * columns_per_sample
-            end_col = start_col + columns_per_sample
-
-            if end_col <= data.shape[1]:
-                sample_data = data.iloc[:, start_col:end_col]
-
-                # Extract TPM values
-                try:
-                    if is_user_simulation:
-                        tpm_values = processing.get_y_data_for_user_test_simulation_plot_type(sample_data, "TPM")
-                    else:
-                        tpm_values = processing.get_y_data_for_plot_type(sample_data, "TPM")
-
-                    tpm_numeric = pd.to_numeric(tpm_values, errors='coerce').dropna()
-                    if not tpm_numeric.empty:
-                        # Use only the first 70% of TPM values for better representation
-                        tpm_count = len(tpm_numeric)
-                        cutoff_index = int(tpm_count * 0.70)
-                        if cutoff_index < 1:
-                            cutoff_index = 1  # Ensure we use at least one value
-
-                        tpm_truncated = tpm_numeric.iloc[:cutoff_index]
-                        debug_print(f"DEBUG: Sample {sample_idx} - Using first {cutoff_index} of {tpm_count} TPM values ({(cutoff_index/tpm_count)*100:.1f}%)")
-
-                        metrics['tpm'].append(tpm_truncated.mean())
-                        metrics['std_dev'].append(tpm_truncated.std())
-
-                except Exception as e:
-                    debug_print(f"DEBUG: Error extracting TPM for sample {sample_idx}: {e}")
-
-                # Extract draw pressure values
-                try:
-                    if is_user_simulation:
-                        dp_values = processing.get_y_data_for_user_test_simulation_plot_type(sample_data, "Draw Pressure")
-                    else:
-                        dp_values = processing.get_y_data_for_plot_type(sample_data, "Draw Pressure")
-
-                    dp_numeric = pd.to_numeric(dp_values, errors='coerce').dropna()
-                    if not dp_numeric.empty:
-                        metrics['draw_pressure'].append(dp_numeric.mean())
-
-                except Exception as e:
-                    debug_print(f"DEBUG: Error extracting Draw Pressure for sample {sample_idx}: {e}")
+            sample_metrics = self.metrics_cache.get(data, sheet_name, sample_idx, file_name)
+            if sample_metrics is None:
+                continue
+            if sample_metrics['tpm'] is not None:
+                metrics['tpm'].append(sample_metrics['tpm'])
+                metrics['std_dev'].append(sample_metrics['std_dev'])
+            if sample_metrics['draw_pressure'] is not None:
+                metrics['draw_pressure'].append(sample_metrics['draw_pressure'])
 
         # Convert lists to None if empty
         for key in metrics:
@@ -0,0 +1,285 @@
+"""
+sample_comparison_engine.py
+Developed by Charlie Becquet.
+Keyword matching and per-sample metrics for the sample comparison window.
+
+Matching used to loop over every sample, every model keyword and every
+variation with a substring check, and then loop again per keyword just to
+label where the match came from. KeywordMatcher compiles all variations of
+sample_comparison_config.json into one Aho-Corasick automaton, so a sample
+name or file name is scanned once and every keyword whose variation occurs
+anywhere in it (overlapping hits included) is returned. Results per
+(file, sheet) are cached by SheetMatchCache until the keywords change.
+
+The metrics of a sample (TPM mean and standard deviation over the first 70%
+of its TPM values, mean draw pressure) do not depend on the keyword config,
+so SampleMetricsCache keeps them per (file, sheet, sample). Changing keywords
+or grouped tests then only redoes matching and grouping, and files added to
+the comparison are the only ones whose samples get computed.
+"""
+
+from collections import deque
+from utils import debug_print
+
+TPM_FRACTION = 0.70  # share of the TPM values (from the start) used for the comparison
+USER_SIMULATION_TESTS = ('user test simulation', 'user simulation')
+SAMPLE_NAME_OFFSET = 5  # sample name column within a sample block (column F)
+INVALID_SAMPLE_NAMES = ('nan', 'none', '')
+
+
+def columns_per_sample(sheet_name):
+    """Return the width of one sample block: 8 columns for user simulation sheets, 12 otherwise."""
+    sheet_lower = sheet_name.lower()
+    return 8 if any(test in sheet_lower for test in USER_SIMULATION_TESTS) else 12
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over the variations of the model keywords."""
+
+    def __init__(self, model_keywords):
+        """
+        Args:
+            model_keywords (dict): Main keyword -> list of variations (main keyword included)
+        """
+        self.keywords = list(model_keywords)
+        self._goto = [{}]  # state -> {character: state}
+        self._output = [set()]  # state -> main keywords whose variation ends here
+        self._fail = [0]
+        self._memo = {}
+
+        for main_keyword, variations in model_keywords.items():
+            for variation in variations:
+                variation = variation.lower()
+                if variation:
+                    self._add(variation, main_keyword)
+        self._build_failure_links()
+
+    def _add(self, variation, main_keyword):
+        state = 0
+        for char in variation:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._output.append(set())
+                self._fail.append(0)
+            state = next_state
+        self._output[state].add(main_keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def match(self, text):
+        """
+        Return the main keywords with a variation occurring in text (case-insensitive).
+
+        Args:
+            text (str): Sample name or file name
+
+        Returns:
+            frozenset: Matching main keywords
+        """
+        cached = self._memo.get(text)
+        if cached is not None:
+            return cached
+
+        hits = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                hits |= output[state]
+
+        result = frozenset(hits)
+        self._memo[text] = result
+        return result
+
+
+def read_sample_names(data, sheet_name):
+    """
+    Return (sample index, lowercased sample name) for every sample block of a sheet.
+
+    Args:
+        data (pd.DataFrame): Sheet data; sample names are in the first row
+        sheet_name (str): Sheet name, which decides the sample block width
+
+    Returns:
+        list: (sample_idx, name) tuples
+    """
+    if data.shape[0] == 0:
+        return []
+    first_row = data.iloc[0].tolist()
+    width = columns_per_sample(sheet_name)
+    names = []
+    for sample_idx in range(len(first_row) // width):
+        sample_name_col = SAMPLE_NAME_OFFSET + sample_idx * width
+        if sample_name_col < len(first_row):
+            names.append((sample_idx, str(first_row[sample_name_col]).lower()))
+    return names
+
+
+def match_sheet(matcher, data, sheet_name, file_name=None):
+    """
+    Match the samples of a sheet against the model keywords.
+
+    Sample names take priority; a keyword found only in the file name applies
+    to every sample with a name.
+
+    Args:
+        matcher (KeywordMatcher): Compiled keywords
+        data (pd.DataFrame): Sheet data
+        sheet_name (str): Sheet name
+        file_name (str): Optional file name checked when no sample name matches
+
+    Returns:
+        dict: {'samples': {keyword: [sample_idx]}, 'sources': {keyword: "sample_name" | "filename"}}
+    """
+    name_hits = {keyword: [] for keyword in matcher.keywords}
+    named_hits = {keyword: [] for keyword in matcher.keywords}
+    valid_sample_indices = []
+
+    for sample_idx, sample_name in read_sample_names(data, sheet_name):
+        is_valid = sample_name not in INVALID_SAMPLE_NAMES
+        if is_valid:
+            valid_sample_indices.append(sample_idx)
+        for keyword in matcher.match(sample_name):
+            name_hits[keyword].append(sample_idx)
+            if is_valid:
+                named_hits[keyword].append(sample_idx)
+
+    file_hits = matcher.match(file_name) if file_name else frozenset()
+
+    samples, sources = {}, {}
+    matched = 0
+    for keyword in matcher.keywords:
+        if named_hits[keyword]:
+            samples[keyword] = named_hits[keyword]
+        elif keyword in file_hits:
+            samples[keyword] = valid_sample_indices.copy()
+        else:
+            samples[keyword] = []
+        if samples[keyword]:
+            matched += 1
+        # Any sample name hit (even on an unnamed block) labels the match as coming from sample names
+        sources[keyword] = "sample_name" if name_hits[keyword] else "filename"
+
+    debug_print(f"DEBUG: {matched} keywords matched in {file_name}:{sheet_name}")
+    return {'samples': samples, 'sources': sources}
+
+
+class SheetMatchCache:
+    """Keyword match results per (file, sheet), valid until the matcher is replaced."""
+
+    def __init__(self):
+        self.matcher = None
+        self._entries = {}  # (file_name, sheet_name) -> (data, result)
+
+    def set_matcher(self, matcher):
+        """Use a new matcher and drop results of the previous one."""
+        self.matcher = matcher
+        self._entries.clear()
+
+    def get(self, data, sheet_name, file_name=None):
+        """Return the cached match of a sheet, computing it if the sheet or its data is new."""
+        key = (file_name, sheet_name)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        result = match_sheet(self.matcher, data, sheet_name, file_name)
+        self._entries[key] = (data, result)
+        return result
+
+
+def compute_sample_metrics(data, sheet_name, sample_idx):
+    """
+    Compute the comparison metrics of one sample block.
+
+    Args:
+        data (pd.DataFrame): Sheet data
+        sheet_name (str): Sheet name, which decides the sample block width and layout
+        sample_idx (int): Sample index within the sheet
+
+    Returns:
+        dict or None: {'tpm', 'std_dev', 'draw_pressure'}, each None when unavailable,
+        or None when the sample block is not fully inside the sheet
+    """
+    import pandas as pd
+    import processing
+
+    width = columns_per_sample(sheet_name)
+    is_user_simulation = width == 8
+    start_col = sample_idx * width
+    end_col = start_col + width
+    if end_col > data.shape[1]:
+        return None
+
+    sample_data = data.iloc[:, start_col:end_col]
+    metrics = {'tpm': None, 'std_dev': None, 'draw_pressure': None}
+
+    try:
+        if is_user_simulation:
+            tpm_values = processing.get_y_data_for_user_test_simulation_plot_type(sample_data, "TPM")
+        else:
+            tpm_values = processing.get_y_data_for_plot_type(sample_data, "TPM")
+
+        tpm_numeric = pd.to_numeric(tpm_values, errors='coerce').dropna()
+        if not tpm_numeric.empty:
+            # Use only the first 70% of TPM values for better representation (at least one value)
+            cutoff_index = max(int(len(tpm_numeric) * TPM_FRACTION), 1)
+            tpm_truncated = tpm_numeric.iloc[:cutoff_index]
+            metrics['tpm'] = tpm_truncated.mean()
+            metrics['std_dev'] = tpm_truncated.std()
+    except Exception as e:
+        debug_print(f"DEBUG: Error extracting TPM for sample {sample_idx}: {e}")
+
+    try:
+        if is_user_simulation:
+            dp_values = processing.get_y_data_for_user_test_simulation_plot_type(sample_data, "Draw Pressure")
+        else:
+            dp_values = processing.get_y_data_for_plot_type(sample_data, "Draw Pressure")
+
+        dp_numeric = pd.to_numeric(dp_values, errors='coerce').dropna()
+        if not dp_numeric.empty:
+            metrics['draw_pressure'] = dp_numeric.mean()
+    except Exception as e:
+        debug_print(f"DEBUG: Error extracting Draw Pressure for sample {sample_idx}: {e}")
+
+    return metrics
+
+
+class SampleMetricsCache:
+    """Per-sample comparison metrics per (file, sheet), recomputed only when a sheet's data object changes."""
+
+    def __init__(self):
+        self._sheets = {}  # (file_name, sheet_name) -> (data, {sample_idx: metrics})
+
+    def get(self, data, sheet_name, sample_idx, file_name=None):
+        """Return the metrics of a sample (see compute_sample_metrics), computing them on first use."""
+        key = (file_name, sheet_name)
+        entry = self._sheets.get(key)
+        if entry is None or entry[0] is not data:
+            entry = (data, {})
+            self._sheets[key] = entry
+        samples = entry[1]
+        if sample_idx not in samples:
+            samples[sample_idx] = compute_sample_metrics(data, sheet_name, sample_idx)
+        return samples[sample_idx]
+
+    def retain(self, keys):
+        """Drop the sheets whose (file_name, sheet_name) is not in keys."""
+        for key in [key for key in self._sheets if key not in keys]:
+            del self._sheets[key]
@@ -2,7 +2,6 @@ import pytest
 import pandas as pd
 import tkinter as tk
 from unittest.mock import MagicMock
-from processing import load_excel_file  # Modify based on your usage
 
 @pytest.fixture
 def sample_dataframe():
@@ -0,0 +1,101 @@
+# tests/test_data_collection_journal.py
+"""
+Edit journal of the data collection window: diffing, replay, and recovery of
+a journal whose last record was cut short by a crash.
+"""
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.data_collection_journal import EditJournal, apply_records, diff_data, snapshot_data
+
+
+def make_data():
+    return {
+        "Sample 1": {"puffs": ["10", "20", "30"], "before_weight": ["1.0", "", ""], "tpm": [None] * 3,
+                     "sample_name": "A"},
+        "Sample 2": {"puffs": ["10"], "before_weight": [""], "tpm": [None], "sample_name": "B"},
+    }
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return EditJournal(str(tmp_path / "test.xlsx"), "Test")
+
+
+def test_diff_and_apply_round_trip():
+    original = make_data()
+    baseline = snapshot_data(original)
+    edited = copy.deepcopy(original)
+    edited["Sample 1"]["before_weight"][1] = "0.9"
+    edited["Sample 1"]["puffs"].append("40")
+    edited["Sample 2"]["puffs"] = []
+    edited["Sample 2"]["sample_name"] = "B2"
+    edited["Sample 2"]["tpm"] = [1.5]
+
+    records = diff_data(baseline, edited)
+    assert not any(record["f"] == "tpm" for record in records)
+    assert diff_data(baseline, edited) == []
+
+    replayed = make_data()
+    apply_records(replayed, records)
+    for sample_id, sample in edited.items():
+        for field in ("puffs", "before_weight", "sample_name"):
+            assert replayed[sample_id][field] == sample[field]
+
+
+def test_torn_tail_is_repaired_before_appending(journal):
+    data = make_data()
+    journal.reset_baseline(data)
+    data["Sample 1"]["before_weight"][1] = "0.9"
+    assert journal.flush(data) == 1
+
+    # A crash in the middle of the next append
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"s": "Sample 1", "f": "before_w')
+    assert len(journal.read()[1]) == 1
+
+    # Recovery: repair, replay, then keep editing
+    assert journal.repair()
+    header, records = journal.read()
+    assert header is not None and len(records) == 1
+    recovered = make_data()
+    apply_records(recovered, records)
+    journal.reset_baseline(recovered)
+    recovered["Sample 1"]["before_weight"][2] = "0.8"
+    assert journal.flush(recovered) == 1
+
+    replayed = make_data()
+    apply_records(replayed, journal.read()[1])
+    assert replayed["Sample 1"]["before_weight"] == ["1.0", "0.9", "0.8"]
+
+
+def test_repair_keeps_intact_journal(journal):
+    data = make_data()
+    journal.reset_baseline(data)
+    data["Sample 2"]["sample_name"] = "B2"
+    journal.flush(data)
+    size = journal.size()
+
+    assert not journal.repair()
+    assert journal.size() == size
+
+
+def test_compact_through_keeps_later_edits(journal):
+    data = make_data()
+    journal.reset_baseline(data)
+    data["Sample 1"]["puffs"][0] = "11"
+    journal.flush(data)
+    offset = journal.size()
+    data["Sample 1"]["puffs"][1] = "21"
+    journal.flush(data)
+
+    assert journal.compact_through(offset) == 1
+    header, records = journal.read()
+    assert header is not None
+    assert records == [{"s": "Sample 1", "f": "puffs", "r": 1, "v": "21"}]
@@ -0,0 +1,95 @@
+# tests/test_data_collection_store.py
+"""
+Per-sample column store of the data collection window: TPM values kept up to
+date cell by cell must match a full DataCollectionData.calculate_tpm pass.
+"""
+import os
+import random
+import statistics
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.data_collection_store import SampleColumnStore
+
+
+def reference_tpm(sample):
+    """The row loop of DataCollectionData.calculate_tpm, starting from an empty TPM column."""
+    tpm = [None] * len(sample["puffs"])
+    for i in range(len(sample["puffs"])):
+        try:
+            before_weight_str = sample["before_weight"][i]
+            after_weight_str = sample["after_weight"][i]
+            if not before_weight_str or not after_weight_str:
+                continue
+            before_weight = float(before_weight_str)
+            after_weight = float(after_weight_str)
+            if before_weight <= after_weight:
+                continue
+            current_puff = int(sample["puffs"][i])
+            if i == 0:
+                puffs_in_interval = current_puff
+            else:
+                puffs_in_interval = current_puff - int(sample["puffs"][i - 1])
+            if puffs_in_interval <= 0:
+                continue
+            tpm[i] = round((before_weight - after_weight) * 1000 / puffs_in_interval, 3)
+        except Exception:
+            pass
+    return tpm
+
+
+PUFF_VALUES = ["10", "20", "30", "40", "60", " 50 ", "", "abc", "25.5"]
+WEIGHT_VALUES = ["1.0", "0.98", "0.95", "0.9", "0.9", " 0.85", "", "x", "1e-1"]
+
+
+def random_sample(rng, rows):
+    return {
+        "puffs": [rng.choice(PUFF_VALUES) for _ in range(rows)],
+        "before_weight": [rng.choice(WEIGHT_VALUES) for _ in range(rows)],
+        "after_weight": [rng.choice(WEIGHT_VALUES) for _ in range(rows)],
+        "tpm": [None] * rows,
+    }
+
+
+def test_full_calculation_matches_calculate_tpm():
+    rng = random.Random(7)
+    for _ in range(300):
+        sample = random_sample(rng, rng.randint(0, 8))
+        store = SampleColumnStore(sample)
+        store.update_tpm(range(len(store)))
+        assert store.tpm == reference_tpm(sample)
+
+
+def test_cell_edits_match_calculate_tpm():
+    rng = random.Random(11)
+    sample = random_sample(rng, 12)
+    store = SampleColumnStore(sample)
+    store.update_tpm(range(len(store)))
+
+    for _ in range(500):
+        column = rng.choice(("puffs", "before_weight", "after_weight"))
+        row = rng.randrange(len(store))
+        value = rng.choice(PUFF_VALUES if column == "puffs" else WEIGHT_VALUES)
+        sample[column][row] = value
+        store.update_tpm(store.set_value(column, row, value))
+
+        expected = reference_tpm(sample)
+        assert store.tpm == expected
+        values = [v for v in expected if v is not None]
+        assert store.count == len(values)
+        assert store.sorted_tpm == sorted(values)
+        assert store.mean == pytest.approx(statistics.mean(values) if values else 0.0)
+        assert store.std == pytest.approx(statistics.stdev(values) if len(values) > 1 else 0.0, abs=1e-9)
+
+
+def test_existing_tpm_is_taken_as_is():
+    sample = {"puffs": ["10", "20"], "before_weight": ["1.0", "0.9"], "after_weight": ["0.9", "0.8"],
+              "tpm": ["5.0", None]}
+    store = SampleColumnStore(sample)
+    assert store.tpm == [5.0, None]
+    assert store.update_tpm({0, 1}) == [(0, 10.0), (1, 10.0)]
+    assert store.largest_tpm(1) == [10.0]
+    assert store.tpm_points() == ([10, 20], [10.0, 10.0])
@@ -0,0 +1,73 @@
+# tests/test_database_manager.py
+"""
+Batch deletion in DatabaseManager: inside a transaction a failure propagates
+so the whole unit of work is rolled back; on its own it reports no deletions.
+"""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database_manager import DatabaseManager, open_database_connection
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    db_path = str(tmp_path / "dataviewer.db")
+    conn = open_database_connection(db_path)
+    manager = DatabaseManager.from_connection(conn, db_path)
+    manager._create_tables()
+    yield manager
+    conn.close()
+
+
+def store(manager, *names):
+    return manager.store_files([
+        {'source': io.BytesIO(b"vap3 content"), 'meta_data': {'display_filename': name},
+         'sheets': [("Test Sheet", True, False)], 'images': []}
+        for name in names
+    ])
+
+
+def fail_deleting(manager, file_id):
+    manager.conn.execute(f"CREATE TEMP TRIGGER fail_delete BEFORE DELETE ON files WHEN old.id = {file_id} "
+                         "BEGIN SELECT RAISE(ABORT, 'delete failed'); END")
+
+
+def test_delete_files_reports_deleted_ids(manager):
+    file_ids = store(manager, "a.vap3", "b.vap3")
+    assert manager.delete_files([file_ids[1], 999999, file_ids[0]]) == [file_ids[1], file_ids[0]]
+    assert manager.list_files() == []
+
+
+def test_failed_delete_in_transaction_rolls_back(manager):
+    file_ids = store(manager, "a.vap3", "b.vap3", "c.vap3")
+    fail_deleting(manager, file_ids[2])
+
+    def delete_then_more(ids):
+        manager.delete_file_and_versions(ids[0])
+        return manager.delete_files(ids[1:])
+
+    with pytest.raises(Exception, match="delete failed"):
+        manager.run_transaction(delete_then_more, file_ids)
+    assert len(manager.list_files()) == 3
+
+
+def test_failed_delete_outside_transaction_deletes_nothing(manager):
+    file_ids = store(manager, "a.vap3", "b.vap3")
+    fail_deleting(manager, file_ids[1])
+
+    assert manager.delete_files(file_ids) == []
+    assert len(manager.list_files()) == 2
+    assert not manager.conn.in_transaction
+
+
+def test_most_recent_version_matches_substring_of_longer_names(manager):
+    store(manager, "ABC-12 intense.vap3")
+    store(manager, "XABC-12 intense v2.vap3")  # newer, base name inside a longer token
+
+    assert manager.get_most_recent_version_by_base_name("ABC-12")['filename'] == "XABC-12 intense v2.vap3"
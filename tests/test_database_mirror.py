@@ -0,0 +1,162 @@
+# tests/test_database_mirror.py
+"""
+Local mirror of the shared database: provisional ids and their relabelling.
+
+Files stored through the mirror get a negative provisional id that is
+replaced by the shared database's id once the write is forwarded. Ids handed
+out before that must keep working afterwards.
+"""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database_manager import DatabaseManager, open_database_connection
+from database_mirror import DatabaseMirror, MirroredDatabaseManager
+
+
+def make_entry(name, payload=b"vap3 content"):
+    return {
+        'source': io.BytesIO(payload),
+        'meta_data': {'display_filename': name},
+        'sheets': [("Test Sheet", True, False)],
+        'images': []
+    }
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    shared_path = str(tmp_path / "shared.db")
+    conn = open_database_connection(shared_path)
+    DatabaseManager.from_connection(conn, shared_path)._create_tables()
+    conn.close()
+
+    mirror = DatabaseMirror(shared_path, mirror_path=str(tmp_path / "mirror.db"))
+    yield mirror
+    mirror.close()
+
+
+@pytest.fixture
+def manager(mirror):
+    conn = open_database_connection(mirror.mirror_path)
+    yield MirroredDatabaseManager.for_mirror(conn, mirror)
+    conn.close()
+
+
+def test_store_files_returns_provisional_ids(manager):
+    file_ids = manager.store_files([make_entry("a.vap3"), make_entry("b.vap3")])
+    assert all(file_id < 0 for file_id in file_ids)
+    assert manager.get_file_by_id(file_ids[0])['filename'] == "a.vap3"
+
+
+def test_provisional_ids_resolve_after_forwarding(mirror, manager):
+    payload = b"forwarded content"
+    provisional_id = manager.store_files([make_entry("a.vap3", payload)])[0]
+
+    assert mirror.flush_pending() > 0
+    assert mirror.pending_count() == 0
+
+    record = manager.get_file_by_id(provisional_id)
+    assert record is not None
+    assert record['id'] > 0
+    assert record['filename'] == "a.vap3"
+    assert bytes(record['file_content']) == payload
+
+    assert manager.get_file_size_info(provisional_id) == len(payload)
+    storage = manager.get_file_storage_info(provisional_id)
+    assert storage['content_bytes'] == len(payload)
+    assert storage['sheet_count'] == 1
+
+
+def test_forwarded_file_lands_in_shared_database(mirror, manager):
+    manager.store_files([make_entry("a.vap3")])
+    mirror.flush_pending()
+
+    conn = open_database_connection(mirror.shared_path, read_only=True)
+    try:
+        shared = DatabaseManager.from_connection(conn, mirror.shared_path)
+        assert [record['filename'] for record in shared.list_files()] == ["a.vap3"]
+    finally:
+        conn.close()
+
+
+def test_delete_by_provisional_id_after_forwarding(mirror, manager):
+    provisional_id = manager.store_files([make_entry("a.vap3")])[0]
+    mirror.flush_pending()
+
+    assert manager.delete_file_and_versions(provisional_id)
+    assert manager.get_file_by_id(provisional_id) is None
+
+
+def test_delete_files_reports_only_deleted_ids(manager):
+    provisional_id = manager.store_files([make_entry("a.vap3")])[0]
+
+    assert manager.delete_files([provisional_id, 999999]) == [provisional_id]
+    assert manager.delete_multiple_files([provisional_id]) == (0, 1)
+
+
+def test_storage_stats_and_full_maintenance_use_shared_database(mirror, manager):
+    manager.store_files([make_entry("a.vap3")])
+    mirror.flush_pending()
+
+    stats = manager.get_storage_stats()
+    assert stats['path'] == mirror.shared_path
+    assert stats['blobs']['files']['rows'] == 1
+
+    report = manager.run_maintenance(full=True)
+    assert report['analyzed']
+    assert report['problems'] == []
+
+
+def shared_counts(mirror):
+    conn = open_database_connection(mirror.shared_path, read_only=True)
+    try:
+        return tuple(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                     for table in ("files", "sheets", "file_sources"))
+    finally:
+        conn.close()
+
+
+def test_forwarding_is_not_repeated_after_failed_cleanup(mirror, manager, monkeypatch):
+    provisional_id = manager.store_files([make_entry("a.vap3")])[0]
+
+    # The shared transaction commits, then the local cleanup fails
+    def fail(last_pending_id, new_ids):
+        raise RuntimeError("crashed before local cleanup")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(mirror, "_finish_forwarding", fail)
+        with pytest.raises(RuntimeError):
+            mirror.flush_pending()
+    counts = shared_counts(mirror)
+    assert counts[0] == 1
+    assert mirror.pending_count() > 0
+
+    assert mirror.flush_pending() > 0
+    assert mirror.pending_count() == 0
+    assert shared_counts(mirror) == counts
+    assert manager.get_file_by_id(provisional_id)['id'] > 0
+
+
+def fail_deleting(conn, file_id):
+    conn.execute(f"CREATE TEMP TRIGGER fail_delete BEFORE DELETE ON files WHEN old.id = {file_id} "
+                 "BEGIN SELECT RAISE(ABORT, 'delete failed'); END")
+
+
+def test_failed_delete_rolls_back_whole_transaction(mirror, manager):
+    file_ids = manager.store_files([make_entry("a.vap3"), make_entry("b.vap3")])
+    mirror.flush_pending()
+    file_ids = [manager.get_file_by_id(file_id)['id'] for file_id in file_ids]
+    fail_deleting(manager.conn, file_ids[1])
+
+    with pytest.raises(Exception, match="delete failed"):
+        manager.run_transaction(manager.delete_files, file_ids)
+    assert manager.get_file_by_id(file_ids[0]) is not None
+    assert mirror.pending_count() == 0
+
+    # Outside a transaction, each file is deleted on its own
+    assert manager.delete_files(file_ids) == [file_ids[0]]
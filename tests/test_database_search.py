@@ -0,0 +1,67 @@
+# tests/test_database_search.py
+"""
+Search text parsing (build_match_query) and the MATCH expressions it produces
+run against an FTS5 table with the search index's columns.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database_search import SEARCH_COLUMNS, SEARCH_TABLE, build_match_query
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("abc-12", '"abc 12" *'),
+    ("sample:abc-12", 'sample_ids:"abc 12" *'),
+    ('media:"fresh base"', 'header_fields:"media fresh base" *'),
+    ("tester:jo sheet:intense", 'header_fields:"tester jo" * AND sheet_names:"intense" *'),
+    ("Note:leak", 'notes:"leak" *'),
+    ('foo"bar', '"foo bar" *'),
+])
+def test_build_match_query(text, expected):
+    assert build_match_query(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "   ", "--- !!", 'sample:"-"'])
+def test_build_match_query_without_terms(text):
+    assert build_match_query(text) is None
+
+
+@pytest.fixture
+def index():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5({', '.join(SEARCH_COLUMNS)})")
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite built without FTS5")
+    rows = [
+        (1, "ABC-12 intense.vap3", "Intense Test", "ABC-12 ABC-13", "media Fresh Base tester Jo", ""),
+        (2, "XYZ-9 quick.vap3", "Quick Screening", "XYZ-9", "media Aged tester Joanna", "leak at puff 40"),
+    ]
+    conn.executemany(f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                     rows)
+    yield conn
+    conn.close()
+
+
+def search(conn, text):
+    return [row[0] for row in conn.execute(
+        f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ? ORDER BY rowid",
+        (build_match_query(text),))]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("abc-12", [1]),
+    ("sample:xyz", [2]),
+    ('media:"fresh base"', [1]),
+    ("tester:jo", [1, 2]),
+    ("tester:jo sheet:quick", [2]),
+    ("note:leak", [2]),
+    ("sample:intense", []),
+])
+def test_match_queries_run_against_fts5(index, text, expected):
+    assert search(index, text) == expected
@@ -0,0 +1,72 @@
+# tests/test_excel_integration.py
+"""
+Round trip of a sheet through the exported Excel workbook: finding the cells
+edited in Excel (diff_frames) and applying only those (apply_cell_changes).
+"""
+import os
+import sys
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from file_manager.excel_integration import apply_cell_changes, diff_frames, write_sheet_for_excel
+
+
+@pytest.fixture
+def sheet():
+    return pd.DataFrame({
+        "Puffs": [10, 20, 30, 40],
+        "TPM": [1.5, np.nan, 2.25, 3.0],
+        "Notes": ["ok", None, "leak", "ok"],
+    })
+
+
+def export(sheet, tmp_path):
+    path = str(tmp_path / "export.xlsx")
+    write_sheet_for_excel(sheet, path, "Intense Test")
+    return path
+
+
+def edit_cell(path, row, column, value):
+    """Edit a data cell (0-based row and column) the way Excel would save it."""
+    wb = openpyxl.load_workbook(path)
+    wb.active.cell(row=row + 2, column=column + 1, value=value)
+    wb.save(path)
+
+
+def test_unchanged_export_has_no_changes(sheet, tmp_path):
+    path = export(sheet, tmp_path)
+    changed = diff_frames(sheet, pd.read_excel(path))
+    assert changed is not None
+    assert not changed.any()
+
+
+def test_only_edited_cells_are_applied(sheet, tmp_path):
+    path = export(sheet, tmp_path)
+    edit_cell(path, 1, 1, 1.75)
+    edit_cell(path, 2, 2, "no leak")
+    modified = pd.read_excel(path)
+
+    changed = diff_frames(sheet, modified)
+    assert sorted(zip(*np.nonzero(changed))) == [(1, 1), (2, 2)]
+
+    # Edits made in the application meanwhile are kept
+    current = sheet.copy()
+    current.iloc[0, 2] = "edited in app"
+    result = apply_cell_changes(current, modified, changed)
+    assert result.iloc[1, 1] == 1.75
+    assert result.iloc[2, 2] == "no leak"
+    assert result.iloc[0, 2] == "edited in app"
+    assert pd.api.types.is_numeric_dtype(result["TPM"])
+    assert result["Puffs"].tolist() == [10, 20, 30, 40]
+    assert pd.isna(current.iloc[1, 1])  # the input frame is not modified
+
+
+def test_structural_changes_are_not_diffed(sheet):
+    assert diff_frames(sheet, sheet.iloc[:3]) is None
+    assert diff_frames(sheet, sheet.rename(columns={"TPM": "tpm"})) is None
+    assert diff_frames(sheet, sheet.assign(Extra=1)) is None
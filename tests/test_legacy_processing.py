@@ -0,0 +1,114 @@
+# tests/test_legacy_processing.py
+"""
+Legacy Intense Test conversions: where the converted values land in the
+template sheet, and that the saved copy keeps the template's formatting.
+"""
+import os
+import sys
+
+import openpyxl
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from processing import legacy_processing
+from processing.template_registry import get_template_registry
+
+TEMPLATE_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "resources", "Standardized Test Template - LATEST VERSION - 2025 Jan.xlsx"))
+
+SAMPLES = [
+    {"sample_name": "Cart A", "voltage": 3.3, "resistance": 1.2, "media": "D8", "date": "2024-05-01",
+     "puffs": pd.Series([10, 20, 30]), "before_weight": pd.Series([1.0, 0.98, 0.96]),
+     "after_weight": pd.Series([0.98, 0.96, 0.94]), "tpm": pd.Series([2.0, 2.0, 2.0])},
+    {"sample_name": "Cart B", "voltage": 3.6, "resistance": 1.4, "media": "D9", "date": "2024-05-02",
+     "puffs": pd.Series([10, 20, 30]), "before_weight": pd.Series([1.1, 1.07, 1.04]),
+     "after_weight": pd.Series([1.07, 1.04, 1.01]), "tpm": pd.Series([3.0, 3.0, 3.0])},
+]
+
+CONVERTERS = [
+    ("convert_legacy_file_using_template", "extract_samples_from_old_file", "{} Legacy.xlsx", "{} Data"),
+    ("convert_legacy_file_using_template_v2", "extract_samples_from_old_file_v2", "{} Legacy.xlsx", "Legacy_{}"),
+    ("convert_cart_format_to_template", "extract_samples_from_cart_format", "{} Legacy Cart.xlsx", "Legacy_{}"),
+]
+
+
+def cell_format(cell):
+    return (cell.font.name, cell.font.b, cell.font.sz, cell.font.u, cell.fill.fill_type,
+            cell.fill.fgColor.rgb, cell.fill.fgColor.theme, cell.border.bottom.style, cell.number_format)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    get_template_registry().clear()
+    yield tmp_path
+    get_template_registry().clear()
+
+
+@pytest.fixture(scope="module")
+def template_ws():
+    return openpyxl.load_workbook(TEMPLATE_PATH)["Intense Test"]
+
+
+@pytest.mark.parametrize("converter, extractor, file_name, sheet_name", CONVERTERS)
+def test_converted_layout(workdir, template_ws, monkeypatch, converter, extractor, file_name, sheet_name):
+    monkeypatch.setattr(legacy_processing, extractor, lambda *args, **kwargs: [dict(s) for s in SAMPLES])
+    df = getattr(legacy_processing, converter)(str(workdir / "batch 7.xlsx"), TEMPLATE_PATH)
+
+    wb = openpyxl.load_workbook(workdir / "legacy data" / file_name.format("batch 7"))
+    assert wb.sheetnames == [sheet_name.format("batch 7")]
+    ws = wb.worksheets[0]
+
+    for sample_idx, sample in enumerate(SAMPLES):
+        first = 1 + sample_idx * 12
+        assert ws.cell(1, first).value == "batch 7"
+        assert ws.cell(1, first + 5).value == sample["sample_name"]  # next to "Sample ID:"
+        assert ws.cell(3, first + 5).value == sample["voltage"]  # next to "Voltage:"
+        assert ws.cell(2, first + 1).value == sample["media"]  # next to "Media:"
+        # Block headers stay in row 4, data starts in row 5
+        assert ws.cell(4, first).value == "puffs"
+        assert ws.cell(4, first + 8).value == "TPM (mg/puff)"
+        for row_offset in range(3):
+            row = 5 + row_offset
+            assert ws.cell(row, first).value == sample["puffs"][row_offset]
+            assert ws.cell(row, first + 1).value == sample["before_weight"][row_offset]
+            assert ws.cell(row, first + 2).value == sample["after_weight"][row_offset]
+            assert ws.cell(row, first + 8).value == sample["tpm"][row_offset]
+        if converter == "convert_legacy_file_using_template":
+            assert ws.cell(8, first).value is None  # v1 clears the block below the data
+
+    # Formatting comes from the template sheet
+    for column in ("A", "B", "I", "M"):
+        assert ws.column_dimensions[column].width == template_ws.column_dimensions[column].width
+    for row, col in ((1, 1), (4, 1), (4, 9), (5, 2)):
+        assert cell_format(ws.cell(row, col)) == cell_format(template_ws.cell(row, col))
+
+    # The returned frame is what reading the saved sheet gives
+    assert df.columns[0] == "batch 7"
+    assert df.iloc[3, 0] == 10 and df.iloc[3, 8] == 2.0
+    assert df.iloc[3, 12] == 10 and df.iloc[3, 20] == 3.0
+
+
+def test_v1_drops_columns_after_last_sample(workdir, monkeypatch):
+    monkeypatch.setattr(legacy_processing, "extract_samples_from_old_file",
+                        lambda *args, **kwargs: [dict(s) for s in SAMPLES])
+    df = legacy_processing.convert_legacy_file_using_template(str(workdir / "batch 7.xlsx"), TEMPLATE_PATH)
+
+    ws = openpyxl.load_workbook(workdir / "legacy data" / "batch 7 Legacy.xlsx").worksheets[0]
+    assert ws.max_column == 24
+    assert df.shape[1] <= 24
+
+
+def test_sheet_workbook_is_cached_on_disk(workdir):
+    registry = get_template_registry()
+    structure = registry.get_structure(TEMPLATE_PATH)
+    assert registry.load_sheet_workbook(structure, "Intense Test").sheetnames == ["Intense Test"]
+    cached = [name for name in os.listdir(registry.cache_dir) if name.endswith(".xlsx")]
+    assert len(cached) == 1
+
+    registry.clear()
+    assert registry.load_sheet_workbook(registry.get_structure(TEMPLATE_PATH), "Intense Test").sheetnames == \
+        ["Intense Test"]
@@ -0,0 +1,97 @@
+# tests/test_sample_comparison_engine.py
+"""
+Keyword matching of the sample comparison window: the Aho-Corasick matcher
+and match_sheet must give the same results as the original substring loops.
+"""
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sample_comparison_engine import KeywordMatcher, match_sheet
+
+
+MODEL_KEYWORDS = {
+    "evo": ["evo", "evolution"],
+    "evomax": ["evomax", "evo max"],
+    "ccell": ["ccell", "c-cell"],
+    "rosin": ["rosin", "live rosin"],
+    "aio": ["aio", "all in one"],
+}
+
+
+def reference_match(model_keywords, data, sheet_name, file_name=None):
+    """The substring loops match_sheet replaced (find_matching_samples and find_sample_name_matches_only)."""
+    width = 8 if any(test in sheet_name.lower() for test in ['user test simulation', 'user simulation']) else 12
+    sample_name_matches = {keyword: [] for keyword in model_keywords}
+    any_name_matches = {keyword: [] for keyword in model_keywords}
+    valid_sample_indices = []
+    if data.shape[0] > 0:
+        first_row = data.iloc[0]
+        for sample_idx in range(len(first_row) // width):
+            sample_name_col = 5 + sample_idx * width
+            if sample_name_col >= len(first_row):
+                continue
+            sample_name = str(first_row.iloc[sample_name_col]).lower()
+            for keyword, variations in model_keywords.items():
+                if any(variation.lower() in sample_name for variation in variations):
+                    any_name_matches[keyword].append(sample_idx)
+            if sample_name and sample_name not in ['nan', 'none', '']:
+                valid_sample_indices.append(sample_idx)
+                for keyword, variations in model_keywords.items():
+                    if any(variation.lower() in sample_name for variation in variations):
+                        sample_name_matches[keyword].append(sample_idx)
+
+    samples, sources = {}, {}
+    for keyword, variations in model_keywords.items():
+        if sample_name_matches[keyword]:
+            samples[keyword] = sample_name_matches[keyword]
+        elif file_name and any(variation.lower() in file_name.lower() for variation in variations):
+            samples[keyword] = valid_sample_indices.copy()
+        else:
+            samples[keyword] = []
+        sources[keyword] = "sample_name" if any_name_matches[keyword] else "filename"
+    return {'samples': samples, 'sources': sources}
+
+
+def make_sheet(names, width=12):
+    first_row = [""] * (len(names) * width)
+    for sample_idx, name in enumerate(names):
+        first_row[5 + sample_idx * width] = name
+    return pd.DataFrame([first_row, [1.0] * len(first_row)])
+
+
+def test_overlapping_variations_all_match():
+    matcher = KeywordMatcher(MODEL_KEYWORDS)
+    assert matcher.match("EvoMax live rosin AIO") == {"evo", "evomax", "rosin", "aio"}
+    assert matcher.match("C-Cell evolution") == {"ccell", "evo"}
+    assert matcher.match("unrelated") == frozenset()
+
+
+def test_filename_fallback_and_sources():
+    matcher = KeywordMatcher(MODEL_KEYWORDS)
+    data = make_sheet(["Evo 1", "nan", "Plain"])
+    result = match_sheet(matcher, data, "Intense Test", "ccell batch.xlsx")
+    assert result['samples']['evo'] == [0]
+    assert result['samples']['ccell'] == [0, 2]
+    assert result['sources']['evo'] == "sample_name"
+    assert result['sources']['ccell'] == "filename"
+
+
+@pytest.mark.parametrize("sheet_name, width", [("Intense Test", 12), ("User Test Simulation", 8)])
+def test_match_sheet_agrees_with_substring_loops(sheet_name, width):
+    rng = random.Random(42)
+    fragments = ["evo", "evomax", "Evo Max", "ccell", "C-CELL", "live rosin", "rosin", "all in one",
+                 "AIO", "blank", "nan", "none", "", "x", "123"]
+    matcher = KeywordMatcher(MODEL_KEYWORDS)
+    for _ in range(200):
+        names = [" ".join(rng.choice(fragments) for _ in range(rng.randint(0, 3)))
+                 for _ in range(rng.randint(0, 6))]
+        file_name = rng.choice([None, "evo test.xlsx", "AIO ccell.vap3", "plain.xlsx"])
+        data = make_sheet(names, width)
+        assert match_sheet(matcher, data, sheet_name, file_name) == \
+            reference_match(MODEL_KEYWORDS, data, sheet_name, file_name)
@@ -0,0 +1,101 @@
+# tests/test_startup_imports.py
+"""
+Import-time budget for the startup path.
+
+main.py imports main_gui before the startup menu is shown, so nothing on that
+import path may pull in the scientific stack. These tests run a fresh
+interpreter with ``-X importtime`` so they measure a cold import, and print the
+slowest modules when the budget is exceeded.
+
+Run on its own (works headless, no display needed):
+    python -m pytest -q tests/test_startup_imports.py -s
+
+The budget can be overridden on slow CI machines with
+DATAVIEWER_IMPORT_BUDGET_MS.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that must not be imported before the startup menu is up
+DEFERRED_MODULES = ["pandas", "numpy", "openpyxl", "matplotlib", "PIL", "tksheet", "psutil"]
+
+# Cumulative import time allowed for `import main_gui`, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get("DATAVIEWER_IMPORT_BUDGET_MS", "400"))
+
+
+def run_importtime(module_name):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (list of (module, self_us, cumulative_us) rows, set of loaded top-level modules)
+    """
+    code = (
+        f"import sys; import {module_name}; "
+        "print(','.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, f"import {module_name} failed:\n{result.stderr[-2000:]}"
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:   self [us] | cumulative | imported package"
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+
+    loaded = set(result.stdout.strip().splitlines()[-1].split(",")) if result.stdout.strip() else set()
+    return rows, loaded
+
+
+def format_breakdown(rows, limit=15):
+    """Format the slowest imports (by cumulative time) as a table."""
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:limit]
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for name, self_us, cumulative_us in slowest:
+        lines.append(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def main_gui_import():
+    return run_importtime("main_gui")
+
+
+def test_main_gui_does_not_import_scientific_stack(main_gui_import):
+    rows, loaded = main_gui_import
+    imported_early = [name for name in DEFERRED_MODULES if name in loaded]
+    assert not imported_early, (
+        f"import main_gui pulled in {imported_early}; keep these behind lazy imports.\n"
+        + format_breakdown(rows)
+    )
+
+
+def test_main_gui_import_time_budget(main_gui_import):
+    rows, _ = main_gui_import
+    main_gui_rows = [row for row in rows if row[0] == "main_gui"]
+    assert main_gui_rows, "main_gui missing from -X importtime output"
+    cumulative_ms = main_gui_rows[-1][2] / 1000
+
+    print(f"\nimport main_gui: {cumulative_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print(format_breakdown(rows))
+
+    assert cumulative_ms <= IMPORT_BUDGET_MS, (
+        f"import main_gui took {cumulative_ms:.1f} ms, budget is {IMPORT_BUDGET_MS:.0f} ms\n"
+        + format_breakdown(rows)
+    )
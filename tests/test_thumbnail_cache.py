@@ -0,0 +1,87 @@
+# tests/test_thumbnail_cache.py
+"""
+Disk tier of the thumbnail cache: thumbnails are keyed by crop method and
+version, and a crop that fell back to another method is not persisted.
+"""
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import crop_box_cache
+import thumbnail_cache
+from image_loader import ImageLoader
+
+
+@pytest.fixture
+def image_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(crop_box_cache, "_crop_cache", None)
+    thumbnail_cache.clear_memory_cache()
+    path = tmp_path / "device.png"
+    img = Image.new("RGB", (400, 600), "white")
+    img.paste((40, 40, 40), (100, 100, 300, 500))
+    img.save(path)
+    yield str(path)
+    thumbnail_cache.clear_memory_cache()
+
+
+def disk_thumbnails():
+    directory = thumbnail_cache.get_thumbnail_dir()
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def make_loader(analyzer, method="stand_in"):
+    loader = ImageLoader(None, False)
+    loader.crop_analyzer = analyzer
+    loader.crop_method = method
+    return loader
+
+
+def confident_answer(image_data, prompt):
+    return json.dumps({
+        "crop_box": {"left": 10, "top": 10, "right": 200, "bottom": 300},
+        "measurements": {"height_to_width_ratio": 2.0},
+        "confidence": 90,
+    })
+
+
+def failing_analyzer(image_data, prompt):
+    raise ConnectionError("API unavailable")
+
+
+def test_failed_analyzer_crop_is_not_persisted(image_path):
+    loader = make_loader(failing_analyzer)
+    crop = loader.thumbnail_crop(True)
+
+    assert thumbnail_cache.load_thumbnail(image_path, crop, loader.crop_with_method) is not None
+    assert disk_thumbnails() == []
+
+    # Once the analyzer works, its crop replaces the fallback and is persisted
+    thumbnail_cache.clear_memory_cache()
+    loader.crop_analyzer = confident_answer
+    assert thumbnail_cache.load_thumbnail(image_path, crop, loader.crop_with_method) is not None
+    assert [name for name in disk_thumbnails() if crop in name]
+
+
+def test_thumbnails_are_keyed_by_crop_method(image_path):
+    first = make_loader(confident_answer, "stand_in")
+    second = make_loader(confident_answer, "other_method")
+    assert first.thumbnail_crop(True) != second.thumbnail_crop(True)
+    assert first.thumbnail_crop(False) is None
+
+    for loader in (first, second):
+        thumbnail_cache.load_thumbnail(image_path, loader.thumbnail_crop(True), loader.crop_with_method)
+    thumbnail_cache.load_thumbnail(image_path, None)
+    assert len(disk_thumbnails()) == 3
+
+
+def test_algorithm_version_changes_the_key(image_path, monkeypatch):
+    loader = make_loader(confident_answer)
+    before = loader.thumbnail_crop(True)
+    monkeypatch.setitem(crop_box_cache.CROP_ALGORITHM_VERSIONS, "stand_in", 2)
+    assert loader.thumbnail_crop(True) != before
@@ -0,0 +1,90 @@
+# tests/test_vap_file_manager.py
+"""
+Round trips through the .vap3 format, including sheets whose numeric columns
+are stored as aligned .npy members and memory-mapped on load.
+"""
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from vap_file_manager import VapFileManager, release_mapped_sheets
+
+
+def make_sheet(rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Sample": [f"S{i}" for i in range(rows)],
+        "Puffs": np.arange(rows, dtype=np.int64),
+        "TPM": rng.random(rows),
+        "Resistance": rng.random(rows).astype(np.float32),
+    })
+
+
+def save(manager, path, sheets):
+    assert manager.save_to_vap3(path, sheets, {}, [], numeric_member_min_cells=1)
+
+
+@pytest.fixture
+def manager():
+    return VapFileManager()
+
+
+def test_numeric_columns_round_trip_through_npy_members(tmp_path, manager):
+    path = str(tmp_path / "data.vap3")
+    original = make_sheet()
+    save(manager, path, {"Test": {"data": original, "is_empty": False}})
+
+    names = zipfile.ZipFile(path).namelist()
+    assert "sheets/Test/numeric_0.npy" in names
+
+    for memory_map in (True, False):
+        loaded = manager.load_from_vap3(path, memory_map=memory_map)['filtered_sheets']['Test']['data']
+        assert list(loaded.columns) == list(original.columns)
+        pd.testing.assert_frame_equal(loaded, original, check_dtype=False)
+        assert loaded["Resistance"].dtype == np.float32
+
+
+def test_save_over_memory_mapped_source(tmp_path, manager):
+    path = str(tmp_path / "data.vap3")
+    save(manager, path, {"Test": {"data": make_sheet(), "is_empty": False}})
+
+    sheets = manager.load_from_vap3(path, memory_map=True)['filtered_sheets']
+    expected = sheets["Test"]["data"].copy(deep=True)
+    expected["TPM"] = expected["TPM"] * 2
+    sheets["Test"]["data"] = sheets["Test"]["data"].assign(TPM=sheets["Test"]["data"]["TPM"] * 2)
+
+    save(manager, path, sheets)
+    # The mapped columns that were not edited must still be readable after the save
+    pd.testing.assert_frame_equal(sheets["Test"]["data"], expected)
+
+    reloaded = manager.load_from_vap3(path)['filtered_sheets']['Test']['data']
+    pd.testing.assert_frame_equal(reloaded, expected, check_dtype=False)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_release_mapped_sheets_copies_only_mapped_data(tmp_path, manager):
+    path = str(tmp_path / "data.vap3")
+    save(manager, path, {"Test": {"data": make_sheet(), "is_empty": False}})
+
+    sheets = manager.load_from_vap3(path, memory_map=True)['filtered_sheets']
+    sheets["Other"] = {"data": make_sheet(seed=1)}
+    other = sheets["Other"]["data"]
+
+    assert release_mapped_sheets(sheets, path) == 1
+    assert sheets["Other"]["data"] is other
+    assert release_mapped_sheets(sheets, path) == 0
+
+
+def test_sheets_stay_csv_by_default(tmp_path, manager):
+    path = str(tmp_path / "data.vap3")
+    assert manager.save_to_vap3(path, {"Test": {"data": make_sheet(rows=5000), "is_empty": False}}, {}, [])
+
+    names = zipfile.ZipFile(path).namelist()
+    assert "sheets/Test/data.csv" in names
+    assert not [name for name in names if name.endswith(".npy")]
@@ -0,0 +1,242 @@
+"""
+thumbnail_cache.py
+Developed by Charlie Becquet.
+Two-tier cache of display-size image thumbnails for the DataViewer application.
+
+ImageLoader used to keep a full-resolution PIL copy of every processed image
+for as long as it lived, and decoded and resized each image on the Tk thread.
+With 12-megapixel phone photos that costs tens of megabytes per image and
+stalls every sheet switch. This module keeps only display-size thumbnails:
+
+- a memory tier, an LRU bounded by total pixel bytes and shared by all
+  ImageLoader instances (the main window creates a new loader per sheet), keyed
+  by file path, size, modification time and crop state;
+- a disk tier of PNG thumbnails under ~/.DataViewer/thumbnails, keyed by the
+  SHA-256 of the image file and the crop (method and algorithm version), so
+  thumbnails (including the result of an expensive auto-crop) survive restarts
+  and renamed files. A crop that fell back to another method is only kept in
+  memory, so the requested method is tried again next session.
+
+Thumbnails are produced on a small thread pool. Uncropped JPEGs are decoded
+in draft mode, which lets libjpeg scale down by up to 8x while decoding.
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils import debug_print, file_content_hash
+
+THUMBNAIL_HEIGHT = 135  # display height used by ImageLoader
+THUMBNAIL_CACHE_VERSION = 2  # bump when thumbnail rendering changes
+MEMORY_CACHE_LIMIT_BYTES = 64 * 1024 * 1024  # decoded thumbnail pixels kept in memory
+DISK_CACHE_LIMIT_BYTES = 256 * 1024 * 1024  # PNG thumbnails kept on disk
+THUMBNAIL_WORKERS = min(4, os.cpu_count() or 1)
+
+_memory_cache = OrderedDict()  # key -> PIL image
+_memory_bytes = 0
+_cache_lock = threading.Lock()
+_executor = None
+_disk_pruned = False
+
+
+def get_thumbnail_dir():
+    """Return the directory holding cached thumbnails."""
+    return os.path.join(os.path.expanduser("~/.DataViewer"), "thumbnails")
+
+
+def get_executor():
+    """Return the shared thumbnail decoding pool."""
+    global _executor
+    with _cache_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+        return _executor
+
+
+def _file_signature(img_path):
+    stat = os.stat(img_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def memory_key(img_path, crop, height=THUMBNAIL_HEIGHT):
+    """Return the memory tier key of an image, or None if the file cannot be read."""
+    try:
+        return (os.path.abspath(img_path), _file_signature(img_path), crop or None, height)
+    except OSError:
+        return None
+
+
+def _image_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def get_cached_thumbnail(img_path, crop, height=THUMBNAIL_HEIGHT):
+    """Return the thumbnail from the memory tier, or None. Never touches the disk."""
+    key = memory_key(img_path, crop, height)
+    if key is None:
+        return None
+    with _cache_lock:
+        img = _memory_cache.get(key)
+        if img is not None:
+            _memory_cache.move_to_end(key)
+    return img
+
+
+def _remember(key, img):
+    global _memory_bytes
+    with _cache_lock:
+        old = _memory_cache.pop(key, None)
+        if old is not None:
+            _memory_bytes -= _image_bytes(old)
+        _memory_cache[key] = img
+        _memory_bytes += _image_bytes(img)
+        while _memory_bytes > MEMORY_CACHE_LIMIT_BYTES and len(_memory_cache) > 1:
+            _, evicted = _memory_cache.popitem(last=False)
+            _memory_bytes -= _image_bytes(evicted)
+
+
+def forget(img_path):
+    """Drop every memory tier entry of an image (the disk tier is content-addressed and kept)."""
+    global _memory_bytes
+    path = os.path.abspath(img_path)
+    with _cache_lock:
+        for key in [key for key in _memory_cache if key[0] == path]:
+            _memory_bytes -= _image_bytes(_memory_cache.pop(key))
+
+
+def clear_memory_cache():
+    """Empty the memory tier."""
+    global _memory_bytes
+    with _cache_lock:
+        _memory_cache.clear()
+        _memory_bytes = 0
+
+
+def memory_cache_info():
+    """Return entry count and pixel bytes held by the memory tier."""
+    with _cache_lock:
+        return {'entries': len(_memory_cache), 'bytes': _memory_bytes, 'limit_bytes': MEMORY_CACHE_LIMIT_BYTES}
+
+
+def _disk_path(content_hash, crop, height):
+    crop_name = re.sub(r'[^A-Za-z0-9_.-]', '_', crop) if crop else 'full'
+    name = f"{content_hash}_{crop_name}_{height}_v{THUMBNAIL_CACHE_VERSION}.png"
+    return os.path.join(get_thumbnail_dir(), name)
+
+
+def prune_cache_dir(directory, limit_bytes):
+    """Remove the least recently written files of a cache directory once it exceeds limit_bytes."""
+    try:
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit_bytes:
+                break
+            os.remove(path)
+            total -= size
+    except OSError as e:
+        debug_print(f"DEBUG: Could not prune cache directory {directory}: {e}")
+
+
+def _store_on_disk(path, img):
+    global _disk_pruned
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        img.save(temp_path, format='PNG')
+        os.replace(temp_path, path)
+    except OSError as e:
+        debug_print(f"DEBUG: Could not write thumbnail {path}: {e}")
+        return
+    if not _disk_pruned:
+        _disk_pruned = True
+        prune_cache_dir(get_thumbnail_dir(), DISK_CACHE_LIMIT_BYTES)
+
+
+def scale_to_height(img, height, Image):
+    """Resize an image to the given height, keeping its aspect ratio."""
+    width = max(1, int(img.width * height / img.height))
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def decode_scaled(img_path, height, Image):
+    """
+    Open an image and scale it to the given height.
+
+    JPEGs are decoded in draft mode at the smallest DCT scale that still
+    covers the target size, which is several times faster than a full decode
+    for large photos.
+    """
+    with Image.open(img_path) as img:
+        if img.format == 'JPEG' and img.height > height:
+            target_width = max(1, int(img.width * height / img.height))
+            img.draft(img.mode, (target_width, height))
+        img.load()
+        return scale_to_height(img, height, Image)
+
+
+def load_thumbnail(img_path, crop, crop_func=None, height=THUMBNAIL_HEIGHT):
+    """
+    Return the display thumbnail of an image, producing and caching it if needed.
+
+    Safe to call from worker threads.
+
+    Args:
+        img_path (str): Image file
+        crop (str): Key of the crop wanted (crop method and version, see
+            crop_box_cache.crop_method_key), or None/False for the full image
+        crop_func (callable): img_path -> (cropped full-resolution PIL image or
+            None, key of the crop actually applied)
+        height (int): Thumbnail height in pixels
+
+    Returns:
+        PIL.Image.Image or None if the image could not be read
+    """
+    from PIL import Image
+
+    key = memory_key(img_path, crop, height)
+    if key is None:
+        return None
+    cached = get_cached_thumbnail(img_path, crop, height)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    disk_path = _disk_path(file_content_hash(img_path), crop, height)
+    if os.path.exists(disk_path):
+        try:
+            with Image.open(disk_path) as img:
+                img.load()
+                thumbnail = img.copy()
+            _remember(key, thumbnail)
+            return thumbnail
+        except OSError as e:
+            debug_print(f"DEBUG: Ignoring unreadable cached thumbnail {disk_path}: {e}")
+
+    processed, applied = crop_func(img_path) if crop and crop_func else (None, None)
+    if processed is not None:
+        thumbnail = scale_to_height(processed, height, Image)
+    else:
+        thumbnail = decode_scaled(img_path, height, Image)
+
+    if not crop or applied == crop:
+        _store_on_disk(disk_path, thumbnail)
+    else:
+        debug_print(f"DEBUG: Not persisting thumbnail of {os.path.basename(img_path)}: "
+                    f"wanted crop {crop}, got {applied}")
+    _remember(key, thumbnail)
+    debug_print(f"DEBUG: Built thumbnail for {os.path.basename(img_path)} (crop={crop}) in {time.perf_counter() - started:.3f}s")
+    return thumbnail
+
+
+def submit_thumbnail(img_path, crop, crop_func=None, height=THUMBNAIL_HEIGHT):
+    """Start building a thumbnail on the shared pool; returns a Future."""
+    return get_executor().submit(load_thumbnail, img_path, crop, crop_func, height)
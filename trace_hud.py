@@ -0,0 +1,210 @@
+"""
+trace_hud.py
+Developed by Charlie Becquet.
+Performance HUD window for the DataViewer Application.
+
+Shows the most recent traced operations (see tracing.py) with their duration,
+thread and byte counts, a per-operation summary, and lets the user export the
+recorded spans as Chrome trace-event JSON.
+"""
+
+import os
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from tracing import (
+    get_recent_spans,
+    summarize_spans,
+    clear_spans,
+    export_chrome_trace,
+    set_tracing_enabled,
+    is_tracing_enabled
+)
+from utils import debug_print, show_success_message
+
+
+class TraceHUD:
+    """Toplevel window listing recent spans, refreshed while it is open."""
+
+    REFRESH_INTERVAL_MS = 1000
+    RECENT_SPAN_LIMIT = 200
+
+    def __init__(self, root):
+        self.root = root
+        self.window = None
+        self.recent_tree = None
+        self.summary_tree = None
+        self.paused_var = None
+        self.enabled_var = None
+        self._refresh_job = None
+        self._last_span_count = None
+
+    def show(self):
+        """Open the HUD, or bring it to the front if it is already open."""
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Performance HUD")
+        self.window.geometry("900x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill="x", padx=5, pady=5)
+
+        self.enabled_var = tk.BooleanVar(value=is_tracing_enabled())
+        ttk.Checkbutton(controls, text="Record spans", variable=self.enabled_var,
+                        command=lambda: set_tracing_enabled(self.enabled_var.get())).pack(side="left", padx=5)
+
+        self.paused_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(controls, text="Pause view", variable=self.paused_var).pack(side="left", padx=5)
+
+        ttk.Button(controls, text="Clear", command=self.clear).pack(side="left", padx=5)
+        ttk.Button(controls, text="Export Chrome Trace...", command=self.export_trace).pack(side="right", padx=5)
+
+        notebook = ttk.Notebook(self.window)
+        notebook.pack(fill="both", expand=True, padx=5, pady=5)
+
+        recent_frame = ttk.Frame(notebook)
+        summary_frame = ttk.Frame(notebook)
+        notebook.add(recent_frame, text="Recent Operations")
+        notebook.add(summary_frame, text="Summary")
+
+        self.recent_tree = self._create_tree(
+            recent_frame,
+            [("Operation", 380), ("Category", 80), ("Duration (ms)", 100), ("Bytes", 100), ("Thread", 140)]
+        )
+        self.summary_tree = self._create_tree(
+            summary_frame,
+            [("Operation", 380), ("Count", 70), ("Total (ms)", 100), ("Max (ms)", 100), ("Bytes", 100)]
+        )
+
+        self._last_span_count = None
+        self.refresh()
+
+    def _create_tree(self, parent, columns):
+        """Create a Treeview with a vertical scrollbar."""
+        names = [name for name, _ in columns]
+        tree = ttk.Treeview(parent, columns=names, show="headings")
+        for name, width in columns:
+            tree.heading(name, text=name)
+            tree.column(name, width=width, anchor="w" if name == "Operation" else "e")
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        return tree
+
+    def refresh(self):
+        """Repopulate both tables and schedule the next refresh."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+
+        try:
+            spans = get_recent_spans()
+            span_signature = (len(spans), spans[-1].span_id if spans else None)
+            if not self.paused_var.get() and span_signature != self._last_span_count:
+                self._last_span_count = span_signature
+                self._populate_recent(spans[-self.RECENT_SPAN_LIMIT:])
+                self._populate_summary(spans)
+        except Exception as e:
+            debug_print(f"DEBUG: Error refreshing performance HUD: {e}")
+
+        self._refresh_job = self.window.after(self.REFRESH_INTERVAL_MS, self.refresh)
+
+    def _populate_recent(self, spans):
+        """Fill the recent operations table, newest first, indented by nesting depth."""
+        self.recent_tree.delete(*self.recent_tree.get_children())
+        for span in reversed(spans):
+            name = ("    " * span.depth) + span.name
+            if span.error:
+                name += "  [error]"
+            self.recent_tree.insert("", "end", values=(
+                name,
+                span.category,
+                f"{span.duration_ms:.1f}",
+                format_bytes(span.bytes) if span.bytes else "",
+                span.thread_name
+            ))
+
+    def _populate_summary(self, spans):
+        """Fill the per-operation summary table."""
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for entry in summarize_spans(spans):
+            self.summary_tree.insert("", "end", values=(
+                entry['name'],
+                entry['count'],
+                f"{entry['total_ms']:.1f}",
+                f"{entry['max_ms']:.1f}",
+                format_bytes(entry['bytes']) if entry['bytes'] else ""
+            ))
+
+    def clear(self):
+        """Clear recorded spans and the tables."""
+        clear_spans()
+        self._last_span_count = None
+        self.refresh_now()
+
+    def refresh_now(self):
+        """Cancel the pending refresh and refresh immediately."""
+        if self._refresh_job is not None and self.window is not None:
+            try:
+                self.window.after_cancel(self._refresh_job)
+            except tk.TclError:
+                pass
+            self._refresh_job = None
+        self.refresh()
+
+    def export_trace(self):
+        """Ask for a destination and export recorded spans as Chrome trace JSON."""
+        export_trace_dialog(self.window or self.root)
+
+    def close(self):
+        """Stop refreshing and destroy the window."""
+        if self._refresh_job is not None and self.window is not None:
+            try:
+                self.window.after_cancel(self._refresh_job)
+            except tk.TclError:
+                pass
+        self._refresh_job = None
+        if self.window is not None:
+            self.window.destroy()
+        self.window = None
+
+
+def export_trace_dialog(parent):
+    """Prompt for a file name and export all recorded spans as Chrome trace JSON."""
+    default_name = f"dataviewer_trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    file_path = filedialog.asksaveasfilename(
+        parent=parent,
+        title="Export Chrome Trace",
+        defaultextension=".json",
+        initialfile=default_name,
+        filetypes=[("Chrome trace JSON", "*.json")]
+    )
+    if not file_path:
+        return None
+
+    try:
+        count = export_chrome_trace(file_path)
+        show_success_message(
+            "Trace Exported",
+            f"Exported {count} spans to {os.path.basename(file_path)}.\n"
+            "Open it in chrome://tracing or ui.perfetto.dev.",
+            parent
+        )
+        return file_path
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to export trace: {e}")
+        return None
+
+
+def format_bytes(count):
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
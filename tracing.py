@@ -0,0 +1,307 @@
+"""
+tracing.py
+Developed by Charlie Becquet.
+Lightweight span tracing for the DataViewer Application.
+
+Spans are recorded with context managers (or the @traced decorator), nest per
+thread, and carry the thread ID, optional byte counts and free-form arguments.
+Finished spans are kept in a bounded in-memory buffer that the performance HUD
+reads, and can be exported as Chrome trace-event JSON (chrome://tracing or
+https://ui.perfetto.dev) for offline analysis.
+
+Usage:
+    from tracing import trace_span, traced
+
+    with trace_span("DatabaseManager.store_vap3_file", category="db") as span:
+        span.add_bytes(len(file_content))
+
+    @traced(category="plot")
+    def plot_all_samples(...):
+        ...
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Only stdlib imports here - main.py imports this module before anything heavy
+
+MAX_RECORDED_SPANS = 5000
+
+_enabled = True
+_lock = threading.Lock()
+_spans = deque(maxlen=MAX_RECORDED_SPANS)
+_local = threading.local()
+_origin_ns = time.perf_counter_ns()
+_next_span_id = 0
+
+
+def set_tracing_enabled(enabled):
+    """
+    Enable or disable span recording globally.
+
+    Args:
+        enabled (bool): True to record spans, False to make spans no-ops
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_tracing_enabled():
+    """Return True if spans are currently being recorded."""
+    return _enabled
+
+
+def _span_stack():
+    """Return the calling thread's stack of open spans."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = []
+        _local.stack = stack
+    return stack
+
+
+class Span:
+    """A single timed operation. Use trace_span() rather than creating these directly."""
+
+    __slots__ = ('span_id', 'name', 'category', 'args', 'bytes', 'parent_id', 'depth',
+                 'thread_id', 'thread_name', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, name, category, args):
+        global _next_span_id
+        with _lock:
+            _next_span_id += 1
+            self.span_id = _next_span_id
+        self.name = name
+        self.category = category
+        self.args = dict(args) if args else {}
+        self.bytes = 0
+        self.parent_id = None
+        self.depth = 0
+        current_thread = threading.current_thread()
+        self.thread_id = threading.get_ident()
+        self.thread_name = current_thread.name
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+
+    def add_bytes(self, count):
+        """Add to the number of bytes this span read, wrote or transferred."""
+        try:
+            self.bytes += int(count)
+        except (TypeError, ValueError):
+            pass
+
+    def set(self, key, value):
+        """Attach an extra argument to the span (shown in the HUD and trace export)."""
+        self.args[key] = value
+
+    @property
+    def duration_ms(self):
+        """Duration in milliseconds (0 while the span is still open)."""
+        if not self.end_ns:
+            return 0.0
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def __enter__(self):
+        stack = _span_stack()
+        if stack:
+            self.parent_id = stack[-1].span_id
+            self.depth = len(stack)
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        stack = _span_stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            stack.remove(self)
+        with _lock:
+            _spans.append(self)
+        return False
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is disabled so call sites need no checks."""
+
+    bytes = 0
+    args = {}
+
+    def add_bytes(self, count):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def trace_span(name, category="app", **args):
+    """
+    Create a span context manager.
+
+    Args:
+        name (str): Operation name, e.g. "VapFileManager.save_to_vap3"
+        category (str): Coarse grouping such as "file", "db", "plot", "report"
+        **args: Extra values recorded with the span (paths, sheet names, counts)
+
+    Returns:
+        Span: Context manager yielding the span so callers can add bytes/args
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, category, args)
+
+
+def current_span():
+    """Return the innermost open span on this thread (a no-op span if none)."""
+    stack = _span_stack()
+    return stack[-1] if stack else _NULL_SPAN
+
+
+def traced(name=None, category="app"):
+    """
+    Decorator that wraps every call of a function in a span.
+
+    Args:
+        name (str, optional): Span name, defaults to the function's qualified name
+        category (str): Span category
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_instant(name, category="app", **args):
+    """Record a zero-length marker span (e.g. startup checkpoints)."""
+    with trace_span(name, category, **args):
+        pass
+
+
+def get_recent_spans(limit=None):
+    """
+    Get finished spans, oldest first.
+
+    Args:
+        limit (int, optional): Only return the most recent `limit` spans
+
+    Returns:
+        list: Span objects
+    """
+    with _lock:
+        spans = list(_spans)
+    if limit is not None:
+        spans = spans[-limit:]
+    return spans
+
+
+def clear_spans():
+    """Discard all recorded spans."""
+    with _lock:
+        _spans.clear()
+
+
+def summarize_spans(spans=None):
+    """
+    Aggregate spans by name.
+
+    Returns:
+        list: Dicts with name, category, count, total_ms, max_ms and bytes,
+              sorted by total time descending
+    """
+    if spans is None:
+        spans = get_recent_spans()
+    summary = {}
+    for span in spans:
+        entry = summary.setdefault(span.name, {
+            'name': span.name,
+            'category': span.category,
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'bytes': 0
+        })
+        entry['count'] += 1
+        entry['total_ms'] += span.duration_ms
+        entry['max_ms'] = max(entry['max_ms'], span.duration_ms)
+        entry['bytes'] += span.bytes
+    return sorted(summary.values(), key=lambda e: e['total_ms'], reverse=True)
+
+
+def export_chrome_trace(file_path, spans=None):
+    """
+    Write spans as Chrome trace-event JSON.
+
+    Args:
+        file_path (str): Destination .json path
+        spans (list, optional): Spans to export, defaults to all recorded spans
+
+    Returns:
+        int: Number of span events written
+    """
+    if spans is None:
+        spans = get_recent_spans()
+
+    pid = os.getpid()
+    events = []
+    thread_names = {}
+
+    for span in spans:
+        thread_names[span.thread_id] = span.thread_name
+        args = {key: _json_safe(value) for key, value in span.args.items()}
+        if span.bytes:
+            args['bytes'] = span.bytes
+        if span.error:
+            args['error'] = span.error
+        events.append({
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': (span.start_ns - _origin_ns) / 1000,
+            'dur': (span.end_ns - span.start_ns) / 1000,
+            'pid': pid,
+            'tid': span.thread_id,
+            'args': args
+        })
+
+    for thread_id, thread_name in thread_names.items():
+        events.append({
+            'name': 'thread_name',
+            'ph': 'M',
+            'pid': pid,
+            'tid': thread_id,
+            'args': {'name': thread_name}
+        })
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    return len(spans)
+
+
+def _json_safe(value):
+    """Convert span argument values to something json.dump accepts."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
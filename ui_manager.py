@@ -150,6 +150,29 @@ class UIManager:
                 self.gui.table_frame.config(width=max_plot_width)
                 self.gui.table_frame.grid_propagate(False)
     
+    def create_file_dropdown(self) -> None:
+        """Create the file selection dropdown in the top_frame if it does not exist yet.
+
+        Kept here rather than in the file_manager package so the main window can be
+        built without importing FileManager (and with it pandas/openpyxl) at startup.
+        """
+        if hasattr(self.gui, 'file_dropdown') and self.gui.file_dropdown:
+            return
+        dropdown_frame = ttk.Frame(self.gui.top_frame, width=1400, height=40)
+        dropdown_frame.pack(side="left", pady=2, padx=5)
+        file_label = ttk.Label(dropdown_frame, text="Select File:", font=FONT, background=APP_BACKGROUND_COLOR)
+        file_label.pack(side="left", padx=(0, 0))
+        self.gui.file_dropdown_var = tk.StringVar()
+        self.gui.file_dropdown = ttk.Combobox(
+            dropdown_frame,
+            textvariable=self.gui.file_dropdown_var,
+            state="readonly",
+            font=FONT,
+            width=20
+        )
+        self.gui.file_dropdown.pack(side="left", fill="x", expand=True, padx=(5, 5))
+        self.gui.file_dropdown.bind("<<ComboboxSelected>>", self.gui.on_file_selection)
+
     def center_window(self, window: tk.Toplevel, width: Optional[int] = None, height: Optional[int] = None) -> None:
         """Center a given Tkinter window on the screen."""
         window.update_idletasks()
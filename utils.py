@@ -3,18 +3,69 @@ Utility module for the DataViewer Application. Developed by Charlie Becquet.
 Provides a Tkinter-based interface for interacting with Excel data, generating reports,
 and plotting graphs.
 """
-import numpy as np
+# Annotations such as pd.DataFrame must not import pandas when this module loads
+from __future__ import annotations
+
+import hashlib
+import importlib
 import os
 import re
 import sys
 import tempfile
+import threading
 import traceback
-import pandas as pd
-import openpyxl
 from tkinter import filedialog, messagebox, Toplevel, Label, Button
-from typing import Optional
-from openpyxl import load_workbook
-from openpyxl.worksheet.worksheet import Worksheet
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openpyxl.worksheet.worksheet import Worksheet
+
+
+class LazyModule:
+    """
+    Module stand-in that imports the real module on first attribute access.
+
+    Lets modules keep the usual ``pd.`` / ``np.`` / ``openpyxl.`` call style
+    while deferring the scientific stack until it is actually used, so the
+    startup menu can be shown before pandas, numpy or openpyxl are imported.
+    """
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        """True once the real module has been imported."""
+        return self._module is not None or self._module_name in sys.modules
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyModule '{self._module_name}' ({state})>"
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+openpyxl = LazyModule('openpyxl')
+
+
+def load_workbook(*args, **kwargs):
+    """Deferred openpyxl.load_workbook."""
+    return openpyxl.load_workbook(*args, **kwargs)
 
 # Global debug flag - change this to control ALL debug output across the app
 DEBUG_ENABLED = False # Set to True when debugging is needed
@@ -276,13 +327,15 @@ def remove_empty_columns(data: pd.DataFrame) -> pd.DataFrame:
             break
     return data
 
-def clean_columns(data):
+def clean_columns(data, fill_na=True):
     """
     Clean column names and remove only truly empty columns.
     This function:
     - Retains columns with valid headers, even if they are empty.
     - Renames columns with NaN headers to their column index (1-based).
     - Ensures all column names are unique by appending a counter to duplicates.
+    - Replaces NaN cell values with empty strings unless fill_na is False
+      (the virtual table blanks NaN cells itself as they are displayed).
     """
     print(f"DEBUG: clean_columns starting with {len(data.columns)} columns")
     print(f"DEBUG: Original columns: {list(data.columns)}")
@@ -346,7 +399,8 @@ def clean_columns(data):
     data.columns = final_columns
 
     # Step 5: Replace NaN values with empty strings
-    data = data.fillna('')
+    if fill_na:
+        data = data.fillna('')
 
     print(f"DEBUG: Final columns: {list(data.columns)}")
     return data
@@ -724,6 +778,51 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 hex digest of a file.
+
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Bytes read per iteration
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_hash_memo = {}  # absolute path -> ((size, mtime_ns), sha256)
+_hash_memo_lock = threading.Lock()
+
+def file_content_hash(file_path):
+    """
+    Return the SHA-256 of a file, reusing the last result while its size and mtime are unchanged.
+
+    Shared by the content-keyed caches (header data, thumbnails, crop boxes,
+    image working copies) so each file is hashed once per change.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex digest
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        memo = _hash_memo.get(path)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+    digest = hash_file(path)
+    with _hash_memo_lock:
+        _hash_memo[path] = (signature, digest)
+    return digest
+
 def is_valid_excel_file(filename: str) -> bool:
     """
     Checks if the given filename is a valid Excel file that should be processed.
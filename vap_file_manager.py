@@ -14,16 +14,320 @@ This module implements a custom file format (.vap3) that stores:
 import os
 import json
 import zipfile
+import struct
+import numpy as np
 import pandas as pd
 import pickle
 import io
 import matplotlib.pyplot as plt
 import datetime
 import uuid
+import time
+import collections
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
 from PIL import Image
 import tempfile
 from utils import plotting_sheet_test
+from image_ingest import prepare_image
+from tracing import traced, current_span
+
+try:
+    import lzma  # noqa: F401  (needed by zipfile for ZIP_LZMA members)
+    _TABULAR_STRONG = (zipfile.ZIP_LZMA, None)
+except ImportError:
+    _TABULAR_STRONG = (zipfile.ZIP_DEFLATED, 9)
+
+# In-memory size up to which a VAP3 buffer stays off disk (see create_vap3_buffer)
+VAP3_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Member extensions that are already compressed; deflating them only costs CPU
+PRECOMPRESSED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+TABULAR_EXTENSIONS = ('.csv',)
+
+# Per-member compression, as (compress_type, compresslevel) for each member kind
+COMPRESSION_POLICIES = {
+    # Format before per-member policies: deflate everything at zlib's default level
+    'deflate': {
+        'image': (zipfile.ZIP_DEFLATED, None),
+        'tabular': (zipfile.ZIP_DEFLATED, None),
+        'other': (zipfile.ZIP_DEFLATED, None),
+    },
+    # Store images, deflate the rest at the default level
+    'balanced': {
+        'image': (zipfile.ZIP_STORED, None),
+        'tabular': (zipfile.ZIP_DEFLATED, 6),
+        'other': (zipfile.ZIP_DEFLATED, 6),
+    },
+    # Quickest saves: store images, lightest deflate for everything else
+    'fast': {
+        'image': (zipfile.ZIP_STORED, None),
+        'tabular': (zipfile.ZIP_DEFLATED, 1),
+        'other': (zipfile.ZIP_DEFLATED, 1),
+    },
+    # Smallest archives: LZMA for sheet data (deflate level 9 without lzma)
+    'compact': {
+        'image': (zipfile.ZIP_STORED, None),
+        'tabular': _TABULAR_STRONG,
+        'other': (zipfile.ZIP_DEFLATED, 9),
+    },
+}
+DEFAULT_COMPRESSION_POLICY = 'balanced'
+
+# Member payloads (sheet CSV text, image working copies) are encoded in a
+# thread pool; zipfile compresses each member as it is appended
+VAP3_COMPRESSION_WORKERS = min(4, os.cpu_count() or 1)
+
+# Suggested save_to_vap3 numeric_member_min_cells for local long-run archives:
+# sheets with at least this many numeric cells keep their numeric columns in
+# uncompressed .npy members that load_from_vap3 can memory-map. Off by default,
+# since readers without .npy support would see only the CSV columns.
+NUMERIC_MEMBER_MIN_CELLS = 500_000
+NPY_ALIGNMENT = 64
+_ALIGNMENT_EXTRA_ID = 0xD935  # extra-field id used by zipalign for padding
+_LOCAL_HEADER_SIZE = 30
+_ZIP64_LOCAL_EXTRA_SIZE = 20
+
+
+def create_vap3_buffer(max_memory_bytes=VAP3_SPOOL_MAX_BYTES):
+    """
+    Create a sink for save_to_vap3 that is streamed into the database afterwards.
+
+    The archive is kept in memory and only spills to a temporary file if it
+    grows past max_memory_bytes, so typical saves never touch the disk.
+
+    Returns:
+        tempfile.SpooledTemporaryFile: Seekable binary buffer (close it when done)
+    """
+    return tempfile.SpooledTemporaryFile(max_size=max_memory_bytes, mode='w+b')
+
+
+def member_compression(arcname, policy=DEFAULT_COMPRESSION_POLICY):
+    """
+    Return the (compress_type, compresslevel) a policy uses for an archive member.
+
+    Args:
+        arcname (str): Member name inside the archive
+        policy (str): Key of COMPRESSION_POLICIES
+
+    Returns:
+        tuple: (zipfile compress_type, compresslevel or None)
+    """
+    rules = COMPRESSION_POLICIES.get(policy) or COMPRESSION_POLICIES[DEFAULT_COMPRESSION_POLICY]
+    extension = os.path.splitext(arcname)[1].lower()
+    if extension in PRECOMPRESSED_EXTENSIONS:
+        return rules['image']
+    if extension in TABULAR_EXTENSIONS:
+        return rules['tabular']
+    return rules['other']
+
+
+def _csv_member(arcname, frame):
+    """Encode a sheet as a CSV member; runs in a worker thread."""
+    return arcname, frame.to_csv(index=False), None
+
+
+def _image_member(arcname_stem, img_path):
+    """Prepare an image's working copy (capped resolution, recompressed); runs in a worker thread."""
+    stored_path = prepare_image(img_path)
+    return f'{arcname_stem}{os.path.splitext(stored_path)[1]}', None, stored_path
+
+
+def split_numeric_columns(frame, min_cells=NUMERIC_MEMBER_MIN_CELLS):
+    """
+    Split a sheet into per-dtype numeric blocks and the remaining columns.
+
+    Args:
+        frame (pd.DataFrame): Sheet data
+        min_cells (int): Smallest number of numeric cells worth splitting out
+
+    Returns:
+        tuple or None: (remaining DataFrame, [(column names, Fortran-ordered array)],
+        all column names in order), or None if the sheet stays a plain CSV
+    """
+    columns = [str(column) for column in frame.columns]
+    if len(set(columns)) != len(columns):
+        return None
+
+    groups = {}
+    for position, dtype in enumerate(frame.dtypes):
+        # Extension dtypes (nullable ints, strings) stay in the CSV
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            groups.setdefault(dtype, []).append(position)
+    numeric_positions = [position for positions in groups.values() for position in positions]
+    if not groups or len(numeric_positions) * len(frame) < min_cells:
+        return None
+
+    blocks = []
+    for dtype, positions in groups.items():
+        block = np.asfortranarray(frame.iloc[:, positions].to_numpy(dtype=dtype))
+        blocks.append(([columns[position] for position in positions], block))
+    numeric_set = set(numeric_positions)
+    remaining = frame.iloc[:, [position for position in range(len(columns)) if position not in numeric_set]]
+    return remaining, blocks, columns
+
+
+def write_aligned_array(archive, arcname, array, alignment=NPY_ALIGNMENT):
+    """
+    Store an array as an uncompressed .npy member whose data is aligned in the archive.
+
+    The local header is padded through its extra field so the .npy data (whose
+    own header is a multiple of 64 bytes) starts on an alignment boundary,
+    which lets readers memory-map it in place.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for writing
+        arcname (str): Member name
+        array (np.ndarray): C- or Fortran-contiguous array without objects
+        alignment (int): Byte alignment of the array data
+
+    Returns:
+        int: Member size in bytes
+    """
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, np.lib.format.header_data_from_array_1_0(array))
+    size = header.tell() + array.nbytes
+
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.external_attr = 0o600 << 16
+    zinfo.file_size = size
+    zip64 = size * 1.05 > zipfile.ZIP64_LIMIT  # same test zipfile uses for the local header
+    data_start = (archive.start_dir + _LOCAL_HEADER_SIZE + len(arcname.encode('utf-8'))
+                  + (_ZIP64_LOCAL_EXTRA_SIZE if zip64 else 0) + header.tell())
+    padding = -data_start % alignment
+    if 0 < padding < 6:  # smallest extra-field record is 6 bytes
+        padding += alignment
+    if padding:
+        zinfo.extra = struct.pack('<HHH', _ALIGNMENT_EXTRA_ID, padding - 4, alignment) + bytes(padding - 6)
+
+    # Fortran-ordered data is written column by column, which is C order of the transpose
+    contiguous = array.T if array.flags.f_contiguous and not array.flags.c_contiguous else array
+    with archive.open(zinfo, 'w') as writer:
+        writer.write(header.getvalue())
+        writer.write(memoryview(contiguous).cast('B'))
+    return size
+
+
+def read_numeric_member(archive, arcname, path=None):
+    """
+    Return the array in a .npy member, memory-mapped when possible.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for reading
+        arcname (str): .npy member name
+        path (str, optional): Archive path on local disk; without it (or for a
+            compressed member) the array is read into memory
+
+    Returns:
+        np.ndarray: Copy-on-write np.memmap, or an in-memory array
+    """
+    info = archive.getinfo(arcname)
+    if path is not None and info.compress_type == zipfile.ZIP_STORED:
+        with open(path, 'rb') as f:
+            f.seek(info.header_offset)
+            local_header = f.read(_LOCAL_HEADER_SIZE)
+            if local_header[:4] == b'PK\x03\x04':
+                name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+                f.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                offset = f.tell()
+                if not dtype.hasobject and all(shape):
+                    # Copy-on-write: edits to the sheet never reach the archive
+                    return np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape,
+                                     order='F' if fortran_order else 'C')
+
+    with archive.open(arcname) as member:
+        return np.lib.format.read_array(member)
+
+
+def release_mapped_sheets(sheets, path):
+    """
+    Replace sheets whose data is memory-mapped from path with in-memory copies.
+
+    Args:
+        sheets (dict): {sheet_name: sheet_info} as returned by load_from_vap3
+        path (str): Archive file the sheets may be mapped from
+
+    Returns:
+        int: Number of sheets copied
+    """
+    path = os.path.abspath(path)
+    released = 0
+    for sheet_info in sheets.values():
+        frame = sheet_info.get('data')
+        if frame is None:
+            continue
+        for position in range(frame.shape[1]):
+            base = frame.iloc[:, position].to_numpy()
+            while isinstance(base, np.ndarray) and not isinstance(base, np.memmap):
+                base = base.base
+            if isinstance(base, np.memmap) and base.filename and os.path.abspath(base.filename) == path:
+                sheet_info['data'] = frame.copy(deep=True)
+                released += 1
+                break
+    return released
+
+
+def _write_member(archive, arcname, data, path, policy):
+    """Append one member with its policy's compression; returns its uncompressed size."""
+    compress_type, compresslevel = member_compression(arcname, policy)
+    if data is None:
+        archive.write(path, arcname, compress_type=compress_type, compresslevel=compresslevel)
+        return os.path.getsize(path)
+    archive.writestr(arcname, data, compress_type=compress_type, compresslevel=compresslevel)
+    return len(data)
+
+
+def write_archive_members(archive, members, policy=DEFAULT_COMPRESSION_POLICY, workers=None):
+    """
+    Write members to an open ZipFile using per-member compression.
+
+    Members given as callables are encoded first (sheet CSV text, image
+    working copies). With more than one worker they run in a thread pool, a
+    bounded number ahead of the writer, and are appended in their original
+    order; zipfile compresses each member as it is written.
+
+    Args:
+        archive (zipfile.ZipFile): Archive opened for writing
+        members (list): (arcname, data, path) tuples, or callables returning one;
+            data is str/bytes, or None to read the member from path
+        policy (str): Key of COMPRESSION_POLICIES
+        workers (int, optional): Thread count, defaults to VAP3_COMPRESSION_WORKERS
+
+    Returns:
+        int: Approximate uncompressed size of the members (text counted in characters)
+    """
+    workers = VAP3_COMPRESSION_WORKERS if workers is None else workers
+    total = 0
+    if workers <= 1 or sum(1 for member in members if callable(member)) < 2:
+        for member in members:
+            total += _write_member(archive, *(member() if callable(member) else member), policy)
+        return total
+
+    # Keep a bounded number of encoded members in flight so large image sets
+    # are not all held in memory at once
+    window = workers * 2
+    pending = collections.deque()
+
+    def write_next():
+        member = pending.popleft()
+        return _write_member(archive, *(member.result() if isinstance(member, Future) else member), policy)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="VAP3Encode") as executor:
+        for member in members:
+            pending.append(executor.submit(member) if callable(member) else member)
+            if len(pending) >= window:
+                total += write_next()
+        while pending:
+            total += write_next()
+    return total
+
 
 class VapFileManager:
     """Manager for the .vap3 file format, enabling storage and retrieval of test data."""
@@ -33,20 +337,25 @@ class VapFileManager:
         self.version = "1.0"
         self.temp_files = []  # Track temporary files for cleanup
 
-    def save_to_vap3(self, filepath: str, filtered_sheets: Dict,
+    @traced("VapFileManager.save_to_vap3", category="file")
+    def save_to_vap3(self, filepath, filtered_sheets: Dict,
                     sheet_images: Dict, plot_options: List[str],
                     image_crop_states: Dict = None,
                     plot_settings: Dict = None,
                     sample_images: Dict = None,
                     sample_image_crop_states: Dict = None,
-                    sample_header_data: Dict = None) -> bool:
+                    sample_header_data: Dict = None,
+                    compression_policy: str = None,
+                    compression_workers: int = None,
+                    numeric_member_min_cells: int = None) -> bool:
         """
         Save test data to a .vap3 file.
 
         Parameters:
         -----------
-        filepath : str
-            Path where the .vap3 file will be saved
+        filepath : str or file object
+            Path where the .vap3 file will be saved, or a seekable binary
+            file object to write the archive into (see create_vap3_buffer)
         filtered_sheets : dict
             Dictionary containing sheet data
         sheet_images : dict
@@ -63,17 +372,42 @@ class VapFileManager:
             Dictionary of crop states for sample images {image_path: crop_state}
         sample_header_data : dict, optional
             Header data containing sample information for labeling
+        compression_policy : str, optional
+            Key of COMPRESSION_POLICIES, defaults to DEFAULT_COMPRESSION_POLICY
+        compression_workers : int, optional
+            Threads used to encode members (CSV text, image working copies), defaults to VAP3_COMPRESSION_WORKERS
+        numeric_member_min_cells : int, optional
+            Sheets with at least this many numeric cells store their numeric
+            columns as aligned, uncompressed .npy members that can be
+            memory-mapped on load (e.g. NUMERIC_MEMBER_MIN_CELLS); 0 or None
+            (the default) keeps every sheet as CSV
 
         Returns:
         --------
         bool
             True if successful, False otherwise
         """
-        if not filepath.endswith('.vap3'):
+        policy = compression_policy or DEFAULT_COMPRESSION_POLICY
+        is_path = isinstance(filepath, str)
+        temp_path = None
+        if is_path and not filepath.endswith('.vap3'):
             filepath += '.vap3'
 
         try:
-            with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as archive:
+            target = filepath
+            if is_path:
+                # Write next to the destination and swap it in at the end: the
+                # sheets may still be memory-mapped from the file being replaced
+                fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix='.vap3_',
+                                                 dir=os.path.dirname(os.path.abspath(filepath)))
+                os.close(fd)
+                target = temp_path
+
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+                # Members are collected as (arcname, data, path) and written at the end
+                members = []
+                arrays = []  # (arcname, ndarray) for .npy members, written last
+
                 # Create a meta_data file
                 file_id = str(uuid.uuid4())
                 timestamp = datetime.datetime.now().isoformat()
@@ -88,14 +422,14 @@ class VapFileManager:
                 }
 
                 # Write meta_data to the archive
-                archive.writestr('meta_data.json', json.dumps(meta_data))
+                members.append(('meta_data.json', json.dumps(meta_data), None))
 
                 # Store plot options
-                archive.writestr('plot_options.json', json.dumps(plot_options))
+                members.append(('plot_options.json', json.dumps(plot_options), None))
 
                 # Store plot settings if provided
                 if plot_settings:
-                    archive.writestr('plot_settings.json', json.dumps(plot_settings))
+                    members.append(('plot_settings.json', json.dumps(plot_settings), None))
 
                 # Store each sheet's data
                 for sheet_name, sheet_info in filtered_sheets.items():
@@ -106,23 +440,38 @@ class VapFileManager:
                     # Create directory structure for the sheet
                     sheet_dir = f'sheets/{sheet_name}'
 
-                    # Convert DataFrame to CSV for better interoperability
-                    buffer = io.StringIO()
-                    sheet_info['data'].to_csv(buffer, index=False)
-                    archive.writestr(f'{sheet_dir}/data.csv', buffer.getvalue())
-
                     # Store sheet meta_data
                     sheet_meta_data = {
                         'is_plotting': is_plotting,
                         'is_empty': is_empty
                     }
-                    archive.writestr(f'{sheet_dir}/meta_data.json',
-                                    json.dumps(sheet_meta_data))
+
+                    # Large numeric blocks go to .npy members, the other columns to CSV
+                    layout = None
+                    if numeric_member_min_cells:
+                        layout = split_numeric_columns(sheet_info['data'], numeric_member_min_cells)
+                    if layout:
+                        csv_frame, blocks, columns = layout
+                        sheet_meta_data['columns'] = columns
+                        sheet_meta_data['numeric_blocks'] = []
+                        for block_index, (block_columns, block) in enumerate(blocks):
+                            member_name = f'numeric_{block_index}.npy'
+                            arrays.append((f'{sheet_dir}/{member_name}', block))
+                            sheet_meta_data['numeric_blocks'].append({'member': member_name, 'columns': block_columns})
+                        print(f"DEBUG: Storing {sum(len(c) for c, _ in blocks)} numeric columns of sheet {sheet_name} as .npy")
+                    else:
+                        csv_frame = sheet_info['data']
+
+                    # Convert DataFrame to CSV for better interoperability
+                    if not layout or len(csv_frame.columns):
+                        members.append(functools.partial(_csv_member, f'{sheet_dir}/data.csv', csv_frame))
+                    members.append((f'{sheet_dir}/meta_data.json',
+                                    json.dumps(sheet_meta_data), None))
 
                     # Store header data if available (for .vap3 files only)
                     if 'header_data' in sheet_info:
-                        archive.writestr(f'{sheet_dir}/header_data.json',
-                                        json.dumps(sheet_info['header_data']))
+                        members.append((f'{sheet_dir}/header_data.json',
+                                        json.dumps(sheet_info['header_data']), None))
                         print(f"DEBUG: Stored header data for sheet {sheet_name}")
 
                 # Store images
@@ -130,9 +479,8 @@ class VapFileManager:
                     for sheet_name, images in file_sheets.items():
                         for i, img_path in enumerate(images):
                             if os.path.exists(img_path):
-                                # Store the image in the archive
-                                img_ext = os.path.splitext(img_path)[1]
-                                archive.write(img_path, f'images/{sheet_name}/image_{i}{img_ext}')
+                                # Store the image's working copy (capped resolution, recompressed)
+                                members.append(functools.partial(_image_member, f'images/{sheet_name}/image_{i}', img_path))
 
                 # NEW: Store sample-specific images
                 if sample_images:
@@ -145,7 +493,7 @@ class VapFileManager:
                         'sample_count': len(sample_images),
                         'header_data': sample_header_data
                     }
-                    archive.writestr('sample_images/metadata.json', json.dumps(sample_images_metadata))
+                    members.append(('sample_images/metadata.json', json.dumps(sample_images_metadata), None))
 
                     # Store each sample's images
                     for sample_id, image_paths in sample_images.items():
@@ -153,34 +501,63 @@ class VapFileManager:
 
                         for i, img_path in enumerate(image_paths):
                             if os.path.exists(img_path):
-                                img_ext = os.path.splitext(img_path)[1]
                                 # Store with sample-specific path
-                                sample_img_path = f'sample_images/{sample_id}/image_{i}{img_ext}'
-                                archive.write(img_path, sample_img_path)
+                                sample_img_path = f'sample_images/{sample_id}/image_{i}'
+                                members.append(functools.partial(_image_member, sample_img_path, img_path))
                                 print(f"DEBUG: Stored sample image: {sample_img_path}")
 
                     # Store sample image crop states
                     if sample_image_crop_states:
-                        archive.writestr('sample_images/crop_states.json',
-                                       json.dumps(sample_image_crop_states))
+                        members.append(('sample_images/crop_states.json',
+                                       json.dumps(sample_image_crop_states), None))
 
                 # Store image crop states
                 if image_crop_states:
-                    archive.writestr('image_crop_states.json', json.dumps(image_crop_states))
+                    members.append(('image_crop_states.json', json.dumps(image_crop_states), None))
 
+                raw_bytes = write_archive_members(archive, members, policy, compression_workers)
+                member_count = len(members) + len(arrays)
+                for arcname, array in arrays:
+                    raw_bytes += write_aligned_array(archive, arcname, array)
+            # Drop references into the sheets' (possibly mapped) columns before replacing the file
+            arrays = array = layout = blocks = block = csv_frame = sheet_info = members = None
+
+            if is_path:
+                try:
+                    os.replace(temp_path, filepath)
+                except PermissionError:
+                    # Windows cannot replace a file that is still mapped
+                    release_mapped_sheets(filtered_sheets, filepath)
+                    os.replace(temp_path, filepath)
+                temp_path = None
+
+            span = current_span()
+            span.set("policy", policy)
+            span.set("members", member_count)
+            span.set("raw_bytes", raw_bytes)
+            span.add_bytes(os.path.getsize(filepath) if is_path else filepath.tell())
+            if not is_path:
+                filepath.seek(0)
             return True
 
         except Exception as e:
             print(f"Error saving VAP3 file: {e}")
             # Clean up potentially corrupted file
-            if os.path.exists(filepath):
+            if not is_path:
                 try:
-                    os.remove(filepath)
+                    filepath.seek(0)
+                    filepath.truncate()
+                except Exception:
+                    pass
+            elif temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
                 except:
                     pass
             return False
 
-    def load_from_vap3(self, filepath: str) -> Dict[str, Any]:
+    @traced("VapFileManager.load_from_vap3", category="file")
+    def load_from_vap3(self, filepath: str, memory_map: bool = True) -> Dict[str, Any]:
         """
         Load test data from a .vap3 file.
 
@@ -188,6 +565,12 @@ class VapFileManager:
         -----------
         filepath : str
             Path to the .vap3 file
+        memory_map : bool, optional
+            Memory-map numeric .npy members instead of reading them. Pass False
+            for temporary copies (e.g. archives pulled from the database) that
+            are deleted after loading; mapped files cannot be removed on
+            Windows while the sheets are alive. Saving back to the same path
+            is safe (save_to_vap3 writes a new file and swaps it in).
 
         Returns:
         --------
@@ -214,6 +597,7 @@ class VapFileManager:
         }
 
         try:
+            current_span().add_bytes(os.path.getsize(filepath))
             with zipfile.ZipFile(filepath, 'r') as archive:
                 # Get the list of all files in the archive
                 all_files = archive.namelist()
@@ -235,6 +619,7 @@ class VapFileManager:
 
                 # Extract sheet data
                 sheet_names = meta_data.get('sheet_names', [])
+                map_path = filepath if memory_map and os.path.isfile(filepath) else None
                 for sheet_name in sheet_names:
                     # Load sheet meta_data
                     sheet_meta_path = f'sheets/{sheet_name}/meta_data.json'
@@ -243,10 +628,15 @@ class VapFileManager:
 
                         # Load sheet data
                         data_path = f'sheets/{sheet_name}/data.csv'
-                        if data_path in all_files:
+                        data = None
+                        if sheet_meta.get('numeric_blocks'):
+                            data = self._load_numeric_sheet(archive, f'sheets/{sheet_name}', sheet_meta,
+                                                            all_files, map_path)
+                        elif data_path in all_files:
                             csv_data = archive.read(data_path).decode('utf-8')
                             data = pd.read_csv(io.StringIO(csv_data))
 
+                        if data is not None:
                             # Load header data if available (for .vap3 files only)
                             sheet_dir = f'sheets/{sheet_name}'
                             header_data = None
@@ -303,7 +693,7 @@ class VapFileManager:
                     sample_image_files = [f for f in all_files if f.startswith('sample_images/')
                                           and f != 'sample_images/metadata.json'
                                           and f != 'sample_images/crop_states.json'
-                                          and f.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'))]
+                                          and f.endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.pdf'))]
 
                     if sample_image_files:
                         print(f"DEBUG: Found {len(sample_image_files)} sample image files to extract")
@@ -343,6 +733,25 @@ class VapFileManager:
             self.cleanup_temp_files()  # Clean up any temporary files created
             raise
 
+    def _load_numeric_sheet(self, archive, sheet_dir, sheet_meta, all_files, map_path):
+        """Rebuild a sheet from its .npy blocks and CSV columns without copying the blocks."""
+        frames = []
+        data_path = f'{sheet_dir}/data.csv'
+        if data_path in all_files:
+            frames.append(pd.read_csv(io.StringIO(archive.read(data_path).decode('utf-8'))))
+        for block in sheet_meta['numeric_blocks']:
+            array = read_numeric_member(archive, f"{sheet_dir}/{block['member']}", map_path)
+            # copy=False: the constructor would otherwise copy the mapped array (concat does not)
+            frames.append(pd.DataFrame(array, columns=block['columns'], copy=False))
+        data = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+        print(f"DEBUG: Loaded {len(sheet_meta['numeric_blocks'])} numeric blocks for {sheet_dir}"
+              f" ({'memory-mapped' if map_path else 'in memory'})")
+        # Reordering copies every column, mapped ones included; only do it when needed
+        columns = sheet_meta.get('columns')
+        if columns is None or list(data.columns) == columns:
+            return data
+        return data.reindex(columns=columns)
+
     def cleanup_temp_files(self):
         """Clean up any temporary files created during loading."""
         for file_path in self.temp_files:
@@ -0,0 +1,272 @@
+"""
+virtual_listbox.py
+Developed by Charlie Becquet.
+Virtualized listbox for long lists such as the database browser.
+
+A tk.Listbox holding tens of thousands of items is slow to fill and to
+clear. VirtualListbox keeps only the rows that fit on screen in the
+underlying Listbox and asks a callback for their text, so its cost does not
+depend on the number of rows. Selection is tracked by absolute row index and
+supports click, Ctrl+click, Shift+click, keyboard navigation and select-all,
+like an EXTENDED-mode Listbox.
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(tk.Frame):
+    """Frame containing a Listbox and Scrollbar that render only the visible rows."""
+
+    WHEEL_ROWS = 3
+
+    def __init__(self, parent, font=None, **listbox_options):
+        """
+        Create the widget.
+
+        Args:
+            parent: Tk container
+            font: Listbox font
+            **listbox_options: Extra options for the underlying tk.Listbox
+        """
+        super().__init__(parent)
+        self.row_count = 0
+        self.get_text = lambda index: ""
+        self.top = 0
+        self.selected = set()
+        self.anchor = None
+        self.active = None
+        self._visible_rows = 1
+
+        self.scrollbar = tk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox = tk.Listbox(self, font=font, selectmode=tk.EXTENDED, activestyle="none",
+                                  exportselection=False, **listbox_options)
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self._line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<Button-1>", self._on_click)
+        self.listbox.bind("<Control-Button-1>", self._on_ctrl_click)
+        self.listbox.bind("<Shift-Button-1>", self._on_shift_click)
+        self.listbox.bind("<B1-Motion>", self._on_drag)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-self.WHEEL_ROWS))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(self.WHEEL_ROWS))
+        self.listbox.bind("<Up>", lambda event: self._move_active(-1, event))
+        self.listbox.bind("<Down>", lambda event: self._move_active(1, event))
+        self.listbox.bind("<Shift-Up>", lambda event: self._move_active(-1, event, extend=True))
+        self.listbox.bind("<Shift-Down>", lambda event: self._move_active(1, event, extend=True))
+        self.listbox.bind("<Prior>", lambda event: self._move_active(-self._visible_rows, event))
+        self.listbox.bind("<Next>", lambda event: self._move_active(self._visible_rows, event))
+        self.listbox.bind("<Control-a>", lambda event: (self.select_all(), "break")[1])
+
+    # ------------------------------------------------------------------
+    # Data source
+    # ------------------------------------------------------------------
+
+    def set_source(self, row_count, get_text, keep_selection=False):
+        """
+        Point the list at a new set of rows.
+
+        Args:
+            row_count (int): Number of rows
+            get_text (callable): get_text(index) -> display string, called for visible rows only
+            keep_selection (bool): Keep selected indices that are still in range
+        """
+        self.row_count = row_count
+        self.get_text = get_text
+        if keep_selection:
+            self.selected = {index for index in self.selected if index < row_count}
+        else:
+            self.selected = set()
+            self.anchor = None
+            self.active = None
+            self.top = 0
+        self.top = max(0, min(self.top, row_count - self._visible_rows))
+        self.refresh()
+
+    def show_message(self, text):
+        """Show a single placeholder line (e.g. while loading) with no selectable rows."""
+        self.set_source(0, lambda index: "")
+        self.listbox.insert(tk.END, text)
+
+    def refresh(self):
+        """Re-render the visible rows (after the row texts changed)."""
+        listbox = self.listbox
+        listbox.delete(0, tk.END)
+        last = min(self.row_count, self.top + self._visible_rows + 1)
+        if last > self.top:
+            listbox.insert(tk.END, *(self.get_text(index) for index in range(self.top, last)))
+            for index in self.selected:
+                if self.top <= index < last:
+                    listbox.selection_set(index - self.top)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if self.row_count <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.top / self.row_count
+        last = min(1.0, (self.top + self._visible_rows) / self.row_count)
+        self.scrollbar.set(first, last)
+
+    # ------------------------------------------------------------------
+    # Scrolling
+    # ------------------------------------------------------------------
+
+    def _on_configure(self, event):
+        visible_rows = max(1, event.height // self._line_height)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self.top = max(0, min(self.top, self.row_count - visible_rows))
+            self.refresh()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self._visible_rows - 1)
+            self.scroll(amount)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+        return "break"
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.row_count - self._visible_rows))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def see(self, index):
+        """Scroll so that row index is visible."""
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self._visible_rows:
+            self.scroll_to(index - self._visible_rows + 1)
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def curselection(self):
+        """Return the selected row indices in ascending order."""
+        return tuple(sorted(self.selected))
+
+    def selection_set(self, first, last=None):
+        if last == tk.END:
+            last = self.row_count - 1
+        last = first if last is None else last
+        self.selected.update(range(max(0, first), min(last, self.row_count - 1) + 1))
+        self.refresh()
+        self._notify()
+
+    select_set = selection_set
+
+    def selection_clear(self, first=0, last=None):
+        if last == tk.END or last is None and first == 0:
+            self.selected.clear()
+        else:
+            last = first if last is None else last
+            self.selected.difference_update(range(first, last + 1))
+        self.refresh()
+        self._notify()
+
+    def select_all(self):
+        self.selection_set(0, tk.END)
+
+    def nearest(self, y):
+        """Return the absolute row index nearest to widget y coordinate."""
+        if self.row_count == 0:
+            return None
+        return min(self.row_count - 1, self.top + self.listbox.nearest(y))
+
+    def _row_at(self, event):
+        index = self.nearest(event.y)
+        if index is None:
+            return None
+        bbox = self.listbox.bbox(index - self.top)
+        if bbox and event.y > bbox[1] + bbox[3] + 1:
+            return None
+        return index
+
+    def _on_click(self, event):
+        self.listbox.focus_set()
+        index = self._row_at(event)
+        if index is None:
+            return "break"
+        self.selected = {index}
+        self.anchor = self.active = index
+        self.refresh()
+        self._notify()
+        return "break"
+
+    def _on_ctrl_click(self, event):
+        self.listbox.focus_set()
+        index = self._row_at(event)
+        if index is None:
+            return "break"
+        self.selected.symmetric_difference_update({index})
+        self.anchor = self.active = index
+        self.refresh()
+        self._notify()
+        return "break"
+
+    def _on_shift_click(self, event):
+        self.listbox.focus_set()
+        index = self._row_at(event)
+        if index is None:
+            return "break"
+        self._select_range_to(index)
+        return "break"
+
+    def _on_drag(self, event):
+        if self.anchor is None or self.row_count == 0:
+            return "break"
+        if event.y < 0:
+            self.scroll(-1)
+        elif event.y > self.listbox.winfo_height():
+            self.scroll(1)
+        index = self.nearest(max(0, min(event.y, self.listbox.winfo_height() - 1)))
+        if index is not None and index != self.active:
+            self._select_range_to(index)
+        return "break"
+
+    def _select_range_to(self, index):
+        anchor = self.anchor if self.anchor is not None else index
+        low, high = sorted((anchor, index))
+        self.selected = set(range(low, high + 1))
+        self.anchor = anchor
+        self.active = index
+        self.refresh()
+        self._notify()
+
+    def _move_active(self, step, event, extend=False):
+        if self.row_count == 0:
+            return "break"
+        current = self.active if self.active is not None else self.top
+        index = max(0, min(self.row_count - 1, current + step))
+        self.see(index)
+        if extend:
+            self._select_range_to(index)
+        else:
+            self.selected = {index}
+            self.anchor = self.active = index
+            self.refresh()
+            self._notify()
+        return "break"
+
+    def _notify(self):
+        self.event_generate("<<ListboxSelect>>")
+
+    def bind_rows(self, sequence, func):
+        """Bind an event (e.g. <Double-Button-1>) on the row area."""
+        return self.listbox.bind(sequence, func, add="+")
@@ -0,0 +1,307 @@
+"""
+virtual_table.py
+Developed by Charlie Becquet.
+Virtualized tksheet table for large non-plotting sheets.
+
+Raw-data and test-plan sheets can have thousands of rows. Instead of converting
+the whole DataFrame to strings up front, VirtualTable only formats the rows and
+columns that are scrolled into view. Column widths are estimated from a sample
+of rows, and a background pass formats the remaining cells and computes wrapped
+row heights without blocking the Tk thread.
+"""
+
+import queue
+import threading
+
+from utils import debug_print, wrap_text
+
+# Non-plotting sheets with more rows than this are displayed through VirtualTable
+VIRTUAL_TABLE_ROW_THRESHOLD = 500
+
+# Cell values that display_table has always shown as blank
+EMPTY_CELL_STRINGS = {'', 'nan', 'None', 'NaN', 'NaT', '<NA>'}
+
+
+def format_cell_text(value, max_chars_per_line):
+    """
+    Convert a raw cell value to the wrapped display string used by the tables.
+
+    Args:
+        value: Raw cell value from the DataFrame
+        max_chars_per_line (int): Maximum characters per wrapped line
+
+    Returns:
+        str: Display text, empty for NaN/None placeholders
+    """
+    if value is None:
+        return ''
+    text = str(value).strip()
+    if text in EMPTY_CELL_STRINGS:
+        return ''
+    return wrap_text(text, max_width=max_chars_per_line)
+
+
+class VirtualTable:
+    """tksheet wrapper that formats cells lazily as they become visible."""
+
+    # Cells are formatted in blocks so small scrolls reuse previous work
+    ROW_BLOCK = 50
+    COLUMN_BLOCK = 16
+    # How often the Tk thread checks for the background formatting result
+    RESULT_POLL_MS = 100
+
+    def __init__(self, parent, data, Sheet, font_size=10, char_width_pixels=8,
+                 font_height_pixels=12, min_column_width=120, max_column_width=380,
+                 min_row_height=25, row_padding=8, sample_rows=200):
+        """
+        Create the virtual table.
+
+        Args:
+            parent: Tk container the sheet widget is created in
+            data (pd.DataFrame): Data with cleaned, string column headers
+            Sheet: tksheet Sheet class (lazily imported by the caller)
+            font_size (int): Table font size in points
+            char_width_pixels (int): Approximate pixel width of one character
+            font_height_pixels (int): Pixel height of one text line
+            min_column_width (int): Minimum column width in pixels
+            max_column_width (int): Maximum column width in pixels
+            min_row_height (int): Minimum row height in pixels
+            row_padding (int): Extra vertical padding per row in pixels
+            sample_rows (int): Number of rows sampled to estimate column widths
+        """
+        self.headers = [str(col) for col in data.columns]
+        self.values = data.to_numpy(dtype=object)
+        self.num_rows, self.num_columns = self.values.shape
+
+        self.char_width_pixels = char_width_pixels
+        self.font_height_pixels = font_height_pixels
+        self.min_column_width = min_column_width
+        self.max_column_width = max_column_width
+        self.min_row_height = min_row_height
+        self.row_padding = row_padding
+        self.max_chars_per_line = max_column_width // char_width_pixels
+
+        self.formatted_blocks = set()
+        self.fully_formatted = False
+        self.cancelled = False
+        self._redraw_pending = False
+        self._format_results = queue.Queue()
+
+        self.column_widths = self.estimate_column_widths(sample_rows)
+
+        # Rows share the same empty string objects until their block is formatted
+        empty_row = [''] * self.num_columns
+        rows_data = [empty_row.copy() for _ in range(self.num_rows)]
+
+        self.sheet = Sheet(
+            parent,
+            data=rows_data,
+            headers=self.headers,
+            show_table=True,
+            show_row_index=True,
+            show_header=True,
+            show_top_left=True,
+            empty_horizontal=0,
+            empty_vertical=0,
+            selected_rows_to_end_of_window=False,
+            horizontal_grid_to_end_of_window=False,
+            vertical_grid_to_end_of_window=False,
+            show_horizontal_grid=True,
+            show_vertical_grid=True,
+            auto_resize_default_row_index=False,
+            auto_resize_default_header=False,
+            auto_resize_row_index=False,
+            auto_resize_columns=False,
+            height=400,
+            width=600
+        )
+        self.sheet.set_options(
+            theme="light blue",
+            font=("Arial", font_size, "normal"),
+            header_font=("Arial", font_size, "bold"),
+            index_font=("Arial", font_size, "normal"),
+            show_dropdown_borders=False,
+            redraw_header_grid=True,
+            redraw_row_index_grid=True,
+            default_row_height=min_row_height
+        )
+        self.sheet.set_column_widths(self.column_widths)
+        self.sheet.set_row_heights([min_row_height] * self.num_rows)
+
+        self.sheet.bind("<<SheetRedrawn>>", self.on_sheet_redrawn)
+        self.sheet.bind("<Destroy>", self.on_destroy, add="+")
+
+        debug_print(f"DEBUG: VirtualTable created for {self.num_rows} rows x {self.num_columns} columns")
+
+    def estimate_column_widths(self, sample_rows):
+        """
+        Estimate pixel column widths from the header and a sample of rows.
+
+        The first half of the sample is taken from the top of the sheet (where
+        headers and long labels usually live) and the rest is spread evenly
+        over the remaining rows.
+        """
+        if self.num_rows <= sample_rows:
+            row_indices = range(self.num_rows)
+        else:
+            head_count = sample_rows // 2
+            stride = max(1, (self.num_rows - head_count) // (sample_rows - head_count))
+            row_indices = list(range(head_count)) + list(range(head_count, self.num_rows, stride))
+
+        widths = []
+        for col_idx, header in enumerate(self.headers):
+            max_chars = len(header)
+            for row_idx in row_indices:
+                text = format_cell_text(self.values[row_idx, col_idx], self.max_chars_per_line)
+                if text:
+                    max_chars = max(max_chars, max(len(line) for line in text.split('\n')))
+            widths.append(self._chars_to_width(max_chars))
+        return widths
+
+    def _chars_to_width(self, max_chars):
+        """Convert a character count to a clamped pixel column width."""
+        calculated_width = max_chars * self.char_width_pixels + 5
+        return max(self.min_column_width, min(self.max_column_width, calculated_width))
+
+    def grid(self, **kwargs):
+        """Grid the underlying sheet widget and start the background formatting pass."""
+        self.sheet.grid(**kwargs)
+        self.format_visible_window()
+        self.start_background_formatting()
+
+    def on_sheet_redrawn(self, event=None):
+        """Fill any newly visible blocks after tksheet redraws (scrolling, resizing)."""
+        if self.fully_formatted or self.cancelled:
+            return
+        if self.format_visible_window() and not self._redraw_pending:
+            # Redraw outside of the current redraw callback to avoid recursion
+            self._redraw_pending = True
+            self.sheet.after_idle(self._redraw)
+
+    def _redraw(self):
+        """Redraw the sheet after newly formatted cells were written."""
+        self._redraw_pending = False
+        if not self.cancelled:
+            self.sheet.redraw()
+
+    def format_visible_window(self):
+        """
+        Format the blocks that intersect the visible window.
+
+        Returns:
+            bool: True if any cells were written to the sheet
+        """
+        try:
+            start_row, end_row = self.sheet.visible_rows
+            start_col, end_col = self.sheet.visible_columns
+        except Exception as e:
+            debug_print(f"DEBUG: Could not read visible window: {e}")
+            return False
+
+        # tksheet reports an empty window before the widget is mapped
+        if end_row <= start_row:
+            end_row = start_row + self.ROW_BLOCK
+        if end_col <= start_col:
+            end_col = start_col + self.COLUMN_BLOCK
+
+        wrote_cells = False
+        for row_block in range(start_row // self.ROW_BLOCK, (min(end_row, self.num_rows) - 1) // self.ROW_BLOCK + 1):
+            for col_block in range(start_col // self.COLUMN_BLOCK, (min(end_col, self.num_columns) - 1) // self.COLUMN_BLOCK + 1):
+                if (row_block, col_block) not in self.formatted_blocks:
+                    self._format_block(row_block, col_block)
+                    wrote_cells = True
+        return wrote_cells
+
+    def _format_block(self, row_block, col_block):
+        """Format one block of cells and write it into the sheet data."""
+        row_start = row_block * self.ROW_BLOCK
+        row_end = min(row_start + self.ROW_BLOCK, self.num_rows)
+        col_start = col_block * self.COLUMN_BLOCK
+        col_end = min(col_start + self.COLUMN_BLOCK, self.num_columns)
+
+        for row_idx in range(row_start, row_end):
+            for col_idx in range(col_start, col_end):
+                text = format_cell_text(self.values[row_idx, col_idx], self.max_chars_per_line)
+                self.sheet.set_cell_data(row_idx, col_idx, text, redraw=False)
+
+        self.formatted_blocks.add((row_block, col_block))
+
+    def start_background_formatting(self):
+        """Format every cell and compute wrapped row heights on a worker thread.
+
+        Must be called on the Tk thread; the result is picked up by polling
+        from the Tk thread, since the worker may not call into Tk.
+        """
+        thread = threading.Thread(target=self._background_format, daemon=True)
+        thread.start()
+        self.sheet.after(self.RESULT_POLL_MS, self._poll_format_result)
+
+    def _poll_format_result(self):
+        """Tk thread: apply the background result once it is ready."""
+        if self.cancelled:
+            return
+        try:
+            result = self._format_results.get_nowait()
+        except queue.Empty:
+            self.sheet.after(self.RESULT_POLL_MS, self._poll_format_result)
+            return
+        if result is not None:
+            self._apply_full_format(*result)
+
+    def _background_format(self):
+        """Worker: build the full display data without touching any Tk widgets."""
+        try:
+            rows_data = []
+            row_heights = []
+            max_chars = [len(header) for header in self.headers]
+
+            for row_idx in range(self.num_rows):
+                if self.cancelled:
+                    return
+                row_texts = []
+                max_lines_in_row = 1
+                for col_idx in range(self.num_columns):
+                    text = format_cell_text(self.values[row_idx, col_idx], self.max_chars_per_line)
+                    row_texts.append(text)
+                    if text:
+                        lines = text.split('\n')
+                        max_lines_in_row = max(max_lines_in_row, len(lines))
+                        max_chars[col_idx] = max(max_chars[col_idx], max(len(line) for line in lines))
+                rows_data.append(row_texts)
+                row_heights.append(max(self.min_row_height,
+                                       max_lines_in_row * self.font_height_pixels + self.row_padding))
+
+            column_widths = [self._chars_to_width(chars) for chars in max_chars]
+
+            self._format_results.put((rows_data, row_heights, column_widths))
+        except Exception as e:
+            debug_print(f"DEBUG: Background table formatting failed: {e}")
+            self._format_results.put(None)
+
+    def _apply_full_format(self, rows_data, row_heights, column_widths):
+        """Swap in the fully formatted data on the Tk thread."""
+        if self.cancelled:
+            return
+        try:
+            # Keep any widths the user has changed by hand since the table was shown
+            current_widths = [self.sheet.column_width(column=col_idx) for col_idx in range(self.num_columns)]
+            final_widths = [
+                new if current == estimated else current
+                for current, estimated, new in zip(current_widths, self.column_widths, column_widths)
+            ]
+
+            self.sheet.set_sheet_data(rows_data, reset_col_positions=False,
+                                      reset_row_positions=False, redraw=False)
+            self.sheet.set_column_widths(final_widths)
+            self.sheet.set_row_heights(row_heights)
+            self.column_widths = final_widths
+            self.fully_formatted = True
+            self.sheet.refresh()
+            debug_print(f"DEBUG: VirtualTable background formatting applied for {self.num_rows} rows")
+        except Exception as e:
+            debug_print(f"DEBUG: Could not apply background table formatting: {e}")
+
+    def on_destroy(self, event=None):
+        """Stop background work once the sheet widget is destroyed."""
+        if event is None or event.widget is self.sheet:
+            self.cancelled = True